@@ -13,26 +13,62 @@ for image processing, AI model integration via Replicate, and text-to-speech con
 import gradio as gr
 import time
 import os
+import threading
 from tempfile import NamedTemporaryFile
 import requests
 from dotenv import load_dotenv
 import logging
 
 # Import from our modular components
-from config.settings import INIT_HISTORY
+from config.settings import (
+    REGENERATE_REPLAY,
+    QUEUE_CONCURRENCY_LIMITS,
+    QUEUE_DEFAULT_CONCURRENCY_LIMIT,
+    QUEUE_MAX_SIZE,
+    QUEUE_STATUS_UPDATE_RATE,
+    QUEUE_MAX_THREADS
+)
 from config.logging_config import configure_logging
 from services.image_service import ImageService
 from services.replicate_service import ReplicateService
 from services.tts_service import TTSService
+from services.semantic_cache import semantic_cache
+from services.audio_store import audio_store
+from services.audio_cache import audio_cache
+from services.speech_pipeline import SpeechPipeline
+from services.static_audio import StaticAudio
+from services.tts_prefetch import tts_prefetcher
+from services.conversation_export import ConversationExport
+from services.session_store import session_store, TurnRequest
 from utils.validators import get_last_bot_message, validate_image_input
 from utils.image_utils import ImageUtils
-from ui import ChatInterface, GuideInterface, UIStateManager
+from utils.prompt_builder import prompt_builders
+from ui import ChatInterface, GuideInterface, UIStateManager, format_audio_link
 
 # Load environment variables and configure logging
 load_dotenv()
 configure_logging()
 logger = logging.getLogger(__name__)
 
+def event_queue(kind):
+    """
+    Queue settings for an event of the given kind.
+    
+    Events of one kind share a concurrency group, so e.g. all chat answers
+    together run at most QUEUE_CONCURRENCY_LIMITS["chat"] at a time, while
+    button-state updates ("ui") are never held up by them.
+    
+    Args:
+        kind (str): "ui", "chat", "image", "speech" or "export"
+    
+    Returns:
+        dict: concurrency_limit and concurrency_id arguments for a Gradio event
+    
+    Example:
+        btn.click(handler, inputs, outputs, **event_queue("chat"))
+    """
+    return {"concurrency_limit": QUEUE_CONCURRENCY_LIMITS[kind], "concurrency_id": f"{kind}_events"}
+
 def create_app():
     """
     Create and configure the HearSee application.
@@ -84,6 +120,7 @@ def create_app():
         # Shared state variables to track application status across components
         image_uploaded_state = gr.State(value=False)  # Tracks whether an image is currently uploaded
         processing_status = gr.State(value=False)     # Tracks whether processing is currently happening
+        speech_request = gr.State(value=None)         # Set by an auto-spoken chat answer to start its speech event
         
         with gr.Tabs():
             with gr.Tab("Chat"):
@@ -96,17 +133,26 @@ def create_app():
                 send_btn = components["send_btn"]
                 upload_btn = components["upload_btn"]
                 regenerate_btn = components["regenerate_btn"]
+                alternatives = components["alternatives"]
+                candidate_selector = components["candidate_selector"]
                 clear_btn = components["clear_btn"]
                 extract_btn = components["extract_btn"]
                 caption_btn = components["caption_btn"]
                 summarize_btn = components["summarize_btn"]
                 gallery = components["gallery"]
                 voice_type = components["voice_type"]
+                preview_btn = components["preview_btn"]
                 speed = components["speed"]
+                auto_speak = components["auto_speak"]
                 tts_btn = components["tts_btn"]
+                export_btn = components["export_btn"]
+                export_file = components["export_file"]
+                export_status = components["export_status"]
                 tts_status = components["tts_status"]
                 performance_metrics = components["performance_metrics"]
                 audio_output = components["audio_output"]
+                audio_download = components["audio_download"]
+                audio_link = components["audio_link"]
                 image_instruction = components["image_instruction"]
                 
                 # Hidden image component for processing - stores the actual image data
@@ -121,32 +167,35 @@ def create_app():
                 )
                 
                 # Define helper functions
-                def process_chat_message(message, history, metrics, image=None):
-                    """Process a chat message and return updated history and metrics.
+                def process_chat_message(message, history, metrics, image=None, use_cache=True, session_id=None):
+                    """Process a chat message, streaming the updated history and metrics.
                     
                     This function handles the core functionality of processing user messages
-                    with the uploaded image. It validates inputs, calls the vision model,
-                    and formats the response.
+                    with the uploaded image. It validates inputs, streams the vision model
+                    response and formats the result. Responses cut off by the token limit
+                    are continued automatically and streamed as one message.
                     
                     Args:
                         message (str): The user's text message
                         history (list): The conversation history as a list of [user, bot] message pairs
                         metrics (str): Current performance metrics string
                         image (numpy.ndarray, optional): The uploaded image data. Defaults to None.
+                        use_cache (bool, optional): Whether a similar earlier question about the same
+                            image may be answered from the semantic cache. Defaults to True.
+                        session_id (str, optional): Browser session whose cached prompt builder
+                            formats the conversation history
                     
-                    Returns:
+                    Yields:
                         tuple: (updated_history, updated_metrics)
-                            - updated_history (list): Conversation history with new message pair
+                            - updated_history (list): Conversation history with the new (partial) message pair
                             - updated_metrics (str): Updated performance metrics string
                     
-                    Raises:
-                        Exception: If any error occurs during processing
-                    
                     Example:
-                        history, metrics = process_chat_message("Describe this image",
-                                                               previous_history,
-                                                               "Latency: N/A | Words: N/A",
-                                                               image_data)
+                        for history, metrics in process_chat_message("Describe this image",
+                                                                      previous_history,
+                                                                      "Latency: N/A | Words: N/A",
+                                                                      image_data):
+                            print(history[-1][1])
                     """
                     start_time = time.time()
                     logger.info(f"Processing chat message: {message[:50]}{'...' if len(message) > 50 else ''}")
@@ -155,119 +204,407 @@ def create_app():
                     size_valid, size_msg = ImageService.verify_image_size(image)
                     if not size_valid:
                         logger.warning(f"Image size validation failed: {size_msg}")
-                        return history + [[message, size_msg]], "Error: Image too large"
+                        yield history + [[message, size_msg]], "Error: Image too large"
+                        return
                     
                     # Check API availability
                     api_available, error_msg = ReplicateService.verify_api_available()
                     if not api_available:
                         logger.error(f"API unavailable: {error_msg}")
-                        return history + [[message, error_msg]], "Error: API unavailable"
+                        yield history + [[message, error_msg]], "Error: API unavailable"
+                        return
                     
                     # Validate image requirement
                     valid_img, img_error = validate_image_input(image)
                     if not valid_img:
                         logger.warning(f"Image validation failed: {img_error}")
-                        return history + [[message, img_error]], "Error: Image required"
+                        yield history + [[message, img_error]], "Error: Image required"
+                        return
+                    
+                    # Answer repeated questions about the same image from the semantic cache
+                    image_digest = ImageService.image_digest(image)
+                    cached_answer, similarity = (semantic_cache.lookup(image_digest, message, history)
+                                                 if use_cache else (None, 0.0))
+                    if cached_answer is not None:
+                        latency = time.time() - start_time
+                        word_count = len(cached_answer.split())
+                        logger.info(f"Chat message answered from cache in {latency:.2f}s (similarity {similarity:.2f})")
+                        yield history + [[message, cached_answer]], f"Latency: {latency:.2f}s | Words: {word_count} | Cached"
+                        return
                     
                     # Process the message
                     try:
                         # Convert image to base64 for API transmission
                         img_str = ImageService.image_to_base64(image)
                         
-                        # Build system prompt that defines the AI assistant's role and capabilities
-                        system_prompt = "You are a helpful AI assistant specializing in analyzing images and providing detailed information."
+                        # System prompt, conversation history and the new message; the session's
+                        # builder only formats the turns added since its last request
+                        prompt = prompt_builders.build(session_id, history, message)
                         
-                        # Convert conversation history to a formatted context string
-                        # This preserves the conversation flow for the model
-                        context = ""
-                        for h in history:
-                            if h[0] is not None:  # Skip entries with no user message
-                                context += f"User: {h[0]}\nAssistant: {h[1]}\n\n"
-                        
-                        logger.debug("Running vision model")
-                        # Run the vision model with the complete prompt context and image
-                        result = ReplicateService.run_vision_model(
-                            f"{system_prompt}\n\nConversation History:\n{context}\nUser: {message}\nAssistant:",
-                            image_base64=img_str
-                        )
+                        # Recorded so regenerate can replay the request without preprocessing
+                        turn_request = TurnRequest(message, prompt, image_digest, img_str)
+                        session_store.record_request(session_id, len(history), turn_request)
+                    except Exception as e:
+                        logger.error(f"Error processing chat message: {str(e)}", exc_info=True)
+                        error_msg = f"Sorry, I encountered an error: {str(e)}"
+                        yield history + [[message, error_msg]], "Error: System unavailable. Please try again."
+                        return
+                    
+                    yield from stream_answer(message, history, turn_request, start_time)
+                
+                def stream_answer(message, history, turn_request, start_time, sampling=None, note=""):
+                    """Stream the vision model's answer to a prepared request.
+                    
+                    Args:
+                        message (str): The user's text message
+                        history (list): The conversation history before the message
+                        turn_request (TurnRequest): Prompt, encoded image and limits to send
+                        start_time (float): When handling the message started, for the latency metric
+                        sampling (dict, optional): Extra model inputs such as a seed. Defaults to None.
+                        note (str, optional): Appended to the final metrics, e.g. " | Replayed"
+                    
+                    Yields:
+                        tuple: (updated_history, updated_metrics)
+                    
+                    Example:
+                        for history, metrics in stream_answer(message, history, turn_request, time.time()):
+                            print(history[-1][1])
+                    """
+                    try:
+                        logger.debug("Streaming vision model")
+                        # Stream the vision model with the complete prompt context and image,
+                        # showing the partial answer as it grows
+                        result = ""
+                        for result in ReplicateService.stream_vision_model(turn_request.prompt, turn_request.image_base64,
+                                                                           turn_request.max_tokens,
+                                                                           turn_request.max_continuations,
+                                                                           sampling=sampling):
+                            yield history + [[message, result]], f"Streaming... | Words: {len(result.split())}"
                         
                         # Calculate performance metrics for user feedback
                         end_time = time.time()
                         latency = end_time - start_time  # Total processing time in seconds
                         word_count = len(result.split())  # Approximate word count of response
-                        updated_metrics = f"Latency: {latency:.2f}s | Words: {word_count}"
+                        updated_metrics = f"Latency: {latency:.2f}s | Words: {word_count}{note}"
                         
                         logger.info(f"Chat message processed successfully in {latency:.2f}s")
+                        semantic_cache.store(turn_request.image_digest, message, result, history)
                         # Return updated history and metrics
-                        return history + [[message, result]], updated_metrics
+                        yield history + [[message, result]], updated_metrics
                     except Exception as e:
                         logger.error(f"Error processing chat message: {str(e)}", exc_info=True)
                         error_msg = f"Sorry, I encountered an error: {str(e)}"
-                        return history + [[message, error_msg]], "Error: System unavailable. Please try again."
+                        yield history + [[message, error_msg]], "Error: System unavailable. Please try again."
                 
-                def regenerate_last_response(history, metrics, image=None):
+                def regenerate_last_response(metrics, image=None, alternatives=False, request: gr.Request = None):
                     """Regenerate the last bot message.
                     
-                    This function extracts the last user message from history,
-                    removes the last response pair, and generates a new response.
+                    This function extracts the last user message from the session's
+                    history, removes the last response pair, and streams a new response.
+                    The new pair replaces the old one in the session store.
+                    
+                    When the last answer came from the model, its recorded request is
+                    replayed as is: no size check, image encoding or prompt building,
+                    and no semantic cache lookup. The replay uses the image the answer
+                    was about, with the sampling inputs of REGENERATE_TEMPERATURE and
+                    REGENERATE_RANDOM_SEED. Other turns go through process_chat_message.
+                    With alternatives enabled, a replayed request runs as several
+                    concurrent candidates (see regenerate_candidates).
                     
                     Args:
-                        history (list): The conversation history as a list of [user, bot] message pairs
                         metrics (str): Current performance metrics string
                         image (numpy.ndarray, optional): The uploaded image data. Defaults to None.
+                        alternatives (bool, optional): Generate several alternatives at once. Defaults to False.
+                        request (gr.Request, optional): Injected by Gradio; selects the session's history
+                            and prompt builder
                     
-                    Returns:
-                        tuple: (updated_history, updated_metrics)
+                    Yields:
+                        tuple: (updated_history, updated_metrics, candidate_selector_update)
                             - updated_history (list): Conversation history with regenerated response
                             - updated_metrics (str): Updated performance metrics string
+                            - candidate_selector_update: Alternatives offered so far
                     
                     Example:
-                        new_history, new_metrics = regenerate_last_response(history, metrics, image)
+                        for new_history, new_metrics, _ in regenerate_last_response(metrics, image, False, request):
+                            print(new_metrics)
                     """
+                    session_id = request.session_hash if request else None
+                    history = session_store.history(session_id)
                     if not history:
-                        return history, metrics
+                        yield history.pairs(), metrics, gr.update()
+                        return
                     
                     # Extract the last user message from history
                     last_user_msg = history[-1][0]
                     if last_user_msg is None:  # Skip if there's no valid user message
-                        return history, metrics
+                        yield history.pairs(), metrics, gr.update()
+                        return
                     
                     # Remove the last conversation pair to regenerate response
                     new_history = history[:-1]
+                    turn_request = session_store.last_request(session_id) if REGENERATE_REPLAY else None
+                    
+                    if alternatives and turn_request is not None:
+                        yield from regenerate_candidates(last_user_msg, new_history, turn_request, session_id)
+                        return
                     
                     try:
-                        response, updated_metrics = process_chat_message(last_user_msg, new_history, metrics, image)
-                        return response, updated_metrics
+                        if turn_request is not None:
+                            logger.info("Regenerating response by replaying the recorded request")
+                            updates = stream_answer(last_user_msg, new_history, turn_request, time.time(),
+                                                    sampling=turn_request.sampling(), note=" | Replayed")
+                        else:
+                            # Bypass the semantic cache so the user actually gets a new answer
+                            updates = process_chat_message(last_user_msg, new_history, metrics, image,
+                                                           use_cache=False, session_id=session_id)
+                        for updated_history, updated_metrics in session_store.track(session_id, len(new_history),
+                                                                                    updates):
+                            yield updated_history, updated_metrics, gr.update()
                     except Exception as e:
-                        return new_history + [[last_user_msg, f"Error regenerating response: {str(e)}"]], "Error: System unavailable. Please try again."
+                        error_history = new_history + [[last_user_msg, f"Error regenerating response: {str(e)}"]]
+                        session_store.replace_from(session_id, len(new_history), error_history[-1:])
+                        yield error_history, "Error: System unavailable. Please try again.", gr.update()
+                
+                def regenerate_candidates(message, history, turn_request, session_id):
+                    """Replay a request as several concurrent candidates and offer them as alternatives.
+                    
+                    All candidates start at once (see ReplicateService.stream_vision_candidates).
+                    The first one to produce output streams into the chat and becomes
+                    the answer; the others are added to the alternatives selector as
+                    they finish. A candidate that fails is left out, and if the
+                    streaming one fails, the next one with output takes its place.
+                    
+                    Args:
+                        message (str): The user's message being answered again
+                        history (list): The conversation history before the message
+                        turn_request (TurnRequest): The recorded request to replay
+                        session_id (str): Browser session whose history is updated
+                    
+                    Yields:
+                        tuple: (updated_history, updated_metrics, candidate_selector_update)
+                    
+                    Example:
+                        for new_history, new_metrics, selector in regenerate_candidates(message, history,
+                                                                                        turn_request, session_id):
+                            print(new_metrics)
+                    """
+                    start_time = time.time()
+                    position = len(history)
+                    count = ReplicateService.candidate_count()
+                    answers = [None] * count
+                    leader, leader_text, stored, latency = None, "", False, 0.0
+                    logger.info(f"Regenerating response with {count} candidates")
+                    try:
+                        for index, text, finished in ReplicateService.stream_vision_candidates(
+                                turn_request.prompt, turn_request.image_base64, count, turn_request.max_tokens,
+                                turn_request.max_continuations, sampling_factory=turn_request.sampling):
+                            if finished:
+                                answers[index] = text or None
+                            if not stored:
+                                if leader is None and text:
+                                    leader = index
+                                if index != leader:
+                                    continue
+                                if text is None:
+                                    # The streaming candidate failed; the next one with output takes over
+                                    leader, leader_text = None, ""
+                                    continue
+                                leader_text = text
+                                if not finished:
+                                    yield (history + [[message, text]], f"Streaming... | Words: {len(text.split())}",
+                                           gr.update())
+                                    continue
+                                # The first finished stream is the answer
+                                session_store.replace_from(session_id, position, [[message, text]])
+                                semantic_cache.store(turn_request.image_digest, message, text, history)
+                                stored, latency = True, time.time() - start_time
+                            elif not finished:
+                                continue
+                            session_store.record_candidates(session_id, position, message, answers, leader)
+                            ready = sum(answer is not None for answer in answers)
+                            yield (history + [[message, leader_text]] if index == leader else gr.update(),
+                                   f"Latency: {latency:.2f}s | Words: {len(leader_text.split())} | "
+                                   f"Alternatives: {ready} of {count}",
+                                   candidate_selector_update(session_id))
+                        
+                        if not stored:
+                            error_msg = "Sorry, I encountered an error: no alternative could be generated."
+                            session_store.replace_from(session_id, position, [[message, error_msg]])
+                            stored = True
+                            yield history + [[message, error_msg]], "Error: System unavailable. Please try again.", gr.update()
+                    finally:
+                        if not stored and leader_text:
+                            # The listener went away while the answer streamed
+                            session_store.replace_from(session_id, position, [[message, leader_text]])
                 
-                def text_to_speech_conversion(history, voice_type, speed):
+                def candidate_selector_update(session_id):
+                    """Selector update listing the finished alternatives of the session's last answer."""
+                    answers, selected = session_store.candidates(session_id)
+                    choices = [(f"Alternative {index + 1}", index) for index, answer in enumerate(answers) if answer]
+                    return gr.update(choices=choices, value=selected if choices else None, visible=len(choices) > 1)
+                
+                def show_candidate(index, request: gr.Request = None):
+                    """Show the chosen alternative as the last answer.
+                    
+                    Args:
+                        index (int): The alternative picked in the selector
+                        request (gr.Request, optional): Injected by Gradio; selects the session's history
+                    
+                    Returns:
+                        list: The updated chatbot history, or an empty update if the alternative is gone
+                    """
+                    history = session_store.select_candidate(request.session_hash if request else None, index)
+                    return history.pairs() if history is not None else gr.update()
+                
+                def text_to_speech_conversion(voice_type, speed, request: gr.Request = None):
                     """Convert last bot message to speech.
                     
-                    This function extracts the last bot message from the conversation history
-                    and converts it to speech using the specified voice type and speed.
+                    This function extracts the last bot message from the session's history
+                    and converts it to speech using the specified voice type and speed. Audio
+                    is streamed sentence by sentence so playback starts with the first chunk,
+                    and the merged file is offered for download once synthesis finishes,
+                    encoded in a compact format the browser can play.
                     
                     Args:
-                        history (list): The conversation history as a list of [user, bot] message pairs
                         voice_type (str): The type of voice to use for TTS
                         speed (float): The speed factor for speech playback
+                        request (gr.Request, optional): Injected by Gradio; its session hash
+                            selects the history, keeps each browser session's audio in its own store directory and
+                            its User-Agent header selects the download format
                     
-                    Returns:
-                        tuple: (audio_file, status_message)
-                            - audio_file (str or None): Path to the generated audio file or None if failed
-                            - status_message (str): Status message indicating success or failure
+                    Yields:
+                        tuple: (audio_chunk, status_message, download_file, audio_link)
+                            - audio_chunk (str or None): WAV file of the next sentence chunk
+                            - status_message (str): Progress, success or failure message
+                            - download_file (str or None): Path to the merged, encoded audio file when done
+                            - audio_link: Player update for url delivery mode
                     
                     Example:
-                        audio, status = text_to_speech_conversion(history, "female", 1.0)
+                        for chunk, status, download, link in text_to_speech_conversion("female", 1.0, request):
+                            print(status)
                     """
-                    text = get_last_bot_message(history)
+                    session_id = request.session_hash if request else None
+                    text = get_last_bot_message(session_store.history(session_id))
                     logger.info(f"Converting text to speech with voice: {voice_type}, speed: {speed}")
-                    result = TTSService.process_audio(text, voice_type, speed)
-                    if result[0] is None:
-                        logger.warning(f"TTS conversion failed: {result[1]}")
+                    file_path, status = None, "No text to convert to speech."
+                    user_agent = request.headers.get("user-agent") if request else None
+                    audio_format = TTSService.negotiate_audio_format(user_agent)
+                    for chunk, file_path, status in TTSService.stream_audio(text, voice_type, speed,
+                                                                            session_id, audio_format):
+                        if chunk is not None:
+                            yield chunk, status, gr.update(), gr.update(visible=False)
+                    if file_path is None:
+                        logger.warning(f"TTS conversion failed: {status}")
                     else:
                         logger.info("TTS conversion successful")
-                    return result
+                    if file_path and TTSService.audio_delivery() == "url":
+                        # The browser plays and downloads the audio straight from its source URL
+                        yield None, status, None, gr.update(value=format_audio_link(file_path), visible=True)
+                    else:
+                        yield None, status, file_path, gr.update(visible=False)
+                
+                def preview_selected_voice(voice_type, speed, request: gr.Request = None):
+                    """Play the sample phrase in the selected voice and speed.
+                    
+                    The phrase is pre-rendered for every voice at startup, so the
+                    preview is normally served from the audio cache.
+                    
+                    Args:
+                        voice_type (str): The voice to preview
+                        speed (float): The speed factor for speech playback
+                        request (gr.Request, optional): Injected by Gradio; owns the audio file
+                    
+                    Yields:
+                        tuple: (audio_chunk, status_message)
+                    
+                    Example:
+                        for chunk, status in preview_selected_voice("Male George (British)", 1.0):
+                            print(status)
+                    """
+                    session_id = request.session_hash if request else None
+                    for chunk, status in StaticAudio.stream_voice_preview(voice_type, speed, session_id):
+                        yield (chunk if chunk is not None else gr.update()), status
+                
+                def prefetch_last_response(voice_type, speed, request: gr.Request = None):
+                    """Queue background synthesis of the newest bot message.
+                    
+                    Screen reader users nearly always press "Play Last Response" next,
+                    so when TTS_PREFETCH_ENABLED is set the answer is synthesized with
+                    the current voice and speed right away and Play is usually a cache
+                    hit. Any earlier job of the session is cancelled.
+                    
+                    Args:
+                        voice_type (str): The session's current voice
+                        speed (float): The session's current speech speed
+                        request (gr.Request, optional): Injected by Gradio; identifies the session
+                    
+                    Example:
+                        prefetch_last_response("Female River (American)", 1.0, request)
+                    """
+                    if request is None:
+                        return
+                    audio_format = TTSService.negotiate_audio_format(request.headers.get("user-agent"))
+                    history = session_store.history(request.session_hash)
+                    tts_prefetcher.schedule(request.session_hash, get_last_bot_message(history),
+                                            voice_type, speed, audio_format)
+                
+                def export_conversation_audio(voice_type, speed, request: gr.Request = None,
+                                              progress=gr.Progress()):
+                    """Narrate every answer in the conversation into one downloadable file.
+                    
+                    Cached answers and sentences are reused, the rest is synthesized on
+                    the export's own worker pool. The export runs outside the processing
+                    lock and in its own event queue, so chatting and playback continue
+                    while it runs.
+                    
+                    Args:
+                        voice_type (str): The voice to narrate with
+                        speed (float): The speed factor for speech playback
+                        request (gr.Request, optional): Injected by Gradio; selects the history, owns the
+                            exported file and its User-Agent header selects the file format
+                        progress (gr.Progress, optional): Injected by Gradio; shows the export's progress bar
+                    
+                    Yields:
+                        tuple: (export_file, export_status)
+                            - export_file (str or None): Path of the exported file when done
+                            - export_status (str): Progress, success or failure message
+                    
+                    Example:
+                        for file_path, status in export_conversation_audio("Female River (American)", 1.0, request):
+                            print(status)
+                    """
+                    session_id = request.session_hash if request else None
+                    history = session_store.history(session_id)
+                    user_agent = request.headers.get("user-agent") if request else None
+                    audio_format = TTSService.negotiate_audio_format(user_agent)
+                    logger.info(f"Exporting conversation audio with voice: {voice_type}, speed: {speed}")
+                    for fraction, status, file_path in ConversationExport.export(history, voice_type, speed,
+                                                                                 session_id, audio_format):
+                        progress(fraction, desc=status)
+                        yield (file_path if file_path else gr.update()), status
+                
+                def stream_image_operation(operation, image, request):
+                    """Run an image operation on the session's history and store the turn it adds."""
+                    session_id = request.session_hash if request else None
+                    history = session_store.history(session_id)
+                    yield from session_store.track(session_id, len(history), operation(image, history))
+                
+                def extract_image_text(image, request: gr.Request = None):
+                    """Extract text from the image into the session's conversation."""
+                    yield from stream_image_operation(ImageUtils.stream_extract_text, image, request)
+                
+                def caption_image(image, request: gr.Request = None):
+                    """Caption the image in the session's conversation."""
+                    yield from stream_image_operation(ImageUtils.progressive_caption_image, image, request)
+                
+                def summarize_image(image, request: gr.Request = None):
+                    """Summarize the image in the session's conversation."""
+                    yield from stream_image_operation(ImageUtils.progressive_summarize_image, image, request)
+                
+                def cancel_prefetch(request: gr.Request = None):
+                    """Cancel the session's background synthesis, e.g. after clearing the chat."""
+                    if request is not None:
+                        tts_prefetcher.cancel(request.session_hash)
                 
                 # Helper function to update button states based on image presence
                 def update_button_state(image):
@@ -306,13 +643,15 @@ def create_app():
                     # If image is None, gallery gets empty list, otherwise a list with the image
                     lambda x: (x, [x] if x is not None else []),
                     upload_btn,  # Input is the upload button itself
-                    [image_output, gallery]  # Outputs are the hidden image storage and visible gallery
+                    [image_output, gallery],  # Outputs are the hidden image storage and visible gallery
+                    **event_queue("ui")
                 ).then(
                     # After image upload, update UI state based on image presence
                     update_button_state,
                     inputs=[image_output],  # Input is the uploaded image
                     outputs=[send_btn, extract_btn, caption_btn, summarize_btn,
-                             image_uploaded_state, image_instruction]  # Update multiple UI elements
+                             image_uploaded_state, image_instruction],  # Update multiple UI elements
+                    **event_queue("ui")
                 )
                 
                 # Helper function for UI state transitions
@@ -342,25 +681,26 @@ def create_app():
                         True                           # processing_status
                     )
                 
-                def end_processing(chatbot_val, metrics_val, image_uploaded_state):
+                def end_processing(metrics_val, image_uploaded_state, request: gr.Request = None):
                     """Reset processing state and re-enable interactive elements.
                     
                     This function updates the UI to hide the processing indicator and
-                    re-enables interactive elements after processing is complete.
+                    re-enables interactive elements after processing is complete. The
+                    chatbot is left as is; its history lives in the session store. The
+                    alternatives selector is shown only while the last answer has some.
                     
                     Args:
-                        chatbot_val (list): The current chatbot conversation history
                         metrics_val (str): The current performance metrics
                         image_uploaded_state (bool): Whether an image is currently uploaded
+                        request (gr.Request, optional): Injected by Gradio; selects the session's alternatives
                     
                     Returns:
                         tuple: Updates for multiple UI components to restore interactive state
                     
                     Example:
-                        ui_updates = end_processing(chatbot, metrics, True)
+                        ui_updates = end_processing(metrics, True)
                     """
                     return (
-                        chatbot_val,                                # chatbot
                         metrics_val,                                # performance_metrics
                         gr.update(visible=False),                   # processing_indicator
                         gr.update(interactive=True),                # msg
@@ -371,17 +711,17 @@ def create_app():
                         gr.update(interactive=image_uploaded_state),# summarize_btn
                         gr.update(interactive=True),                # regenerate_btn
                         gr.update(interactive=True),                # tts_btn
-                        False                                       # processing_status
+                        False,                                      # processing_status
+                        candidate_selector_update(request.session_hash if request else None)  # candidate_selector
                     )
                 
-                def end_processing_tts(audio_val, status_val, image_uploaded_state):
+                def end_processing_tts(status_val, image_uploaded_state):
                     """End processing specifically for TTS operations.
                     
                     Similar to end_processing but specifically for text-to-speech operations,
-                    updating the audio output and TTS status components.
+                    updating the TTS status component. The streamed audio is left as is.
                     
                     Args:
-                        audio_val (str): Path to the generated audio file
                         status_val (str): Status message for TTS operation
                         image_uploaded_state (bool): Whether an image is currently uploaded
                     
@@ -390,10 +730,9 @@ def create_app():
                               after TTS processing
                     
                     Example:
-                        ui_updates = end_processing_tts(audio_path, "Success", True)
+                        ui_updates = end_processing_tts("Success", True)
                     """
                     return (
-                        audio_val,                                  # audio_output
                         status_val,                                 # tts_status
                         gr.update(visible=False),                   # processing_indicator
                         gr.update(interactive=True),                # msg
@@ -407,27 +746,98 @@ def create_app():
                         False                                       # processing_status
                     )
                 
+                # Auto-speak pipelines handed from the chat event to its speech event, by session
+                live_speech = {}
+                live_speech_lock = threading.Lock()
+                
                 # 2. For sending messages
-                def locked_chat_response(message, history, metrics, image=None):
+                def locked_chat_response(message, metrics, image=None, auto_speak=False,
+                                         voice_type=None, speed=None, request: gr.Request = None):
                     """Process chat message and clear input field.
                     
-                    This function processes the chat message and returns the updated history,
-                    metrics, and an empty string to clear the input field.
+                    This function streams the updated history and metrics for the chat
+                    message, together with an empty string to clear the input field.
+                    With auto-speak enabled, complete sentences are synthesized while the
+                    answer is still streaming. The audio is played by a separate event
+                    (speak_live_answer), started through speech_request, because a
+                    streaming audio output that never receives audio fails when the
+                    event ends. The history is read from the session store and the new
+                    turn appended to it.
                     
                     Args:
                         message (str): The user's text message
-                        history (list): The conversation history
                         metrics (str): Current performance metrics
                         image (numpy.ndarray, optional): The uploaded image. Defaults to None.
+                        auto_speak (bool, optional): Speak the answer while it is generated. Defaults to False.
+                        voice_type (str, optional): Voice used for auto-speak
+                        speed (float, optional): Speech speed used for auto-speak
+                        request (gr.Request, optional): Injected by Gradio; selects the session's history
+                            and owns the spoken audio files
                     
-                    Returns:
-                        tuple: (updated_history, updated_metrics, empty_string)
+                    Yields:
+                        tuple: (updated_history, updated_metrics, empty_string, speech_request)
+                    
+                    Example:
+                        for history, metrics, _, _ in locked_chat_response("Hello", "Latency: N/A", None):
+                            print(metrics)
+                    """
+                    session_id = request.session_hash if request else None
+                    history = session_store.history(session_id)
+                    pipeline, speech_update = None, gr.update()
+                    if auto_speak:
+                        pipeline = SpeechPipeline(voice_type, speed, session_id)
+                        with live_speech_lock:
+                            previous = live_speech.pop(session_id, None)
+                            live_speech[session_id] = pipeline
+                        if previous:
+                            previous.close()
+                        speech_update = time.time()  # A new value starts the speech event
+                    updates = session_store.track(session_id, len(history),
+                                                  process_chat_message(message, history, metrics, image,
+                                                                       session_id=session_id))
+                    completed = False
+                    try:
+                        for updated_history, updated_metrics in updates:
+                            if pipeline and updated_metrics.startswith("Streaming"):
+                                pipeline.queue_text(updated_history[-1][1])
+                            yield updated_history, updated_metrics, "", speech_update  # Clear the input field
+                            speech_update = gr.update()
+                        
+                        if pipeline:
+                            # Speak the rest of the answer; error messages are not spoken
+                            spoken = "" if updated_metrics.startswith("Error") else updated_history[-1][1]
+                            pipeline.queue_text(spoken, final=True)
+                        completed = True
+                    finally:
+                        # Stores the new turn even if the listener went away mid-stream
+                        updates.close()
+                        if pipeline and not completed:
+                            pipeline.close()
+                
+                def speak_live_answer(speech_requested, request: gr.Request = None):
+                    """Play the auto-spoken answer of the session's chat event as it is synthesized.
+                    
+                    Args:
+                        speech_requested (float): The speech_request value that started the event
+                        request (gr.Request, optional): Injected by Gradio; selects the session's pipeline
+                    
+                    Yields:
+                        tuple: (audio_chunk, tts_status)
                     
                     Example:
-                        history, metrics, _ = locked_chat_response("Hello", [], "Latency: N/A", None)
+                        for chunk, status in speak_live_answer(time.time(), request):
+                            print(status)
                     """
-                    updated_history, updated_metrics = process_chat_message(message, history, metrics, image)
-                    return updated_history, updated_metrics, ""  # Clear the input field
+                    session_id = request.session_hash if request else None
+                    with live_speech_lock:
+                        pipeline = live_speech.pop(session_id, None)
+                    # Starts the audio stream, which must exist when the event ends
+                    yield None, "Speaking..." if pipeline else gr.update()
+                    if pipeline is None:
+                        return
+                    for chunk in pipeline.chunks():
+                        yield chunk, "Speaking..."
+                    yield gr.update(), pipeline.status()
                 
                 # Event chain for message submission via Enter key
                 # This creates a three-step process: 1) Show processing state, 2) Process message, 3) Restore UI
@@ -436,20 +846,31 @@ def create_app():
                     start_processing,
                     inputs=None,  # No inputs needed
                     outputs=[processing_indicator, msg, send_btn, upload_btn, extract_btn,
-                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status]
+                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
                 ).then(
                     # Step 2: Process the message with the AI model
                     locked_chat_response,
-                    inputs=[msg, chatbot, performance_metrics, image_output],  # Message and context
-                    outputs=[chatbot, performance_metrics, msg],  # Updated conversation and metrics
-                    show_progress="full"  # Show progress bar during processing
+                    inputs=[msg, performance_metrics, image_output,
+                            auto_speak, voice_type, speed],  # Message, context and auto-speak settings
+                    outputs=[chatbot, performance_metrics, msg,
+                             speech_request],  # Updated conversation and metrics; starts auto-speak
+                    show_progress="full",  # Show progress bar during processing
+                    **event_queue("chat")  # Shares its worker limit with the other chat answers
                 ).then(
                     # Step 3: Restore UI state after processing completes
                     end_processing,
-                    inputs=[chatbot, performance_metrics, image_uploaded_state],  # Current state
-                    outputs=[chatbot, performance_metrics, processing_indicator, msg, send_btn,
+                    inputs=[performance_metrics, image_uploaded_state],  # Current state
+                    outputs=[performance_metrics, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn,
-                             regenerate_btn, tts_btn, processing_status]  # UI elements to update
+                             regenerate_btn, tts_btn, processing_status, candidate_selector],  # UI elements to update
+                    **event_queue("ui")
+                ).then(
+                    # Step 4: Synthesize the new answer in the background (opt-in)
+                    prefetch_last_response,
+                    inputs=[voice_type, speed],
+                    outputs=None,
+                    **event_queue("ui")
                 )
                 
                 # Same event chain for send button click (identical to Enter key submission)
@@ -459,37 +880,57 @@ def create_app():
                     start_processing,
                     inputs=None,
                     outputs=[processing_indicator, msg, send_btn, upload_btn, extract_btn,
-                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status]
+                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
                 ).then(
                     # Step 2: Process the message
                     locked_chat_response,
-                    inputs=[msg, chatbot, performance_metrics, image_output],
-                    outputs=[chatbot, performance_metrics, msg],
-                    show_progress="full"
+                    inputs=[msg, performance_metrics, image_output, auto_speak, voice_type, speed],
+                    outputs=[chatbot, performance_metrics, msg, speech_request],
+                    show_progress="full",
+                    **event_queue("chat")
                 ).then(
                     # Step 3: Restore UI state
                     end_processing,
-                    inputs=[chatbot, performance_metrics, image_uploaded_state],
-                    outputs=[chatbot, performance_metrics, processing_indicator, msg, send_btn,
+                    inputs=[performance_metrics, image_uploaded_state],
+                    outputs=[performance_metrics, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn,
-                             regenerate_btn, tts_btn, processing_status]
+                             regenerate_btn, tts_btn, processing_status, candidate_selector],
+                    **event_queue("ui")
+                ).then(
+                    # Step 4: Synthesize the new answer in the background (opt-in)
+                    prefetch_last_response,
+                    inputs=[voice_type, speed],
+                    outputs=None,
+                    **event_queue("ui")
+                )
+                
+                # Auto-spoken answers play in their own event, started by the chat event above
+                speech_request.change(
+                    speak_live_answer,
+                    inputs=[speech_request],
+                    outputs=[audio_output, tts_status],
+                    **event_queue("speech")
                 )
                 
                 # Helper function for clearing the interface
-                def clear_interface_state():
+                def clear_interface_state(request: gr.Request = None):
                     """Reset all interface elements to their initial state.
                     
                     This function resets the entire UI to its initial state, clearing
                     the conversation history, uploaded images, and resetting all controls.
                     
+                    Args:
+                        request (gr.Request, optional): Injected by Gradio; selects the history to reset
+                    
                     Returns:
                         tuple: Updates for all UI components to reset to initial state
                     
                     Example:
-                        ui_updates = clear_interface_state()
+                        ui_updates = clear_interface_state(request)
                     """
                     return (
-                        INIT_HISTORY,                    # chatbot
+                        session_store.reset(request.session_hash if request else None),  # chatbot
                         "Latency: N/A | Words: N/A",     # performance_metrics
                         gr.update(visible=False),        # processing_indicator
                         gr.update(interactive=True, value=""), # msg
@@ -504,7 +945,8 @@ def create_app():
                         [],                              # gallery
                         None,                            # image_output
                         False,                           # image_uploaded_state
-                        gr.update(visible=True)          # image_instruction
+                        gr.update(visible=True),         # image_instruction
+                        gr.update(choices=[], value=None, visible=False)  # candidate_selector
                     )
                 
                 # 3. For clear history button
@@ -514,7 +956,14 @@ def create_app():
                     outputs=[chatbot, performance_metrics, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn, regenerate_btn,
                              tts_btn, processing_status, gallery, image_output, 
-                             image_uploaded_state, image_instruction]
+                             image_uploaded_state, image_instruction, candidate_selector],
+                    **event_queue("ui")
+                ).then(
+                    # The cleared answer no longer needs to be spoken
+                    cancel_prefetch,
+                    inputs=None,
+                    outputs=None,
+                    **event_queue("ui")
                 )
                 
                 # 4. For regenerate button - allows user to get a new response to the last question
@@ -524,20 +973,29 @@ def create_app():
                     start_processing,
                     inputs=None,
                     outputs=[processing_indicator, msg, send_btn, upload_btn, extract_btn,
-                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status]
+                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
                 ).then(
                     # Step 2: Regenerate the last response using the same image and last user message
                     regenerate_last_response,
-                    inputs=[chatbot, performance_metrics, image_output],
-                    outputs=[chatbot, performance_metrics],
-                    show_progress="full"
+                    inputs=[performance_metrics, image_output, alternatives],
+                    outputs=[chatbot, performance_metrics, candidate_selector],
+                    show_progress="full",
+                    **event_queue("chat")
                 ).then(
                     # Step 3: Restore UI state
                     end_processing,
-                    inputs=[chatbot, performance_metrics, image_uploaded_state],
-                    outputs=[chatbot, performance_metrics, processing_indicator, msg, send_btn,
+                    inputs=[performance_metrics, image_uploaded_state],
+                    outputs=[performance_metrics, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn,
-                             regenerate_btn, tts_btn, processing_status]
+                             regenerate_btn, tts_btn, processing_status, candidate_selector],
+                    **event_queue("ui")
+                ).then(
+                    # Step 4: Synthesize the new answer in the background (opt-in)
+                    prefetch_last_response,
+                    inputs=[voice_type, speed],
+                    outputs=None,
+                    **event_queue("ui")
                 )
                 
                 # 5. For extract text button - specialized function to extract text from images
@@ -547,19 +1005,28 @@ def create_app():
                     start_processing,
                     inputs=None,
                     outputs=[processing_indicator, msg, send_btn, upload_btn, extract_btn,
-                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status]
+                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
                 ).then(
-                    # Step 2: Extract text from the image using OCR
-                    ImageUtils.extract_text,  # External utility function for OCR
-                    inputs=[image_output, chatbot],  # Image data and current conversation
-                    outputs=[chatbot, performance_metrics]  # Updated with extraction results
+                    # Step 2: Extract text from the image using OCR, streaming long transcriptions
+                    extract_image_text,  # OCR via ImageUtils on the session's conversation
+                    inputs=[image_output],  # Image data
+                    outputs=[chatbot, performance_metrics],  # Updated with extraction results
+                    **event_queue("image")
                 ).then(
                     # Step 3: Restore UI state
                     end_processing,
-                    inputs=[chatbot, performance_metrics, image_uploaded_state],
-                    outputs=[chatbot, performance_metrics, processing_indicator, msg, send_btn,
+                    inputs=[performance_metrics, image_uploaded_state],
+                    outputs=[performance_metrics, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn,
-                             regenerate_btn, tts_btn, processing_status]
+                             regenerate_btn, tts_btn, processing_status, candidate_selector],
+                    **event_queue("ui")
+                ).then(
+                    # Step 4: Synthesize the new answer in the background (opt-in)
+                    prefetch_last_response,
+                    inputs=[voice_type, speed],
+                    outputs=None,
+                    **event_queue("ui")
                 )
                 
                 # 6. For caption image button - generates a descriptive caption for the image
@@ -569,19 +1036,28 @@ def create_app():
                     start_processing,
                     inputs=None,
                     outputs=[processing_indicator, msg, send_btn, upload_btn, extract_btn,
-                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status]
+                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
                 ).then(
                     # Step 2: Generate caption for the image
-                    ImageUtils.caption_image,  # External utility for image captioning
-                    inputs=[image_output, chatbot],  # Image data and current conversation
-                    outputs=[chatbot, performance_metrics]  # Updated with caption results
+                    caption_image,  # Quick preview, then full-resolution caption
+                    inputs=[image_output],  # Image data
+                    outputs=[chatbot, performance_metrics],  # Updated with caption results
+                    **event_queue("image")
                 ).then(
                     # Step 3: Restore UI state
                     end_processing,
-                    inputs=[chatbot, performance_metrics, image_uploaded_state],
-                    outputs=[chatbot, performance_metrics, processing_indicator, msg, send_btn,
+                    inputs=[performance_metrics, image_uploaded_state],
+                    outputs=[performance_metrics, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn,
-                             regenerate_btn, tts_btn, processing_status]
+                             regenerate_btn, tts_btn, processing_status, candidate_selector],
+                    **event_queue("ui")
+                ).then(
+                    # Step 4: Synthesize the new answer in the background (opt-in)
+                    prefetch_last_response,
+                    inputs=[voice_type, speed],
+                    outputs=None,
+                    **event_queue("ui")
                 )
                 
                 # 7. For summarize image button - provides a detailed analysis of the image
@@ -591,19 +1067,28 @@ def create_app():
                     start_processing,
                     inputs=None,
                     outputs=[processing_indicator, msg, send_btn, upload_btn, extract_btn,
-                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status]
+                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
                 ).then(
                     # Step 2: Generate detailed summary of the image
-                    ImageUtils.summarize_image,  # External utility for image summarization
-                    inputs=[image_output, chatbot],  # Image data and current conversation
-                    outputs=[chatbot, performance_metrics]  # Updated with summary results
+                    summarize_image,  # Quick preview, then full-resolution summary
+                    inputs=[image_output],  # Image data
+                    outputs=[chatbot, performance_metrics],  # Updated with summary results
+                    **event_queue("image")
                 ).then(
                     # Step 3: Restore UI state
                     end_processing,
-                    inputs=[chatbot, performance_metrics, image_uploaded_state],
-                    outputs=[chatbot, performance_metrics, processing_indicator, msg, send_btn,
+                    inputs=[performance_metrics, image_uploaded_state],
+                    outputs=[performance_metrics, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn,
-                             regenerate_btn, tts_btn, processing_status]
+                             regenerate_btn, tts_btn, processing_status, candidate_selector],
+                    **event_queue("ui")
+                ).then(
+                    # Step 4: Synthesize the new answer in the background (opt-in)
+                    prefetch_last_response,
+                    inputs=[voice_type, speed],
+                    outputs=None,
+                    **event_queue("ui")
                 )
                 
                 # 8. For TTS button - converts the last bot response to speech
@@ -613,26 +1098,90 @@ def create_app():
                     start_processing,
                     inputs=None,
                     outputs=[processing_indicator, msg, send_btn, upload_btn, extract_btn,
-                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status]
+                             caption_btn, summarize_btn, regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
                 ).then(
                     # Step 2: Convert text to speech with selected voice and speed
                     text_to_speech_conversion,
-                    inputs=[chatbot, voice_type, speed],  # Conversation history and TTS parameters
-                    outputs=[audio_output, tts_status]  # Audio file path and status message
+                    inputs=[voice_type, speed],  # TTS parameters; the text comes from the session store
+                    outputs=[audio_output, tts_status, audio_download, audio_link],  # Streamed audio, status, merged file, URL player
+                    **event_queue("speech")
                 ).then(
                     # Step 3: Restore UI state with TTS-specific handler
-                    # This handler updates audio components in addition to standard UI elements
+                    # This handler updates the TTS status in addition to standard UI elements
                     end_processing_tts,
-                    inputs=[audio_output, tts_status, image_uploaded_state],
-                    outputs=[audio_output, tts_status, processing_indicator, msg, send_btn,
+                    inputs=[tts_status, image_uploaded_state],
+                    outputs=[tts_status, processing_indicator, msg, send_btn,
                              upload_btn, extract_btn, caption_btn, summarize_btn,
-                             regenerate_btn, tts_btn, processing_status]
+                             regenerate_btn, tts_btn, processing_status],
+                    **event_queue("ui")
+                )
+                
+                # 9. For voice preview button - plays a pre-rendered sample of the selected voice
+                preview_btn.click(
+                    preview_selected_voice,
+                    inputs=[voice_type, speed],
+                    outputs=[audio_output, tts_status],
+                    **event_queue("speech")
+                )
+                
+                # 10. For the alternatives selector - shows another regenerated answer
+                candidate_selector.input(
+                    show_candidate,
+                    inputs=[candidate_selector],
+                    outputs=[chatbot],
+                    **event_queue("ui")
+                ).then(
+                    # The shown answer is the one "Play Last Response" speaks
+                    prefetch_last_response,
+                    inputs=[voice_type, speed],
+                    outputs=None,
+                    **event_queue("ui")
+                )
+                
+                # 11. For export button - narrates the whole conversation into one file
+                # Runs in its own concurrency group without the processing lock, so long
+                # exports never wait on or hold up the chat and playback events
+                export_btn.click(
+                    export_conversation_audio,
+                    inputs=[voice_type, speed],
+                    outputs=[export_file, export_status],
+                    **event_queue("export"),
+                    trigger_mode="once"  # Ignore further clicks while an export is running
                 )
                 
             # Create the Guide tab with usage instructions
             with gr.Tab("Guide"):
                 # Use the modular GuideInterface to create the guide content
                 GuideInterface.create_guide()  # Loads guide content from the UI module
+
+        # Delete a session's generated audio and cached prompt when its browser tab closes; its
+        # history leaves memory and persisted turns expire with the session store's sweep
+        def release_audio_session(request: gr.Request):
+            tts_prefetcher.cancel(request.session_hash)
+            audio_store.release_session(request.session_hash)
+            prompt_builders.release(request.session_hash)
+            session_store.release(request.session_hash)
+            with live_speech_lock:
+                pipeline = live_speech.pop(request.session_hash, None)
+            if pipeline:
+                pipeline.close()
+
+        hearsee.unload(release_audio_session)
+
+    # Expired and over-quota audio files are reclaimed in the background
+    audio_store.start_reaper()
+    # Chat histories unchanged for SESSION_STORE_TTL are removed in the background
+    session_store.start_sweeper()
+    # Welcome messages and voice previews are rendered into the audio cache in the background
+    StaticAudio.start_prerender()
+    
+    # Concurrency limits are set per kind of event (see event_queue)
+    hearsee.queue(
+        status_update_rate=QUEUE_STATUS_UPDATE_RATE,
+        max_size=QUEUE_MAX_SIZE,
+        default_concurrency_limit=QUEUE_DEFAULT_CONCURRENCY_LIMIT
+    )
     
     return hearsee
 
@@ -641,5 +1190,8 @@ if __name__ == "__main__":
     logger.info("Starting HearSee application")
     app = create_app()
     logger.info("Launching Gradio interface")
-    app.launch(share=False, inbrowser=True)  # Launch locally and open in browser
+    # Generated speech may live outside the working and temp directories (AUDIO_STORE_DIR,
+    # AUDIO_STORE_USE_TMPFS, TTS_CACHE_DIR), where Gradio only serves files it is allowed to
+    app.launch(share=False, inbrowser=True, max_threads=QUEUE_MAX_THREADS,
+               allowed_paths=[audio_store.root, audio_cache.directory])  # Launch locally and open in browser
     logger.info("HearSee application stopped")
\ No newline at end of file
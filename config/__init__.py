@@ -4,22 +4,182 @@ from .settings import (
     QWEN_VL_MODEL,
     KOKORO_TTS_MODEL,
     DEFAULT_MAX_TOKENS,
+    MAX_CONTINUATIONS,
+    TRUNCATION_TOKEN_RATIO,
     MAX_IMAGE_SIZE,
+    MOSAIC_RESOLUTION_BUDGET,
+    MOSAIC_MIN_TILE_SIZE,
+    MOSAIC_MAX_TILE_SIZE,
+    MOSAIC_MAX_TILES,
+    MOSAIC_TOKENS_PER_TILE,
+    PROGRESSIVE_ANALYSIS,
+    PROGRESSIVE_PREVIEW_SIZE,
+    PROGRESSIVE_PREVIEW_MAX_TOKENS,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_IMAGES,
+    SEMANTIC_CACHE_MAX_ENTRIES_PER_IMAGE,
+    SEMANTIC_CACHE_DIMENSIONS,
+    PROMPT_BUILDER_MAX_SESSIONS,
+    PROMPT_HISTORY_TOKEN_BUDGET,
+    PROMPT_SUMMARY_ENABLED,
+    PROMPT_SUMMARY_MAX_TOKENS,
+    PROMPT_SUMMARY_WORKERS,
+    SESSION_STORE_DB,
+    SESSION_STORE_TTL,
+    SESSION_STORE_SWEEP_INTERVAL,
+    REGENERATE_REPLAY,
+    REGENERATE_TEMPERATURE,
+    REGENERATE_RANDOM_SEED,
+    REGENERATE_CANDIDATES,
+    REGENERATE_ALTERNATIVES_DEFAULT,
     INIT_HISTORY,
     VOICE_TYPES,
     TTS_SPEED_RANGE,
     DEFAULT_VOICE,
-    DEFAULT_SPEED
+    DEFAULT_SPEED,
+    TTS_CHUNK_MAX_CHARS,
+    TTS_MAX_PARALLEL_CHUNKS,
+    TTS_LOCAL_TIME_STRETCH,
+    TTS_POSTPROCESS,
+    TTS_SILENCE_THRESHOLD_DB,
+    TTS_SILENCE_PAD,
+    TTS_TARGET_LOUDNESS_DBFS,
+    TTS_CROSSFADE_SECONDS,
+    EXPORT_MAX_WORKERS,
+    EXPORT_MESSAGE_PAUSE,
+    EXPORT_CONCURRENCY_LIMIT,
+    AUTO_SPEAK_DEFAULT,
+    AUTO_SPEAK_MIN_CHARS,
+    VOICE_PREVIEW_TEXT,
+    STATIC_AUDIO_PRERENDER,
+    STATIC_AUDIO_WORKERS,
+    TTS_PREFETCH_ENABLED,
+    TTS_PREFETCH_WORKERS,
+    TTS_PREFETCH_DELAY,
+    TTS_AUDIO_DELIVERY,
+    TTS_AUDIO_FORMAT,
+    TTS_AUDIO_SAMPLE_RATE,
+    TTS_AUDIO_BITRATE,
+    AUDIO_HTTP_POOL_SIZE,
+    AUDIO_DOWNLOAD_RETRIES,
+    AUDIO_DOWNLOAD_TIMEOUT,
+    AUDIO_DOWNLOAD_CHUNK_SIZE,
+    AUDIO_STORE_DIR,
+    AUDIO_STORE_USE_TMPFS,
+    AUDIO_STORE_MAX_BYTES,
+    AUDIO_STORE_MAX_AGE,
+    AUDIO_STORE_REAP_INTERVAL,
+    TTS_CACHE_ENABLED,
+    TTS_CACHE_DIR,
+    TTS_CACHE_MAX_BYTES,
+    TOKEN_RATE_LIMIT_COOLDOWN,
+    TOKEN_FAILURE_THRESHOLD,
+    TOKEN_FAILURE_COOLDOWN,
+    REPLICATE_CONCURRENCY_INITIAL,
+    REPLICATE_CONCURRENCY_MIN,
+    REPLICATE_CONCURRENCY_MAX,
+    AIMD_INCREASE_STEP,
+    AIMD_DECREASE_FACTOR,
+    AIMD_LATENCY_SPIKE_RATIO,
+    AIMD_ERROR_RATE_THRESHOLD,
+    AIMD_DECREASE_COOLDOWN,
+    CONCURRENCY_ACQUIRE_TIMEOUT,
+    QUEUE_CONCURRENCY_LIMITS,
+    QUEUE_DEFAULT_CONCURRENCY_LIMIT,
+    QUEUE_MAX_SIZE,
+    QUEUE_STATUS_UPDATE_RATE,
+    QUEUE_MAX_THREADS
 )
 
 __all__ = [
     'QWEN_VL_MODEL',
     'KOKORO_TTS_MODEL',
     'DEFAULT_MAX_TOKENS',
+    'MAX_CONTINUATIONS',
+    'TRUNCATION_TOKEN_RATIO',
     'MAX_IMAGE_SIZE',
+    'MOSAIC_RESOLUTION_BUDGET',
+    'MOSAIC_MIN_TILE_SIZE',
+    'MOSAIC_MAX_TILE_SIZE',
+    'MOSAIC_MAX_TILES',
+    'MOSAIC_TOKENS_PER_TILE',
+    'PROGRESSIVE_ANALYSIS',
+    'PROGRESSIVE_PREVIEW_SIZE',
+    'PROGRESSIVE_PREVIEW_MAX_TOKENS',
+    'SEMANTIC_CACHE_ENABLED',
+    'SEMANTIC_CACHE_THRESHOLD',
+    'SEMANTIC_CACHE_MAX_IMAGES',
+    'SEMANTIC_CACHE_MAX_ENTRIES_PER_IMAGE',
+    'SEMANTIC_CACHE_DIMENSIONS',
+    'PROMPT_BUILDER_MAX_SESSIONS',
+    'PROMPT_HISTORY_TOKEN_BUDGET',
+    'PROMPT_SUMMARY_ENABLED',
+    'PROMPT_SUMMARY_MAX_TOKENS',
+    'PROMPT_SUMMARY_WORKERS',
+    'SESSION_STORE_DB',
+    'SESSION_STORE_TTL',
+    'SESSION_STORE_SWEEP_INTERVAL',
+    'REGENERATE_REPLAY',
+    'REGENERATE_TEMPERATURE',
+    'REGENERATE_RANDOM_SEED',
+    'REGENERATE_CANDIDATES',
+    'REGENERATE_ALTERNATIVES_DEFAULT',
     'INIT_HISTORY',
     'VOICE_TYPES',
     'TTS_SPEED_RANGE',
     'DEFAULT_VOICE',
-    'DEFAULT_SPEED'
+    'DEFAULT_SPEED',
+    'TTS_CHUNK_MAX_CHARS',
+    'TTS_MAX_PARALLEL_CHUNKS',
+    'TTS_LOCAL_TIME_STRETCH',
+    'TTS_POSTPROCESS',
+    'TTS_SILENCE_THRESHOLD_DB',
+    'TTS_SILENCE_PAD',
+    'TTS_TARGET_LOUDNESS_DBFS',
+    'TTS_CROSSFADE_SECONDS',
+    'EXPORT_MAX_WORKERS',
+    'EXPORT_MESSAGE_PAUSE',
+    'EXPORT_CONCURRENCY_LIMIT',
+    'AUTO_SPEAK_DEFAULT',
+    'AUTO_SPEAK_MIN_CHARS',
+    'VOICE_PREVIEW_TEXT',
+    'STATIC_AUDIO_PRERENDER',
+    'STATIC_AUDIO_WORKERS',
+    'TTS_PREFETCH_ENABLED',
+    'TTS_PREFETCH_WORKERS',
+    'TTS_PREFETCH_DELAY',
+    'TTS_AUDIO_DELIVERY',
+    'TTS_AUDIO_FORMAT',
+    'TTS_AUDIO_SAMPLE_RATE',
+    'TTS_AUDIO_BITRATE',
+    'AUDIO_HTTP_POOL_SIZE',
+    'AUDIO_DOWNLOAD_RETRIES',
+    'AUDIO_DOWNLOAD_TIMEOUT',
+    'AUDIO_DOWNLOAD_CHUNK_SIZE',
+    'AUDIO_STORE_DIR',
+    'AUDIO_STORE_USE_TMPFS',
+    'AUDIO_STORE_MAX_BYTES',
+    'AUDIO_STORE_MAX_AGE',
+    'AUDIO_STORE_REAP_INTERVAL',
+    'TTS_CACHE_ENABLED',
+    'TTS_CACHE_DIR',
+    'TTS_CACHE_MAX_BYTES',
+    'TOKEN_RATE_LIMIT_COOLDOWN',
+    'TOKEN_FAILURE_THRESHOLD',
+    'TOKEN_FAILURE_COOLDOWN',
+    'REPLICATE_CONCURRENCY_INITIAL',
+    'REPLICATE_CONCURRENCY_MIN',
+    'REPLICATE_CONCURRENCY_MAX',
+    'AIMD_INCREASE_STEP',
+    'AIMD_DECREASE_FACTOR',
+    'AIMD_LATENCY_SPIKE_RATIO',
+    'AIMD_ERROR_RATE_THRESHOLD',
+    'AIMD_DECREASE_COOLDOWN',
+    'CONCURRENCY_ACQUIRE_TIMEOUT',
+    'QUEUE_CONCURRENCY_LIMITS',
+    'QUEUE_DEFAULT_CONCURRENCY_LIMIT',
+    'QUEUE_MAX_SIZE',
+    'QUEUE_STATUS_UPDATE_RATE',
+    'QUEUE_MAX_THREADS'
 ]
\ No newline at end of file
@@ -15,6 +15,87 @@ Constants:
     TTS_SPEED_RANGE (tuple): Minimum and maximum allowed speech speed values
     DEFAULT_VOICE (str): Default voice type for text-to-speech conversion
     DEFAULT_SPEED (float): Default speech speed for text-to-speech conversion
+    TTS_CHUNK_MAX_CHARS (int): Maximum characters per sentence chunk synthesized in one TTS prediction
+    TTS_MAX_PARALLEL_CHUNKS (int): Sentence chunks synthesized concurrently for one response
+    TTS_LOCAL_TIME_STRETCH (bool): Synthesize at 1.0x and apply other speeds locally, so speed changes reuse one prediction
+    TTS_POSTPROCESS (bool): Trim silence, normalize loudness and crossfade synthesized chunks
+    TTS_SILENCE_THRESHOLD_DB (float): Level in dBFS below which audio at the edges of a chunk is trimmed
+    TTS_SILENCE_PAD (float): Seconds of silence kept before and after the speech of each chunk
+    TTS_TARGET_LOUDNESS_DBFS (float): Loudness of speech after normalization, in dBFS
+    TTS_CROSSFADE_SECONDS (float): Length of the crossfade between consecutive chunks
+    EXPORT_MAX_WORKERS (int): Chunks synthesized concurrently by one conversation audio export
+    EXPORT_MESSAGE_PAUSE (float): Seconds of silence between answers in an exported conversation
+    EXPORT_CONCURRENCY_LIMIT (int): Conversation exports that run at the same time across all sessions
+    AUTO_SPEAK_DEFAULT (bool): Whether answers are spoken while they are generated, by default
+    AUTO_SPEAK_MIN_CHARS (int): Complete text needed before auto-speak queues a chunk for synthesis
+    VOICE_PREVIEW_TEXT (str): Sample phrase spoken by the voice preview button
+    STATIC_AUDIO_PRERENDER (bool): Pre-render the welcome messages and voice previews for every voice at startup
+    STATIC_AUDIO_WORKERS (int): Texts synthesized concurrently while pre-rendering static audio
+    TTS_PREFETCH_ENABLED (bool): Synthesize every new bot message in the background so Play is a cache hit
+    TTS_PREFETCH_WORKERS (int): Background synthesis jobs run at once across all sessions
+    TTS_PREFETCH_DELAY (float): Seconds a new bot message waits before background synthesis starts
+    MAX_CONTINUATIONS (int): Maximum follow-up predictions chained onto a truncated response
+    TRUNCATION_TOKEN_RATIO (float): Fraction of DEFAULT_MAX_TOKENS at which an unfinished response counts as truncated
+    SEMANTIC_CACHE_ENABLED (bool): Whether repeated questions about the same image are answered from cache
+    SEMANTIC_CACHE_THRESHOLD (float): Minimum cosine similarity for a semantic cache hit
+    SEMANTIC_CACHE_MAX_IMAGES (int): Number of images kept in the semantic cache
+    SEMANTIC_CACHE_MAX_ENTRIES_PER_IMAGE (int): Number of answers kept per image
+    SEMANTIC_CACHE_DIMENSIONS (int): Size of the hashed question embedding
+    PROMPT_BUILDER_MAX_SESSIONS (int): Sessions whose formatted conversation history is kept for the next prompt
+    PROMPT_HISTORY_TOKEN_BUDGET (int): Approximate tokens of recent conversation sent verbatim with each message
+    PROMPT_SUMMARY_ENABLED (bool): Fold turns older than the token budget into a rolling summary
+    PROMPT_SUMMARY_MAX_TOKENS (int): Maximum length of the rolling summary in tokens
+    PROMPT_SUMMARY_WORKERS (int): Rolling summaries generated concurrently across all sessions
+    SESSION_STORE_DB (str): SQLite file that persists chat histories (None keeps them in memory only)
+    SESSION_STORE_TTL (float): Seconds after its last change that a chat history is removed
+    SESSION_STORE_SWEEP_INTERVAL (float): Seconds between background passes removing expired chat histories
+    REGENERATE_REPLAY (bool): Regenerate replays the last turn's recorded prompt and encoded image
+    REGENERATE_TEMPERATURE (float): Temperature sent with replayed requests (None keeps the model default)
+    REGENERATE_RANDOM_SEED (bool): Send a new random seed with every replayed request
+    REGENERATE_CANDIDATES (int): Completions generated at once when regenerating with alternatives
+    REGENERATE_ALTERNATIVES_DEFAULT (bool): Whether regenerate produces alternatives, by default
+    MOSAIC_RESOLUTION_BUDGET (int): Maximum side length in pixels of a batch captioning mosaic
+    MOSAIC_MIN_TILE_SIZE (int): Smallest tile side length in a mosaic
+    MOSAIC_MAX_TILE_SIZE (int): Largest tile side length in a mosaic
+    MOSAIC_MAX_TILES (int): Maximum number of images captioned in one mosaic prediction
+    MOSAIC_TOKENS_PER_TILE (int): Token allowance per tile for mosaic caption responses
+    TTS_AUDIO_DELIVERY (str): "download" saves speech on the server, "url" lets the browser fetch it from Replicate
+    TTS_AUDIO_FORMAT (str): Preferred format of delivered speech: "opus", "mp3" or "wav"
+    TTS_AUDIO_SAMPLE_RATE (int): Sample rate in Hz of delivered speech
+    TTS_AUDIO_BITRATE (str): Target bitrate of compressed speech, e.g. "32k"
+    AUDIO_HTTP_POOL_SIZE (int): Keep-alive connections in the shared audio download session
+    AUDIO_DOWNLOAD_RETRIES (int): Retries for failed audio downloads (connection errors and 5xx)
+    AUDIO_DOWNLOAD_TIMEOUT (tuple): Connect and read timeouts in seconds for audio downloads
+    AUDIO_DOWNLOAD_CHUNK_SIZE (int): Bytes written to disk per block while downloading audio
+    AUDIO_STORE_DIR (str): Root directory for generated audio (None uses the system temp directory)
+    AUDIO_STORE_USE_TMPFS (bool): Place generated audio on /dev/shm when AUDIO_STORE_DIR is not set
+    AUDIO_STORE_MAX_BYTES (int): Byte quota for generated audio, oldest files are reclaimed beyond it
+    AUDIO_STORE_MAX_AGE (float): Seconds after which generated audio files are reclaimed
+    AUDIO_STORE_REAP_INTERVAL (float): Seconds between background reclaim passes
+    TTS_CACHE_ENABLED (bool): Whether synthesized speech is cached on disk
+    TTS_CACHE_DIR (str): Directory for cached speech (None uses the system temp directory)
+    TTS_CACHE_MAX_BYTES (int): Disk budget for cached speech, least recently used files are evicted
+    PROGRESSIVE_ANALYSIS (bool): Whether captions and summaries show a fast low-resolution preview first
+    PROGRESSIVE_PREVIEW_SIZE (int): Longest side in pixels of the image used for the fast preview pass
+    PROGRESSIVE_PREVIEW_MAX_TOKENS (int): Token limit for the fast preview pass
+    TOKEN_RATE_LIMIT_COOLDOWN (float): Seconds a rate-limited API token stays out of rotation
+    TOKEN_FAILURE_THRESHOLD (int): Consecutive failures before an API token is marked unhealthy
+    TOKEN_FAILURE_COOLDOWN (float): Seconds an unhealthy API token stays out of rotation
+    REPLICATE_CONCURRENCY_INITIAL (int): Starting limit for in-flight Replicate predictions
+    REPLICATE_CONCURRENCY_MIN (int): Lowest in-flight limit the adaptive limiter may set
+    REPLICATE_CONCURRENCY_MAX (int): Highest in-flight limit the adaptive limiter may set
+    AIMD_INCREASE_STEP (float): Additive limit increase per round of healthy predictions
+    AIMD_DECREASE_FACTOR (float): Multiplier applied to the limit on throttling or latency spikes
+    AIMD_LATENCY_SPIKE_RATIO (float): Latency over baseline ratio treated as a spike
+    AIMD_ERROR_RATE_THRESHOLD (float): Error rate above which the limit is cut
+    AIMD_DECREASE_COOLDOWN (float): Minimum seconds between two limit cuts
+    CONCURRENCY_ACQUIRE_TIMEOUT (float): Seconds a request waits for a prediction slot
+    QUEUE_CONCURRENCY_LIMITS (dict): Events of each kind ("ui", "chat", "image", "speech", "export") run at once
+        across all sessions (None runs them without a limit)
+    QUEUE_DEFAULT_CONCURRENCY_LIMIT (int): Concurrency limit of events not assigned to a kind
+    QUEUE_MAX_SIZE (int): Events that may wait in the queue before new ones are turned away (None for no limit)
+    QUEUE_STATUS_UPDATE_RATE (float): Seconds between queue position updates sent to waiting browsers, or "auto"
+    QUEUE_MAX_THREADS (int): Worker threads shared by all running events
 """
 
 # Replicate Model Constants - specific model versions for reproducibility
@@ -25,6 +106,80 @@ KOKORO_TTS_MODEL = "jaaari/kokoro-82m:f559560eb822dc509045f3921a1921234918b91739
 # API Configuration - controls response length
 DEFAULT_MAX_TOKENS = 512  # Balances between detailed responses and API costs
 
+# Response Continuation - long answers (e.g. OCR of dense slides) that hit the
+# token limit are continued automatically and stitched into one message
+MAX_CONTINUATIONS = 3           # Up to 4 predictions (~2048 tokens) per answer
+TRUNCATION_TOKEN_RATIO = 0.85   # Unfinished answers at >= 85% of the limit are continued
+
+# API Token Pool - multiple tokens can be supplied as a comma-separated
+# REPLICATE_API_TOKENS environment variable to spread load across accounts
+TOKEN_RATE_LIMIT_COOLDOWN = 30.0  # Seconds to rest a token after an HTTP 429 response
+TOKEN_FAILURE_THRESHOLD = 3       # Consecutive errors before a token is considered unhealthy
+TOKEN_FAILURE_COOLDOWN = 60.0     # Seconds to rest an unhealthy token
+
+# Adaptive Concurrency (AIMD) - bounds in-flight predictions across all tokens
+# The limit grows while latency and errors stay healthy and is cut on 429s or latency spikes
+# Speech predictions use a second limiter with the same settings, so they never wait on vision streams
+REPLICATE_CONCURRENCY_INITIAL = 4
+REPLICATE_CONCURRENCY_MIN = 1
+REPLICATE_CONCURRENCY_MAX = 32
+AIMD_INCREASE_STEP = 1.0          # +1 slot per round of healthy predictions
+AIMD_DECREASE_FACTOR = 0.5        # Halve the limit when throttled
+AIMD_LATENCY_SPIKE_RATIO = 2.0    # Latency above 2x baseline counts as a spike
+AIMD_ERROR_RATE_THRESHOLD = 0.2   # Cut the limit when over 20% of recent calls fail
+AIMD_DECREASE_COOLDOWN = 2.0      # Seconds between cuts so one burst only counts once
+CONCURRENCY_ACQUIRE_TIMEOUT = 120.0  # Seconds to wait for a free prediction slot
+
+# Mosaic Batch Captioning - small images are tiled into one labeled grid per prediction
+# Tile size follows the images' size, the grid must fit the resolution budget
+MOSAIC_RESOLUTION_BUDGET = 1344   # Max mosaic side in pixels, keeps vision token count bounded
+MOSAIC_MIN_TILE_SIZE = 224        # Icons are upscaled to at least this for legibility
+MOSAIC_MAX_TILE_SIZE = 448        # Larger previews are downscaled to at most this
+MOSAIC_MAX_TILES = 16             # Caps the structured response length per prediction
+MOSAIC_TOKENS_PER_TILE = 48       # Response budget per caption in a mosaic prediction
+
+# Progressive Analysis - captions and summaries first show a quick answer from a
+# downscaled image, then replace it with the full-resolution answer
+PROGRESSIVE_ANALYSIS = True           # Off: one full-resolution prediction per request
+PROGRESSIVE_PREVIEW_SIZE = 448        # Few vision tokens, so the preview returns quickly
+PROGRESSIVE_PREVIEW_MAX_TOKENS = 96   # Short preview; the full pass gives the detail
+
+# Semantic Answer Cache - near-identical questions about the same image reuse a stored answer
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.92           # Cosine similarity required for a hit (1.0 = same normalized question)
+SEMANTIC_CACHE_MAX_IMAGES = 256           # Least recently used images are evicted beyond this
+SEMANTIC_CACHE_MAX_ENTRIES_PER_IMAGE = 64 # Oldest answers for an image are evicted beyond this
+SEMANTIC_CACHE_DIMENSIONS = 1024          # Hashed feature space for question embeddings
+
+# Prompt Building - each session's conversation history is formatted once and
+# extended turn by turn instead of being rebuilt for every request
+PROMPT_BUILDER_MAX_SESSIONS = 256   # Least recently active sessions are rebuilt on their next message
+
+# History Window - only the newest turns within the token budget are sent verbatim,
+# older turns are folded into a rolling summary refreshed in the background
+PROMPT_HISTORY_TOKEN_BUDGET = 2048  # Approximate tokens (see utils.text_utils.estimate_tokens)
+PROMPT_SUMMARY_ENABLED = True       # When off, turns outside the window are dropped
+PROMPT_SUMMARY_MAX_TOKENS = 200     # Length limit of the rolling summary
+PROMPT_SUMMARY_WORKERS = 2          # Summaries running at once across all sessions
+
+# Session Store - chat histories stay on the server, events only carry the turns they change
+SESSION_STORE_DB = None             # e.g. "hearsee_sessions.db" to keep conversations across restarts
+SESSION_STORE_TTL = 7 * 24 * 3600   # Closed tabs' conversations are kept for a week
+SESSION_STORE_SWEEP_INTERVAL = 3600.0
+
+# Regenerate - the last turn's request (prompt, encoded image, limits) is recorded and
+# replayed without validation, encoding or prompt building. The pinned Qwen2-VL
+# version samples by default and declares no seed or temperature input, so these
+# stay off unless the model is switched to a version that accepts them
+REGENERATE_REPLAY = True
+REGENERATE_TEMPERATURE = None       # e.g. 0.9 for more varied alternatives
+REGENERATE_RANDOM_SEED = False      # Adds a random "seed" input to each replay
+
+# Regenerate Alternatives - several completions of the replayed request run at once,
+# the first to answer streams into the chat and the others can be picked when done
+REGENERATE_CANDIDATES = 3           # Capped by the Replicate concurrency limit
+REGENERATE_ALTERNATIVES_DEFAULT = False
+
 # Image Processing Settings - prevents uploading excessively large images
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB in bytes (10 * 1024KB * 1024B)
 
@@ -34,7 +189,7 @@ INIT_HISTORY = [
     ["Hello! Can you help me analyze an image?",
      "Of course! I'd be happy to help. You can upload an image using the Upload Image button below."],
     ["What kind of images can I upload?",
-     "You can upload most common image formats (JPG, PNG, etc.). Once uploaded, I can help you with:\n- Extracting text from the image\n- Generating image captions\n- Providing accurate image summaries\n I can also convert text to speech for you.\n Please bear in mind that I can only process one image at a time and responses may be cut off around approximately 310 words due to API limitations."],
+     "You can upload most common image formats (JPG, PNG, etc.). Once uploaded, I can help you with:\n- Extracting text from the image\n- Generating image captions\n- Providing accurate image summaries\n I can also convert text to speech for you.\n Please bear in mind that I can only process one image at a time. Long responses are continued automatically, so they may take a little longer to finish."],
     ["That sounds great!",
      "Feel free to upload an image whenever you're ready. I'm here to help! 😊"]
 ]
@@ -57,4 +212,90 @@ TTS_SPEED_RANGE = (0.5, 2.0)  # (min_speed, max_speed)
 
 # Default TTS Settings - used when user doesn't specify preferences
 DEFAULT_VOICE = "Female River (American)"  # Must match a key in VOICE_TYPES
-DEFAULT_SPEED = 1.0  # Normal speaking rate (1.0x)
\ No newline at end of file
+DEFAULT_SPEED = 1.0  # Normal speaking rate (1.0x)
+
+# Chunked TTS - long answers are synthesized sentence by sentence and streamed in order
+TTS_CHUNK_MAX_CHARS = 300     # Roughly two sentences, a few seconds of speech per chunk
+TTS_MAX_PARALLEL_CHUNKS = 4   # Concurrent chunk predictions per response
+
+# Local time-stretching - speech is synthesized (and cached) at 1.0x and other
+# speeds are produced with a pitch-preserving time-stretch on the server
+TTS_LOCAL_TIME_STRETCH = True
+
+# Audio post-processing - each synthesized chunk is trimmed and level-matched,
+# and chunks are joined with a short crossfade instead of a hard cut
+TTS_POSTPROCESS = True
+TTS_SILENCE_THRESHOLD_DB = -45.0   # RMS level (dBFS) below which a 10ms frame counts as silence
+TTS_SILENCE_PAD = 0.1              # Seconds of silence kept around the speech of each chunk
+TTS_TARGET_LOUDNESS_DBFS = -20.0   # RMS level of speech after normalization, peaks are held below -1 dBFS
+TTS_CROSSFADE_SECONDS = 0.01       # Overlap between consecutive chunks
+
+# Conversation export - all answers of a session narrated into one file. Exports
+# run in their own event queue and worker pool, so they never hold up chat or playback
+EXPORT_MAX_WORKERS = 2          # Below TTS_MAX_PARALLEL_CHUNKS, interactive speech keeps priority on the API
+EXPORT_MESSAGE_PAUSE = 0.8      # Seconds, marks where one answer ends and the next begins
+EXPORT_CONCURRENCY_LIMIT = 2
+
+# Auto-speak - complete sentences of a streaming answer are synthesized while
+# the rest is still being generated
+AUTO_SPEAK_DEFAULT = False
+AUTO_SPEAK_MIN_CHARS = 40     # A short first sentence starts playback without wasting a prediction on "Sure."
+
+# Static Audio - INIT_HISTORY answers and the voice preview phrase can be rendered
+# into the audio cache for every voice (also offline: python -m services.static_audio)
+VOICE_PREVIEW_TEXT = "Hello! This is how I will sound when I read your image descriptions aloud."
+STATIC_AUDIO_PRERENDER = False  # Costs a prediction per text and voice; enable for deployments with a persistent cache
+STATIC_AUDIO_WORKERS = 2      # Low, so the pre-render does not crowd out user requests at startup
+
+# TTS Prefetch - opt-in background synthesis of each new bot message with the
+# session's current voice and speed; a newer message or a cleared chat cancels it
+TTS_PREFETCH_ENABLED = False
+TTS_PREFETCH_WORKERS = 1      # Low priority: each job synthesizes one chunk at a time, so this caps prefetch predictions
+TTS_PREFETCH_DELAY = 1.0      # Quick follow-up messages supersede the job before it costs a prediction
+
+# Audio Delivery - "download" streams speech through the server (needed for the
+# audio cache), "url" hands the browser the Replicate output URL and skips the
+# server-side download; "url" only takes effect when TTS_CACHE_ENABLED is False
+TTS_AUDIO_DELIVERY = "download"
+
+# Delivered Audio Format - the final speech file is encoded with ffmpeg when it is
+# installed (Safari gets MP3 instead of Opus) and falls back to WAV at
+# TTS_AUDIO_SAMPLE_RATE otherwise
+TTS_AUDIO_FORMAT = "opus"
+TTS_AUDIO_SAMPLE_RATE = 24000             # Kokoro's native rate; Opus accepts 8k, 12k, 16k, 24k or 48k
+TTS_AUDIO_BITRATE = "32k"                 # Transparent for speech in Opus, ~10x smaller than 16-bit WAV
+
+# Audio Download - pooled keep-alive session, audio is streamed straight to disk
+AUDIO_HTTP_POOL_SIZE = 16                 # Enough for concurrent chunk downloads of several users
+AUDIO_DOWNLOAD_RETRIES = 2
+AUDIO_DOWNLOAD_TIMEOUT = (5.0, 60.0)      # (connect, read) seconds
+AUDIO_DOWNLOAD_CHUNK_SIZE = 64 * 1024     # Peak download memory per request
+
+# Audio Store - generated speech lives in per-session directories and is
+# reclaimed by a background reaper instead of piling up in /tmp
+AUDIO_STORE_DIR = None                    # None uses a "hearsee_audio" folder in the system temp directory
+AUDIO_STORE_USE_TMPFS = False             # RAM-backed /dev/shm keeps short-lived audio off the disk
+AUDIO_STORE_MAX_BYTES = 500 * 1024 * 1024 # 500MB across all sessions
+AUDIO_STORE_MAX_AGE = 3600.0              # One hour, long enough to replay or download a response
+AUDIO_STORE_REAP_INTERVAL = 60.0
+
+# TTS Audio Cache - replays and repeated messages skip the prediction and download
+TTS_CACHE_ENABLED = True
+TTS_CACHE_DIR = None                      # None uses a "hearsee_tts_cache" folder in the system temp directory
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024   # 200MB, roughly 70 minutes of 24kHz speech
+
+# Gradio Queue - every event joins the concurrency group of its kind, so cheap UI
+# updates never wait behind model calls and one slow kind of request does not
+# hold up the others. Gradio's default is one running event per handler; the
+# model calls themselves are still bounded by the adaptive concurrency limiter
+QUEUE_CONCURRENCY_LIMITS = {
+    "ui": None,                           # Button states and bookkeeping, a few milliseconds each
+    "chat": 8,                            # Chat answers and regenerates, mostly waiting on the vision model
+    "image": 4,                           # Text extraction, captions and summaries, larger uploads per request
+    "speech": 4,                          # Play Last Response, auto-spoken answers and voice previews
+    "export": EXPORT_CONCURRENCY_LIMIT,   # Whole-conversation narration, the longest events
+}
+QUEUE_DEFAULT_CONCURRENCY_LIMIT = 1
+QUEUE_MAX_SIZE = 64                       # Waiting users beyond this get "queue full" instead of a long wait
+QUEUE_STATUS_UPDATE_RATE = "auto"         # Send the queue position whenever it changes
+QUEUE_MAX_THREADS = 40                    # Above the sum of the limited groups, leaving room for UI events
@@ -4,11 +4,23 @@
 from .image_service import ImageService
 from .replicate_service import ReplicateService
 from .tts_service import TTSService
+from .token_pool import TokenPool
+from .semantic_cache import SemanticAnswerCache, semantic_cache
+from .audio_cache import AudioCache, audio_cache
+from .audio_store import AudioStore, audio_store
+from .speech_pipeline import SpeechPipeline
+from .static_audio import StaticAudio
+from .tts_prefetch import TTSPrefetcher, tts_prefetcher
+from .conversation_export import ConversationExport
+from .session_store import SessionStore, session_store, Turn, TurnAction, TurnRequest, HistoryView
 
 # Import specific functions from each module
 from .image_service import image_to_base64, verify_image_size
-from .replicate_service import verify_api_available, run_vision_model, run_tts_model
-from .tts_service import validate_voice_type, validate_speed, process_audio
+from .replicate_service import (verify_api_available, run_vision_model, stream_vision_model,
+                                stream_vision_candidates, run_tts_model)
+from .tts_service import validate_voice_type, validate_speed, process_audio, stream_audio
+from .static_audio import prerender_static_audio, stream_voice_preview
+from .conversation_export import export_conversation
 
 # Export everything
 __all__ = [
@@ -16,14 +28,38 @@ __all__ = [
     'ImageService',
     'ReplicateService',
     'TTSService',
+    'TokenPool',
+    'SemanticAnswerCache',
+    'semantic_cache',
+    'AudioCache',
+    'audio_cache',
+    'AudioStore',
+    'audio_store',
+    'SpeechPipeline',
+    'StaticAudio',
+    'TTSPrefetcher',
+    'tts_prefetcher',
+    'ConversationExport',
+    'SessionStore',
+    'session_store',
+    'Turn',
+    'TurnAction',
+    'TurnRequest',
+    'HistoryView',
     
     # Functions
     'image_to_base64',
     'verify_image_size',
     'verify_api_available',
     'run_vision_model',
+    'stream_vision_model',
+    'stream_vision_candidates',
     'run_tts_model',
     'validate_voice_type',
     'validate_speed',
-    'process_audio'
+    'process_audio',
+    'stream_audio',
+    'prerender_static_audio',
+    'stream_voice_preview',
+    'export_conversation'
 ]
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""Disk-backed cache of synthesized speech.
+
+This module provides a least-recently-used cache of WAV files keyed by a
+hash of the normalized text, voice ID, speed and TTS model version. Users
+often replay the same response, and the welcome messages are spoken over and
+over, so a cache hit skips both the prediction and the audio download.
+Compressed copies for delivery are cached next to the WAV files, so they are
+encoded only once. The cache survives restarts: existing files are re-indexed on startup, ordered by
+their last access time.
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+
+from config.settings import (
+    KOKORO_TTS_MODEL,
+    TTS_CACHE_ENABLED,
+    TTS_CACHE_DIR,
+    TTS_CACHE_MAX_BYTES
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Cached WAV files are named <sha256 hex>.wav; encoded files keep their suffix in the key
+CACHE_FILE_SUFFIX = ".wav"
+ENCODED_FILE_SUFFIXES = (".ogg", ".mp3")
+
+
+def audio_cache_key(text, voice_id, speed, model=KOKORO_TTS_MODEL, encoding=None, suffix=CACHE_FILE_SUFFIX):
+    """
+    Build the cache key for a synthesis request.
+
+    Whitespace is collapsed so reformatted copies of the same text share an
+    entry, and speed is rounded to two decimals so slider noise does not
+    create new entries. The model version is part of the key, so upgrading
+    the model never serves audio from the old one. Encoded copies of the
+    audio (see TTSService.encode_audio) add their encoding settings to the
+    hash and carry their file suffix in the key.
+
+    Args:
+        text (str): Text to be spoken.
+        voice_id (str): Validated voice ID.
+        speed (float): Validated speech speed.
+        model (str, optional): TTS model identifier. Defaults to KOKORO_TTS_MODEL.
+        encoding (str, optional): Format, sample rate and bitrate of an encoded copy.
+        suffix (str, optional): File suffix of the cached audio. Defaults to ".wav".
+
+    Returns:
+        str: Hex SHA-256 digest, followed by the suffix for non-WAV audio.
+
+    Example:
+        >>> audio_cache_key("Hello  world", "af_river", 1.0) == audio_cache_key("Hello world", "af_river", 1.0)
+        True
+    """
+    normalized = re.sub(r"\s+", " ", text or "").strip()
+    parts = [normalized, voice_id or "", f"{float(speed):.2f}", model]
+    if encoding:
+        parts.append(encoding)
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return digest if suffix == CACHE_FILE_SUFFIX else f"{digest}{suffix}"
+
+
+class AudioCache:
+    """
+    Byte-budgeted LRU cache of audio files on disk.
+
+    Entries are evicted least-recently-used once their total size exceeds
+    max_bytes. Files returned by get() belong to the cache and must not be
+    deleted by the caller; an entry whose file has vanished is treated as a
+    miss.
+
+    Example:
+        >>> cache = AudioCache("/tmp/hearsee_tts_cache", max_bytes=50 * 1024 * 1024)
+        >>> key = audio_cache_key(text, voice_id, speed)
+        >>> path = cache.get(key) or cache.put(key, synthesize(text))
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, enabled=TTS_CACHE_ENABLED):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "hearsee_tts_cache")
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()   # key -> file size in bytes, least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.enabled:
+            self._load_index()
+
+    def _path(self, key):
+        """Return the file path for a cache key."""
+        if key.endswith(ENCODED_FILE_SUFFIXES):
+            return os.path.join(self.directory, key)
+        return os.path.join(self.directory, f"{key}{CACHE_FILE_SUFFIX}")
+
+    def _load_index(self):
+        """Index files left by a previous run, oldest access first."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            found = []
+            for name in os.listdir(self.directory):
+                if name.endswith(CACHE_FILE_SUFFIX):
+                    key = name[:-len(CACHE_FILE_SUFFIX)]
+                elif name.endswith(ENCODED_FILE_SUFFIXES):
+                    key = name
+                else:
+                    continue
+                stat = os.stat(os.path.join(self.directory, name))
+                found.append((stat.st_mtime, key, stat.st_size))
+        except OSError as e:
+            logger.warning(f"Audio cache disabled, cannot use {self.directory}: {e}")
+            self.enabled = False
+            return
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        with self._lock:
+            self._evict()
+        if self._entries:
+            logger.info(f"Audio cache loaded {len(self._entries)} files ({self._total_bytes} bytes)")
+
+    def get(self, key):
+        """
+        Look up cached audio.
+
+        Args:
+            key (str): Key from audio_cache_key.
+
+        Returns:
+            str or None: Path of the cached audio file, or None on a miss.
+
+        Example:
+            >>> path = audio_cache.get(key)
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                # The modification time doubles as the access time, so LRU order survives restarts
+                os.utime(path)
+            except OSError:
+                logger.warning(f"Cached audio file vanished: {path}")
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return path
+
+    def contains(self, key):
+        """
+        Check whether audio is cached, without side effects.
+
+        Unlike get(), this neither counts a hit or miss nor refreshes the
+        entry's position in the LRU order, so bulk checks (e.g. before a
+        pre-render) leave the statistics and the eviction order alone.
+
+        Args:
+            key (str): Key from audio_cache_key.
+
+        Returns:
+            bool: True if the audio is cached.
+
+        Example:
+            >>> if not audio_cache.contains(key):
+            >>>     synthesize(text)
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            return key in self._entries and os.path.exists(self._path(key))
+
+    def put(self, key, content):
+        """
+        Store audio in the cache.
+
+        Args:
+            key (str): Key from audio_cache_key.
+            content (bytes): WAV file content.
+
+        Returns:
+            str or None: Path of the cached file, or None if caching is
+                         disabled, the audio exceeds the budget or the write failed.
+
+        Example:
+            >>> path = audio_cache.put(key, wav_bytes)
+        """
+        if not self.enabled or not content or len(content) > self.max_bytes:
+            return None
+
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            # Write then rename, so a crash never leaves a truncated file under a valid key
+            with open(temp_path, "wb") as temp_file:
+                temp_file.write(content)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing cached audio file: {e}", exc_info=True)
+            return None
+
+        return self._add(key, len(content))
+
+    def put_file(self, key, source_path):
+        """
+        Store an audio file in the cache by copying it.
+
+        The file is copied in blocks, so large files are never held in memory.
+
+        Args:
+            key (str): Key from audio_cache_key.
+            source_path (str): Path of the audio file to cache.
+
+        Returns:
+            str or None: Path of the cached file, or None if caching is
+                         disabled, the file exceeds the budget or the copy failed.
+
+        Example:
+            >>> path = audio_cache.put_file(key, "/tmp/speech.wav")
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            size = os.path.getsize(source_path)
+            if not size or size > self.max_bytes:
+                return None
+            # Copy then rename, so a crash never leaves a truncated file under a valid key
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing cached audio file: {e}", exc_info=True)
+            return None
+
+        return self._add(key, size)
+
+    def _add(self, key, size):
+        """Index a file that was just written and apply the budget."""
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+            return self._path(key) if key in self._entries else None
+
+    def _evict(self):
+        """Delete least recently used files until within budget. Caller must hold the lock."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+            logger.debug(f"Evicted cached audio {key[:12]} ({size} bytes)")
+
+    def clear(self):
+        """Delete all cached files and reset statistics."""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.unlink(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate, files and bytes keys.
+
+        Example:
+            >>> print(audio_cache.stats()["hit_rate"])
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+
+# Shared cache used by the TTS service
+audio_cache = AudioCache()
@@ -0,0 +1,289 @@
+"""Managed storage for generated audio files.
+
+This module provides the AudioStore, which owns every WAV file produced for
+playback or download. Files live in one directory per browser session and a
+background reaper deletes them once they are older than a maximum age or the
+store exceeds its byte quota (least recently used first), so generated speech
+no longer accumulates in the system temp directory. The store can be placed
+on tmpfs (/dev/shm) to keep short-lived audio off the disk entirely.
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+
+from config.settings import (
+    AUDIO_STORE_DIR,
+    AUDIO_STORE_USE_TMPFS,
+    AUDIO_STORE_MAX_BYTES,
+    AUDIO_STORE_MAX_AGE,
+    AUDIO_STORE_REAP_INTERVAL
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Directory for files not tied to a browser session (e.g. direct process_audio calls)
+SHARED_SESSION = "shared"
+
+# RAM-backed filesystem available on most Linux hosts
+TMPFS_ROOT = "/dev/shm"
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def resolve_store_root(directory=AUDIO_STORE_DIR, use_tmpfs=AUDIO_STORE_USE_TMPFS):
+    """
+    Choose the root directory of the audio store.
+
+    Args:
+        directory (str, optional): Explicit root directory. Takes precedence when set.
+        use_tmpfs (bool, optional): Place the store on /dev/shm when it is available.
+
+    Returns:
+        tuple: (root_path, on_tmpfs)
+
+    Example:
+        >>> root, on_tmpfs = resolve_store_root(None, use_tmpfs=True)
+    """
+    if directory:
+        return directory, directory.startswith(TMPFS_ROOT)
+    if use_tmpfs:
+        if os.path.isdir(TMPFS_ROOT) and os.access(TMPFS_ROOT, os.W_OK):
+            return os.path.join(TMPFS_ROOT, "hearsee_audio"), True
+        logger.warning(f"{TMPFS_ROOT} is not available, storing audio on disk")
+    return os.path.join(tempfile.gettempdir(), "hearsee_audio"), False
+
+
+class AudioStore:
+    """
+    Quota-managed store of generated audio files.
+
+    Files are created with new_path() in a per-session directory. reap()
+    deletes files older than max_age seconds and then the least recently
+    modified files until the store fits in max_bytes; start_reaper() runs it
+    every reap_interval seconds on a daemon thread.
+
+    Example:
+        >>> store = AudioStore()
+        >>> store.start_reaper()
+        >>> path = store.new_path(session_id=request.session_hash)
+        >>> print(store.metrics()["bytes"])
+    """
+
+    def __init__(self, directory=AUDIO_STORE_DIR, use_tmpfs=AUDIO_STORE_USE_TMPFS,
+                 max_bytes=AUDIO_STORE_MAX_BYTES, max_age=AUDIO_STORE_MAX_AGE,
+                 reap_interval=AUDIO_STORE_REAP_INTERVAL):
+        self.root, self.on_tmpfs = resolve_store_root(directory, use_tmpfs)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.reap_interval = reap_interval
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reaper = None
+        self.reaps = 0
+        self.reclaimed_files = 0
+        self.reclaimed_bytes = 0
+        self.last_reap = None
+
+    def _session_dir(self, session_id):
+        """Return (and create) the directory for a session."""
+        if not session_id:
+            name = SHARED_SESSION
+        elif SESSION_ID_PATTERN.match(session_id):
+            name = session_id
+        else:
+            # Never build paths from arbitrary strings
+            name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def new_path(self, session_id=None, suffix=".wav"):
+        """
+        Create an empty audio file in the store.
+
+        Args:
+            session_id (str, optional): Browser session that owns the file.
+            suffix (str, optional): File extension. Defaults to ".wav".
+
+        Returns:
+            str: Path of the new file.
+
+        Raises:
+            OSError: If the file cannot be created.
+
+        Example:
+            >>> path = audio_store.new_path(session_id="abc123")
+        """
+        # Under the lock, so reap() cannot remove the session directory in between
+        with self._lock:
+            file_descriptor, path = tempfile.mkstemp(suffix=suffix, dir=self._session_dir(session_id))
+        os.close(file_descriptor)
+        return path
+
+    def _scan(self):
+        """List (mtime, size, path) for every file in the store."""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for session in os.scandir(self.root):
+            if not session.is_dir():
+                continue
+            for entry in os.scandir(session.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.is_file():
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _remove(self, path, size):
+        """Delete one file and count it as reclaimed. Returns True on success."""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.error(f"Error reclaiming audio file {path}: {e}", exc_info=True)
+            return False
+        self.reclaimed_files += 1
+        self.reclaimed_bytes += size
+        return True
+
+    def reap(self, now=None):
+        """
+        Delete expired files, then the oldest files until within quota.
+
+        Args:
+            now (float, optional): Current time for the age check. Defaults to time.time().
+
+        Returns:
+            int: Number of files deleted.
+
+        Example:
+            >>> removed = audio_store.reap()
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entries = sorted(self._scan())
+            removed = 0
+            kept = []
+            for mtime, size, path in entries:
+                if now - mtime > self.max_age:
+                    removed += self._remove(path, size)
+                else:
+                    kept.append((mtime, size, path))
+
+            total = sum(size for _, size, _ in kept)
+            for mtime, size, path in kept:
+                if total <= self.max_bytes:
+                    break
+                if self._remove(path, size):
+                    removed += 1
+                    total -= size
+
+            # Drop session directories that are now empty
+            if os.path.isdir(self.root):
+                for session in os.scandir(self.root):
+                    if session.is_dir():
+                        try:
+                            os.rmdir(session.path)
+                        except OSError:
+                            pass
+
+            self.reaps += 1
+            self.last_reap = now
+
+        if removed:
+            logger.info(f"Audio store reclaimed {removed} files")
+        return removed
+
+    def release_session(self, session_id):
+        """
+        Delete all files of a session, e.g. when its browser tab closes.
+
+        Args:
+            session_id (str): Browser session to release.
+
+        Example:
+            >>> audio_store.release_session(request.session_hash)
+        """
+        if not session_id:
+            return
+        with self._lock:
+            path = self._session_dir(session_id)
+            for entry in os.scandir(path):
+                try:
+                    self._remove(entry.path, entry.stat().st_size)
+                except FileNotFoundError:
+                    pass
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _run_reaper(self):
+        """Reaper thread body."""
+        while not self._stop_event.wait(self.reap_interval):
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error(f"Audio store reaper failed: {e}", exc_info=True)
+
+    def start_reaper(self):
+        """
+        Start the background reaper thread (no-op if already running).
+
+        Example:
+            >>> audio_store.start_reaper()
+        """
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._stop_event.clear()
+        self._reaper = threading.Thread(target=self._run_reaper, name="audio-store-reaper", daemon=True)
+        self._reaper.start()
+        logger.info(f"Audio store reaper started for {self.root} "
+                    f"(quota {self.max_bytes} bytes, max age {self.max_age}s)")
+
+    def stop_reaper(self):
+        """Stop the background reaper thread."""
+        self._stop_event.set()
+        if self._reaper is not None:
+            self._reaper.join(timeout=5)
+            self._reaper = None
+
+    def metrics(self):
+        """
+        Get disk usage and reclaim statistics.
+
+        Returns:
+            dict: root, on_tmpfs, files, bytes, max_bytes, sessions, reaps,
+                  reclaimed_files, reclaimed_bytes and last_reap keys.
+
+        Example:
+            >>> usage = audio_store.metrics()
+            >>> print(f"{usage['bytes']} of {usage['max_bytes']} bytes used")
+        """
+        with self._lock:
+            entries = self._scan()
+            sessions = {os.path.dirname(path) for _, _, path in entries}
+            return {
+                "root": self.root,
+                "on_tmpfs": self.on_tmpfs,
+                "files": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "sessions": len(sessions),
+                "reaps": self.reaps,
+                "reclaimed_files": self.reclaimed_files,
+                "reclaimed_bytes": self.reclaimed_bytes,
+                "last_reap": self.last_reap,
+            }
+
+
+# Shared store used by the TTS service
+audio_store = AudioStore()
@@ -0,0 +1,264 @@
+"""Adaptive concurrency control for Replicate predictions.
+
+This module provides an AIMD (additive increase, multiplicative decrease)
+limiter that bounds the number of in-flight predictions. The limit grows
+slowly while latency and error rate stay healthy and is cut sharply when the
+API starts throttling (HTTP 429) or latency spikes, which avoids both idle
+capacity and throttling storms.
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+from config.settings import (
+    REPLICATE_CONCURRENCY_INITIAL,
+    REPLICATE_CONCURRENCY_MIN,
+    REPLICATE_CONCURRENCY_MAX,
+    AIMD_INCREASE_STEP,
+    AIMD_DECREASE_FACTOR,
+    AIMD_LATENCY_SPIKE_RATIO,
+    AIMD_ERROR_RATE_THRESHOLD,
+    AIMD_DECREASE_COOLDOWN,
+    CONCURRENCY_ACQUIRE_TIMEOUT
+)
+from .token_pool import is_rate_limit_error
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Smoothing factor for the per-key latency baseline (exponentially weighted average)
+LATENCY_EWMA_ALPHA = 0.2
+
+# Calls faster than this are never treated as latency spikes, so jitter on
+# very fast calls cannot cut the limit
+MIN_SPIKE_LATENCY = 1.0
+
+
+class CallTiming:
+    """
+    Timing of one call made inside AdaptiveConcurrencyLimiter.acquire.
+
+    The total duration of a call grows with the length of its output, so a
+    long answer would look like a latency spike. A streamed call reports
+    when its first output arrives and is judged by its time to first
+    output; a blocking call reports how many tokens it produced (or read)
+    and is judged by its latency per token.
+
+    Example:
+        >>> with limiter.acquire(key=model) as timing:
+        >>>     for event in replicate.stream(model, input=params):
+        >>>         timing.first_output()
+    """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.first_output_latency = None
+        self.output_units = None
+
+    def first_output(self):
+        """Record the arrival of the first streamed output (later calls are ignored)."""
+        if self.first_output_latency is None:
+            self.first_output_latency = time.monotonic() - self.start
+
+    def output(self, units):
+        """Record the size of a blocking call's output, e.g. its token count."""
+        self.output_units = units
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limiter for in-flight API calls.
+
+    Each successful call with normal latency, made while the limit is close
+    to fully used, raises the limit by increase_step / limit (roughly
+    +increase_step per "round" of calls).
+    A rate limit response, a latency spike (latency above
+    latency_spike_ratio times the baseline for that call type) or an error
+    rate above error_rate_threshold multiplies the limit by decrease_factor.
+    Latency is normalized for the output length as reported through the
+    CallTiming the block receives, each signal with a baseline of its own.
+    Decreases are spaced at least decrease_cooldown seconds apart so one
+    burst of failures only counts once.
+
+    Example:
+        >>> limiter = AdaptiveConcurrencyLimiter()
+        >>> with limiter.acquire(key="vision") as timing:
+        >>>     output = replicate.run(model, input=params)
+        >>>     timing.output(estimate_tokens("".join(output)))
+        >>> print(limiter.metrics()["limit"])
+    """
+
+    def __init__(self,
+                 initial_limit=REPLICATE_CONCURRENCY_INITIAL,
+                 min_limit=REPLICATE_CONCURRENCY_MIN,
+                 max_limit=REPLICATE_CONCURRENCY_MAX,
+                 increase_step=AIMD_INCREASE_STEP,
+                 decrease_factor=AIMD_DECREASE_FACTOR,
+                 latency_spike_ratio=AIMD_LATENCY_SPIKE_RATIO,
+                 error_rate_threshold=AIMD_ERROR_RATE_THRESHOLD,
+                 decrease_cooldown=AIMD_DECREASE_COOLDOWN,
+                 window_size=20,
+                 history_size=200):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_spike_ratio = latency_spike_ratio
+        self.error_rate_threshold = error_rate_threshold
+        self.decrease_cooldown = decrease_cooldown
+
+        self._limit = float(max(min_limit, min(max_limit, initial_limit)))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._baselines = {}                          # Latency baseline per call type
+        self._outcomes = deque(maxlen=window_size)    # True for success, False for error
+        self._history = deque(maxlen=history_size)    # (timestamp, limit, reason)
+        self._last_decrease = float("-inf")
+        self._history.append((time.time(), self.limit, "initial"))
+
+    @property
+    def limit(self):
+        """Current number of predictions allowed in flight."""
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self):
+        """Number of predictions currently in flight."""
+        return self._in_flight
+
+    @contextmanager
+    def acquire(self, key="default", timeout=CONCURRENCY_ACQUIRE_TIMEOUT):
+        """
+        Wait for a free slot, then hold it for the duration of one call.
+
+        The time spent inside the block is recorded as the call latency and
+        any exception is classified (rate limit or error) before being
+        re-raised. The block receives a CallTiming: a streamed call's time
+        to first output, or a blocking call's latency per output unit, is
+        used instead of the total duration when it is reported.
+
+        Args:
+            key (str, optional): Call type used for the latency baseline
+                                 (e.g. the model identifier). Defaults to "default".
+            timeout (float, optional): Maximum seconds to wait for a slot.
+
+        Yields:
+            CallTiming: Timing of the call, to report its first output or output size.
+
+        Raises:
+            RuntimeError: If no slot becomes available within timeout.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._in_flight < self.limit, timeout=timeout):
+                raise RuntimeError(f"Timed out waiting for a prediction slot "
+                                   f"(limit {self.limit}, in flight {self._in_flight})")
+            self._in_flight += 1
+
+        timing = CallTiming()
+        try:
+            yield timing
+        except Exception as e:
+            self._record_error(rate_limited=is_rate_limit_error(e))
+            raise
+        else:
+            duration = time.monotonic() - timing.start
+            if timing.first_output_latency is not None:
+                self._record_success(f"{key} first output", timing.first_output_latency,
+                                     timing.first_output_latency)
+            elif timing.output_units:
+                self._record_success(f"{key} per token", duration / timing.output_units, duration)
+            else:
+                self._record_success(key, duration, duration)
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def _error_rate(self):
+        """Fraction of failed calls in the sliding window. Caller must hold the lock."""
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _record_success(self, key, latency, duration):
+        """
+        Grow the limit unless the call was a latency spike.
+
+        Args:
+            key (str): Baseline the latency signal is compared with.
+            latency (float): Latency signal, e.g. seconds to first output or per token.
+            duration (float): Seconds the caller waited, checked against MIN_SPIKE_LATENCY.
+        """
+        with self._cond:
+            self._outcomes.append(True)
+            baseline = self._baselines.get(key)
+            is_spike = (baseline is not None and duration > MIN_SPIKE_LATENCY
+                        and latency > baseline * self.latency_spike_ratio)
+            if is_spike:
+                self._decrease(f"latency spike ({key}: {latency:.3f}s vs {baseline:.3f}s baseline)")
+            elif self._error_rate() <= self.error_rate_threshold:
+                self._increase()
+
+            # Update the baseline after the spike check so a spike is judged
+            # against the latency observed before it
+            if baseline is None:
+                self._baselines[key] = latency
+            else:
+                self._baselines[key] = (1 - LATENCY_EWMA_ALPHA) * baseline + LATENCY_EWMA_ALPHA * latency
+
+    def _record_error(self, rate_limited):
+        """Shrink the limit on throttling or a high error rate."""
+        with self._cond:
+            self._outcomes.append(False)
+            if rate_limited:
+                self._decrease("rate limited")
+            elif self._error_rate() > self.error_rate_threshold:
+                self._decrease(f"error rate {self._error_rate():.0%}")
+
+    def _increase(self):
+        """Additive increase. Caller must hold the lock."""
+        # Only grow a limit that is actually being used; otherwise an idle
+        # period would ratchet it up to max_limit without any evidence
+        if self._in_flight < self.limit - 1:
+            return
+        previous = self.limit
+        self._limit = min(float(self.max_limit), self._limit + self.increase_step / max(1.0, self._limit))
+        if self.limit != previous:
+            self._history.append((time.time(), self.limit, "increase"))
+            logger.debug(f"Concurrency limit raised to {self.limit}")
+            self._cond.notify_all()
+
+    def _decrease(self, reason):
+        """Multiplicative decrease, at most once per cooldown. Caller must hold the lock."""
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self._history.append((time.time(), self.limit, reason))
+        logger.warning(f"Concurrency limit cut to {self.limit}: {reason}")
+
+    def metrics(self):
+        """
+        Get a snapshot of the limiter state.
+
+        Returns:
+            dict: Current limit, in-flight count, error rate, latency
+                  baselines per call type and the limit history as a list
+                  of (timestamp, limit, reason) tuples.
+
+        Example:
+            >>> snapshot = limiter.metrics()
+            >>> print(f"Limit: {snapshot['limit']} | In flight: {snapshot['in_flight']}")
+        """
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "error_rate": self._error_rate(),
+                "latency_baselines": dict(self._baselines),
+                "history": list(self._history),
+            }
@@ -0,0 +1,293 @@
+"""Export a whole conversation as one narrated audio file.
+
+Teachers export an analyzed session for offline listening. The
+ConversationExport collects every bot answer in the history, splits the
+answers into sentence chunks and looks each of them up in the audio cache,
+so answers that were already played (or pre-synthesized) cost no new
+prediction and repeated sentences are synthesized once. The remaining chunks
+are synthesized on the export's own small worker pool, and the audio is
+merged on disk block by block into a single file.
+"""
+
+import os
+import time
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .tts_service import TTSService
+from .replicate_service import ReplicateService
+from .audio_cache import audio_cache, audio_cache_key
+from .audio_store import audio_store
+from config.settings import (
+    INIT_HISTORY,
+    DEFAULT_VOICE,
+    TTS_CHUNK_MAX_CHARS,
+    TTS_LOCAL_TIME_STRETCH,
+    EXPORT_MAX_WORKERS,
+    EXPORT_MESSAGE_PAUSE
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Start of the error messages shown in the chat instead of an answer
+ERROR_PREFIXES = ("Error", "Sorry, I encountered an error")
+
+# Module level functions (exported directly)
+def export_conversation(history, voice_type=None, speed=None, session_id=None, audio_format=None):
+    """
+    Narrate every bot answer in a conversation into one audio file.
+
+    Args:
+        history (list): Conversation history as a list of [user, bot] message pairs.
+        voice_type (str, optional): Voice to narrate with. Defaults to None.
+        speed (float, optional): Speech speed. Defaults to None.
+        session_id (str, optional): Browser session that owns the exported file.
+        audio_format (str, optional): Format of the exported file, see TTSService.encode_audio.
+
+    Yields:
+        tuple: (progress, status_message, file_path) - see ConversationExport.export.
+
+    Example:
+        >>> for progress, status, file_path in export_conversation(history, "Male George (British)"):
+        >>>     print(f"{progress:.0%} {status}")
+    """
+    yield from ConversationExport.export(history, voice_type, speed, session_id, audio_format)
+
+class ConversationExport:
+    @staticmethod
+    def bot_messages(history):
+        """
+        Get the bot answers of a conversation that are worth narrating.
+
+        The INIT_HISTORY welcome messages are part of every conversation and
+        are left out, as are empty messages and error notices (turns without
+        a user message and answers that report an error).
+
+        Args:
+            history (list): Conversation history as a list of [user, bot] message pairs.
+
+        Returns:
+            list: Bot messages in conversation order.
+
+        Example:
+            >>> ConversationExport.bot_messages(INIT_HISTORY + [["Caption this", "A red bus."]])
+            ['A red bus.']
+        """
+        welcome = {bot for _, bot in INIT_HISTORY}
+        return [bot for user, bot in history or []
+                if user is not None and isinstance(bot, str) and bot.strip() and bot not in welcome
+                and not bot.startswith(ERROR_PREFIXES)]
+
+    @staticmethod
+    def _pin(cached_path, session_id=None):
+        """
+        Give the export its own link to a cached file.
+
+        The export caches the chunks it synthesizes, which may evict the
+        files it planned to reuse. A hard link (or a copy on another file
+        system) in the audio store keeps the audio until the export is done.
+
+        Returns:
+            str: Path of the pinned file, or None if the cache already evicted it.
+        """
+        pinned_path = audio_store.new_path(session_id)
+        os.unlink(pinned_path)
+        try:
+            os.link(cached_path, pinned_path)
+        except FileNotFoundError:
+            return None
+        except OSError:
+            # Hard links do not cross file systems
+            try:
+                shutil.copyfile(cached_path, pinned_path)
+            except FileNotFoundError:
+                TTSService.cleanup_audio_file(pinned_path)
+                return None
+        return pinned_path
+
+    @staticmethod
+    def plan(messages, voice_id, synthesis_speed, session_id=None):
+        """
+        Split messages into segments and look them up in the audio cache.
+
+        A message that was played before is cached as a whole and becomes a
+        single segment. Other messages are split into sentence chunks, each
+        looked up under its own cache key; chunks with the same text share
+        one synthesis. Hits are pinned into the audio store (see _pin), so
+        later cache evictions cannot remove them; the caller deletes the
+        pinned files when it is done.
+
+        Args:
+            messages (list): Bot messages in order.
+            voice_id (str): Validated voice ID.
+            synthesis_speed (float): Speed the audio is synthesized and cached at.
+            session_id (str, optional): Browser session that owns the pinned files.
+
+        Returns:
+            tuple: (segments, cached_paths, misses)
+                - segments: One list of cache keys per message, in playback order
+                - cached_paths: Cache key -> pinned file path for the hits
+                - misses: Cache key -> chunk text still to be synthesized
+        """
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.text_utils import split_sentences
+
+        segments, cached_paths, misses = [], {}, {}
+        for message in messages:
+            message_key = audio_cache_key(message, voice_id, synthesis_speed)
+            cached = cached_paths.get(message_key)
+            if not cached:
+                cached = audio_cache.get(message_key)
+                if cached:
+                    cached = ConversationExport._pin(cached, session_id)
+            if cached:
+                cached_paths[message_key] = cached
+                segments.append([message_key])
+                continue
+            keys = []
+            for chunk in split_sentences(message, max_chars=TTS_CHUNK_MAX_CHARS):
+                key = audio_cache_key(chunk, voice_id, synthesis_speed)
+                if key not in cached_paths and key not in misses:
+                    cached = audio_cache.get(key)
+                    if cached:
+                        cached = ConversationExport._pin(cached, session_id)
+                    if cached:
+                        cached_paths[key] = cached
+                    else:
+                        misses[key] = chunk
+                keys.append(key)
+            segments.append(keys)
+        return segments, cached_paths, misses
+
+    @staticmethod
+    def _pause_file(sample_rate, session_id=None):
+        """Write the silence placed between two answers."""
+        # Lazy import avoids a circular import (utils imports services)
+        import numpy as np
+        from utils.audio_utils import write_wav
+
+        pause_path = audio_store.new_path(session_id)
+        write_wav(pause_path, np.zeros(int(sample_rate * EXPORT_MESSAGE_PAUSE), dtype=np.float32), sample_rate)
+        return pause_path
+
+    @staticmethod
+    def export(history, voice_type=None, speed=None, session_id=None, audio_format=None):
+        """
+        Narrate every bot answer in a conversation into one audio file.
+
+        Cached audio is reused (see plan), the remaining chunks are
+        synthesized concurrently, at most EXPORT_MAX_WORKERS at a time, and
+        cached for later replays. Answers are joined in order with
+        EXPORT_MESSAGE_PAUSE seconds of silence between them, stretched to
+        the requested speed and encoded. Only the current block of audio is
+        held in memory while the file is written.
+
+        Args:
+            history (list): Conversation history as a list of [user, bot] message pairs.
+            voice_type (str, optional): Voice to narrate with. Defaults to None.
+            speed (float, optional): Speech speed. Defaults to None.
+            session_id (str, optional): Browser session that owns the exported file.
+            audio_format (str, optional): Format of the exported file, see TTSService.encode_audio.
+
+        Yields:
+            tuple: (progress, status_message, file_path)
+                - progress: Fraction of the export completed, from 0.0 to 1.0
+                - status_message: Progress, success or error message
+                - file_path: Path of the exported file in the final update, otherwise None
+
+        Example:
+            >>> for progress, status, file_path in ConversationExport.export(history, speed=1.2):
+            >>>     print(status)
+            'Synthesizing 12 chunks (5 of 17 cached)...'
+            'Synthesized 1 of 12 chunks...'
+            ...
+            'Exported 4 answers (3:12) using Female River (American) voice at 1.2x speed | ...'
+        """
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.audio_utils import map_wav
+
+        messages = ConversationExport.bot_messages(history)
+        if not messages:
+            yield 1.0, "No answers to export.", None
+            return
+
+        voice_id = TTSService.validate_voice_type(voice_type)
+        safe_speed = TTSService.validate_speed(speed)
+        stretch = TTS_LOCAL_TIME_STRETCH and safe_speed != 1.0
+        synthesis_speed = 1.0 if TTS_LOCAL_TIME_STRETCH else safe_speed
+
+        segments, cached_paths, misses = ConversationExport.plan(messages, voice_id, synthesis_speed, session_id)
+        total = len(cached_paths) + len(misses)
+        logger.info(f"Exporting {len(messages)} answers: {len(cached_paths)} of {total} segments cached, "
+                    f"{len(misses)} to synthesize")
+
+        if misses:
+            api_available, error_msg = ReplicateService.verify_api_available()
+            if not api_available:
+                yield 1.0, error_msg, None
+                return
+
+        start_time = time.monotonic()
+        synthesized = {}    # cache key -> synthesized file owned by the export
+        temp_paths = []     # pause, stretched and merged files
+        file_path = None
+        executor = ThreadPoolExecutor(max_workers=max(1, min(EXPORT_MAX_WORKERS, len(misses) or 1)),
+                                      thread_name_prefix="audio-export")
+        try:
+            if misses:
+                yield 0.0, f"Synthesizing {len(misses)} chunks ({len(cached_paths)} of {total} cached)...", None
+                futures = {executor.submit(TTSService._synthesize_chunk, text, voice_id, synthesis_speed, session_id): key
+                           for key, text in misses.items()}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    key = futures[future]
+                    synthesized[key] = future.result()[0]
+                    # Cached chunk by chunk, so a failed export does not lose its finished predictions
+                    audio_cache.put_file(key, synthesized[key])
+                    yield 0.9 * done / len(misses), f"Synthesized {done} of {len(misses)} chunks...", None
+            synthesis_seconds = time.monotonic() - start_time
+
+            yield 0.9, "Assembling audio...", None
+            audio_paths = {**cached_paths, **synthesized}
+            ordered = []
+            for index, keys in enumerate(segments):
+                if index and EXPORT_MESSAGE_PAUSE > 0:
+                    if not temp_paths:
+                        _, sample_rate = map_wav(audio_paths[keys[0]])
+                        temp_paths.append(ConversationExport._pause_file(sample_rate, session_id))
+                    ordered.append(temp_paths[0])
+                for key in keys:
+                    path = audio_paths[key]
+                    if stretch:
+                        # Stretched segment by segment, so memory stays bounded for long exports
+                        path = TTSService._stretch_audio(path, safe_speed, session_id)
+                        temp_paths.append(path)
+                    ordered.append(path)
+
+            wav_path = TTSService._join_chunks(ordered, session_id)
+            if wav_path not in ordered:
+                temp_paths.append(wav_path)
+            frames, sample_rate = map_wav(wav_path)
+            duration = len(frames) / sample_rate
+            del frames
+
+            # A single WAV segment is returned as is, without a copy
+            file_path, delivered_format = TTSService.encode_audio(wav_path, audio_format, session_id)
+            minutes, seconds = divmod(int(round(duration)), 60)
+            status = (f"Exported {len(messages)} answers ({minutes}:{seconds:02d}) using {voice_type or DEFAULT_VOICE} "
+                      f"voice at {safe_speed}x speed | Cached: {len(cached_paths)} of {total} | "
+                      f"Synthesis: {synthesis_seconds:.2f}s | Total: {time.monotonic() - start_time:.2f}s | "
+                      f"Format: {delivered_format}")
+            logger.info(status)
+            yield 1.0, status, file_path
+
+        except Exception as e:
+            logger.error(f"Error exporting conversation audio: {str(e)}", exc_info=True)
+            yield 1.0, TTSService._format_error(e), None
+        finally:
+            # Stop pending chunks if the export failed or the listener went away
+            executor.shutdown(wait=False, cancel_futures=True)
+            for path in list(cached_paths.values()) + list(synthesized.values()) + temp_paths:
+                if path != file_path:
+                    TTSService.cleanup_audio_file(path)
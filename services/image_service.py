@@ -4,13 +4,21 @@ This module provides functionality for image conversion, validation, and metadat
 It includes both module-level functions and a class-based implementation.
 """
 
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 import io
 import base64
+import hashlib
 import numpy as np
 import logging
 
-from config.settings import MAX_IMAGE_SIZE
+from config.settings import (
+    MAX_IMAGE_SIZE,
+    MOSAIC_RESOLUTION_BUDGET,
+    MOSAIC_MIN_TILE_SIZE,
+    MOSAIC_MAX_TILE_SIZE,
+    MOSAIC_MAX_TILES,
+    PROGRESSIVE_PREVIEW_SIZE
+)
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
@@ -132,6 +140,61 @@ class ImageService:
         except Exception as e:
             return False, f"Error checking image size: {str(e)}"
 
+    @staticmethod
+    def image_digest(image):
+        """
+        Compute a content digest that identifies an image.
+        
+        The digest covers the pixel data, shape and dtype, so identical images
+        uploaded by different users produce the same digest.
+        
+        Args:
+            image (numpy.ndarray or PIL.Image): Image to identify.
+        
+        Returns:
+            str or None: Hex SHA-256 digest, or None if image is None.
+            
+        Example:
+            >>> digest = ImageService.image_digest(img)
+            >>> print(digest[:12])
+        """
+        if image is None:
+            return None
+        
+        array = np.ascontiguousarray(image)
+        hasher = hashlib.sha256()
+        hasher.update(f"{array.shape}|{array.dtype}".encode())
+        hasher.update(array.data)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def downscale_image(image, max_side=PROGRESSIVE_PREVIEW_SIZE):
+        """
+        Shrink an image so its longest side is at most max_side pixels.
+        
+        Fewer pixels means fewer vision tokens, so predictions on the
+        downscaled image return much faster. Smaller images are returned
+        unchanged (as a PIL Image).
+        
+        Args:
+            image (numpy.ndarray or PIL.Image): Image to shrink.
+            max_side (int, optional): Maximum width or height in pixels.
+        
+        Returns:
+            PIL.Image or None: The downscaled image, or None if image is None.
+            
+        Example:
+            >>> preview = ImageService.downscale_image(photo, max_side=448)
+            >>> print(preview.size)
+            (448, 336)
+        """
+        if image is None:
+            return None
+        
+        preview = ImageService._to_pil(image).copy()
+        preview.thumbnail((max_side, max_side))
+        return preview
+
     @staticmethod
     def preprocess_image(image):
         """
@@ -191,4 +254,97 @@ class ImageService:
             'format': image.format,  # Image format (PNG, JPEG, etc.)
             'mode': image.mode,      # Color mode (RGB, RGBA, etc.)
             'size': image.size       # Width and height in pixels
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def plan_mosaic(images, resolution_budget=MOSAIC_RESOLUTION_BUDGET,
+                    min_tile_size=MOSAIC_MIN_TILE_SIZE, max_tile_size=MOSAIC_MAX_TILE_SIZE,
+                    max_tiles=MOSAIC_MAX_TILES):
+        """
+        Choose the tile size and number of tiles per mosaic for a batch of images.
+        
+        The tile size follows the median longest side of the images, clamped to
+        [min_tile_size, max_tile_size], so tiny icons are packed densely while
+        larger previews keep enough detail. The number of tiles is whatever
+        fits in a resolution_budget x resolution_budget grid, capped at max_tiles.
+        
+        Args:
+            images (list): Images (numpy.ndarray or PIL.Image) to be tiled.
+            resolution_budget (int, optional): Maximum mosaic side length in pixels.
+            min_tile_size (int, optional): Smallest tile side length in pixels.
+            max_tile_size (int, optional): Largest tile side length in pixels.
+            max_tiles (int, optional): Maximum tiles in one mosaic.
+        
+        Returns:
+            tuple: (tile_size, tiles_per_mosaic)
+            
+        Example:
+            >>> tile_size, per_mosaic = ImageService.plan_mosaic(thumbnails)
+            >>> print(f"{per_mosaic} tiles of {tile_size}px")
+        """
+        if not images:
+            return min_tile_size, 0
+        
+        longest_sides = [max(ImageService._to_pil(image).size) for image in images]
+        tile_size = int(max(min_tile_size, min(max_tile_size, np.median(longest_sides))))
+        columns = max(1, resolution_budget // tile_size)
+        return tile_size, max(1, min(max_tiles, columns * columns))
+
+    @staticmethod
+    def build_mosaic(images, tile_size, labels=None):
+        """
+        Tile images into one labeled grid image.
+        
+        Each image is scaled to fit a tile_size square (keeping its aspect
+        ratio) on a white background, and a number label is drawn in the
+        top-left corner of the tile so the model can refer to it.
+        
+        Args:
+            images (list): Images (numpy.ndarray or PIL.Image) to tile.
+            tile_size (int): Side length of each square tile in pixels.
+            labels (list, optional): Label per image. Defaults to 1..N.
+        
+        Returns:
+            PIL.Image: The mosaic image (RGB).
+            
+        Raises:
+            ValueError: If images is empty.
+            
+        Example:
+            >>> mosaic = ImageService.build_mosaic(thumbnails, 224)
+            >>> mosaic.save("mosaic.png")
+        """
+        if not images:
+            raise ValueError("At least one image is required to build a mosaic")
+        
+        labels = labels or [str(i + 1) for i in range(len(images))]
+        columns = int(np.ceil(np.sqrt(len(images))))
+        rows = int(np.ceil(len(images) / columns))
+        gap = 4  # Separator between tiles so neighbouring images don't blend together
+        
+        mosaic = Image.new("RGB", (columns * tile_size + (columns - 1) * gap,
+                                   rows * tile_size + (rows - 1) * gap), "black")
+        font = ImageFont.load_default(size=max(12, tile_size // 10))
+        
+        for index, (image, label) in enumerate(zip(images, labels)):
+            tile = Image.new("RGB", (tile_size, tile_size), "white")
+            picture = ImageService._to_pil(image).convert("RGB")
+            picture.thumbnail((tile_size, tile_size))
+            tile.paste(picture, ((tile_size - picture.width) // 2, (tile_size - picture.height) // 2))
+            
+            # Label with a high-contrast box so it stays legible on any image
+            draw = ImageDraw.Draw(tile)
+            left, top, right, bottom = draw.textbbox((0, 0), label, font=font)
+            padding = max(2, tile_size // 64)
+            draw.rectangle((0, 0, right - left + 2 * padding, bottom - top + 2 * padding), fill="black")
+            draw.text((padding - left, padding - top), label, fill="yellow", font=font)
+            
+            row, column = divmod(index, columns)
+            mosaic.paste(tile, (column * (tile_size + gap), row * (tile_size + gap)))
+        
+        return mosaic
+
+    @staticmethod
+    def _to_pil(image):
+        """Return image as a PIL Image, converting numpy arrays."""
+        return image if isinstance(image, Image.Image) else Image.fromarray(image)
@@ -6,15 +6,24 @@ API validation, parameter preparation, and error handling.
 """
 
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import replicate
+from replicate.exceptions import ReplicateError
 import logging
 from dotenv import load_dotenv
 
 from config.settings import (
     QWEN_VL_MODEL, 
     KOKORO_TTS_MODEL, 
-    DEFAULT_MAX_TOKENS
+    DEFAULT_MAX_TOKENS,
+    MAX_CONTINUATIONS,
+    TRUNCATION_TOKEN_RATIO,
+    REGENERATE_CANDIDATES
 )
+from .token_pool import TokenPool, load_tokens_from_env
+from .concurrency_limiter import AdaptiveConcurrencyLimiter
 
 # Load environment variables
 load_dotenv()
@@ -37,7 +46,8 @@ def verify_api_available():
     """
     return ReplicateService.verify_api_available()
 
-def run_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS):
+def run_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS,
+                     max_continuations=MAX_CONTINUATIONS, sampling=None):
     """
     Run the Qwen VL model with given prompt and optional image.
     
@@ -45,6 +55,8 @@ def run_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS):
         prompt (str): The text prompt for the model.
         image_base64 (str, optional): Base64 encoded image. Defaults to None.
         max_tokens (int, optional): Maximum number of tokens to generate. Defaults to DEFAULT_MAX_TOKENS.
+        max_continuations (int, optional): Maximum continuation predictions. Defaults to MAX_CONTINUATIONS.
+        sampling (dict, optional): Extra model inputs such as a seed or temperature. Defaults to None.
     
     Returns:
         str: Model's text response.
@@ -57,7 +69,51 @@ def run_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS):
         >>> response = run_vision_model("Describe this image", image_base64_string)
         >>> print(response)
     """
-    return ReplicateService.run_vision_model(prompt, image_base64, max_tokens)
+    return ReplicateService.run_vision_model(prompt, image_base64, max_tokens, max_continuations, sampling)
+
+def stream_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS,
+                        max_continuations=MAX_CONTINUATIONS, sampling=None):
+    """
+    Stream the Qwen VL response, continuing it automatically if truncated.
+    
+    Args:
+        prompt (str): The text prompt for the model.
+        image_base64 (str, optional): Base64 encoded image. Defaults to None.
+        max_tokens (int, optional): Maximum number of tokens per prediction. Defaults to DEFAULT_MAX_TOKENS.
+        max_continuations (int, optional): Maximum continuation predictions. Defaults to MAX_CONTINUATIONS.
+        sampling (dict, optional): Extra model inputs such as a seed or temperature. Defaults to None.
+    
+    Yields:
+        str: The stitched response text so far.
+        
+    Example:
+        >>> for partial in stream_vision_model("Transcribe this slide", image_base64_string):
+        >>>     print(partial)
+    """
+    return ReplicateService.stream_vision_model(prompt, image_base64, max_tokens, max_continuations, sampling)
+
+def stream_vision_candidates(prompt, image_base64=None, count=REGENERATE_CANDIDATES, max_tokens=DEFAULT_MAX_TOKENS,
+                             max_continuations=MAX_CONTINUATIONS, sampling_factory=None):
+    """
+    Stream several completions of the same prompt concurrently.
+    
+    Args:
+        prompt (str): The text prompt for the model.
+        image_base64 (str, optional): Base64 encoded image. Defaults to None.
+        count (int, optional): Completions to run, capped by the concurrency limit. Defaults to REGENERATE_CANDIDATES.
+        max_tokens (int, optional): Maximum number of tokens per prediction. Defaults to DEFAULT_MAX_TOKENS.
+        max_continuations (int, optional): Maximum continuation predictions. Defaults to MAX_CONTINUATIONS.
+        sampling_factory (callable, optional): Returns the sampling inputs of one candidate. Defaults to None.
+    
+    Yields:
+        tuple: (index, text, finished) - see ReplicateService.stream_vision_candidates.
+        
+    Example:
+        >>> for index, text, finished in stream_vision_candidates("Describe this image", image_base64_string):
+        >>>     print(index, finished)
+    """
+    return ReplicateService.stream_vision_candidates(prompt, image_base64, count, max_tokens, max_continuations,
+                                                     sampling_factory)
 
 def run_tts_model(text, voice_id, speed):
     """
@@ -82,6 +138,18 @@ def run_tts_model(text, voice_id, speed):
     return ReplicateService.run_tts_model(text, voice_id, speed)
 
 class ReplicateService:
+    # Token pool and per-token clients are shared by all requests in the process
+    _token_pool = None
+    _clients = {}
+    _pool_lock = threading.Lock()
+    # Adaptive limit on in-flight predictions, shared across all tokens
+    _limiter = AdaptiveConcurrencyLimiter()
+    # Speech predictions have a limit of their own, so a long vision stream
+    # cannot hold the last slot an auto-spoken answer waits for
+    _speech_limiter = AdaptiveConcurrencyLimiter()
+    # Models found not to support streaming; these use blocking predictions
+    _non_streaming_models = set()
+
     @staticmethod
     def verify_api_available():
         """
@@ -95,21 +163,173 @@ class ReplicateService:
             >>> if not available:
             >>>     print(error)
         """
-        if "REPLICATE_API_TOKEN" not in os.environ:
+        if not load_tokens_from_env():
             logger.error("Replicate API token not found in environment variables")
             return False, "Error: Replicate API token not found. Set REPLICATE_API_TOKEN in your .env file."
         logger.debug("Replicate API token verified")
         return True, ""
 
     @staticmethod
-    def run_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS):
+    def get_token_pool():
+        """
+        Get the shared token pool, rebuilding it if the configured tokens changed.
+        
+        Returns:
+            TokenPool: Pool built from REPLICATE_API_TOKENS and REPLICATE_API_TOKEN.
+            
+        Example:
+            >>> pool = ReplicateService.get_token_pool()
+            >>> print(pool.stats())
+        """
+        tokens = load_tokens_from_env()
+        with ReplicateService._pool_lock:
+            pool = ReplicateService._token_pool
+            if pool is None or pool.tokens != tokens:
+                logger.info(f"Initializing Replicate token pool with {len(tokens)} token(s)")
+                pool = TokenPool(tokens)
+                ReplicateService._token_pool = pool
+                ReplicateService._clients = {}
+            return pool
+
+    @staticmethod
+    def get_concurrency_limiter(model=None):
+        """
+        Get the adaptive concurrency limiter a model's predictions pass through.
+        
+        Args:
+            model (str, optional): Replicate model identifier. Defaults to None,
+                                   the limiter shared by all non-speech models.
+        
+        Returns:
+            AdaptiveConcurrencyLimiter: The speech limiter for KOKORO_TTS_MODEL,
+                                        otherwise the shared limiter.
+        """
+        if model == KOKORO_TTS_MODEL:
+            return ReplicateService._speech_limiter
+        return ReplicateService._limiter
+
+    @staticmethod
+    def get_concurrency_metrics():
+        """
+        Get the current concurrency limit, its history and token pool health.
+        
+        Returns:
+            dict: Limiter metrics (limit, in_flight, error_rate, latency_baselines,
+                  history), a "speech" entry with the same metrics for the speech
+                  limiter and a "tokens" entry with per-token stats.
+                  
+        Example:
+            >>> metrics = ReplicateService.get_concurrency_metrics()
+            >>> print(f"Limit: {metrics['limit']} | In flight: {metrics['in_flight']}")
+        """
+        metrics = ReplicateService._limiter.metrics()
+        metrics["speech"] = ReplicateService._speech_limiter.metrics()
+        metrics["tokens"] = ReplicateService.get_token_pool().stats()
+        return metrics
+
+    @staticmethod
+    def _get_client(token):
+        """Get (or create) the Replicate client bound to a specific token."""
+        with ReplicateService._pool_lock:
+            client = ReplicateService._clients.get(token)
+            if client is None:
+                client = replicate.Client(api_token=token)
+                ReplicateService._clients[token] = client
+            return client
+
+    @staticmethod
+    def _run_prediction(model, api_params):
+        """
+        Run a prediction using the least-loaded token from the pool.
+        
+        The call first waits for a slot from the model's adaptive concurrency
+        limiter (see get_concurrency_limiter).
+        The token from REPLICATE_API_TOKEN is served by the library's default
+        client; additional pool tokens each get a dedicated client.
+        
+        Args:
+            model (str): Replicate model identifier.
+            api_params (dict): Model input parameters.
+        
+        Returns:
+            Any: Raw model output.
+            
+        Raises:
+            Exception: Propagates any error raised by the Replicate client.
+        """
+        pool = ReplicateService.get_token_pool()
+        limiter = ReplicateService.get_concurrency_limiter(model)
+        with limiter.acquire(key=model) as timing, pool.acquire() as token:
+            if token == os.environ.get("REPLICATE_API_TOKEN", "").strip():
+                output = replicate.run(model, input=api_params)
+            else:
+                output = ReplicateService._get_client(token).run(model, input=api_params)
+            timing.output(ReplicateService._output_units(output, api_params))
+            return output
+
+    @staticmethod
+    def _output_units(output, api_params):
+        """Approximate tokens a prediction wrote (or, for speech, read), to normalize its latency."""
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.text_utils import estimate_tokens
+
+        # Speech predictions return a file or URL; their work follows the text read
+        if api_params.get("text"):
+            return estimate_tokens(api_params["text"])
+        if isinstance(output, list) and all(isinstance(part, str) for part in output):
+            output = "".join(output)
+        return estimate_tokens(output) if isinstance(output, str) else 0
+
+    @staticmethod
+    def _build_vision_params(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS, sampling=None):
+        """Assemble the Qwen VL input parameters for one prediction."""
+        api_params = {
+            "prompt": prompt,
+            "max_new_tokens": max_tokens,
+            **(sampling or {}),
+        }
+        
+        # Add image if provided
+        if image_base64:
+            api_params["media"] = f"data:image/png;base64,{image_base64}"
+            logger.info("Image included in vision model request")
+        else:
+            logger.info("Running vision model without image")
+        return api_params
+
+    @staticmethod
+    def _build_continuation_prompt(prompt, partial_response):
+        """
+        Build the prompt for continuing a response that hit the token limit.
+        
+        The original prompt is kept so the model retains the full task, and
+        the partial response is supplied as context to continue from.
+        """
+        return (
+            f"{prompt}\n\n"
+            f"Your previous answer was cut off by the length limit. Here is what you wrote so far:\n"
+            f"{partial_response}\n\n"
+            f"Continue the answer exactly where it stopped. Do not repeat any earlier text "
+            f"and do not add an introduction."
+        )
+
+    @staticmethod
+    def run_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS,
+                         max_continuations=MAX_CONTINUATIONS, sampling=None):
         """
         Run the Qwen VL model with given prompt and optional image.
         
+        If the response appears to have been cut off at max_tokens, up to
+        max_continuations follow-up predictions are chained with the partial
+        output as context and the results are stitched into one response.
+        
         Args:
             prompt (str): The text prompt for the model.
             image_base64 (str, optional): Base64 encoded image. Defaults to None.
             max_tokens (int, optional): Maximum number of tokens to generate. Defaults to DEFAULT_MAX_TOKENS.
+            max_continuations (int, optional): Maximum continuation predictions. Defaults to MAX_CONTINUATIONS.
+            sampling (dict, optional): Extra model inputs such as a seed or temperature, sent with
+                every prediction including continuations. Defaults to None.
         
         Returns:
             str: Model's text response.
@@ -122,38 +342,226 @@ class ReplicateService:
             >>> response = ReplicateService.run_vision_model("Describe this image", image_base64_string)
             >>> print(response)
         """
+        from utils.text_utils import is_truncated, stitch_continuation
+
         # Validate API availability before running
         api_available, error_msg = ReplicateService.verify_api_available()
         if not api_available:
             logger.error(f"API not available: {error_msg}")
             raise ValueError(error_msg)
 
-        # Prepare API parameters
-        api_params = {
-            "prompt": prompt,
-            "max_new_tokens": max_tokens,
-        }
+        # Run the model, continuing truncated responses
+        try:
+            response = ""
+            current_prompt = prompt
+            for attempt in range(max_continuations + 1):
+                api_params = ReplicateService._build_vision_params(current_prompt, image_base64, max_tokens, sampling)
+                logger.debug(f"Calling Replicate API with model: {QWEN_VL_MODEL}")
+                output = ReplicateService._run_prediction(QWEN_VL_MODEL, api_params)
+                logger.info("Vision model API call completed successfully")
+                
+                # Replicate may return output as a list of string chunks or a single string
+                # We join the chunks if it's a list, otherwise return as is
+                segment = "".join(output) if isinstance(output, list) else output
+                response = stitch_continuation(response, segment)
+
+                if attempt == max_continuations or not is_truncated(segment, max_tokens, TRUNCATION_TOKEN_RATIO):
+                    break
+                logger.info(f"Vision model response truncated; requesting continuation {attempt + 1}/{max_continuations}")
+                current_prompt = ReplicateService._build_continuation_prompt(prompt, response)
+            return response
+        except Exception as e:
+            logger.error(f"Error running vision model: {str(e)}", exc_info=True)
+            raise RuntimeError(f"Error running vision model: {str(e)}")
+
+    @staticmethod
+    def _stream_prediction(model, api_params):
+        """
+        Stream text output of a prediction using the least-loaded pool token.
         
-        # Add image if provided
-        if image_base64:
-            api_params["media"] = f"data:image/png;base64,{image_base64}"
-            logger.info("Image included in vision model request")
-        else:
-            logger.info("Running vision model without image")
+        Holds a concurrency slot and a pool token until the stream finishes.
+        Models without streaming support fall back to a regular prediction
+        whose full output is yielded as a single chunk.
+        
+        Args:
+            model (str): Replicate model identifier.
+            api_params (dict): Model input parameters.
+        
+        Yields:
+            str: Output text chunks in order.
+        """
+        if model in ReplicateService._non_streaming_models:
+            output = ReplicateService._run_prediction(model, api_params)
+            yield "".join(output) if isinstance(output, list) else output
+            return
 
-        # Run the model
-        try:
-            logger.debug(f"Calling Replicate API with model: {QWEN_VL_MODEL}")
-            output = replicate.run(QWEN_VL_MODEL, input=api_params)
-            logger.info("Vision model API call completed successfully")
+        pool = ReplicateService.get_token_pool()
+        limiter = ReplicateService.get_concurrency_limiter(model)
+        with limiter.acquire(key=model) as timing, pool.acquire() as token:
+            if token == os.environ.get("REPLICATE_API_TOKEN", "").strip():
+                events = replicate.stream(model, input=api_params)
+            else:
+                events = ReplicateService._get_client(token).stream(model, input=api_params)
+            try:
+                for event in events:
+                    chunk = str(event)
+                    if chunk:
+                        # The spike check uses the time to first output, not the stream's length
+                        timing.first_output()
+                        yield chunk
+                return
+            except ReplicateError as e:
+                if "does not support streaming" not in str(e):
+                    raise
+                logger.warning(f"Model {model} does not support streaming; falling back to blocking predictions")
+                ReplicateService._non_streaming_models.add(model)
+
+        # Fallback runs outside the slot held above so it can acquire its own
+        output = ReplicateService._run_prediction(model, api_params)
+        yield "".join(output) if isinstance(output, list) else output
+
+    @staticmethod
+    def stream_vision_model(prompt, image_base64=None, max_tokens=DEFAULT_MAX_TOKENS,
+                            max_continuations=MAX_CONTINUATIONS, sampling=None):
+        """
+        Stream the Qwen VL response, continuing it automatically if truncated.
+        
+        Each yielded value is the full response so far, so the caller can
+        simply replace the displayed message. Continuation predictions are
+        stitched in seamlessly, so the caller sees a single growing message;
+        continuation text that may still overlap the response is held back
+        until the overlap is resolved (see continuation_settled).
+        
+        Args:
+            prompt (str): The text prompt for the model.
+            image_base64 (str, optional): Base64 encoded image. Defaults to None.
+            max_tokens (int, optional): Maximum number of tokens per prediction. Defaults to DEFAULT_MAX_TOKENS.
+            max_continuations (int, optional): Maximum continuation predictions. Defaults to MAX_CONTINUATIONS.
+            sampling (dict, optional): Extra model inputs such as a seed or temperature, sent with
+                every prediction including continuations. Defaults to None.
+        
+        Yields:
+            str: The stitched response text so far.
             
-            # Replicate may return output as a list of string chunks or a single string
-            # We join the chunks if it's a list, otherwise return as is
-            return "".join(output) if isinstance(output, list) else output
+        Raises:
+            ValueError: If API token is not available.
+            RuntimeError: If model execution fails.
+            
+        Example:
+            >>> for partial in ReplicateService.stream_vision_model("Transcribe this slide", image_base64_string):
+            >>>     print(partial)
+        """
+        from utils.text_utils import is_truncated, stitch_continuation, continuation_settled
+
+        # Validate API availability before running
+        api_available, error_msg = ReplicateService.verify_api_available()
+        if not api_available:
+            logger.error(f"API not available: {error_msg}")
+            raise ValueError(error_msg)
+
+        try:
+            response = ""
+            current_prompt = prompt
+            for attempt in range(max_continuations + 1):
+                api_params = ReplicateService._build_vision_params(current_prompt, image_base64, max_tokens, sampling)
+                chunks = []
+                shown = response
+                for chunk in ReplicateService._stream_prediction(QWEN_VL_MODEL, api_params):
+                    chunks.append(chunk)
+                    # Held back until the overlap with the response is resolved, so the text only grows
+                    if continuation_settled(response, "".join(chunks)):
+                        shown = stitch_continuation(response, "".join(chunks))
+                        yield shown
+                segment = "".join(chunks)
+                response = stitch_continuation(response, segment)
+                if response != shown:
+                    yield response
+
+                if attempt == max_continuations or not is_truncated(segment, max_tokens, TRUNCATION_TOKEN_RATIO):
+                    break
+                logger.info(f"Vision model response truncated; streaming continuation {attempt + 1}/{max_continuations}")
+                current_prompt = ReplicateService._build_continuation_prompt(prompt, response)
+            logger.info("Vision model streaming completed successfully")
         except Exception as e:
             logger.error(f"Error running vision model: {str(e)}", exc_info=True)
             raise RuntimeError(f"Error running vision model: {str(e)}")
 
+    @staticmethod
+    def candidate_count(count=REGENERATE_CANDIDATES):
+        """Number of candidates stream_vision_candidates runs: count, capped by the current concurrency limit."""
+        return max(1, min(count, ReplicateService._limiter.limit))
+
+    @staticmethod
+    def stream_vision_candidates(prompt, image_base64=None, count=REGENERATE_CANDIDATES, max_tokens=DEFAULT_MAX_TOKENS,
+                                 max_continuations=MAX_CONTINUATIONS, sampling_factory=None):
+        """
+        Stream several completions of the same prompt concurrently.
+        
+        Each candidate is a regular stream_vision_model call on its own
+        thread, so every prediction waits for a slot from the adaptive
+        concurrency limiter like any other. The number of candidates is
+        capped by the current limit (see candidate_count), so they run side
+        by side instead of queueing behind each other. Updates of all
+        candidates are yielded in the order they arrive; closing the
+        generator stops the candidates that are still running.
+        
+        Args:
+            prompt (str): The text prompt for the model.
+            image_base64 (str, optional): Base64 encoded image. Defaults to None.
+            count (int, optional): Completions to run. Defaults to REGENERATE_CANDIDATES.
+            max_tokens (int, optional): Maximum number of tokens per prediction. Defaults to DEFAULT_MAX_TOKENS.
+            max_continuations (int, optional): Maximum continuation predictions. Defaults to MAX_CONTINUATIONS.
+            sampling_factory (callable, optional): Called once per candidate for its sampling inputs,
+                e.g. TurnRequest.sampling for a new seed each. Defaults to None.
+        
+        Yields:
+            tuple: (index, text, finished)
+                - index: Candidate number, from 0
+                - text: The candidate's stitched text so far, or None if it failed
+                - finished: True for the candidate's last update
+            
+        Example:
+            >>> for index, text, finished in ReplicateService.stream_vision_candidates(prompt, image, count=3):
+            >>>     if finished:
+            >>>         print(f"Candidate {index + 1}: {text}")
+        """
+        count = ReplicateService.candidate_count(count)
+        updates = queue.Queue()
+        stopped = threading.Event()
+
+        def run_candidate(index):
+            text = None
+            try:
+                sampling = sampling_factory() if sampling_factory else None
+                stream = ReplicateService.stream_vision_model(prompt, image_base64, max_tokens, max_continuations,
+                                                              sampling)
+                try:
+                    for text in stream:
+                        if stopped.is_set():
+                            return
+                        updates.put((index, text, False))
+                finally:
+                    # Releases the candidate's concurrency slot right away
+                    stream.close()
+                updates.put((index, text or "", True))
+            except Exception as e:
+                logger.warning(f"Vision candidate {index + 1} failed: {str(e)}")
+                updates.put((index, None, True))
+
+        logger.info(f"Streaming {count} vision candidates")
+        executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="vision-candidate")
+        try:
+            for index in range(count):
+                executor.submit(run_candidate, index)
+            running = count
+            while running:
+                index, text, finished = updates.get()
+                running -= finished
+                yield index, text, finished
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
     @staticmethod
     def run_tts_model(text, voice_id, speed):
         """
@@ -186,9 +594,9 @@ class ReplicateService:
             logger.debug(f"Text length for TTS: {len(text)} characters")
             
             # Configure TTS model parameters
-            output = replicate.run(
+            output = ReplicateService._run_prediction(
                 KOKORO_TTS_MODEL,
-                input={
+                {
                     "text": text,      # The text content to convert to speech
                     "voice": voice_id, # The voice identifier to use
                     "speed": speed     # The playback speed factor
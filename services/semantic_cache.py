@@ -0,0 +1,369 @@
+"""Semantic answer cache for repeated questions about the same image.
+
+This module provides a per-image cache of chat answers. Incoming questions
+are normalized and embedded locally with a signed feature-hashing vectorizer
+(word unigrams, word bigrams and character trigrams), so near-identical
+questions such as "What is this slide about?" and "what's this slide about"
+can be answered from the cache without a prediction. No network access or
+model download is needed.
+
+Lexical similarity cannot tell "the third paragraph" from "the fourth
+paragraph", so questions whose numbers, ordinals or direction words differ
+never match. Only questions asked without earlier conversation are cached,
+because a follow-up such as "What does that mean?" depends on the turns
+before it, which differ between conversations.
+"""
+
+import re
+import zlib
+import threading
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+from config.settings import (
+    INIT_HISTORY,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_IMAGES,
+    SEMANTIC_CACHE_MAX_ENTRIES_PER_IMAGE,
+    SEMANTIC_CACHE_DIMENSIONS
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Contractions expanded during normalization so both spellings embed alike
+CONTRACTIONS = {
+    "what's": "what is",
+    "whats": "what is",
+    "it's": "it is",
+    "that's": "that is",
+    "there's": "there is",
+    "who's": "who is",
+    "where's": "where is",
+    "can't": "cannot",
+    "don't": "do not",
+    "i'm": "i am",
+}
+
+# Politeness, filler and determiner words that do not change the meaning of a
+# question (every question already refers to the one uploaded image)
+FILLER_WORDS = {
+    "please", "pls", "kindly", "can", "could", "would", "you", "me", "tell",
+    "just", "a", "an", "the", "this", "that", "these", "those",
+    "hey", "hi", "thanks", "thank",
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that make otherwise identical questions ask about different things;
+# a cached answer is only used when the question has the same ones
+MARKER_WORDS = {
+    # Numbers and ordinals, e.g. "question 3" or "the third paragraph"
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "first", "second", "third", "fourth", "fifth", "sixth", "seventh",
+    "eighth", "ninth", "tenth", "last", "next", "previous", "final",
+    # Positions and directions, e.g. "the left person" or "the bottom half"
+    "left", "right", "top", "bottom", "upper", "lower", "above", "below", "middle",
+    "center", "centre", "front", "back", "behind", "before", "after", "north", "south",
+    "east", "west", "horizontal", "vertical",
+}
+NUMBER_PATTERN = re.compile(r"\d+(st|nd|rd|th)?")
+
+# The greeting is the same in every conversation and gives a question no context
+STATIC_TURNS = frozenset((user, bot) for user, bot in INIT_HISTORY)
+
+# Similarity band below the threshold that is logged as a near miss, to help tune it
+NEAR_MISS_MARGIN = 0.1
+
+
+def normalize_question(text):
+    """
+    Normalize a chat message for cache matching.
+
+    Lowercases the text, expands common contractions, strips punctuation and
+    drops filler words and determiners.
+
+    Args:
+        text (str): The user's chat message.
+
+    Returns:
+        str: Normalized message (may be empty).
+
+    Example:
+        >>> normalize_question("Could you please tell me what's on this slide?")
+        'what is on slide'
+    """
+    if not text:
+        return ""
+    lowered = text.lower().replace("’", "'")
+    for contraction, expansion in CONTRACTIONS.items():
+        lowered = re.sub(rf"\b{re.escape(contraction)}\b", expansion, lowered)
+    words = [word for word in WORD_PATTERN.findall(lowered) if word not in FILLER_WORDS]
+    return " ".join(words)
+
+
+def question_markers(normalized):
+    """
+    Numbers, ordinals and direction words of a normalized question.
+
+    Args:
+        normalized (str): Text produced by normalize_question.
+
+    Returns:
+        frozenset: The marker words; questions only match when theirs are equal.
+
+    Example:
+        >>> question_markers("what does third paragraph say")
+        frozenset({'third'})
+    """
+    return frozenset(word for word in normalized.split()
+                     if word in MARKER_WORDS or NUMBER_PATTERN.fullmatch(word))
+
+
+def is_standalone(history):
+    """
+    Check that a question is asked without earlier conversation it could refer to.
+
+    Args:
+        history (list): Conversation history before the question.
+
+    Returns:
+        bool: True when the history holds nothing but the greeting and
+              notices without a user message.
+
+    Example:
+        >>> is_standalone(INIT_HISTORY)
+        True
+    """
+    return not any(user is not None and (user, bot) not in STATIC_TURNS for user, bot in history or ())
+
+
+def embed_text(normalized, dimensions=SEMANTIC_CACHE_DIMENSIONS):
+    """
+    Embed normalized text with signed feature hashing.
+
+    Features are word unigrams, word bigrams and character trigrams of each
+    word. Counts are dampened with log(1 + tf) and the vector is
+    L2-normalized, so the dot product of two embeddings is their cosine
+    similarity.
+
+    Args:
+        normalized (str): Text produced by normalize_question.
+        dimensions (int, optional): Size of the hashed feature space.
+
+    Returns:
+        numpy.ndarray: float32 vector of length dimensions (all zeros for empty text).
+
+    Example:
+        >>> a = embed_text(normalize_question("Summarize this"))
+        >>> b = embed_text(normalize_question("Please summarize this."))
+        >>> float(a @ b)
+        1.0
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    words = normalized.split()
+    if not words:
+        return vector
+
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    # crc32 is stable across processes, unlike the built-in hash()
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features),
+                         dtype=np.uint64, count=len(features))
+    indices = (hashes % dimensions).astype(np.intp)
+    signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, indices, signs)
+
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class _ImageEntries:
+    """Cached questions and answers for a single image digest."""
+
+    def __init__(self, dimensions):
+        self.questions = []                                    # Normalized questions
+        self.markers = []                                      # question_markers of each question
+        self.answers = []                                      # Stored answers
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+
+
+class SemanticAnswerCache:
+    """
+    Per-image cache of answers matched by question similarity.
+
+    Images are identified by a content digest (see ImageService.image_digest),
+    so the same classroom material uploaded by different users shares
+    answers. Images are evicted least-recently-used once max_images is
+    exceeded, and each image keeps at most max_entries_per_image answers.
+    Questions with an earlier conversation are neither looked up nor stored
+    when their history is passed.
+
+    Example:
+        >>> cache = SemanticAnswerCache(threshold=0.85)
+        >>> cache.store(digest, "What is this slide about?", answer)
+        >>> cache.lookup(digest, "what's this slide about")
+        (answer, 1.0)
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 max_images=SEMANTIC_CACHE_MAX_IMAGES,
+                 max_entries_per_image=SEMANTIC_CACHE_MAX_ENTRIES_PER_IMAGE,
+                 dimensions=SEMANTIC_CACHE_DIMENSIONS,
+                 enabled=SEMANTIC_CACHE_ENABLED):
+        self.threshold = threshold
+        self.max_images = max_images
+        self.max_entries_per_image = max_entries_per_image
+        self.dimensions = dimensions
+        self.enabled = enabled
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._hit_similarity_total = 0.0
+
+    def lookup(self, image_digest, question, history=None):
+        """
+        Find a cached answer for a similar question about the same image.
+
+        Args:
+            image_digest (str): Digest of the image the question is about.
+            question (str): The user's chat message.
+            history (list, optional): Conversation history before the question;
+                questions that follow earlier turns are always misses.
+
+        Returns:
+            tuple: (answer, similarity) for a hit, or (None, best_similarity)
+                   for a miss.
+
+        Example:
+            >>> answer, similarity = cache.lookup(digest, "Summarize this slide")
+            >>> if answer is not None:
+            >>>     print(f"Cache hit ({similarity:.2f})")
+        """
+        if not self.enabled or not image_digest or not is_standalone(history):
+            return None, 0.0
+
+        normalized = normalize_question(question)
+        if not normalized:
+            return None, 0.0
+        vector = embed_text(normalized, self.dimensions)
+        markers = question_markers(normalized)
+
+        with self._lock:
+            entries = self._images.get(image_digest)
+            if entries is None or not entries.questions:
+                self.misses += 1
+                return None, 0.0
+            self._images.move_to_end(image_digest)
+
+            similarities = entries.vectors @ vector
+            for index, stored_markers in enumerate(entries.markers):
+                if stored_markers != markers:
+                    similarities[index] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            matched_question = entries.questions[best]
+            answer = entries.answers[best]
+
+            if similarity >= self.threshold:
+                self.hits += 1
+                self._hit_similarity_total += similarity
+            else:
+                self.misses += 1
+
+        if similarity >= self.threshold:
+            logger.info(f"Semantic cache hit (similarity {similarity:.3f}): "
+                        f"'{normalized}' matched '{matched_question}'")
+            return answer, similarity
+
+        if similarity >= self.threshold - NEAR_MISS_MARGIN:
+            logger.info(f"Semantic cache near miss (similarity {similarity:.3f} < {self.threshold}): "
+                        f"'{normalized}' vs '{matched_question}'")
+        return None, similarity
+
+    def store(self, image_digest, question, answer, history=None):
+        """
+        Store an answer for a question about an image.
+
+        Args:
+            image_digest (str): Digest of the image the question is about.
+            question (str): The user's chat message.
+            answer (str): The model's answer.
+            history (list, optional): Conversation history before the question;
+                answers to questions that follow earlier turns are not stored.
+
+        Example:
+            >>> cache.store(digest, "What is this slide about?", "The slide explains photosynthesis.")
+        """
+        if not self.enabled or not image_digest or not answer or not is_standalone(history):
+            return
+
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        vector = embed_text(normalized, self.dimensions)
+
+        with self._lock:
+            entries = self._images.get(image_digest)
+            if entries is None:
+                entries = _ImageEntries(self.dimensions)
+                self._images[image_digest] = entries
+            self._images.move_to_end(image_digest)
+
+            if normalized in entries.questions:
+                # Refresh the answer for an identical question
+                entries.answers[entries.questions.index(normalized)] = answer
+            else:
+                entries.questions.append(normalized)
+                entries.markers.append(question_markers(normalized))
+                entries.answers.append(answer)
+                entries.vectors = np.vstack([entries.vectors, vector[np.newaxis, :]])
+                if len(entries.questions) > self.max_entries_per_image:
+                    del entries.questions[0]
+                    del entries.markers[0]
+                    del entries.answers[0]
+                    entries.vectors = entries.vectors[1:]
+
+            while len(self._images) > self.max_images:
+                self._images.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached answers and reset statistics."""
+        with self._lock:
+            self._images.clear()
+            self.hits = 0
+            self.misses = 0
+            self._hit_similarity_total = 0.0
+
+    def stats(self):
+        """
+        Get cache hit statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate, mean_hit_similarity and images keys.
+
+        Example:
+            >>> print(semantic_cache.stats()["hit_rate"])
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "mean_hit_similarity": self._hit_similarity_total / self.hits if self.hits else 0.0,
+                "images": len(self._images),
+            }
+
+
+# Shared cache used by the chat interface
+semantic_cache = SemanticAnswerCache()
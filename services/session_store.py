@@ -0,0 +1,610 @@
+"""Server-side store of chat histories.
+
+The chat history used to travel with every event: Gradio serialized the
+whole chatbot value from the browser as an input and back again as an
+output, so every click cost more the longer the session ran. The
+SessionStore keeps each session's history on the server, keyed by the
+Gradio session hash, as a list of compact Turn records. Handlers read the
+history from the store and write back only the turns they changed; the
+browser only receives chatbot updates. The Gradio Chatbot has no append
+update, so the first update of an event carries the whole history; Gradio
+sends every later update of the same event as a diff against the previous
+one, so a streamed answer only appends to what the browser already has.
+
+A Turn has slots instead of an attribute dict and records what kind of turn
+it is (TurnAction). Canned texts, i.e. the image action prompts such as
+"Please extract the text from this image." and the INIT_HISTORY messages,
+are interned, so every turn refers to one shared string instead of its own
+copy. Handlers get a HistoryView, which converts turns to the [user, bot]
+lists Gradio and the handlers expect only when they are accessed.
+
+The vision model request behind the newest answer (TurnRequest) is
+recorded as well, so regenerate can replay it without validating, encoding
+or formatting anything again, together with the alternative answers of the
+last regenerate, which the user can switch between.
+
+With SESSION_STORE_DB set, turns are also written to a SQLite database, so
+the conversations of open tabs survive a server restart. Recorded requests
+hold the encoded image and stay in memory. Sessions that have not changed
+for SESSION_STORE_TTL seconds are removed by a background sweep, both from
+memory and from the database.
+"""
+
+import sys
+import time
+import random
+import sqlite3
+import threading
+import logging
+from enum import Enum
+from collections.abc import Sequence
+
+from config.settings import (
+    INIT_HISTORY,
+    SESSION_STORE_DB,
+    SESSION_STORE_TTL,
+    SESSION_STORE_SWEEP_INTERVAL,
+    DEFAULT_MAX_TOKENS,
+    MAX_CONTINUATIONS,
+    REGENERATE_TEMPERATURE,
+    REGENERATE_RANDOM_SEED
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Requests without a browser session share one history
+SHARED_SESSION = "shared"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    session TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    user TEXT,
+    bot TEXT,
+    PRIMARY KEY (session, position)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT PRIMARY KEY,
+    updated REAL NOT NULL
+);
+"""
+
+
+# Canned text -> (shared string, action), built on first use
+_canned = None
+_canned_lock = threading.Lock()
+
+
+class TurnAction(Enum):
+    """What a turn in the conversation is."""
+    MESSAGE = "message"    # Question typed by the user
+    EXTRACT = "extract"    # Extract Text button
+    CAPTION = "caption"    # Caption Image button
+    SUMMARY = "summary"    # Summarize Image button
+    NOTICE = "notice"      # Bot message without a user side, e.g. an error
+
+
+def canned_messages():
+    """
+    Return the table of canned texts.
+
+    Returns:
+        dict: Text -> (shared string, TurnAction) for the image action prompts
+              and the INIT_HISTORY messages.
+    """
+    global _canned
+    with _canned_lock:
+        if _canned is None:
+            # Lazy import avoids a circular import (utils imports services)
+            from utils.image_utils import EXTRACT_USER_MESSAGE, CAPTION_USER_MESSAGE, SUMMARY_USER_MESSAGE
+
+            table = {}
+            for user, bot in INIT_HISTORY:
+                table[user] = (sys.intern(user), TurnAction.MESSAGE)
+                table[bot] = (sys.intern(bot), TurnAction.MESSAGE)
+            for text, action in ((EXTRACT_USER_MESSAGE, TurnAction.EXTRACT),
+                                 (CAPTION_USER_MESSAGE, TurnAction.CAPTION),
+                                 (SUMMARY_USER_MESSAGE, TurnAction.SUMMARY)):
+                table[text] = (sys.intern(text), action)
+            _canned = table
+        return _canned
+
+
+class Turn:
+    """
+    One exchange of a conversation.
+
+    Args:
+        user (str or None): The user's message, None for a notice.
+        bot (str): The assistant's answer.
+
+    Example:
+        >>> turn = Turn("Please extract the text from this image.", "EXIT")
+        >>> turn.action
+        <TurnAction.EXTRACT: 'extract'>
+    """
+
+    __slots__ = ("action", "user", "bot")
+
+    def __init__(self, user, bot):
+        canned = canned_messages()
+        if user is None:
+            self.action = TurnAction.NOTICE
+        else:
+            user, self.action = canned.get(user, (user, TurnAction.MESSAGE))
+        self.user = user
+        self.bot = canned[bot][0] if bot in canned else bot
+
+    def pair(self):
+        """Return the turn as a new [user, bot] list, the format of the Gradio chatbot."""
+        return [self.user, self.bot]
+
+    def __eq__(self, other):
+        if not isinstance(other, Turn):
+            return NotImplemented
+        return self.user == other.user and self.bot == other.bot
+
+    def __repr__(self):
+        return f"Turn({self.user!r}, {self.bot!r})"
+
+
+class TurnRequest:
+    """
+    The vision model request that produced a turn's answer.
+
+    Args:
+        message (str): The user's message the request answers.
+        prompt (str): The complete prompt sent to the model.
+        image_digest (str): Digest of the image, see ImageService.image_digest.
+        image_base64 (str): The encoded image as sent to the model.
+        max_tokens (int, optional): Token limit per prediction. Defaults to DEFAULT_MAX_TOKENS.
+        max_continuations (int, optional): Continuation limit. Defaults to MAX_CONTINUATIONS.
+
+    Example:
+        >>> request = TurnRequest(message, prompt, image_digest, image_base64)
+        >>> ReplicateService.stream_vision_model(request.prompt, request.image_base64,
+        >>>                                      sampling=request.sampling())
+    """
+
+    __slots__ = ("message", "prompt", "image_digest", "image_base64", "max_tokens", "max_continuations")
+
+    def __init__(self, message, prompt, image_digest, image_base64, max_tokens=DEFAULT_MAX_TOKENS,
+                 max_continuations=MAX_CONTINUATIONS):
+        self.message = message
+        self.prompt = prompt
+        self.image_digest = image_digest
+        self.image_base64 = image_base64
+        self.max_tokens = max_tokens
+        self.max_continuations = max_continuations
+
+    @staticmethod
+    def sampling(temperature=REGENERATE_TEMPERATURE, random_seed=REGENERATE_RANDOM_SEED):
+        """
+        Model inputs that make a replay differ from the recorded request.
+
+        Args:
+            temperature (float, optional): Sampling temperature, None for the model default.
+            random_seed (bool, optional): Add a new random seed.
+
+        Returns:
+            dict: Extra model inputs, empty when the model defaults are kept.
+        """
+        params = {}
+        if temperature is not None:
+            params["temperature"] = temperature
+        if random_seed:
+            params["seed"] = random.randrange(2 ** 31)
+        return params
+
+
+class HistoryView(Sequence):
+    """
+    Read-only chat history in the [user, bot] format, converted on access.
+
+    Indexing returns a new [user, bot] list and slicing a new view, so a
+    handler that only needs the last turn never converts the rest. The
+    full list is built once, when the view is concatenated with the new
+    turn that is sent to the chatbot.
+
+    Args:
+        turns (tuple): Turn records.
+
+    Example:
+        >>> history = session_store.history(request.session_hash)
+        >>> last_answer = history[-1][1]
+        >>> chatbot_value = history + [[message, answer]]
+    """
+
+    __slots__ = ("_turns", "_pairs")
+
+    def __init__(self, turns=()):
+        self._turns = tuple(turns)
+        self._pairs = None
+
+    def __len__(self):
+        return len(self._turns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return HistoryView(self._turns[index])
+        return self._turns[index].pair()
+
+    def __iter__(self):
+        return (turn.pair() for turn in self._turns)
+
+    def pairs(self):
+        """Return the history as a new list of [user, bot] lists."""
+        if self._pairs is None:
+            self._pairs = [turn.pair() for turn in self._turns]
+        return list(self._pairs)
+
+    def __add__(self, other):
+        return self.pairs() + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self.pairs()
+
+    def __eq__(self, other):
+        if isinstance(other, HistoryView):
+            return self._turns == other._turns
+        if isinstance(other, (list, tuple)):
+            return self.pairs() == [list(pair) for pair in other]
+        return NotImplemented
+
+    def __repr__(self):
+        return f"HistoryView({self.pairs()!r})"
+
+
+class SessionStore:
+    """
+    Chat histories of all sessions, optionally persisted to SQLite.
+
+    A session that has not been seen yet starts with INIT_HISTORY. Updates
+    are deltas: replace_from() keeps the first turns and replaces the rest,
+    which covers a new answer (append), a regenerated answer (replace the
+    last turn) and an answer that is still streaming. sweep() removes
+    sessions that have not changed for ttl seconds; start_sweeper() runs it
+    every sweep_interval seconds on a daemon thread.
+
+    Example:
+        >>> store = SessionStore()
+        >>> store.start_sweeper()
+        >>> history = store.history(request.session_hash)
+        >>> store.replace_from(request.session_hash, len(history), [[message, answer]])
+    """
+
+    def __init__(self, db_path=SESSION_STORE_DB, initial_history=INIT_HISTORY, ttl=SESSION_STORE_TTL,
+                 sweep_interval=SESSION_STORE_SWEEP_INTERVAL):
+        self._initial_history = initial_history
+        self._initial = None
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._sessions = {}    # session -> list of Turn records
+        self._updated = {}     # session -> time of its last change or load
+        self._requests = {}    # session -> (position, TurnRequest) of the newest answer
+        self._candidates = {}  # session -> (position, message, answers, selected) of the last regenerate
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sweeper = None
+        self._db = None
+        if db_path:
+            # One connection shared by all threads, serialized by the lock
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+            logger.info(f"Persisting chat sessions to {db_path}")
+
+    @property
+    def initial(self):
+        """Turns a new session starts with, built on first use (the store is created while utils is imported)."""
+        if self._initial is None:
+            self._initial = tuple(Turn(user, bot) for user, bot in self._initial_history)
+        return self._initial
+
+    def _turns(self, session):
+        """Return the live turn list of a session, loading it if needed. Caller must hold the lock."""
+        turns = self._sessions.get(session)
+        if turns is None:
+            turns = list(self.initial)
+            if self._db is not None:
+                rows = self._db.execute("SELECT user, bot FROM turns WHERE session = ? ORDER BY position",
+                                        (session,)).fetchall()
+                if rows:
+                    turns = [Turn(user, bot) for user, bot in rows]
+            self._sessions[session] = turns
+            self._updated[session] = time.time()
+        return turns
+
+    def history(self, session_id):
+        """
+        Get a session's chat history.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+
+        Returns:
+            HistoryView: Snapshot of the history as [user, bot] pairs.
+
+        Example:
+            >>> history = session_store.history(request.session_hash)
+        """
+        with self._lock:
+            return HistoryView(self._turns(session_id or SHARED_SESSION))
+
+    def replace_from(self, session_id, start, turns):
+        """
+        Keep the first start turns of a session and replace the rest.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+            start (int): Number of turns to keep.
+            turns (list): [user, bot] pairs that follow them.
+
+        Example:
+            >>> session_store.replace_from(request.session_hash, len(history) - 1, [[question, new_answer]])
+        """
+        session = session_id or SHARED_SESSION
+        new_turns = [turn if isinstance(turn, Turn) else Turn(*turn[:2]) for turn in turns]
+        with self._lock:
+            stored = self._turns(session)
+            start = min(start, len(stored))
+            del stored[start:]
+            stored.extend(new_turns)
+            self._updated[session] = time.time()
+            if self._db is not None:
+                try:
+                    if not self._has_rows(session):
+                        # First write of a session also persists the turns it started with
+                        start, new_turns = 0, stored
+                    with self._db:
+                        self._db.execute("DELETE FROM turns WHERE session = ? AND position >= ?", (session, start))
+                        self._db.executemany("INSERT INTO turns (session, position, user, bot) VALUES (?, ?, ?, ?)",
+                                             [(session, start + index, turn.user, turn.bot)
+                                              for index, turn in enumerate(new_turns)])
+                        self._db.execute("INSERT OR REPLACE INTO sessions (session, updated) VALUES (?, ?)",
+                                         (session, self._updated[session]))
+                except sqlite3.Error as e:
+                    logger.error(f"Error persisting chat session: {e}", exc_info=True)
+
+    def _has_rows(self, session):
+        """Whether a session has been persisted. Caller must hold the lock."""
+        return self._db.execute("SELECT 1 FROM turns WHERE session = ? LIMIT 1", (session,)).fetchone() is not None
+
+    def record_request(self, session_id, position, request):
+        """
+        Record the vision model request behind the turn at position.
+
+        Only the newest request of a session is kept; it is the only one
+        regenerate can replay.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+            position (int): Index of the turn the request answers.
+            request (TurnRequest): The request as sent to the model.
+        """
+        with self._lock:
+            self._requests[session_id or SHARED_SESSION] = (position, request)
+
+    def last_request(self, session_id):
+        """
+        Get the recorded request behind a session's last turn.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+
+        Returns:
+            TurnRequest or None: The request, or None if the last turn was not
+                                 produced by a recorded request (e.g. an image action).
+
+        Example:
+            >>> request = session_store.last_request(request.session_hash)
+        """
+        session = session_id or SHARED_SESSION
+        with self._lock:
+            position, request = self._requests.get(session, (None, None))
+            if request is None or not self._is_last_turn(session, position, request.message):
+                return None
+            return request
+
+    def _is_last_turn(self, session, position, message):
+        """Whether position is a session's last turn and answers message. Caller must hold the lock."""
+        turns = self._turns(session)
+        return position == len(turns) - 1 and turns[-1].user == message
+
+    def record_candidates(self, session_id, position, message, answers, selected):
+        """
+        Record the alternative answers of a regenerate with alternatives.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+            position (int): Index of the regenerated turn.
+            message (str): The user's message the answers respond to.
+            answers (list): Answer of each candidate, None while running or if it failed.
+            selected (int): Index of the answer shown in the chat.
+        """
+        with self._lock:
+            self._candidates[session_id or SHARED_SESSION] = (position, message, list(answers), selected)
+
+    def candidates(self, session_id):
+        """
+        Get the alternative answers of a session's last turn.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+
+        Returns:
+            tuple: (answers, selected) - the candidates' answers (None while running
+                   or failed) and the index shown, or ([], None) if the last turn
+                   was not regenerated with alternatives.
+        """
+        session = session_id or SHARED_SESSION
+        with self._lock:
+            entry = self._candidates.get(session)
+            if entry is None or not self._is_last_turn(session, entry[0], entry[1]):
+                return [], None
+            return list(entry[2]), entry[3]
+
+    def select_candidate(self, session_id, index):
+        """
+        Show another alternative answer as the session's last turn.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+            index (int): Candidate to show.
+
+        Returns:
+            HistoryView or None: The updated history, or None if there is no
+                                 such finished alternative for the last turn.
+
+        Example:
+            >>> history = session_store.select_candidate(request.session_hash, 2)
+        """
+        session = session_id or SHARED_SESSION
+        with self._lock:
+            entry = self._candidates.get(session)
+            if entry is None or not self._is_last_turn(session, entry[0], entry[1]):
+                return None
+            position, message, answers, _ = entry
+            if index is None or not 0 <= index < len(answers) or not answers[index]:
+                return None
+            self._candidates[session] = (position, message, answers, index)
+        self.replace_from(session_id, position, [[message, answers[index]]])
+        return self.history(session_id)
+
+    def track(self, session_id, start, updates):
+        """
+        Pass a handler's streamed updates through and store the turns it changed.
+
+        The first element of each update is the complete new history. The
+        last one is stored when the stream ends, even if it ends early
+        because the listener went away.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+            start (int): Number of turns the handler leaves untouched.
+            updates (iterable): Tuples whose first element is the updated history.
+
+        Yields:
+            tuple: The updates, unchanged.
+
+        Example:
+            >>> yield from session_store.track(session_id, len(history), process_chat_message(message, history, metrics))
+        """
+        last = None
+        try:
+            for update in updates:
+                last = update
+                yield update
+        finally:
+            if last is not None:
+                self.replace_from(session_id, start, last[0][start:])
+
+    def reset(self, session_id):
+        """
+        Start a session over with INIT_HISTORY, e.g. when the chat is cleared.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+
+        Returns:
+            list: The initial history as [user, bot] pairs.
+        """
+        with self._lock:
+            self._requests.pop(session_id or SHARED_SESSION, None)
+            self._candidates.pop(session_id or SHARED_SESSION, None)
+        self.replace_from(session_id, 0, self.initial)
+        return [turn.pair() for turn in self.initial]
+
+    def release(self, session_id):
+        """
+        Forget a session in memory, e.g. when its browser tab closes.
+
+        Persisted turns are kept, so the conversation can still be loaded
+        after a restart; sweep() removes them once they expire.
+
+        Args:
+            session_id (str): Browser session, or None for the shared history.
+        """
+        session = session_id or SHARED_SESSION
+        with self._lock:
+            self._sessions.pop(session, None)
+            self._updated.pop(session, None)
+            self._requests.pop(session, None)
+            self._candidates.pop(session, None)
+
+    def sweep(self, now=None):
+        """
+        Remove sessions that have not changed for ttl seconds.
+
+        Args:
+            now (float, optional): Current time for the age check. Defaults to time.time().
+
+        Returns:
+            int: Number of sessions removed from memory.
+
+        Example:
+            >>> removed = session_store.sweep()
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.ttl
+        with self._lock:
+            expired = [session for session, updated in self._updated.items() if updated < cutoff]
+            for session in expired:
+                self._sessions.pop(session, None)
+                self._updated.pop(session, None)
+                self._requests.pop(session, None)
+                self._candidates.pop(session, None)
+            if self._db is not None:
+                try:
+                    with self._db:
+                        # Sessions persisted before their age was recorded start aging now
+                        self._db.execute("INSERT OR IGNORE INTO sessions (session, updated) "
+                                         "SELECT DISTINCT session, ? FROM turns", (now,))
+                        self._db.execute("DELETE FROM turns WHERE session IN "
+                                         "(SELECT session FROM sessions WHERE updated < ?)", (cutoff,))
+                        self._db.execute("DELETE FROM sessions WHERE updated < ?", (cutoff,))
+                except sqlite3.Error as e:
+                    logger.error(f"Error expiring chat sessions: {e}", exc_info=True)
+
+        if expired:
+            logger.info(f"Session store expired {len(expired)} sessions")
+        return len(expired)
+
+    def _run_sweeper(self):
+        """Sweeper thread body."""
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Session store sweep failed: {e}", exc_info=True)
+
+    def start_sweeper(self):
+        """
+        Start the background sweeper thread (no-op if already running).
+
+        Example:
+            >>> session_store.start_sweeper()
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=self._run_sweeper, name="session-store-sweeper", daemon=True)
+        self._sweeper.start()
+        logger.info(f"Session store sweeper started (sessions expire after {self.ttl}s)")
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread."""
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+# Shared store used by the app
+session_store = SessionStore()
@@ -0,0 +1,269 @@
+"""Pipelined speech synthesis for answers that are still being generated.
+
+This module provides the SpeechPipeline, which turns a growing response into
+speech while the vision model is still writing it. Each time the streamed
+text grows, complete sentences are cut off the front and synthesized in the
+background, and their audio is handed back strictly in order as soon as it
+is ready. Playback therefore starts a second or two after the model starts
+answering instead of after the complete answer and a separate synthesis.
+
+The text can be fed and the audio played by different threads, e.g. the
+Gradio event that streams the answer and a separate event that streams the
+speech (see queue_text and chunks).
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .tts_service import TTSService
+from .audio_cache import audio_cache, audio_cache_key
+from config.settings import (
+    TTS_CHUNK_MAX_CHARS,
+    TTS_MAX_PARALLEL_CHUNKS,
+    TTS_LOCAL_TIME_STRETCH,
+    DEFAULT_VOICE,
+    AUTO_SPEAK_MIN_CHARS
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+class SpeechPipeline:
+    """
+    Incremental text-to-speech for a streamed response.
+
+    feed() is called with the full response text every time it grows and
+    returns the audio chunks that are ready to play; finish() speaks the
+    rest once the response is complete. Chunks are synthesized concurrently,
+    at most TTS_MAX_PARALLEL_CHUNKS at a time, and always returned in text
+    order. When the answer is complete its speech is stored in the audio
+    cache, so a later "Play Last Response" needs no new prediction. A failed
+    chunk stops the pipeline without affecting the text response.
+
+    When another thread plays the audio, the producer calls queue_text()
+    instead of feed() and finish(), and the player iterates chunks().
+
+    Example:
+        >>> pipeline = SpeechPipeline("Female River (American)", 1.0, request.session_hash)
+        >>> for partial in ReplicateService.stream_vision_model(prompt, image_base64):
+        >>>     for chunk_path in pipeline.feed(partial):
+        >>>         play(chunk_path)
+        >>> for chunk_path in pipeline.finish(partial):
+        >>>     play(chunk_path)
+    """
+
+    def __init__(self, voice_type=None, speed=None, session_id=None):
+        self.voice_type = voice_type
+        self.voice_id = TTSService.validate_voice_type(voice_type)
+        self.speed = TTSService.validate_speed(speed)
+        self.session_id = session_id
+        # Speech is synthesized at 1.0x and stretched locally, as in TTSService.stream_audio
+        self.stretch = TTS_LOCAL_TIME_STRETCH and self.speed != 1.0
+        self.synthesis_speed = 1.0 if TTS_LOCAL_TIME_STRETCH else self.speed
+        self.error = None
+        self.started_at = time.monotonic()
+        self.first_audio_at = None
+        self._offset = 0          # Characters of the response already queued for synthesis
+        self._pending = []        # Futures not yet handed to the caller, in text order
+        self._base_paths = []     # Synthesized chunk files, in text order
+        self._text = None         # The complete response, once known
+        self._finished = False    # No more text will be queued
+        self._changed = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, TTS_MAX_PARALLEL_CHUNKS))
+
+    def _render(self, text):
+        """Synthesize one chunk. Returns (synthesized_path, playback_path)."""
+        base_path, _, _ = TTSService._synthesize_chunk(text, self.voice_id, self.synthesis_speed, self.session_id)
+        if self.stretch:
+            return base_path, TTSService._stretch_audio(base_path, self.speed, self.session_id)
+        return base_path, base_path
+
+    def _submit(self, text):
+        """Queue sentence chunks of text for synthesis."""
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.text_utils import split_sentences
+
+        for chunk in split_sentences(text, max_chars=TTS_CHUNK_MAX_CHARS):
+            self._pending.append(self._executor.submit(self._render, chunk))
+
+    def _complete_prefix(self, text):
+        """Return the length of the leading part of text that ends on a sentence boundary."""
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.text_utils import SENTENCE_BOUNDARY
+
+        end = 0
+        for match in SENTENCE_BOUNDARY.finditer(text):
+            end = match.end()
+        return end
+
+    def _next_future(self, wait):
+        """Take the next chunk in text order; with wait=True block until there is one or no more will come."""
+        with self._changed:
+            if wait:
+                self._changed.wait_for(lambda: self._pending or self._finished or self.error is not None)
+            if self.error is not None or not self._pending or not (wait or self._pending[0].done()):
+                return None
+            return self._pending.pop(0)
+
+    def _take(self, future):
+        """Wait for a chunk; returns its playback path, or None if it failed."""
+        try:
+            base_path, playback_path = future.result()
+        except Exception as e:
+            if self.error is None:
+                logger.error(f"Error speaking streamed response: {str(e)}", exc_info=True)
+                self.error = TTSService._format_error(e)
+            self.close()
+            return None
+        self._base_paths.append(base_path)
+        if self.first_audio_at is None:
+            self.first_audio_at = time.monotonic()
+            logger.info(f"Auto-speak started {self.first_audio_at - self.started_at:.2f}s after the request")
+        return playback_path
+
+    def _collect(self, wait):
+        """Hand over finished chunks in order; with wait=True block until the next one is done."""
+        ready = []
+        while (future := self._next_future(wait)) is not None:
+            playback_path = self._take(future)
+            if playback_path is None:
+                break
+            ready.append(playback_path)
+            if wait:
+                break
+        return ready
+
+    def queue_text(self, text, final=False):
+        """
+        Queue newly completed sentences for synthesis without collecting audio.
+
+        Used when another thread plays the audio with chunks().
+
+        Args:
+            text (str): The full response so far.
+            final (bool, optional): The response is complete; the rest of it is
+                queued as well and chunks() ends after the last chunk. Defaults to False.
+
+        Example:
+            >>> pipeline.queue_text("The image shows a red bus. It is parked")
+            >>> pipeline.queue_text("The image shows a red bus. It is parked outside.", final=True)
+        """
+        with self._changed:
+            if self.error is None and text and not self._finished:
+                remaining = text[self._offset:]
+                end = len(remaining) if final else self._complete_prefix(remaining)
+                # Wait until enough complete text has arrived to be worth a prediction
+                if remaining[:end].strip() and (final or len(remaining[:end].strip()) >= AUTO_SPEAK_MIN_CHARS):
+                    self._submit(remaining[:end])
+                    self._offset += end
+            if final:
+                self._text = text
+                self._finished = True
+            self._changed.notify_all()
+
+    def chunks(self):
+        """
+        Yield the audio of the response in order as it becomes ready.
+
+        Ends once the text queued with final=True has been spoken, or when
+        the pipeline fails or is closed. The complete answer's speech is
+        then stored in the audio cache.
+
+        Yields:
+            str: WAV file paths ready for playback, in order.
+
+        Example:
+            >>> for chunk_path in pipeline.chunks():
+            >>>     play(chunk_path)
+        """
+        try:
+            while (future := self._next_future(wait=True)) is not None:
+                playback_path = self._take(future)
+                if playback_path is None:
+                    break
+                yield playback_path
+            if self.error is None and self._text and self._base_paths:
+                self._store(self._text)
+            if self.stretch:
+                # Only the stretched copies were played
+                for base_path in self._base_paths:
+                    TTSService.cleanup_audio_file(base_path)
+        finally:
+            self.close()
+
+    def feed(self, text):
+        """
+        Queue newly completed sentences and return audio that is ready.
+
+        Args:
+            text (str): The full response so far.
+
+        Returns:
+            list: WAV file paths ready for playback, in order (may be empty).
+
+        Example:
+            >>> ready = pipeline.feed("The image shows a red bus. It is parked")
+        """
+        if self.error is not None or not text:
+            return []
+
+        self.queue_text(text)
+        return self._collect(wait=False)
+
+    def finish(self, text=None):
+        """
+        Speak the rest of a completed response.
+
+        Args:
+            text (str, optional): The complete response. When given, text after
+                the last queued sentence is synthesized as well.
+
+        Yields:
+            str: WAV file paths of the remaining chunks, in order.
+
+        Example:
+            >>> for chunk_path in pipeline.finish(answer):
+            >>>     play(chunk_path)
+        """
+        self.queue_text(text or self._text or "", final=True)
+        yield from self.chunks()
+
+    def _store(self, text):
+        """Cache the complete answer's speech so replaying it needs no prediction."""
+        try:
+            if len(self._base_paths) == 1:
+                audio_cache.put_file(audio_cache_key(text, self.voice_id, self.synthesis_speed), self._base_paths[0])
+                return
+            merged_path = TTSService._join_chunks(self._base_paths, self.session_id)
+            audio_cache.put_file(audio_cache_key(text, self.voice_id, self.synthesis_speed), merged_path)
+            TTSService.cleanup_audio_file(merged_path)
+        except Exception as e:
+            logger.warning(f"Could not cache auto-spoken audio: {e}")
+
+    def close(self):
+        """Stop synthesizing, e.g. when the response failed or the listener went away."""
+        with self._changed:
+            self._finished = True
+            self._changed.notify_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self):
+        """
+        Describe the pipeline's outcome for the TTS status box.
+
+        Returns:
+            str: Error message, or voice, speed and time to first audio.
+
+        Example:
+            >>> print(pipeline.status())
+            'Auto-spoke answer using Female River (American) voice at 1.0x speed | First audio: 1.84s'
+        """
+        if self.error is not None:
+            return self.error
+        if self.first_audio_at is None:
+            return "Idle"
+        return (f"Auto-spoke answer using {self.voice_type or DEFAULT_VOICE} voice at {self.speed}x speed"
+                f" | First audio: {self.first_audio_at - self.started_at:.2f}s")
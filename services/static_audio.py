@@ -0,0 +1,220 @@
+"""Pre-rendered speech for content that is the same in every session.
+
+The welcome messages in INIT_HISTORY and the voice preview phrase never
+change, yet every session used to synthesize them on demand. This module
+renders them for every voice in VOICE_TYPES into the audio cache, either in
+the background when the app starts or offline before deployment:
+
+    python -m services.static_audio
+
+Voice previews are then served straight from the cache.
+"""
+
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .tts_service import TTSService
+from .replicate_service import ReplicateService
+from .audio_cache import audio_cache, audio_cache_key
+from config.settings import (
+    INIT_HISTORY,
+    VOICE_TYPES,
+    VOICE_PREVIEW_TEXT,
+    STATIC_AUDIO_PRERENDER,
+    STATIC_AUDIO_WORKERS
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Module level functions (exported directly)
+def prerender_static_audio(voice_types=None):
+    """
+    Render the static texts for every voice into the audio cache.
+
+    Args:
+        voice_types (list, optional): Voice names to render. Defaults to all of VOICE_TYPES.
+
+    Returns:
+        dict: Counts of "rendered", "cached" and "failed" texts.
+
+    Example:
+        >>> stats = prerender_static_audio()
+        >>> print(stats["rendered"])
+    """
+    return StaticAudio.prerender(voice_types)
+
+def stream_voice_preview(voice_type=None, speed=None, session_id=None):
+    """
+    Speak the voice preview phrase.
+
+    Args:
+        voice_type (str, optional): Voice to preview. Defaults to None.
+        speed (float, optional): Speech speed. Defaults to None.
+        session_id (str, optional): Browser session that owns the audio file.
+
+    Yields:
+        tuple: (chunk_audio, status_message) - see StaticAudio.stream_voice_preview.
+
+    Example:
+        >>> for chunk, status in stream_voice_preview("Male George (British)", 1.0):
+        >>>     print(status)
+    """
+    yield from StaticAudio.stream_voice_preview(voice_type, speed, session_id)
+
+class StaticAudio:
+    # Background pre-render started by the app, if any
+    _thread = None
+
+    @staticmethod
+    def static_texts():
+        """
+        Get the texts that are spoken identically in every session.
+
+        Returns:
+            list: The INIT_HISTORY bot messages followed by VOICE_PREVIEW_TEXT.
+
+        Example:
+            >>> len(StaticAudio.static_texts())
+            4
+        """
+        texts = [bot for _, bot in INIT_HISTORY if bot]
+        return texts + [VOICE_PREVIEW_TEXT]
+
+    @staticmethod
+    def is_cached(text, voice_type):
+        """
+        Check whether speech for a text is already in the audio cache.
+
+        Args:
+            text (str): Text to check.
+            voice_type (str): Voice name.
+
+        Returns:
+            bool: True if the 1.0x synthesis is cached.
+        """
+        # Speech is cached at the synthesis speed, 1.0x, and stretched to other speeds on replay
+        key = audio_cache_key(text, TTSService.validate_voice_type(voice_type), 1.0)
+        return audio_cache.contains(key)
+
+    @staticmethod
+    def prerender(voice_types=None):
+        """
+        Render the static texts for every voice into the audio cache.
+
+        Texts that are already cached are skipped, so repeated runs (and
+        restarts with a persistent TTS_CACHE_DIR) cost no predictions.
+
+        Args:
+            voice_types (list, optional): Voice names to render. Defaults to all of VOICE_TYPES.
+
+        Returns:
+            dict: Counts of "rendered", "cached" and "failed" texts.
+
+        Example:
+            >>> stats = StaticAudio.prerender(["Female River (American)"])
+            >>> print(f"{stats['rendered']} rendered, {stats['cached']} already cached")
+        """
+        stats = {"rendered": 0, "cached": 0, "failed": 0}
+        if not audio_cache.enabled:
+            logger.info("Audio cache is disabled, skipping static audio pre-render")
+            return stats
+        api_available, error_msg = ReplicateService.verify_api_available()
+        if not api_available:
+            logger.warning(f"Skipping static audio pre-render: {error_msg}")
+            return stats
+
+        jobs = []
+        for voice_type in voice_types or list(VOICE_TYPES.keys()):
+            for text in StaticAudio.static_texts():
+                if StaticAudio.is_cached(text, voice_type):
+                    stats["cached"] += 1
+                else:
+                    jobs.append((text, voice_type))
+
+        def render(job):
+            text, voice_type = job
+            file_path, status = TTSService.process_audio(text, voice_type, 1.0)
+            if file_path is None:
+                logger.warning(f"Could not pre-render speech for {voice_type}: {status}")
+            return file_path is not None
+
+        with ThreadPoolExecutor(max_workers=max(1, STATIC_AUDIO_WORKERS)) as executor:
+            for success in executor.map(render, jobs):
+                stats["rendered" if success else "failed"] += 1
+
+        logger.info(f"Static audio pre-render: {stats['rendered']} rendered, "
+                    f"{stats['cached']} already cached, {stats['failed']} failed")
+        return stats
+
+    @staticmethod
+    def start_prerender():
+        """
+        Pre-render the static audio on a background thread.
+
+        Does nothing when STATIC_AUDIO_PRERENDER is off or a pre-render is
+        already running, so the app starts serving immediately either way.
+
+        Returns:
+            threading.Thread or None: The pre-render thread, if one was started.
+
+        Example:
+            >>> StaticAudio.start_prerender()
+        """
+        if not STATIC_AUDIO_PRERENDER:
+            return None
+        if StaticAudio._thread is not None and StaticAudio._thread.is_alive():
+            return StaticAudio._thread
+
+        def run():
+            try:
+                StaticAudio.prerender()
+            except Exception as e:
+                logger.error(f"Static audio pre-render failed: {e}", exc_info=True)
+
+        StaticAudio._thread = threading.Thread(target=run, name="static-audio-prerender", daemon=True)
+        StaticAudio._thread.start()
+        return StaticAudio._thread
+
+    @staticmethod
+    def stream_voice_preview(voice_type=None, speed=None, session_id=None):
+        """
+        Speak the voice preview phrase.
+
+        The phrase is pre-rendered for every voice, so the preview is served
+        from the audio cache; a voice that has not been rendered yet is
+        synthesized once and cached. The preview is played, never
+        downloaded, so it is not encoded.
+
+        Args:
+            voice_type (str, optional): Voice to preview. Defaults to None.
+            speed (float, optional): Speech speed. Defaults to None.
+            session_id (str, optional): Browser session that owns the audio file.
+
+        Yields:
+            tuple: (chunk_audio, status_message)
+                - chunk_audio: WAV file path to play, or None for the final update
+                - status_message: Progress, success or error message
+
+        Example:
+            >>> for chunk, status in StaticAudio.stream_voice_preview("Male George (British)", 1.2):
+            >>>     print(status)
+        """
+        status = "No text to convert to speech."
+        for chunk, _, status in TTSService.stream_audio(VOICE_PREVIEW_TEXT, voice_type, speed,
+                                                        session_id, audio_format="wav"):
+            if chunk is not None:
+                yield chunk, status
+        yield None, status.replace("Generated audio", "Previewed", 1)
+
+
+if __name__ == "__main__":
+    # Offline build step: fill the audio cache before deploying
+    from dotenv import load_dotenv
+    from config.logging_config import configure_logging
+
+    load_dotenv()
+    configure_logging()
+    result = StaticAudio.prerender()
+    print(f"Rendered {result['rendered']}, already cached {result['cached']}, failed {result['failed']}")
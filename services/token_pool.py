@@ -0,0 +1,238 @@
+"""Pool of Replicate API tokens for spreading load across accounts.
+
+This module provides a thread-safe pool of API tokens. Each call to the
+Replicate API borrows the least-loaded healthy token from the pool, and the
+outcome of the call is reported back so that rate-limited or failing tokens
+are taken out of rotation until they recover.
+"""
+
+import os
+import re
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+from config.settings import (
+    TOKEN_RATE_LIMIT_COOLDOWN,
+    TOKEN_FAILURE_THRESHOLD,
+    TOKEN_FAILURE_COOLDOWN
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Rate limit wording in error messages; a bare "429" may be part of an ID, a size or a duration
+RATE_LIMIT_PATTERN = re.compile(r"\b429 too many requests\b|\bstatus(?: code)?:? 429\b|\brate.?limit|\bthrottled\b",
+                                re.IGNORECASE)
+
+
+def load_tokens_from_env():
+    """
+    Read the configured Replicate API tokens from the environment.
+
+    Tokens are read from the comma-separated REPLICATE_API_TOKENS variable
+    and from the single REPLICATE_API_TOKEN variable. Duplicates and blank
+    entries are dropped while preserving order.
+
+    Returns:
+        list: Ordered list of unique API tokens (may be empty).
+
+    Example:
+        >>> os.environ["REPLICATE_API_TOKENS"] = "r8_a, r8_b"
+        >>> load_tokens_from_env()
+        ['r8_a', 'r8_b']
+    """
+    raw_tokens = os.environ.get("REPLICATE_API_TOKENS", "").split(",")
+    raw_tokens.append(os.environ.get("REPLICATE_API_TOKEN", ""))
+
+    tokens = []
+    for token in raw_tokens:
+        token = token.strip()
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def is_rate_limit_error(error):
+    """
+    Check whether an exception raised by the Replicate client is a rate limit.
+
+    The HTTP status is checked first (the status attribute of a
+    ReplicateError, or the response of an httpx error); otherwise the
+    message must say so, e.g. "429 Too Many Requests" or "status 429".
+
+    Args:
+        error (Exception): Exception raised by a Replicate API call.
+
+    Returns:
+        bool: True if the error indicates HTTP 429 / throttling.
+
+    Example:
+        >>> is_rate_limit_error(Exception("429 Too Many Requests"))
+        True
+    """
+    response = getattr(error, "response", None)
+    for status in (getattr(error, "status", None), getattr(response, "status_code", None)):
+        if status is not None:
+            return status == 429
+    return RATE_LIMIT_PATTERN.search(str(error)) is not None
+
+
+class TokenState:
+    """Runtime bookkeeping for a single API token."""
+
+    def __init__(self, token):
+        self.token = token
+        self.in_flight = 0               # Requests currently using this token
+        self.total_requests = 0          # Requests started with this token
+        self.rate_limited_count = 0      # Number of 429 responses seen
+        self.consecutive_failures = 0    # Non-429 failures since last success
+        self.unavailable_until = 0.0     # Monotonic time the token re-enters rotation
+        self.last_used = 0.0             # Monotonic time of the last acquisition
+
+    @property
+    def label(self):
+        """Short, log-safe identifier for the token."""
+        return f"...{self.token[-4:]}" if len(self.token) > 4 else "****"
+
+    def is_available(self, now):
+        """Whether the token is currently in rotation."""
+        return now >= self.unavailable_until
+
+
+class TokenPool:
+    """
+    Thread-safe pool of API tokens with least-loaded selection.
+
+    Tokens are chosen by fewest in-flight requests, ties broken by least
+    recent use. A token that receives a rate limit response is removed from
+    rotation for TOKEN_RATE_LIMIT_COOLDOWN seconds; a token that fails
+    TOKEN_FAILURE_THRESHOLD times in a row is removed for
+    TOKEN_FAILURE_COOLDOWN seconds.
+
+    Example:
+        >>> pool = TokenPool(["r8_a", "r8_b"])
+        >>> with pool.acquire() as token:
+        >>>     client = replicate.Client(api_token=token)
+    """
+
+    def __init__(self, tokens,
+                 rate_limit_cooldown=TOKEN_RATE_LIMIT_COOLDOWN,
+                 failure_threshold=TOKEN_FAILURE_THRESHOLD,
+                 failure_cooldown=TOKEN_FAILURE_COOLDOWN):
+        self._states = [TokenState(token) for token in tokens]
+        self._lock = threading.Lock()
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.failure_threshold = failure_threshold
+        self.failure_cooldown = failure_cooldown
+
+    def __len__(self):
+        return len(self._states)
+
+    @property
+    def tokens(self):
+        """List of tokens managed by the pool, in configuration order."""
+        return [state.token for state in self._states]
+
+    def _select(self):
+        """Pick the best token state. Caller must hold the lock."""
+        now = time.monotonic()
+        available = [s for s in self._states if s.is_available(now)]
+        if available:
+            return min(available, key=lambda s: (s.in_flight, s.last_used))
+
+        # Every token is out of rotation - use the one that recovers first
+        # rather than failing the request outright
+        state = min(self._states, key=lambda s: s.unavailable_until)
+        logger.warning(f"All API tokens are throttled or unhealthy; using token {state.label} "
+                       f"({state.unavailable_until - now:.1f}s before it recovers)")
+        return state
+
+    @contextmanager
+    def acquire(self):
+        """
+        Borrow a token for the duration of one API call.
+
+        Exceptions raised inside the block are classified and recorded
+        against the token (rate limit or failure) before being re-raised;
+        a clean exit records a success.
+
+        Yields:
+            str: The selected API token.
+
+        Raises:
+            ValueError: If the pool has no tokens.
+        """
+        if not self._states:
+            raise ValueError("No Replicate API tokens configured")
+
+        with self._lock:
+            state = self._select()
+            state.in_flight += 1
+            state.total_requests += 1
+            state.last_used = time.monotonic()
+
+        try:
+            yield state.token
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self._mark_rate_limited(state)
+            else:
+                self._mark_failure(state)
+            raise
+        else:
+            self._mark_success(state)
+        finally:
+            with self._lock:
+                state.in_flight -= 1
+
+    def _mark_rate_limited(self, state):
+        """Take a token out of rotation after a 429 response."""
+        with self._lock:
+            state.rate_limited_count += 1
+            state.unavailable_until = time.monotonic() + self.rate_limit_cooldown
+        logger.warning(f"API token {state.label} rate limited; removed from rotation "
+                       f"for {self.rate_limit_cooldown}s")
+
+    def _mark_failure(self, state):
+        """Record a failed call and quarantine the token if it keeps failing."""
+        with self._lock:
+            state.consecutive_failures += 1
+            unhealthy = state.consecutive_failures >= self.failure_threshold
+            if unhealthy:
+                state.unavailable_until = time.monotonic() + self.failure_cooldown
+        if unhealthy:
+            logger.warning(f"API token {state.label} failed {state.consecutive_failures} times in a row; "
+                           f"removed from rotation for {self.failure_cooldown}s")
+
+    def _mark_success(self, state):
+        """Reset the failure streak after a successful call."""
+        with self._lock:
+            state.consecutive_failures = 0
+
+    def stats(self):
+        """
+        Get a snapshot of per-token load and health.
+
+        Returns:
+            list: One dict per token with label, in_flight, total_requests,
+                  rate_limited_count, consecutive_failures and available keys.
+
+        Example:
+            >>> for entry in pool.stats():
+            >>>     print(entry["label"], entry["in_flight"])
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "label": s.label,
+                    "in_flight": s.in_flight,
+                    "total_requests": s.total_requests,
+                    "rate_limited_count": s.rate_limited_count,
+                    "consecutive_failures": s.consecutive_failures,
+                    "available": s.is_available(now),
+                }
+                for s in self._states
+            ]
@@ -0,0 +1,159 @@
+"""Background pre-synthesis of bot messages.
+
+Users who rely on a screen reader almost always press "Play Last Response"
+right after an answer arrives. When prefetching is enabled, the TTSPrefetcher
+synthesizes each new bot message in the background with the session's
+current voice and speed, so the audio is usually in the audio cache by the
+time Play is pressed. Prefetch jobs run on their own small worker pool and
+synthesize one chunk at a time, so they never take more than
+TTS_PREFETCH_WORKERS predictions away from requests a user is waiting for,
+and a newer message or a cleared history cancels the job of its session.
+"""
+
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .tts_service import TTSService
+from config.settings import (
+    TTS_PREFETCH_ENABLED,
+    TTS_PREFETCH_WORKERS,
+    TTS_PREFETCH_DELAY
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Jobs scheduled without a browser session share one slot
+SHARED_SESSION = "shared"
+
+
+class TTSPrefetcher:
+    """
+    Low-priority background synthesis of the latest bot message per session.
+
+    Each session has at most one job. Scheduling a new job cancels the
+    previous one: a job that has not started yet is dropped, and a job that
+    is already synthesizing stops after its current chunk without caching
+    anything. Jobs wait delay seconds before starting, so a message that is
+    immediately followed by another one is never synthesized.
+
+    Example:
+        >>> prefetcher = TTSPrefetcher(enabled=True)
+        >>> prefetcher.schedule(request.session_hash, answer, "Female River (American)", 1.0)
+        >>> prefetcher.cancel(request.session_hash)  # history cleared
+    """
+
+    def __init__(self, enabled=TTS_PREFETCH_ENABLED, max_workers=TTS_PREFETCH_WORKERS, delay=TTS_PREFETCH_DELAY):
+        self.enabled = enabled
+        self.delay = delay
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="tts-prefetch")
+        self._jobs = {}             # session -> (generation, future, cancel_event)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    def schedule(self, session_id, text, voice_type=None, speed=None, audio_format=None):
+        """
+        Queue background synthesis of a bot message.
+
+        Args:
+            session_id (str): Browser session the message belongs to.
+            text (str): Bot message to synthesize.
+            voice_type (str, optional): The session's current voice.
+            speed (float, optional): The session's current speech speed.
+            audio_format (str, optional): Delivery format; see TTSService.encode_audio.
+
+        Returns:
+            concurrent.futures.Future or None: The job, or None if prefetching
+                is disabled or there is nothing to speak.
+
+        Example:
+            >>> tts_prefetcher.schedule(request.session_hash, answer, voice_type, speed)
+        """
+        if not self.enabled or not text or not text.strip():
+            return None
+
+        session = session_id or SHARED_SESSION
+        with self._lock:
+            self._cancel_locked(session)
+            self._generation += 1
+            generation = self._generation
+            cancel_event = threading.Event()
+            future = self._executor.submit(self._run, session, generation, cancel_event,
+                                           text, voice_type, speed, audio_format)
+            self._jobs[session] = (generation, future, cancel_event)
+            self.scheduled += 1
+        return future
+
+    def _cancel_locked(self, session):
+        """Cancel a session's job. Caller must hold the lock."""
+        job = self._jobs.pop(session, None)
+        if job is None:
+            return False
+        _, future, cancel_event = job
+        cancel_event.set()
+        future.cancel()
+        if not future.done() or future.cancelled():
+            self.cancelled += 1
+        return True
+
+    def cancel(self, session_id):
+        """
+        Cancel the pending job of a session, e.g. when its history is cleared.
+
+        Args:
+            session_id (str): Browser session whose job is cancelled.
+
+        Returns:
+            bool: True if the session had a job.
+
+        Example:
+            >>> tts_prefetcher.cancel(request.session_hash)
+        """
+        with self._lock:
+            return self._cancel_locked(session_id or SHARED_SESSION)
+
+    def _run(self, session, generation, cancel_event, text, voice_type, speed, audio_format):
+        """Worker body: wait out the delay, then synthesize one chunk at a time unless superseded."""
+        if cancel_event.wait(self.delay):
+            return None
+        file_path, status = TTSService.process_audio(text, voice_type, speed,
+                                                     None if session == SHARED_SESSION else session,
+                                                     audio_format, max_parallel=1, cancel_event=cancel_event)
+        with self._lock:
+            if self._jobs.get(session, (None,))[0] == generation:
+                del self._jobs[session]
+            if file_path is not None:
+                self.completed += 1
+        if cancel_event.is_set() and file_path is None:
+            logger.debug(f"Background speech synthesis cancelled for session {session[:8]}")
+        elif file_path is None:
+            logger.warning(f"Background speech synthesis failed: {status}")
+        else:
+            logger.debug(f"Pre-synthesized speech for session {session[:8]}")
+        return file_path
+
+    def stats(self):
+        """
+        Get prefetch statistics.
+
+        Returns:
+            dict: scheduled, completed, cancelled and pending keys.
+
+        Example:
+            >>> print(tts_prefetcher.stats()["completed"])
+        """
+        with self._lock:
+            return {
+                "scheduled": self.scheduled,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "pending": len(self._jobs),
+            }
+
+
+# Shared prefetcher used by the app
+tts_prefetcher = TTSPrefetcher()
@@ -2,20 +2,49 @@
 
 This module provides functionality for converting text to speech using the Replicate API.
 It handles voice type validation, speech speed adjustment, audio file management,
-and integration with the ReplicateService for API calls.
+and integration with the ReplicateService for API calls. Audio is downloaded
+through a shared pooled HTTP session and streamed straight to disk. Long texts are split
+into sentence chunks that are synthesized concurrently and streamed in order,
+so playback can start as soon as the first chunk is ready. Speech is synthesized
+at 1.0x and other speeds are applied locally, so a speed change never needs
+a new prediction. The final file is encoded in a compact format negotiated
+for each client.
 """
 
+import time
+import wave
+import threading
 import requests
-from tempfile import NamedTemporaryFile
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 import os
 import logging
 
 from .replicate_service import ReplicateService
+from .audio_cache import audio_cache, audio_cache_key
+from .audio_store import audio_store
 from config.settings import (
     VOICE_TYPES, 
     TTS_SPEED_RANGE, 
     DEFAULT_VOICE, 
-    DEFAULT_SPEED
+    DEFAULT_SPEED,
+    TTS_CHUNK_MAX_CHARS,
+    TTS_MAX_PARALLEL_CHUNKS,
+    TTS_LOCAL_TIME_STRETCH,
+    TTS_POSTPROCESS,
+    TTS_SILENCE_THRESHOLD_DB,
+    TTS_SILENCE_PAD,
+    TTS_TARGET_LOUDNESS_DBFS,
+    TTS_CROSSFADE_SECONDS,
+    AUDIO_HTTP_POOL_SIZE,
+    AUDIO_DOWNLOAD_RETRIES,
+    AUDIO_DOWNLOAD_TIMEOUT,
+    AUDIO_DOWNLOAD_CHUNK_SIZE,
+    TTS_AUDIO_DELIVERY,
+    TTS_AUDIO_FORMAT,
+    TTS_AUDIO_SAMPLE_RATE,
+    TTS_AUDIO_BITRATE
 )
 
 # Get logger for this module
@@ -76,7 +105,30 @@ def process_audio(text, voice_type=None, speed=None):
     """
     return TTSService.process_audio(text, voice_type, speed)
 
+def stream_audio(text, voice_type=None, speed=None):
+    """
+    Synthesize text sentence by sentence, yielding audio as it becomes ready.
+    
+    Args:
+        text (str): Text to convert to speech.
+        voice_type (str, optional): Voice type to use. Defaults to None.
+        speed (float, optional): Speech speed. Defaults to None.
+    
+    Yields:
+        tuple: (chunk_audio, file_path, status_message) - see TTSService.stream_audio.
+        
+    Example:
+        >>> for chunk, file_path, status in stream_audio(answer, "male", 1.0):
+        >>>     if chunk:
+        >>>         play(chunk)
+    """
+    yield from TTSService.stream_audio(text, voice_type, speed)
+
 class TTSService:
+    # Shared HTTP session so audio downloads reuse pooled connections
+    _http_session = None
+    _session_lock = threading.Lock()
+
     @staticmethod
     def validate_voice_type(voice_type=None):
         """
@@ -125,83 +177,591 @@ class TTSService:
         return max(min_speed, min(max_speed, float(speed)))
 
     @staticmethod
-    def _create_temp_audio_file(content):
+    def get_http_session():
         """
-        Create a temporary audio file with the given content.
+        Get the shared HTTP session used for audio downloads.
+        
+        The session keeps up to AUDIO_HTTP_POOL_SIZE connections alive, so
+        consecutive and concurrent chunk downloads skip the TCP and TLS
+        handshakes, and retries connection errors and 5xx responses with backoff.
+        
+        Returns:
+            requests.Session: The shared session.
+            
+        Example:
+            >>> session = TTSService.get_http_session()
+        """
+        with TTSService._session_lock:
+            if TTSService._http_session is None:
+                retry = Retry(total=AUDIO_DOWNLOAD_RETRIES, backoff_factor=0.3,
+                              status_forcelist=(500, 502, 503, 504), allowed_methods=("GET",))
+                adapter = HTTPAdapter(pool_connections=AUDIO_HTTP_POOL_SIZE,
+                                      pool_maxsize=AUDIO_HTTP_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                TTSService._http_session = session
+            return TTSService._http_session
+
+    @staticmethod
+    def _create_temp_audio_path(session_id=None):
+        """
+        Create an empty audio file in the managed audio store and return its path.
+        
+        The store's reaper deletes the file once it expires or the store
+        exceeds its quota, so callers do not need to clean it up.
         
         Args:
-            content (bytes): Audio content to write to the file.
+            session_id (str, optional): Browser session that owns the file.
             
         Returns:
-            str: Path to the temporary file.
+            str: Path to the new file.
             
         Raises:
             IOError: If file creation fails.
             
         Example:
-            >>> audio_data = requests.get(audio_url).content
-            >>> temp_path = TTSService._create_temp_audio_file(audio_data)
+            >>> temp_path = TTSService._create_temp_audio_path(request.session_hash)
+            >>> TTSService._download_audio(audio_url, temp_path)
         """
-        # Create a temporary file with .wav extension that won't be automatically deleted
-        # This allows the file to be used after this function returns
-        with NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(content)
-            return temp_file.name
+        return audio_store.new_path(session_id)
 
     @staticmethod
-    def process_audio(text, voice_type=None, speed=None):
+    def _download_audio(audio_url, destination_path):
         """
-        Process text to speech conversion.
+        Stream audio from a URL into a file in fixed-size chunks.
+        
+        Only one chunk of AUDIO_DOWNLOAD_CHUNK_SIZE bytes is held in memory at
+        a time, so peak memory does not grow with the length of the audio.
         
         Args:
-            text (str): Text to convert to speech.
-            voice_type (str, optional): Voice type to use. Defaults to None.
-            speed (float, optional): Speech speed. Defaults to None.
+            audio_url (str): URL of the audio file.
+            destination_path (str): File to write the audio to.
+            
+        Returns:
+            int: Number of bytes written.
+            
+        Raises:
+            RuntimeError: If the server returns a non-200 status.
+            requests.RequestException: If the connection fails or times out.
+            
+        Example:
+            >>> size = TTSService._download_audio(audio_url, "/tmp/speech.wav")
+        """
+        response = TTSService.get_http_session().get(audio_url, stream=True, timeout=AUDIO_DOWNLOAD_TIMEOUT)
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"Error downloading audio: HTTP status {response.status_code}")
+            written = 0
+            with open(destination_path, "wb") as audio_file:
+                for block in response.iter_content(chunk_size=AUDIO_DOWNLOAD_CHUNK_SIZE):
+                    if block:
+                        audio_file.write(block)
+                        written += len(block)
+            return written
+        finally:
+            response.close()
+
+    @staticmethod
+    def _synthesize_chunk(text, voice_id, speed, session_id=None):
+        """
+        Synthesize one chunk of text and download the resulting audio to disk.
         
+        Args:
+            text (str): Text of the chunk.
+            voice_id (str): Validated voice ID.
+            speed (float): Validated speech speed.
+            session_id (str, optional): Browser session that owns the audio file.
+            
         Returns:
-            tuple: Temporary audio file path and status message.
+            tuple: (file_path, prediction_seconds, download_seconds)
             
         Raises:
-            Exception: If TTS processing fails.
+            RuntimeError: If the audio download returns a non-200 status.
+            Exception: If the prediction or the download fails.
+        """
+        # Get audio URL from Replicate
+        start_time = time.monotonic()
+        audio_url = ReplicateService.run_tts_model(text, voice_id, speed)
+        prediction_seconds = time.monotonic() - start_time
+
+        # Download the audio file from the URL provided by Replicate
+        temp_path = TTSService._create_temp_audio_path(session_id)
+        try:
+            size = TTSService._download_audio(audio_url, temp_path)
+        except Exception:
+            TTSService.cleanup_audio_file(temp_path)
+            raise
+        download_seconds = time.monotonic() - start_time - prediction_seconds
+        logger.debug(f"Chunk predicted in {prediction_seconds:.2f}s, "
+                     f"{size} bytes downloaded in {download_seconds:.2f}s")
+        if TTS_POSTPROCESS:
+            TTSService._postprocess_audio(temp_path)
+        return temp_path, prediction_seconds, download_seconds
+
+    @staticmethod
+    def _postprocess_audio(file_path):
+        """
+        Trim leading and trailing silence and normalize loudness of a chunk in place.
+        
+        Chunks are synthesized independently, so each one starts and ends
+        with its own pause and may come back at a slightly different level.
+        Post-processing is best effort: if it fails, the chunk is kept as
+        downloaded.
+        
+        Args:
+            file_path (str): Downloaded WAV file, replaced by the processed audio.
+            
+        Returns:
+            bool: True if the file was processed.
             
         Example:
-            >>> file_path, status = TTSService.process_audio("Hello world", "male", 1.0)
-            >>> if file_path:
-            >>>     play_audio(file_path)
+            >>> TTSService._postprocess_audio(chunk_path)
         """
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.audio_utils import postprocess_wav_file
+
+        # Written next to the chunk and moved over it, so the file keeps its place in the audio store
+        processed_path = f"{file_path}.processed"
+        try:
+            start_time = time.monotonic()
+            stats = postprocess_wav_file(file_path, processed_path,
+                                         threshold_db=TTS_SILENCE_THRESHOLD_DB,
+                                         pad_seconds=TTS_SILENCE_PAD,
+                                         target_dbfs=TTS_TARGET_LOUDNESS_DBFS)
+            os.replace(processed_path, file_path)
+        except Exception as e:
+            logger.warning(f"Skipping audio post-processing of {file_path}: {e}")
+            TTSService.cleanup_audio_file(processed_path)
+            return False
+        logger.debug(f"Post-processed chunk in {time.monotonic() - start_time:.3f}s: "
+                     f"trimmed {stats['frames_in'] - stats['frames_out']} frames, gain {stats['gain_db']:+.1f} dB")
+        return True
+
+    @staticmethod
+    def _join_chunks(paths, session_id=None):
+        """Return the single chunk file, or merge several chunks into a new file."""
+        if len(paths) == 1:
+            return paths[0]
+        destination_path = TTSService._create_temp_audio_path(session_id)
+        if TTS_POSTPROCESS:
+            # Lazy import avoids a circular import (utils imports services)
+            from utils.audio_utils import crossfade_wav_files
+
+            try:
+                return crossfade_wav_files(paths, destination_path, TTS_CROSSFADE_SECONDS)
+            except ValueError as e:
+                logger.warning(f"Merging chunks without crossfade: {e}")
+        return TTSService._merge_wav_files(paths, destination_path)
+
+    @staticmethod
+    def _merge_wav_files(paths, destination_path, frames_per_block=65536):
+        """
+        Concatenate WAV files into a single WAV file.
+        
+        Frames are copied in blocks, so memory use does not depend on the
+        length of the audio.
+        
+        Args:
+            paths (list): WAV file paths in playback order.
+            destination_path (str): File to write the merged audio to.
+            frames_per_block (int, optional): Frames copied per read.
+            
+        Returns:
+            str: destination_path
+            
+        Raises:
+            ValueError: If the files use different audio formats.
+            
+        Example:
+            >>> TTSService._merge_wav_files(["part1.wav", "part2.wav"], "speech.wav")
+        """
+        params = None
+        with wave.open(destination_path, "wb") as merged:
+            for path in paths:
+                with wave.open(path, "rb") as part:
+                    chunk_params = part.getparams()[:3]  # channels, sample width, frame rate
+                    if params is None:
+                        params = chunk_params
+                        merged.setparams(part.getparams())
+                    elif chunk_params != params:
+                        raise ValueError(f"Cannot merge audio chunks with different formats: {params} vs {chunk_params}")
+                    while True:
+                        frames = part.readframes(frames_per_block)
+                        if not frames:
+                            break
+                        merged.writeframes(frames)
+        return destination_path
+
+    @staticmethod
+    def _stretch_audio(source_path, speed, session_id=None):
+        """
+        Write a time-stretched copy of a WAV file to the audio store.
+        
+        Args:
+            source_path (str): WAV file synthesized at 1.0x.
+            speed (float): Target speech speed.
+            session_id (str, optional): Browser session that owns the new file.
+            
+        Returns:
+            str: Path of the stretched WAV file.
+            
+        Raises:
+            ValueError: If the file is not a supported WAV file.
+            
+        Example:
+            >>> fast_path = TTSService._stretch_audio("speech_1x.wav", 1.5)
+        """
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.audio_utils import stretch_wav_file
+
+        destination_path = TTSService._create_temp_audio_path(session_id)
+        try:
+            return stretch_wav_file(source_path, destination_path, speed)
+        except Exception:
+            TTSService.cleanup_audio_file(destination_path)
+            raise
+
+    @staticmethod
+    def negotiate_audio_format(user_agent=None):
+        """
+        Choose the delivery format of speech for a client.
+        
+        Uses TTS_AUDIO_FORMAT, except that WebKit-only browsers (Safari and
+        every iOS browser) get MP3 instead of Opus, since older versions
+        cannot play Ogg Opus. Compressed formats need ffmpeg; without it
+        WAV is used.
+        
+        Args:
+            user_agent (str, optional): The client's User-Agent header.
+            
+        Returns:
+            str: "opus", "mp3" or "wav".
+            
+        Example:
+            >>> TTSService.negotiate_audio_format(request.headers.get("user-agent"))
+            'opus'
+        """
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.audio_utils import AUDIO_FORMATS, ffmpeg_path
+
+        audio_format = TTS_AUDIO_FORMAT if TTS_AUDIO_FORMAT in AUDIO_FORMATS else "wav"
+        if audio_format == "opus" and user_agent and "AppleWebKit" in user_agent \
+                and not any(engine in user_agent for engine in ("Chrome/", "Chromium/", "Edg/", "OPR/")):
+            audio_format = "mp3"
+        if audio_format != "wav" and ffmpeg_path() is None:
+            logger.debug(f"ffmpeg is not installed, delivering WAV instead of {audio_format}")
+            audio_format = "wav"
+        return audio_format
+
+    @staticmethod
+    def encode_audio(source_path, audio_format=None, session_id=None, cache_key=None):
+        """
+        Encode synthesized speech in its delivery format.
+        
+        The file is converted to audio_format at TTS_AUDIO_SAMPLE_RATE and
+        TTS_AUDIO_BITRATE. Encoded files are stored in the audio cache under
+        cache_key, so each text is encoded only once. If encoding fails, the
+        WAV file is delivered unchanged.
+        
+        Args:
+            source_path (str): Synthesized WAV file.
+            audio_format (str, optional): "opus", "mp3" or "wav". Defaults to
+                the result of negotiate_audio_format().
+            session_id (str, optional): Browser session that owns the new file.
+            cache_key (str, optional): Key from _encoded_cache_key; None skips the cache.
+            
+        Returns:
+            tuple: (file_path, audio_format) of the delivered audio.
+            
+        Example:
+            >>> path, audio_format = TTSService.encode_audio("/tmp/speech.wav", "opus")
+            >>> print(path)  # e.g. /tmp/hearsee_audio/shared/tmpab12cd.ogg
+        """
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.audio_utils import AUDIO_FORMATS, encode_audio_file
+
+        audio_format = audio_format or TTSService.negotiate_audio_format()
+        if audio_format == "wav":
+            try:
+                with wave.open(source_path, "rb") as wav_file:
+                    if wav_file.getframerate() == TTS_AUDIO_SAMPLE_RATE:
+                        return source_path, "wav"
+            except (wave.Error, EOFError, OSError):
+                # Not a PCM WAV file, deliver it as it is
+                return source_path, "wav"
+
+        cached_path = audio_cache.get(cache_key) if cache_key else None
+        if cached_path:
+            return cached_path, audio_format
+
+        destination_path = audio_store.new_path(session_id, suffix=AUDIO_FORMATS[audio_format][0])
+        try:
+            start_time = time.monotonic()
+            encode_audio_file(source_path, destination_path, audio_format,
+                              TTS_AUDIO_SAMPLE_RATE, TTS_AUDIO_BITRATE)
+            logger.debug(f"Encoded speech as {audio_format} in {time.monotonic() - start_time:.2f}s: "
+                         f"{os.path.getsize(source_path)} -> {os.path.getsize(destination_path)} bytes")
+        except Exception as e:
+            logger.warning(f"Could not encode speech as {audio_format}, delivering WAV: {e}")
+            TTSService.cleanup_audio_file(destination_path)
+            return source_path, "wav"
+
+        if cache_key:
+            audio_cache.put_file(cache_key, destination_path)
+        return destination_path, audio_format
+
+    @staticmethod
+    def _encoded_cache_key(text, voice_id, speed, audio_format):
+        """Build the audio cache key of an encoded copy of synthesized speech."""
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.audio_utils import AUDIO_FORMATS
+
+        encoding = f"{audio_format}:{TTS_AUDIO_SAMPLE_RATE}:{TTS_AUDIO_BITRATE}"
+        return audio_cache_key(text, voice_id, speed, encoding=encoding, suffix=AUDIO_FORMATS[audio_format][0])
+
+    @staticmethod
+    def audio_delivery():
+        """
+        Get the effective audio delivery mode.
+        
+        "url" hands the prediction's output URL to the client, so the server
+        never downloads the audio. The audio has to be materialized locally
+        whenever the audio cache is enabled, so "url" falls back to
+        "download" in that case.
+        
+        Returns:
+            str: "url" or "download".
+            
+        Example:
+            >>> if TTSService.audio_delivery() == "url":
+            >>>     print("Audio is streamed from its source")
+        """
+        if TTS_AUDIO_DELIVERY == "url" and not audio_cache.enabled:
+            return "url"
+        return "download"
+
+    @staticmethod
+    def _format_error(error):
+        """Turn a synthesis exception into a user-facing status message."""
+        if str(error).startswith("Error downloading audio"):
+            return str(error)
+        # Include "Error downloading audio" in the message if it's a connection error
+        if "ConnectionError" in str(type(error)) or "Network error" in str(error):
+            return f"Error downloading audio: {str(error)}"
+        return f"Error generating speech: {str(error)}"
+
+    @staticmethod
+    def stream_audio(text, voice_type=None, speed=None, session_id=None, audio_format=None,
+                     max_parallel=TTS_MAX_PARALLEL_CHUNKS, cancel_event=None):
+        """
+        Synthesize text sentence by sentence, yielding audio as it becomes ready.
+        
+        The text is split into sentence chunks (see utils.text_utils.split_sentences)
+        that are synthesized concurrently, at most max_parallel at a
+        time. Chunks are yielded strictly in order as soon as each one and all
+        chunks before it are ready, so playback starts after the first chunk
+        instead of after the whole text. A final update carries the path of
+        one merged WAV file with the complete speech. In "url" delivery mode
+        (see audio_delivery) the text is synthesized in one prediction and
+        only its output URL is returned. With TTS_LOCAL_TIME_STRETCH, speech
+        is synthesized and cached at 1.0x and every chunk is time-stretched
+        locally to the requested speed, so moving the speed slider replays
+        the cached synthesis instead of running a new prediction. Audio
+        previously synthesized for the same text, voice and speed is served
+        from the audio cache instead; the cached file belongs to the cache
+        and must not be deleted by the caller. The merged file is encoded in
+        audio_format (see encode_audio) before it is returned.
+        
+        Args:
+            text (str): Text to convert to speech.
+            voice_type (str, optional): Voice type to use. Defaults to None.
+            speed (float, optional): Speech speed. Defaults to None.
+            session_id (str, optional): Browser session that owns the audio files.
+            audio_format (str, optional): Delivery format of the merged file, "opus",
+                "mp3" or "wav". Defaults to the result of negotiate_audio_format().
+            max_parallel (int, optional): Chunks synthesized at once. Defaults to
+                TTS_MAX_PARALLEL_CHUNKS; background jobs use 1.
+            cancel_event (threading.Event, optional): Checked between chunks; once set,
+                chunks not yet started are dropped and nothing is cached.
+        
+        Yields:
+            tuple: (chunk_audio, file_path, status_message)
+                - chunk_audio: WAV file path of the next chunk, or None for the final update
+                - file_path: Path of the merged, encoded file in the final update (the
+                  output URL in "url" delivery mode), otherwise None
+                - status_message: Progress, success or error message
+                
+        Example:
+            >>> for chunk, file_path, status in TTSService.stream_audio(answer, "male", 1.0):
+            >>>     print(status)
+            'Playing part 1 of 3...'
+            'Playing part 2 of 3...'
+            'Playing part 3 of 3...'
+            'Generated audio using male voice at 1.0x speed | Synthesis: 2.41s | Prediction time: 4.12s | ...'
+        """
+        # Lazy import avoids a circular import (utils imports services)
+        from utils.text_utils import split_sentences
+
         # Check API availability
         api_available, error_msg = ReplicateService.verify_api_available()
         if not api_available:
-            return None, error_msg
+            yield None, None, error_msg
+            return
 
         # Validate inputs
         if not text or text.strip() == "":
-            return None, "No text to convert to speech."
+            yield None, None, "No text to convert to speech."
+            return
+
+        # Get validated parameters
+        voice_id = TTSService.validate_voice_type(voice_type)
+        safe_speed = TTSService.validate_speed(speed)
+        status = f"Generated audio using {voice_type or DEFAULT_VOICE} voice at {safe_speed}x speed"
+
+        # In url delivery mode the whole text is one prediction and the client fetches
+        # the output directly; nothing is downloaded or chunked on the server
+        if TTSService.audio_delivery() == "url":
+            try:
+                start_time = time.monotonic()
+                audio_url = ReplicateService.run_tts_model(text, voice_id, safe_speed)
+                yield None, audio_url, f"{status} | Synthesis: {time.monotonic() - start_time:.2f}s | Served from source"
+            except Exception as e:
+                logger.error(f"Error generating speech: {str(e)}", exc_info=True)
+                yield None, None, TTSService._format_error(e)
+            return
+
+        # Other speeds are derived locally from one synthesis at 1.0x
+        stretch = TTS_LOCAL_TIME_STRETCH and safe_speed != 1.0
+        synthesis_speed = 1.0 if TTS_LOCAL_TIME_STRETCH else safe_speed
 
+        audio_format = audio_format or TTSService.negotiate_audio_format()
+        encoded_key = TTSService._encoded_cache_key(text, voice_id, safe_speed, audio_format)
+
+        # Replays and repeated messages are served from the audio cache without a prediction
+        cache_key = audio_cache_key(text, voice_id, synthesis_speed)
+        cached_path = audio_cache.get(cache_key)
+        if cached_path:
+            logger.info("Serving speech from the audio cache")
+            if stretch:
+                try:
+                    start_time = time.monotonic()
+                    cached_path = TTSService._stretch_audio(cached_path, safe_speed, session_id)
+                    status = f"{status} | Stretch: {time.monotonic() - start_time:.2f}s"
+                except Exception as e:
+                    logger.error(f"Error stretching cached speech: {str(e)}", exc_info=True)
+                    yield None, None, TTSService._format_error(e)
+                    return
+            yield cached_path, None, "Playing cached audio..."
+            delivered_path, delivered_format = TTSService.encode_audio(cached_path, audio_format, session_id, encoded_key)
+            yield None, delivered_path, f"{status} | Format: {delivered_format} (cached)"
+            return
+
+        chunks = split_sentences(text, max_chars=TTS_CHUNK_MAX_CHARS)
+        logger.info(f"Synthesizing speech in {len(chunks)} chunks")
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(chunks))))
+        futures = []
+        chunk_paths = []
+        stretched_paths = []
+        base_path = temp_path = None
         try:
-            # Get validated parameters
-            voice_id = TTSService.validate_voice_type(voice_type)
-            safe_speed = TTSService.validate_speed(speed)
-
-            # Get audio URL from Replicate
-            audio_url = ReplicateService.run_tts_model(text, voice_id, safe_speed)
-
-            # Download and save audio
-            # Download the audio file from the URL provided by Replicate
-            response = requests.get(audio_url)
-            if response.status_code == 200:
-                # Create temporary file with the audio content
-                temp_path = TTSService._create_temp_audio_file(response.content)
-                # Return the file path and a descriptive status message
-                return temp_path, f"Generated audio using {voice_type or DEFAULT_VOICE} voice at {safe_speed}x speed"
-            else:
-                return None, f"Error downloading audio: HTTP status {response.status_code}"
+            def synthesize(chunk):
+                # Chunks that have not started yet are skipped once the stream is cancelled
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                return TTSService._synthesize_chunk(chunk, voice_id, synthesis_speed, session_id)
+
+            synthesis_start = time.monotonic()
+            futures = [executor.submit(synthesize, chunk) for chunk in chunks]
+            synthesis_seconds = prediction_total = download_total = stretch_total = 0.0
+            # Ordered reassembly: wait for each chunk in turn, later chunks keep synthesizing meanwhile
+            for index, future in enumerate(futures):
+                result = None if cancel_event is not None and cancel_event.is_set() else future.result()
+                if result is None:
+                    logger.info(f"Speech synthesis cancelled after {index} of {len(chunks)} chunks")
+                    yield None, None, "Speech synthesis cancelled."
+                    return
+                chunk_path, prediction_seconds, download_seconds = result
+                # Wall-clock time until the last chunk was ready; the chunks overlap
+                synthesis_seconds = time.monotonic() - synthesis_start
+                chunk_paths.append(chunk_path)
+                prediction_total += prediction_seconds
+                download_total += download_seconds
+                if stretch:
+                    start_time = time.monotonic()
+                    stretched_paths.append(TTSService._stretch_audio(chunk_path, safe_speed, session_id))
+                    stretch_total += time.monotonic() - start_time
+                played_path = stretched_paths[-1] if stretch else chunk_path
+                yield played_path, None, f"Playing part {index + 1} of {len(chunks)}..."
+
+            # One chunk is already the complete audio; several are merged into a new file
+            base_path = TTSService._join_chunks(chunk_paths, session_id)
+            audio_cache.put_file(cache_key, base_path)
+            wav_path = TTSService._join_chunks(stretched_paths, session_id) if stretch else base_path
+            temp_path, delivered_format = TTSService.encode_audio(wav_path, audio_format, session_id, encoded_key)
+            if temp_path != wav_path:
+                TTSService.cleanup_audio_file(wav_path)
+            logger.info(f"Speech synthesis took {synthesis_seconds:.2f}s ({prediction_total:.2f}s of predictions), "
+                        f"download {download_total:.2f}s across {len(chunks)} chunks")
+            # Return the file path and a descriptive status message
+            status = (f"{status} | Synthesis: {synthesis_seconds:.2f}s | Prediction time: {prediction_total:.2f}s | "
+                      f"Download: {download_total:.2f}s")
+            if stretch:
+                status = f"{status} | Stretch: {stretch_total:.2f}s"
+            yield None, temp_path, f"{status} | Format: {delivered_format}"
 
         except Exception as e:
-            # Include "Error downloading audio" in the message if it's a connection error
-            if "ConnectionError" in str(type(e)) or "Network error" in str(e):
-                return None, f"Error downloading audio: {str(e)}"
-            return None, f"Error generating speech: {str(e)}"
+            logger.error(f"Error generating speech: {str(e)}", exc_info=True)
+            yield None, None, TTSService._format_error(e)
+        finally:
+            # Stop pending chunks if synthesis failed, was cancelled or the listener went away
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Chunks still synthesizing remove their file once they finish
+            for future in futures[len(chunk_paths):]:
+                future.add_done_callback(TTSService._discard_chunk)
+            # Intermediate files are only kept when one of them is the final audio
+            for path in set(chunk_paths + stretched_paths + [base_path]):
+                if path and path != temp_path:
+                    TTSService.cleanup_audio_file(path)
+
+    @staticmethod
+    def process_audio(text, voice_type=None, speed=None, session_id=None, audio_format=None,
+                      max_parallel=TTS_MAX_PARALLEL_CHUNKS, cancel_event=None):
+        """
+        Process text to speech conversion.
+        
+        Runs the chunked synthesis of stream_audio to completion and returns
+        the merged audio file in its delivery format.
+        
+        Args:
+            text (str): Text to convert to speech.
+            voice_type (str, optional): Voice type to use. Defaults to None.
+            speed (float, optional): Speech speed. Defaults to None.
+            session_id (str, optional): Browser session that owns the audio file.
+            audio_format (str, optional): "opus", "mp3" or "wav"; see encode_audio.
+            max_parallel (int, optional): Chunks synthesized at once; see stream_audio.
+            cancel_event (threading.Event, optional): Stops synthesis between chunks.
+        
+        Returns:
+            tuple: Temporary audio file path and status message.
+            
+        Example:
+            >>> file_path, status = TTSService.process_audio("Hello world", "male", 1.0)
+            >>> if file_path:
+            >>>     play_audio(file_path)
+        """
+        file_path, status = None, "No text to convert to speech."
+        for _, file_path, status in TTSService.stream_audio(text, voice_type, speed, session_id, audio_format,
+                                                            max_parallel, cancel_event):
+            pass
+        return file_path, status
+
+    @staticmethod
+    def _discard_chunk(future):
+        """Done callback removing the file of a chunk that finished after its stream ended."""
+        if not future.cancelled() and future.exception() is None and future.result():
+            TTSService.cleanup_audio_file(future.result()[0])
 
     @staticmethod
     def cleanup_audio_file(file_path):
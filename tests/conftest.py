@@ -5,6 +5,10 @@ This module contains fixtures that can be used across all test files.
 """
 
 import os
+import time
+import uuid
+import wave
+import threading
 import pytest
 import json
 from unittest.mock import MagicMock, patch
@@ -38,11 +42,11 @@ def mock_replicate():
 @pytest.fixture
 def mock_requests():
     """Mock HTTP requests."""
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         # Configure the mock response
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"Mock audio content"
+        mock_response.iter_content.return_value = [b"Mock audio content"]
         mock_get.return_value = mock_response
         yield mock_get
 
@@ -98,4 +102,88 @@ def mock_logger():
     with patch("logging.getLogger") as mock_get_logger:
         mock_logger_instance = MagicMock()
         mock_get_logger.return_value = mock_logger_instance
-        yield mock_logger_instance
\ No newline at end of file
+        yield mock_logger_instance
+
+# Silent WAV files stand in for synthesized speech
+@pytest.fixture
+def make_wav():
+    """Return a function that writes a mono 16-bit WAV file of silent frames and returns its path."""
+    def write(path, frames, rate=24000):
+        with wave.open(str(path), "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(rate)
+            wav_file.writeframes(b"\x00\x00" * frames)
+        return str(path)
+    return write
+
+
+class FakeSynthesis(list):
+    """
+    Chunks synthesized by the fake TTS prediction, in the order they started.
+
+    calls holds (chunk, voice_id, speed) for every prediction and paths the
+    WAV file written for each chunk. Every file holds frames silent frames
+    (0.1 s by default), and a chunk listed in delays takes that many seconds
+    longer, e.g. to make chunks finish out of order.
+    """
+
+    def __init__(self, directory, make_wav, frames=2400):
+        super().__init__()
+        self.calls = []
+        self.paths = {}
+        self.delays = {}
+        self._directory = directory
+        self._make_wav = make_wav
+        self.frames = frames
+        self._lock = threading.Lock()
+
+    def __call__(self, chunk, voice_id, speed, session_id=None):
+        with self._lock:
+            self.append(chunk)
+            self.calls.append((chunk, voice_id, speed))
+        time.sleep(self.delays.get(chunk, 0))
+        path = self._make_wav(self._directory / f"{uuid.uuid4().hex}.wav", self.frames)
+        with self._lock:
+            self.paths[chunk] = path
+        return path, 1.0, 0.1
+
+
+@pytest.fixture
+def fake_synthesis(tmp_path, make_wav):
+    """Replace the TTS prediction with silent WAV files and record the chunks (see FakeSynthesis)."""
+    from services.tts_service import TTSService
+    recorder = FakeSynthesis(tmp_path, make_wav)
+    with patch.object(TTSService, '_synthesize_chunk', side_effect=recorder):
+        yield recorder
+
+
+# Isolate the TTS audio cache
+@pytest.fixture(autouse=True)
+def isolated_audio_cache(tmp_path):
+    """Give each test an empty audio cache so cached speech never leaks between tests."""
+    from services.audio_cache import AudioCache
+    cache = AudioCache(directory=str(tmp_path / "tts_cache"), max_bytes=10 * 1024 * 1024)
+    with patch("services.tts_service.audio_cache", cache), \
+         patch("services.speech_pipeline.audio_cache", cache), \
+         patch("services.static_audio.audio_cache", cache), \
+         patch("services.conversation_export.audio_cache", cache):
+        yield cache
+
+
+# Isolate the generated audio store
+@pytest.fixture(autouse=True)
+def isolated_audio_store(tmp_path):
+    """Keep audio generated during tests in the test's temporary directory."""
+    from services.audio_store import AudioStore
+    store = AudioStore(directory=str(tmp_path / "audio_store"))
+    with patch("services.tts_service.audio_store", store):
+        yield store
+
+
+# Keep the app from pre-rendering static audio in the background
+@pytest.fixture(autouse=True)
+def no_static_audio_prerender():
+    """Stop create_app() from starting real TTS predictions during tests."""
+    with patch("services.static_audio.STATIC_AUDIO_PRERENDER", False):
+        yield
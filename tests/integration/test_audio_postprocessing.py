@@ -0,0 +1,77 @@
+"""
+Integration tests for speech post-processing on real audio.
+
+This module runs silence trimming, loudness normalization and crossfade
+merging on the 45-second sample in mockfiles/audio.wav and checks that they
+stay far faster than real time, so post-processing never becomes a
+noticeable part of the time to first audio.
+"""
+
+import os
+import time
+import wave
+import logging
+
+import numpy as np
+import pytest
+
+from utils.audio_utils import map_wav, read_wav, postprocess_wav_file, crossfade_wav_files
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+SAMPLE_AUDIO = os.path.join(os.path.dirname(__file__), "..", "..", "mockfiles", "audio.wav")
+
+# Seconds of audio processed per second of wall time that must be reached;
+# real runs are in the thousands, the bound only catches accidental Python loops
+MIN_REALTIME_FACTOR = 50
+
+
+@pytest.fixture
+def sample_audio():
+    """Path and duration of the sample speech file."""
+    if not os.path.exists(SAMPLE_AUDIO):
+        pytest.skip("mockfiles/audio.wav is not available")
+    with wave.open(SAMPLE_AUDIO, "rb") as wav_file:
+        duration = wav_file.getnframes() / wav_file.getframerate()
+    return SAMPLE_AUDIO, duration
+
+
+class TestAudioPostprocessing:
+    """Test suite for post-processing long speech."""
+
+    def test_postprocess_long_speech(self, sample_audio, tmp_path):
+        """Test a long recording is trimmed and normalized faster than real time."""
+        source, duration = sample_audio
+        destination = str(tmp_path / "clean.wav")
+
+        start_time = time.perf_counter()
+        stats = postprocess_wav_file(source, destination, target_dbfs=-20.0)
+        elapsed = time.perf_counter() - start_time
+
+        realtime_factor = duration / elapsed
+        logger.info(f"Post-processed {duration:.1f}s of speech in {elapsed * 1000:.1f}ms ({realtime_factor:.0f}x real time)")
+        assert realtime_factor > MIN_REALTIME_FACTOR
+
+        samples, _ = read_wav(destination)
+        assert 0 < stats["frames_out"] <= stats["frames_in"]
+        assert len(samples) == stats["frames_out"]
+        # Normalized peaks stay clear of clipping
+        assert np.abs(samples).max() <= 10 ** (-1 / 20) + 1e-3
+
+    def test_crossfade_long_speech(self, sample_audio, tmp_path):
+        """Test merging long chunks with crossfades is faster than real time."""
+        source, duration = sample_audio
+        destination = str(tmp_path / "merged.wav")
+
+        start_time = time.perf_counter()
+        crossfade_wav_files([source] * 4, destination, fade_seconds=0.01)
+        elapsed = time.perf_counter() - start_time
+
+        realtime_factor = 4 * duration / elapsed
+        logger.info(f"Crossfaded {4 * duration:.1f}s of speech in {elapsed * 1000:.1f}ms ({realtime_factor:.0f}x real time)")
+        assert realtime_factor > MIN_REALTIME_FACTOR
+
+        samples, rate = map_wav(source)
+        with wave.open(destination, "rb") as wav_file:
+            assert wav_file.getnframes() == 4 * len(samples) - 3 * int(rate * 0.01)
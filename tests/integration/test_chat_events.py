@@ -0,0 +1,100 @@
+"""
+Integration tests for chat answers served through Gradio events.
+
+This module serves the full app locally with a fake vision model and sends
+chat messages through gradio_client, so the answers pass through Gradio's
+queue and output processing as they do for a browser. With auto-speak off
+no audio is produced; with it on, the answer's speech is played by the
+separate speak_live_answer event.
+"""
+
+import time
+import wave
+import shutil
+import logging
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+from gradio_client import Client, handle_file
+
+import app
+from config.settings import DEFAULT_VOICE, DEFAULT_SPEED
+from services.replicate_service import ReplicateService
+from services.semantic_cache import semantic_cache
+from services.static_audio import StaticAudio
+from services.tts_service import TTSService
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+ANSWER = "The image shows a red square on a white page. It has no text."
+
+
+def fake_stream(prompt, image_base64=None, max_tokens=None, max_continuations=None, sampling=None):
+    """Vision model stand-in that streams ANSWER in two parts."""
+    yield ANSWER[:30]
+    time.sleep(0.05)
+    yield ANSWER
+
+
+@pytest.fixture
+def image_file(tmp_path):
+    """Small PNG sent with every message."""
+    path = tmp_path / "square.png"
+    Image.fromarray(np.full((64, 64, 3), (200, 30, 30), dtype=np.uint8)).save(path)
+    return handle_file(str(path))
+
+
+@pytest.fixture
+def client(mock_env_vars, tmp_path):
+    """Client of the app served locally with fake vision and speech predictions."""
+    def fake_synthesize(chunk, voice_id, speed, session_id=None):
+        path = str(tmp_path / f"chunk{abs(hash(chunk))}.wav")
+        with wave.open(path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(24000)
+            wav_file.writeframes(b"\x00\x00" * 2400)
+        return path, 1.0, 0.1
+
+    with patch.object(ReplicateService, "stream_vision_model", side_effect=fake_stream), \
+         patch.object(TTSService, "_synthesize_chunk", side_effect=fake_synthesize), \
+         patch.object(semantic_cache, "lookup", return_value=(None, 0.0)), \
+         patch.object(semantic_cache, "store"), \
+         patch.object(StaticAudio, "start_prerender"):
+        blocks = app.create_app()
+        url = blocks.launch(prevent_thread_lock=True, quiet=True)[1]
+        try:
+            yield Client(url, verbose=False)
+        finally:
+            blocks.close()
+
+
+class TestChatEvents:
+    """Test suite for chat answers sent through the served app."""
+
+    def test_answer_without_auto_speak(self, client, image_file):
+        """Test a chat answer with auto-speak off completes without an error."""
+        # The speech_request state is not part of the API output
+        history, metrics, message = client.predict(
+            "What is in the picture?", "Latency: N/A", image_file, False, DEFAULT_VOICE, DEFAULT_SPEED,
+            api_name="/locked_chat_response")
+
+        assert history[-1] == ["What is in the picture?", ANSWER]
+        assert metrics.startswith("Latency:")
+        assert message == ""
+
+    # Gradio converts streamed audio with ffmpeg
+    @pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffmpeg is not installed")
+    def test_auto_spoken_answer_plays_in_speech_event(self, client, image_file):
+        """Test an auto-spoken answer is played by the speech event of the same session."""
+        client.predict("What is in the picture?", "Latency: N/A", image_file, True, DEFAULT_VOICE, DEFAULT_SPEED,
+                       api_name="/locked_chat_response")
+
+        # The browser starts the event when speech_request changes
+        audio, status = client.predict(time.time(), api_name="/speak_live_answer")
+
+        assert audio is not None
+        assert status.startswith("Auto-spoke answer")
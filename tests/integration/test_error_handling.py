@@ -71,7 +71,7 @@ class TestErrorHandling:
         # Mock the API to return a URL but the download fails
         with patch.object(ReplicateService, 'run_tts_model', 
                          return_value="https://example.com/audio.wav"), \
-             patch('requests.get') as mock_get:
+             patch('requests.Session.get') as mock_get:
             
             # Configure the mock to simulate a network error
             mock_get.side_effect = requests.exceptions.ConnectionError("Network error")
@@ -0,0 +1,91 @@
+"""
+Integration tests for the cost of prompt assembly in long sessions.
+
+This module grows a conversation to hundreds of turns and measures the
+time spent preparing each new turn's context. The incremental builder
+must stay flat, while rebuilding the history from scratch grows with the
+length of the conversation. The prompt itself must stay within the
+history token budget however long the session gets.
+"""
+
+import time
+import logging
+
+from utils.prompt_builder import PromptBuilder, CHAT_SYSTEM_PROMPT
+from utils.text_utils import estimate_tokens
+from config.settings import INIT_HISTORY, PROMPT_HISTORY_TOKEN_BUDGET
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+ANSWER = "The image shows a whiteboard with a labeled diagram of the water cycle. " * 4
+
+# Conversation lengths compared by the benchmark
+SHORT_SESSION = 20
+LONG_SESSION = 600
+
+
+def rebuild_context(history):
+    """Format the whole history, as every request did before the builder."""
+    context = ""
+    for user, bot in history:
+        if user is not None:
+            context += f"User: {user}\nAssistant: {bot}\n\n"
+    return context
+
+
+def time_per_turn(assemble, turns, repeat=5):
+    """Best-of-repeat seconds that assemble(history) takes once history has the given number of turns."""
+    history = [list(turn) for turn in INIT_HISTORY]
+    for index in range(turns):
+        history.append([f"Question {index} about the diagram?", ANSWER])
+    best = float("inf")
+    for _ in range(repeat):
+        builder = PromptBuilder(summarizer=None)
+        builder.sync(history[:-1])
+        start = time.perf_counter()
+        assemble(builder, history)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestPromptBuilderBenchmark:
+    """Benchmark of per-turn context assembly."""
+
+    def test_incremental_assembly_is_flat(self):
+        """Test preparing the context of a new turn does not grow with the conversation."""
+        def incremental(builder, history):
+            builder.sync(history)
+
+        def from_scratch(builder, history):
+            rebuild_context(history)
+
+        short = time_per_turn(incremental, SHORT_SESSION)
+        long = time_per_turn(incremental, LONG_SESSION)
+        scratch_short = time_per_turn(from_scratch, SHORT_SESSION)
+        scratch_long = time_per_turn(from_scratch, LONG_SESSION)
+        logger.info(f"Per-turn context assembly: incremental {short * 1e6:.1f}us at {SHORT_SESSION} turns, "
+                    f"{long * 1e6:.1f}us at {LONG_SESSION}; from scratch {scratch_short * 1e6:.1f}us and "
+                    f"{scratch_long * 1e6:.1f}us")
+
+        # 30x more turns; the rebuild scales with them, the incremental sync does not
+        assert long < 5 * short + 20e-6
+        assert long < scratch_long / 5
+
+    def test_prompt_size_is_bounded(self):
+        """Test a long session's prompt stays within the history token budget."""
+        builder = PromptBuilder(summarizer=None)
+        history = INIT_HISTORY + [[f"Question {index}?", ANSWER] for index in range(LONG_SESSION)]
+        start = time.perf_counter()
+        prompt = builder.build(history, "Summarize our conversation")
+        elapsed = time.perf_counter() - start
+
+        tokens = estimate_tokens(prompt)
+        full_tokens = sum(builder._tokens)
+        logger.info(f"Rendered a {LONG_SESSION}-turn prompt of {tokens} tokens (full history {full_tokens}) "
+                    f"in {elapsed * 1000:.2f}ms")
+
+        assert prompt.startswith(CHAT_SYSTEM_PROMPT)
+        assert prompt.endswith("User: Summarize our conversation\nAssistant:")
+        assert f"Question {LONG_SESSION - 1}?" in prompt
+        assert tokens <= PROMPT_HISTORY_TOKEN_BUDGET + estimate_tokens(CHAT_SYSTEM_PROMPT) + 50
@@ -0,0 +1,105 @@
+"""
+Load test of the Gradio queue configuration.
+
+This module serves the full app locally with a vision model that takes a
+fixed time to answer and asks it to extract the text of an image from
+several browser sessions at once through gradio_client. With Gradio's
+default queue every handler runs one event at a time, so the requests are
+answered one after another; with the per-kind concurrency groups they are
+answered side by side, up to the limit of their group.
+"""
+
+import time
+import logging
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+from gradio_client import Client, handle_file
+
+import app
+from services.replicate_service import ReplicateService
+from services.semantic_cache import semantic_cache
+from services.static_audio import StaticAudio
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Browser sessions sending a request at the same time, within the "image" group's limit
+SESSIONS = 4
+
+# Seconds the fake vision model takes for every answer
+MODEL_DELAY = 1.0
+
+
+def fake_stream(prompt, image_base64=None, max_tokens=None, max_continuations=None, sampling=None):
+    """Vision model stand-in that answers after MODEL_DELAY."""
+    time.sleep(MODEL_DELAY)
+    yield "RED SQUARE"
+
+
+@pytest.fixture
+def image_file(tmp_path):
+    """Small PNG uploaded with every request."""
+    path = tmp_path / "square.png"
+    Image.fromarray(np.full((64, 64, 3), (200, 30, 30), dtype=np.uint8)).save(path)
+    return handle_file(str(path))
+
+
+@pytest.fixture
+def served_app(mock_env_vars):
+    """Start the app with a given queue setup and return its URL; the servers are closed afterwards."""
+    servers = []
+
+    def serve(configured):
+        # Without the per-kind settings every event gets Gradio's default limit of one
+        with nullcontext() if configured else patch.object(app, "event_queue", return_value={}):
+            blocks = app.create_app()
+        servers.append(blocks)
+        return blocks.launch(prevent_thread_lock=True, quiet=True)[1]
+
+    with patch.object(ReplicateService, "stream_vision_model", side_effect=fake_stream), \
+         patch.object(semantic_cache, "lookup", return_value=(None, 0.0)), \
+         patch.object(semantic_cache, "store"), \
+         patch.object(StaticAudio, "start_prerender"):
+        yield serve
+        for blocks in servers:
+            blocks.close()
+
+
+def extraction_load(url, image_file):
+    """
+    Send one text extraction request from each of SESSIONS clients at once.
+
+    Returns:
+        float: Seconds until all answers arrived.
+    """
+    with ThreadPoolExecutor(max_workers=SESSIONS) as executor:
+        # Connecting fetches the app config, which is not part of the measurement
+        clients = list(executor.map(lambda _: Client(url, verbose=False), range(SESSIONS)))
+
+        def extract(client):
+            history = client.predict(image_file, api_name="/extract_image_text")[0]
+            return "RED SQUARE" in history[-1][1]
+
+        start = time.perf_counter()
+        assert all(executor.map(extract, clients))
+        return time.perf_counter() - start
+
+
+class TestQueueThroughput:
+    """Load test of the per-kind event concurrency groups."""
+
+    def test_sessions_are_answered_concurrently(self, served_app, image_file):
+        """Test concurrent requests finish much sooner with the configured queue than with the default."""
+        default_elapsed = extraction_load(served_app(configured=False), image_file)
+        tuned_elapsed = extraction_load(served_app(configured=True), image_file)
+
+        logger.info(f"{SESSIONS} concurrent text extractions: {default_elapsed:.2f}s with the default queue, "
+                    f"{tuned_elapsed:.2f}s with concurrency groups ({default_elapsed / tuned_elapsed:.1f}x throughput)")
+        # One at a time takes at least SESSIONS * MODEL_DELAY
+        assert default_elapsed >= SESSIONS * MODEL_DELAY
+        assert tuned_elapsed < default_elapsed / 2
@@ -0,0 +1,78 @@
+"""
+Integration tests for the memory used by stored chat sessions.
+
+This module builds 1,000-turn histories that mix typed questions with image
+actions and compares the memory they take as [user, bot] lists decoded from
+JSON, which is how Gradio delivered the history to every event, with the
+Turn records of the SessionStore.
+"""
+
+import gc
+import json
+import logging
+import tracemalloc
+
+from config.settings import INIT_HISTORY
+from services.session_store import SessionStore
+from utils.image_utils import EXTRACT_USER_MESSAGE, CAPTION_USER_MESSAGE, SUMMARY_USER_MESSAGE
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+LONG_SESSION = 1000
+
+# Compact turns must save at least this fraction of the list representation;
+# real runs save close to 30% with the short answers used here
+MIN_SAVINGS = 0.15
+
+
+def session_payload(turns):
+    """JSON of a long session, alternating image actions and typed questions."""
+    actions = [EXTRACT_USER_MESSAGE, CAPTION_USER_MESSAGE, SUMMARY_USER_MESSAGE]
+    history = [list(turn) for turn in INIT_HISTORY]
+    for index in range(turns):
+        if index % 2:
+            history.append([f"What does line {index} of the slide say?",
+                            f"Line {index} says the quarterly total was {index * 7} units."])
+        else:
+            history.append([actions[index // 2 % 3], f"Result {index}: a classroom whiteboard with a diagram."])
+    return json.dumps(history)
+
+
+def traced_size(build, payload):
+    """Bytes still allocated by build(payload) once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        result = build(payload)
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - base, result
+    finally:
+        tracemalloc.stop()
+
+
+def stored_session(payload):
+    """Session store holding the decoded history."""
+    store = SessionStore(db_path=None)
+    store.replace_from("session", 0, json.loads(payload))
+    return store
+
+
+class TestSessionMemory:
+    """Test suite for the per-session memory of long conversations."""
+
+    def test_compact_turns_save_memory(self):
+        """Test a 1,000-turn session takes less memory as Turn records than as lists."""
+        payload = session_payload(LONG_SESSION)
+        # Warm the canned text table, shared by all sessions
+        SessionStore(db_path=None)
+
+        list_bytes, history = traced_size(json.loads, payload)
+        turn_bytes, store = traced_size(stored_session, payload)
+
+        savings = 1 - turn_bytes / list_bytes
+        logger.info(f"{len(history)} turns: {list_bytes / 1024:.1f} KiB as lists, {turn_bytes / 1024:.1f} KiB "
+                    f"as turns ({savings:.0%} saved, {(list_bytes - turn_bytes) / len(history):.0f} bytes per turn)")
+        assert store.history("session") == history
+        assert savings > MIN_SAVINGS
@@ -11,13 +11,14 @@ import os
 
 from services.tts_service import TTSService
 from services.replicate_service import ReplicateService
+from config.settings import AUDIO_DOWNLOAD_TIMEOUT
 from utils.validators import validate_tts_input, get_last_bot_message
 
 
 class TestTTSPipeline:
     """Test suite for the text-to-speech pipeline."""
 
-    def test_tts_pipeline_success(self, mock_env_vars, mock_replicate, mock_requests):
+    def test_tts_pipeline_success(self, mock_env_vars, mock_replicate, mock_requests, tmp_path):
         """Test the complete TTS pipeline with successful execution."""
         # Configure mocks
         mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
@@ -25,11 +26,11 @@ class TestTTSPipeline:
         # Create a proper mock for the content
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"Mock audio content"
+        mock_response.iter_content.return_value = [b"Mock audio content"]
         mock_requests.return_value = mock_response
         
-        # Mock the _create_temp_audio_file method
-        with patch.object(TTSService, '_create_temp_audio_file', return_value="mock_temp_file.wav") as mock_create_file:
+        # Mock the _create_temp_audio_path method
+        with patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "mock_temp_file.wav")) as mock_create_file:
             # Sample text to convert
             text = "This is a test message for text-to-speech conversion."
             
@@ -37,17 +38,19 @@ class TestTTSPipeline:
             result, status = TTSService.process_audio(text, "Female River (American)", 1.0)
             
             # Verify the result
-            assert result == "mock_temp_file.wav"
+            assert result == str(tmp_path / "mock_temp_file.wav")
             assert "Generated audio" in status
             assert "Female River (American)" in status
             assert "1.0x speed" in status
         
             # Verify the mocks were called in the correct sequence
             mock_replicate.assert_called_once()
-            mock_requests.assert_called_once_with("https://mock-audio-url.com/sample.wav")
-            mock_create_file.assert_called_once_with(b"Mock audio content")
+            mock_requests.assert_called_once_with("https://mock-audio-url.com/sample.wav", stream=True,
+                                                  timeout=AUDIO_DOWNLOAD_TIMEOUT)
+            mock_create_file.assert_called_once()
+            assert (tmp_path / "mock_temp_file.wav").read_bytes() == b"Mock audio content"
 
-    def test_tts_pipeline_with_validation(self, mock_env_vars, mock_replicate, mock_requests):
+    def test_tts_pipeline_with_validation(self, mock_env_vars, mock_replicate, mock_requests, tmp_path):
         """Test the TTS pipeline including input validation."""
         # Configure mocks
         mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
@@ -55,11 +58,11 @@ class TestTTSPipeline:
         # Create a proper mock for the content
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"Mock audio content"
+        mock_response.iter_content.return_value = [b"Mock audio content"]
         mock_requests.return_value = mock_response
         
-        # Mock the _create_temp_audio_file method
-        with patch.object(TTSService, '_create_temp_audio_file', return_value="mock_temp_file.wav") as mock_create_file:
+        # Mock the _create_temp_audio_path method
+        with patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "mock_temp_file.wav")) as mock_create_file:
             # Sample text to convert
             text = "This is a test message for text-to-speech conversion."
             
@@ -72,15 +75,16 @@ class TestTTSPipeline:
             result, status = TTSService.process_audio(text, "Female River (American)", 1.0)
             
             # Verify the result
-            assert result == "mock_temp_file.wav"
+            assert result == str(tmp_path / "mock_temp_file.wav")
             assert "Generated audio" in status
             assert "Female River (American)" in status
             assert "1.0x speed" in status
             
             # Verify the mock was called with the correct content
-            mock_create_file.assert_called_once_with(b"Mock audio content")
+            mock_create_file.assert_called_once()
+            assert (tmp_path / "mock_temp_file.wav").read_bytes() == b"Mock audio content"
 
-    def test_tts_pipeline_with_chat_history(self, sample_chat_history, mock_env_vars, mock_replicate, mock_requests):
+    def test_tts_pipeline_with_chat_history(self, sample_chat_history, mock_env_vars, mock_replicate, mock_requests, tmp_path):
         """Test the TTS pipeline with chat history integration."""
         # Configure mocks
         mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
@@ -88,11 +92,11 @@ class TestTTSPipeline:
         # Create a proper mock for the content
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"Mock audio content"
+        mock_response.iter_content.return_value = [b"Mock audio content"]
         mock_requests.return_value = mock_response
         
-        # Mock the _create_temp_audio_file method
-        with patch.object(TTSService, '_create_temp_audio_file', return_value="mock_temp_file.wav") as mock_create_file:
+        # Mock the _create_temp_audio_path method
+        with patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "mock_temp_file.wav")) as mock_create_file:
             # Get the last bot message from chat history
             text = get_last_bot_message(sample_chat_history)
             assert text == "I can see various elements in the image."
@@ -101,13 +105,14 @@ class TestTTSPipeline:
             result, status = TTSService.process_audio(text, "Female River (American)", 1.0)
             
             # Verify the result
-            assert result == "mock_temp_file.wav"
+            assert result == str(tmp_path / "mock_temp_file.wav")
             assert "Generated audio" in status
             assert "Female River (American)" in status
             assert "1.0x speed" in status
             
             # Verify the mock was called with the correct content
-            mock_create_file.assert_called_once_with(b"Mock audio content")
+            mock_create_file.assert_called_once()
+            assert (tmp_path / "mock_temp_file.wav").read_bytes() == b"Mock audio content"
 
     def test_tts_pipeline_api_unavailable(self, monkeypatch):
         """Test TTS pipeline when API is unavailable."""
@@ -150,8 +155,8 @@ class TestTTSPipeline:
         # Configure mocks
         mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
         
-        # Mock requests.get to return an error status code
-        with patch('requests.get') as mock_get:
+        # Mock the session download to return an error status code
+        with patch('requests.Session.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 404
             mock_get.return_value = mock_response
@@ -173,8 +178,8 @@ class TestTTSPipeline:
         test_file = tmp_path / "test_audio.wav"
         test_file.write_text("test content")
         
-        # Mock _create_temp_audio_file to return our test file
-        with patch.object(TTSService, '_create_temp_audio_file', return_value=str(test_file)):
+        # Mock _create_temp_audio_path to return our test file
+        with patch.object(TTSService, '_create_temp_audio_path', return_value=str(test_file)):
             # Call the method
             result, status = TTSService.process_audio("Test text")
             
@@ -188,25 +193,26 @@ class TestTTSPipeline:
             # Verify the file was deleted
             assert not os.path.exists(result)
 
-    def test_end_to_end_tts_pipeline(self, mock_env_vars):
+    def test_end_to_end_tts_pipeline(self, mock_env_vars, tmp_path):
         """Test end-to-end TTS pipeline with minimal mocking."""
         # Only mock the actual API call and HTTP request, let the rest of the pipeline run normally
         with patch.object(ReplicateService, 'run_tts_model', return_value="https://mock-audio-url.com/sample.wav"), \
-             patch('requests.get') as mock_get, \
-             patch.object(TTSService, '_create_temp_audio_file', return_value="mock_temp_file.wav") as mock_create_file:
+             patch('requests.Session.get') as mock_get, \
+             patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "mock_temp_file.wav")) as mock_create_file:
             
             # Configure mocks
             mock_response = MagicMock()
             mock_response.status_code = 200
-            mock_response.content = b"Mock audio content"
+            mock_response.iter_content.return_value = [b"Mock audio content"]
             mock_get.return_value = mock_response
             
             # Process the audio
             result, status = TTSService.process_audio("Test text")
             
             # Verify the result
-            assert result == "mock_temp_file.wav"
+            assert result == str(tmp_path / "mock_temp_file.wav")
             assert "Generated audio" in status
             
             # Verify the mock was called with the correct content
-            mock_create_file.assert_called_once_with(b"Mock audio content")
\ No newline at end of file
+            mock_create_file.assert_called_once()
+            assert (tmp_path / "mock_temp_file.wav").read_bytes() == b"Mock audio content"
\ No newline at end of file
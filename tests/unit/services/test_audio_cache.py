@@ -0,0 +1,125 @@
+"""
+Unit tests for the audio_cache module.
+
+This module contains tests for the AudioCache class, cache keys and the
+cache integration in TTSService.
+"""
+
+import os
+import pytest
+from unittest.mock import patch
+
+from services.audio_cache import AudioCache, audio_cache_key
+from services.tts_service import TTSService
+
+
+class TestAudioCache:
+    """Test suite for AudioCache class."""
+
+    def test_cache_key_normalizes_whitespace(self):
+        """Test whitespace differences map to the same key."""
+        assert audio_cache_key("Hello  world\n", "af_river", 1.0) == audio_cache_key("Hello world", "af_river", 1.0)
+
+    def test_cache_key_includes_voice_speed_and_model(self):
+        """Test voice, speed and model all change the key."""
+        base = audio_cache_key("Hello", "af_river", 1.0, model="model:v1")
+        assert base != audio_cache_key("Hello", "am_michael", 1.0, model="model:v1")
+        assert base != audio_cache_key("Hello", "af_river", 1.5, model="model:v1")
+        assert base != audio_cache_key("Hello", "af_river", 1.0, model="model:v2")
+
+    def test_encoded_keys_keep_their_suffix(self, tmp_path):
+        """Test encoded copies get their own key and file suffix, also after a restart."""
+        wav_key = audio_cache_key("Hello", "af_river", 1.0)
+        ogg_key = audio_cache_key("Hello", "af_river", 1.0, encoding="opus:24000:32k", suffix=".ogg")
+        assert ogg_key.endswith(".ogg")
+        assert ogg_key[:-4] != wav_key
+
+        AudioCache(directory=str(tmp_path), max_bytes=1000).put(ogg_key, b"OggS")
+        reloaded = AudioCache(directory=str(tmp_path), max_bytes=1000)
+        assert reloaded.get(ogg_key) == os.path.join(str(tmp_path), ogg_key)
+
+    def test_put_and_get(self, tmp_path):
+        """Test stored audio is returned as a file path."""
+        cache = AudioCache(directory=str(tmp_path), max_bytes=1000)
+
+        assert cache.get("key") is None
+        path = cache.put("key", b"audio")
+
+        assert cache.get("key") == path
+        with open(path, "rb") as cached_file:
+            assert cached_file.read() == b"audio"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_contains_has_no_side_effects(self, tmp_path):
+        """Test contains neither counts statistics nor changes the LRU order."""
+        cache = AudioCache(directory=str(tmp_path), max_bytes=250)
+        cache.put("first", b"a" * 100)
+        cache.put("second", b"b" * 100)
+
+        assert cache.contains("first") is True
+        assert cache.contains("missing") is False
+        assert cache.stats()["hits"] == 0
+        assert cache.stats()["misses"] == 0
+
+        # "first" is still least recently used
+        cache.put("third", b"c" * 100)
+        assert cache.contains("first") is False
+        assert cache.contains("second") is True
+
+    def test_lru_eviction_by_bytes(self, tmp_path):
+        """Test least recently used files are evicted over the byte budget."""
+        cache = AudioCache(directory=str(tmp_path), max_bytes=250)
+        cache.put("first", b"a" * 100)
+        cache.put("second", b"b" * 100)
+        cache.get("first")               # "second" is now least recently used
+        cache.put("third", b"c" * 100)
+
+        assert cache.get("second") is None
+        assert cache.get("first") is not None
+        assert cache.get("third") is not None
+        assert cache.stats()["bytes"] == 200
+        assert len([name for name in os.listdir(tmp_path) if name.endswith(".wav")]) == 2
+
+    def test_oversized_audio_not_cached(self, tmp_path):
+        """Test audio larger than the whole budget is not stored."""
+        cache = AudioCache(directory=str(tmp_path), max_bytes=10)
+        assert cache.put("key", b"a" * 11) is None
+        assert cache.get("key") is None
+
+    def test_index_survives_restart(self, tmp_path):
+        """Test a new cache instance picks up existing files."""
+        AudioCache(directory=str(tmp_path), max_bytes=1000).put("key", b"audio")
+
+        reloaded = AudioCache(directory=str(tmp_path), max_bytes=1000)
+        assert reloaded.get("key") is not None
+        assert reloaded.stats()["bytes"] == 5
+
+    def test_vanished_file_is_a_miss(self, tmp_path):
+        """Test an entry whose file was deleted is dropped."""
+        cache = AudioCache(directory=str(tmp_path), max_bytes=1000)
+        os.unlink(cache.put("key", b"audio"))
+
+        assert cache.get("key") is None
+        assert cache.stats()["files"] == 0
+
+    def test_disabled_cache(self, tmp_path):
+        """Test a disabled cache stores nothing."""
+        cache = AudioCache(directory=str(tmp_path), enabled=False)
+        assert cache.put("key", b"audio") is None
+        assert cache.get("key") is None
+
+    def test_tts_replay_served_from_cache(self, mock_env_vars, mock_replicate, mock_requests, tmp_path):
+        """Test replaying the same text skips the prediction and download."""
+        mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
+
+        with patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "mock_temp_file.wav")):
+            first_path, first_status = TTSService.process_audio("Hello world", "Female River (American)", 1.0)
+            second_path, second_status = TTSService.process_audio("Hello  world", "Female River (American)", 1.0)
+
+        assert first_path == str(tmp_path / "mock_temp_file.wav")
+        assert "(cached)" in second_status
+        with open(second_path, "rb") as cached_file:
+            assert cached_file.read() == b"Mock audio content"
+        mock_replicate.assert_called_once()
+        mock_requests.assert_called_once()
@@ -0,0 +1,139 @@
+"""
+Unit tests for the audio_store module.
+
+This module contains tests for the AudioStore class and its integration
+with TTSService.
+"""
+
+import os
+import time
+import threading
+import pytest
+from unittest.mock import patch
+
+from services.audio_store import AudioStore, resolve_store_root
+from services.tts_service import TTSService
+
+
+def write_file(path, size, age=0.0):
+    """Fill a file with size bytes and backdate its modification time by age seconds."""
+    with open(path, "wb") as audio_file:
+        audio_file.write(b"\x00" * size)
+    timestamp = time.time() - age
+    os.utime(path, (timestamp, timestamp))
+    return path
+
+
+class TestAudioStore:
+    """Test suite for AudioStore class."""
+
+    def test_new_path_per_session(self, tmp_path):
+        """Test files are created in one directory per session."""
+        store = AudioStore(directory=str(tmp_path))
+        first = store.new_path("session_a")
+        second = store.new_path("session_b")
+        shared = store.new_path()
+
+        assert os.path.dirname(first) == str(tmp_path / "session_a")
+        assert os.path.dirname(second) == str(tmp_path / "session_b")
+        assert os.path.dirname(shared) == str(tmp_path / "shared")
+        assert first.endswith(".wav") and os.path.exists(first)
+
+    def test_unsafe_session_id_is_hashed(self, tmp_path):
+        """Test session ids cannot escape the store directory."""
+        store = AudioStore(directory=str(tmp_path))
+        path = store.new_path("../../etc")
+        assert os.path.dirname(os.path.dirname(path)) == str(tmp_path)
+
+    def test_reap_expired_files(self, tmp_path):
+        """Test files older than max_age are reclaimed."""
+        store = AudioStore(directory=str(tmp_path), max_age=60, max_bytes=10_000)
+        old = write_file(store.new_path("s"), 100, age=120)
+        fresh = write_file(store.new_path("s"), 100)
+
+        assert store.reap() == 1
+        assert not os.path.exists(old)
+        assert os.path.exists(fresh)
+        assert store.metrics()["reclaimed_bytes"] == 100
+
+    def test_reap_enforces_quota_oldest_first(self, tmp_path):
+        """Test the least recently modified files go first when over quota."""
+        store = AudioStore(directory=str(tmp_path), max_age=3600, max_bytes=250)
+        oldest = write_file(store.new_path("a"), 100, age=30)
+        middle = write_file(store.new_path("b"), 100, age=20)
+        newest = write_file(store.new_path("a"), 100, age=10)
+
+        assert store.reap() == 1
+        assert not os.path.exists(oldest)
+        assert os.path.exists(middle) and os.path.exists(newest)
+        metrics = store.metrics()
+        assert metrics["bytes"] == 200
+        assert metrics["files"] == 2
+        assert metrics["reclaimed_files"] == 1
+
+    def test_reap_removes_empty_sessions(self, tmp_path):
+        """Test session directories are removed once empty."""
+        store = AudioStore(directory=str(tmp_path), max_age=60)
+        write_file(store.new_path("gone"), 10, age=120)
+
+        store.reap()
+        assert not os.path.exists(tmp_path / "gone")
+
+    def test_new_path_waits_for_reap(self, tmp_path):
+        """Test a new file is not created while a reap may be removing its session directory."""
+        store = AudioStore(directory=str(tmp_path))
+        paths = []
+        creator = threading.Thread(target=lambda: paths.append(store.new_path("session_a")))
+
+        with store._lock:
+            creator.start()
+            creator.join(0.1)
+            assert paths == []
+        creator.join()
+
+        assert os.path.exists(paths[0])
+
+    def test_release_session(self, tmp_path):
+        """Test releasing a session deletes its files only."""
+        store = AudioStore(directory=str(tmp_path))
+        released = write_file(store.new_path("closed"), 10)
+        kept = write_file(store.new_path("open"), 10)
+
+        store.release_session("closed")
+        assert not os.path.exists(released)
+        assert os.path.exists(kept)
+        assert store.metrics()["reclaimed_files"] == 1
+
+    def test_background_reaper(self, tmp_path):
+        """Test the reaper thread reclaims files on its own."""
+        store = AudioStore(directory=str(tmp_path), max_age=60, reap_interval=0.01)
+        old = write_file(store.new_path("s"), 10, age=120)
+
+        store.start_reaper()
+        try:
+            deadline = time.time() + 5
+            while os.path.exists(old) and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            store.stop_reaper()
+
+        assert not os.path.exists(old)
+        assert store.metrics()["reaps"] >= 1
+
+    def test_resolve_store_root_tmpfs_fallback(self):
+        """Test tmpfs placement falls back to disk when /dev/shm is unavailable."""
+        with patch("services.audio_store.os.path.isdir", return_value=False):
+            root, on_tmpfs = resolve_store_root(None, use_tmpfs=True)
+        assert on_tmpfs is False
+        assert root.endswith("hearsee_audio")
+
+    def test_tts_writes_into_session_directory(self, mock_env_vars, mock_replicate, mock_requests,
+                                               isolated_audio_store):
+        """Test TTS output lands in the caller's session directory."""
+        mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
+
+        result, status = TTSService.process_audio("Hello there.", session_id="abc123")
+
+        assert os.path.dirname(result) == os.path.join(isolated_audio_store.root, "abc123")
+        with open(result, "rb") as audio_file:
+            assert audio_file.read() == b"Mock audio content"
@@ -0,0 +1,189 @@
+"""
+Unit tests for the concurrency_limiter module.
+
+This module contains tests for the AdaptiveConcurrencyLimiter class.
+"""
+
+import threading
+import pytest
+from unittest.mock import patch
+
+from services.concurrency_limiter import AdaptiveConcurrencyLimiter
+from services.replicate_service import ReplicateService
+
+
+class RateLimitError(Exception):
+    """Stand-in for a Replicate error carrying an HTTP status."""
+
+    def __init__(self):
+        super().__init__("Too Many Requests")
+        self.status = 429
+
+
+def hold_slots(limiter, count):
+    """Acquire count slots and return a callable that releases them."""
+    contexts = [limiter.acquire() for _ in range(count)]
+    for context in contexts:
+        context.__enter__()
+
+    def release():
+        for context in contexts:
+            context.__exit__(None, None, None)
+    return release
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Test suite for AdaptiveConcurrencyLimiter class."""
+
+    def test_additive_increase_when_saturated(self):
+        """Test the limit grows when healthy calls use the full limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10, increase_step=1.0)
+
+        # Healthy rounds at full utilisation should add slots
+        for _ in range(4):
+            release = hold_slots(limiter, limiter.limit - 1)
+            with limiter.acquire():
+                pass
+            release()
+
+        assert limiter.limit > 2
+        assert limiter.metrics()["history"][-1][2] == "increase"
+
+    def test_no_increase_when_idle(self):
+        """Test the limit does not grow when slots go unused."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=10)
+
+        for _ in range(20):
+            with limiter.acquire():
+                pass
+
+        assert limiter.limit == 4
+
+    def test_multiplicative_decrease_on_rate_limit(self):
+        """Test a 429 halves the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, decrease_factor=0.5)
+
+        with pytest.raises(RateLimitError):
+            with limiter.acquire():
+                raise RateLimitError()
+
+        assert limiter.limit == 4
+        assert limiter.metrics()["history"][-1][2] == "rate limited"
+
+    def test_decrease_cooldown(self):
+        """Test a burst of 429s only cuts the limit once."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, decrease_factor=0.5, decrease_cooldown=60)
+
+        for _ in range(3):
+            with pytest.raises(RateLimitError):
+                with limiter.acquire():
+                    raise RateLimitError()
+
+        assert limiter.limit == 4
+
+    def test_decrease_on_latency_spike(self):
+        """Test a latency spike against the baseline cuts the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_spike_ratio=2.0, decrease_factor=0.5)
+
+        limiter._baselines["model"] = 1.0
+
+        # Start, finish and decrease timestamps for a single 5s call
+        with patch("services.concurrency_limiter.time.monotonic", side_effect=[0.0, 5.0, 5.0]):
+            with limiter.acquire(key="model"):
+                pass
+
+        assert limiter.limit == 4
+        assert "latency spike" in limiter.metrics()["history"][-1][2]
+
+    def test_long_stream_is_not_a_spike(self):
+        """Test a streamed call is judged by its time to first output, not its total duration."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_spike_ratio=2.0, decrease_factor=0.5)
+        limiter._baselines["model first output"] = 1.0
+
+        # Start, first output and finish of a 30s stream that started answering after 1.2s
+        with patch("services.concurrency_limiter.time.monotonic", side_effect=[0.0, 1.2, 30.0]):
+            with limiter.acquire(key="model") as timing:
+                timing.first_output()
+                timing.first_output()
+
+        assert limiter.limit == 8
+        assert limiter.metrics()["latency_baselines"]["model first output"] == pytest.approx(1.04)
+
+    def test_slow_first_output_is_a_spike(self):
+        """Test a stream that is slow to start cuts the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_spike_ratio=2.0, decrease_factor=0.5)
+        limiter._baselines["model first output"] = 1.0
+
+        # Start, first output, finish and decrease timestamps
+        with patch("services.concurrency_limiter.time.monotonic", side_effect=[0.0, 5.0, 6.0, 6.0]):
+            with limiter.acquire(key="model") as timing:
+                timing.first_output()
+
+        assert limiter.limit == 4
+
+    def test_long_output_is_judged_per_token(self):
+        """Test a blocking call with a long output is compared by latency per token."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_spike_ratio=2.0, decrease_factor=0.5)
+        limiter._baselines["model per token"] = 0.02
+
+        # A 10s call that produced 500 tokens
+        with patch("services.concurrency_limiter.time.monotonic", side_effect=[0.0, 10.0]):
+            with limiter.acquire(key="model") as timing:
+                timing.output(500)
+
+        assert limiter.limit == 8
+        assert "model" not in limiter.metrics()["latency_baselines"]
+
+    def test_decrease_on_error_rate(self):
+        """Test a high error rate cuts the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, error_rate_threshold=0.2, decrease_factor=0.5)
+
+        with pytest.raises(ValueError):
+            with limiter.acquire():
+                raise ValueError("boom")
+
+        assert limiter.limit == 4
+        assert limiter.metrics()["error_rate"] == 1.0
+
+    def test_limit_respects_minimum(self):
+        """Test the limit never drops below min_limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, decrease_cooldown=0)
+
+        with pytest.raises(RateLimitError):
+            with limiter.acquire():
+                raise RateLimitError()
+
+        assert limiter.limit == 1
+
+    def test_acquire_blocks_at_limit(self):
+        """Test callers wait when the limit is reached and time out."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        release = hold_slots(limiter, 1)
+
+        with pytest.raises(RuntimeError):
+            with limiter.acquire(timeout=0.05):
+                pass
+
+        # Releasing the slot lets a waiting caller through
+        acquired = threading.Event()
+
+        def worker():
+            with limiter.acquire(timeout=5):
+                acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        release()
+        thread.join(timeout=5)
+        assert acquired.is_set()
+        assert limiter.in_flight == 0
+
+    def test_replicate_service_exposes_metrics(self, mock_env_vars, mock_replicate):
+        """Test predictions pass through the shared limiter and expose metrics."""
+        ReplicateService.run_vision_model("test prompt")
+
+        metrics = ReplicateService.get_concurrency_metrics()
+        assert metrics["limit"] >= 1
+        assert metrics["in_flight"] == 0
+        assert metrics["history"]
+        assert metrics["tokens"][0]["total_requests"] >= 1
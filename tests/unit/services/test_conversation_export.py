@@ -0,0 +1,115 @@
+"""
+Unit tests for the conversation_export module.
+
+This module contains tests for narrating a whole conversation into one
+audio file, reusing cached speech.
+"""
+
+import wave
+import pytest
+from unittest.mock import patch
+
+from services.conversation_export import ConversationExport
+from services.audio_cache import audio_cache_key
+from services.tts_service import TTSService
+from config.settings import INIT_HISTORY, DEFAULT_VOICE
+
+FIRST = "The slide shows a bar chart of sales by region. Sales rose steadily in every quarter of the year."
+SECOND = "The handwritten note reads: bring the permission slips by Friday."
+
+
+@pytest.fixture
+def fake_synthesis(fake_synthesis):
+    """Use the shared fake synthesis with plain joins and a short pause between answers."""
+    with patch('services.tts_service.TTS_POSTPROCESS', False), \
+         patch('services.conversation_export.EXPORT_MESSAGE_PAUSE', 0.1):
+        yield fake_synthesis
+
+
+class TestConversationExport:
+    """Test suite for ConversationExport class."""
+
+    def test_bot_messages_skip_welcome(self):
+        """Test the welcome messages and empty answers are not narrated."""
+        history = INIT_HISTORY + [["Caption this", FIRST], ["Anything else?", ""], ["Read it", SECOND]]
+        assert ConversationExport.bot_messages(history) == [FIRST, SECOND]
+
+    def test_bot_messages_skip_error_notices(self):
+        """Test error notices are not narrated."""
+        history = [[None, "Error extracting text: API error"], ["Caption this", FIRST],
+                   ["Anything else?", "Sorry, I encountered an error: timeout"],
+                   ["Again", "Error regenerating response: timeout"], ["Read it", SECOND]]
+        assert ConversationExport.bot_messages(history) == [FIRST, SECOND]
+
+    def test_export_merges_answers_in_order(self, mock_env_vars, fake_synthesis, isolated_audio_cache):
+        """Test every chunk is synthesized once and the answers are joined with a pause."""
+        history = [["Caption this", FIRST], ["Read it", SECOND], ["Again", FIRST]]
+
+        with patch('services.tts_service.TTS_AUDIO_FORMAT', "wav"):
+            updates = list(ConversationExport.export(history))
+
+        # The repeated answer is not synthesized twice
+        assert sorted(fake_synthesis) == sorted(["The slide shows a bar chart of sales by region.",
+                                                 "Sales rose steadily in every quarter of the year.", SECOND])
+        progress, status, file_path = updates[-1]
+        assert progress == 1.0
+        assert status.startswith(f"Exported 3 answers (0:01) using {DEFAULT_VOICE}")
+        assert "Cached: 0 of 3" in status
+        assert [update[0] for update in updates] == sorted(update[0] for update in updates)
+        with wave.open(file_path, "rb") as wav_file:
+            # Five chunks of speech and two pauses
+            assert wav_file.getnframes() == 5 * 2400 + 2 * 2400
+        # Synthesized chunks are cached for later replays
+        voice_id = TTSService.validate_voice_type(None)
+        assert isolated_audio_cache.get(audio_cache_key(SECOND, voice_id, 1.0)) is not None
+
+    def test_export_reuses_cached_answers(self, mock_env_vars, fake_synthesis, isolated_audio_cache, tmp_path, make_wav):
+        """Test answers played before are taken from the audio cache."""
+        voice_id = TTSService.validate_voice_type(None)
+        isolated_audio_cache.put_file(audio_cache_key(FIRST, voice_id, 1.0), make_wav(tmp_path / "first.wav", 4800))
+
+        with patch('services.tts_service.TTS_AUDIO_FORMAT', "wav"):
+            updates = list(ConversationExport.export([["Caption this", FIRST], ["Read it", SECOND]]))
+
+        assert fake_synthesis == [SECOND]
+        assert "Cached: 1 of 2" in updates[-1][1]
+        with wave.open(updates[-1][2], "rb") as wav_file:
+            assert wav_file.getnframes() == 4800 + 2400 + 2400
+
+    def test_export_survives_eviction_of_cached_answer(self, mock_env_vars, fake_synthesis,
+                                                       isolated_audio_cache, tmp_path, make_wav):
+        """Test a cached answer evicted by the export's own chunks is still exported."""
+        voice_id = TTSService.validate_voice_type(None)
+        first_key = audio_cache_key(FIRST, voice_id, 1.0)
+        isolated_audio_cache.put_file(first_key, make_wav(tmp_path / "first.wav", 4800))
+        # Room for the newly synthesized chunk only
+        isolated_audio_cache.max_bytes = 6000
+
+        with patch('services.tts_service.TTS_AUDIO_FORMAT', "wav"):
+            updates = list(ConversationExport.export([["Caption this", FIRST], ["Read it", SECOND]]))
+
+        assert isolated_audio_cache.get(first_key) is None
+        assert "Cached: 1 of 2" in updates[-1][1]
+        with wave.open(updates[-1][2], "rb") as wav_file:
+            assert wav_file.getnframes() == 4800 + 2400 + 2400
+
+    def test_export_stretches_to_speed(self, mock_env_vars, fake_synthesis):
+        """Test the export is synthesized at 1.0x and stretched to the selected speed."""
+        with patch('services.tts_service.TTS_AUDIO_FORMAT', "wav"):
+            updates = list(ConversationExport.export([["Read it", SECOND]], speed=2.0))
+
+        assert "2.0x speed" in updates[-1][1]
+        with wave.open(updates[-1][2], "rb") as wav_file:
+            assert wav_file.getnframes() == 1200
+
+    def test_export_without_answers(self):
+        """Test a conversation with only the welcome messages exports nothing."""
+        assert list(ConversationExport.export(INIT_HISTORY)) == [(1.0, "No answers to export.", None)]
+
+    def test_export_failure(self, mock_env_vars):
+        """Test a failed chunk ends the export with an error status."""
+        with patch.object(TTSService, '_synthesize_chunk', side_effect=Exception("API error")):
+            updates = list(ConversationExport.export([["Read it", SECOND]]))
+
+        assert updates[-1][2] is None
+        assert "Error generating speech" in updates[-1][1]
@@ -128,4 +128,40 @@ class TestImageService:
     def test_extract_image_metadata_none(self):
         """Test extracting metadata with None input."""
         metadata = ImageService.extract_image_metadata(None)
-        assert metadata == {}
\ No newline at end of file
+        assert metadata == {}
+    def test_plan_mosaic_small_images(self, sample_image):
+        """Test small images use the minimum tile size and fill the budget."""
+        tile_size, per_mosaic = ImageService.plan_mosaic([sample_image] * 3, resolution_budget=1344,
+                                                         min_tile_size=224, max_tile_size=448, max_tiles=16)
+        assert tile_size == 224
+        assert per_mosaic == 16
+
+    def test_plan_mosaic_large_images(self):
+        """Test larger images get bigger tiles and fewer tiles per mosaic."""
+        large = Image.new("RGB", (1000, 800))
+        tile_size, per_mosaic = ImageService.plan_mosaic([large] * 3, resolution_budget=1344,
+                                                         min_tile_size=224, max_tile_size=448, max_tiles=16)
+        assert tile_size == 448
+        assert per_mosaic == 9
+
+    def test_build_mosaic(self, sample_image):
+        """Test the mosaic grid size for five tiles."""
+        mosaic = ImageService.build_mosaic([sample_image] * 5, 224)
+        assert isinstance(mosaic, Image.Image)
+        # Five tiles make a 3x2 grid with 4px separators
+        assert mosaic.size == (3 * 224 + 2 * 4, 2 * 224 + 4)
+
+    def test_build_mosaic_empty(self):
+        """Test building a mosaic without images raises ValueError."""
+        with pytest.raises(ValueError):
+            ImageService.build_mosaic([], 224)
+
+    def test_downscale_image(self):
+        """Test downscaling keeps the aspect ratio within max_side."""
+        preview = ImageService.downscale_image(Image.new("RGB", (1000, 500)), max_side=200)
+        assert preview.size == (200, 100)
+
+    def test_downscale_image_small(self, sample_image):
+        """Test images already within max_side are not enlarged."""
+        preview = ImageService.downscale_image(sample_image, max_side=448)
+        assert preview.size == (100, 100)
@@ -7,8 +7,10 @@ This module contains tests for the ReplicateService class and its methods.
 import pytest
 from unittest.mock import patch, MagicMock
 import os
+import threading
 
 from services.replicate_service import ReplicateService
+from services.concurrency_limiter import AdaptiveConcurrencyLimiter
 from tests.test_config import MOCK_VISION_RESPONSE, MOCK_TTS_RESPONSE, MOCK_API_PARAMS
 
 
@@ -88,4 +90,142 @@ class TestReplicateService:
         assert result == MOCK_TTS_RESPONSE
         
         # Verify the mock was called with expected parameters
-        mock_replicate.assert_called_once()
\ No newline at end of file
+        mock_replicate.assert_called_once()
+
+    def test_run_vision_model_uses_pool_client(self, monkeypatch, mock_replicate):
+        """Test that additional pool tokens are served by dedicated clients."""
+        monkeypatch.delenv("REPLICATE_API_TOKEN", raising=False)
+        monkeypatch.setenv("REPLICATE_API_TOKENS", "pool-token-a,pool-token-b")
+
+        with patch("replicate.Client") as mock_client_cls:
+            mock_client_cls.return_value.run.return_value = MOCK_VISION_RESPONSE
+
+            result = ReplicateService.run_vision_model("test prompt")
+
+            assert result == MOCK_VISION_RESPONSE
+            mock_client_cls.assert_called_once()
+            assert mock_client_cls.call_args.kwargs["api_token"] in ("pool-token-a", "pool-token-b")
+            mock_replicate.assert_not_called()
+
+    def test_run_vision_model_continues_truncated_response(self, mock_env_vars, mock_replicate):
+        """Test that a response cut off at the token limit is continued."""
+        truncated = " ".join(["word"] * 500)
+        mock_replicate.side_effect = [truncated, "and the rest of the answer."]
+
+        result = ReplicateService.run_vision_model("test prompt", max_tokens=512)
+
+        assert result == truncated + " and the rest of the answer."
+        assert mock_replicate.call_count == 2
+        continuation_prompt = mock_replicate.call_args.kwargs["input"]["prompt"]
+        assert continuation_prompt.startswith("test prompt")
+        assert truncated in continuation_prompt
+
+    def test_run_vision_model_sampling_inputs(self, mock_env_vars, mock_replicate):
+        """Test that sampling inputs are sent with every prediction, including continuations."""
+        mock_replicate.side_effect = [" ".join(["word"] * 500), "and the rest of the answer."]
+
+        ReplicateService.run_vision_model("test prompt", max_tokens=512, sampling={"seed": 7})
+
+        assert [call.kwargs["input"]["seed"] for call in mock_replicate.call_args_list] == [7, 7]
+
+    def test_run_vision_model_continuation_limit(self, mock_env_vars, mock_replicate):
+        """Test that continuations stop after max_continuations."""
+        mock_replicate.return_value = " ".join(["word"] * 500)
+
+        ReplicateService.run_vision_model("test prompt", max_tokens=512, max_continuations=2)
+
+        assert mock_replicate.call_count == 3
+
+    def test_stream_vision_model(self, mock_env_vars):
+        """Test streaming yields the growing stitched response."""
+        truncated = " ".join(["word"] * 500)
+        with patch("replicate.stream") as mock_stream:
+            mock_stream.side_effect = [
+                iter([truncated[:100], truncated[100:]]),
+                iter(["and the end."]),
+            ]
+
+            partials = list(ReplicateService.stream_vision_model("test prompt", max_tokens=512))
+
+        assert partials[0] == truncated[:100]
+        assert partials[-1] == truncated + " and the end."
+        assert mock_stream.call_count == 2
+        # Streamed calls are judged by their time to first output
+        assert any(key.endswith(" first output") for key in ReplicateService._limiter.metrics()["latency_baselines"])
+
+    def test_speech_not_starved_by_vision_stream(self, mock_env_vars, mock_replicate):
+        """Test a speech prediction runs while a vision stream holds the only shared slot."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        mock_replicate.return_value = MOCK_TTS_RESPONSE
+        spoken = threading.Event()
+
+        def speak():
+            ReplicateService.run_tts_model("Hello world", "af_bella", 1.0)
+            spoken.set()
+
+        with patch.object(ReplicateService, "_limiter", limiter), \
+             patch("replicate.stream", return_value=iter(["A red bus ", "on a bridge."])):
+            stream = ReplicateService.stream_vision_model("test prompt")
+            assert next(stream) == "A red bus "
+            assert limiter.in_flight == 1
+
+            thread = threading.Thread(target=speak, daemon=True)
+            thread.start()
+            thread.join(timeout=5)
+            stream.close()
+
+        assert spoken.is_set()
+        assert limiter.in_flight == 0
+
+    def test_output_units(self):
+        """Test prediction latency is normalized by the text written or, for speech, read."""
+        assert ReplicateService._output_units(["Hello, ", "world!"], {}) == 6
+        assert ReplicateService._output_units("https://example.com/a.wav", {"text": "Hello, world!"}) == 6
+        assert ReplicateService._output_units(None, {}) == 0
+
+    def test_stream_vision_model_overlap_only_grows(self, mock_env_vars):
+        """Test a continuation that repeats the response's tail never rewrites yielded text."""
+        truncated = " ".join(["word"] * 497) + " the three main goals"
+        with patch("replicate.stream") as mock_stream:
+            mock_stream.side_effect = [
+                iter([truncated]),
+                iter([" the three", " main goals", ": speed and cost."]),
+            ]
+
+            partials = list(ReplicateService.stream_vision_model("test prompt", max_tokens=512))
+
+        assert all(later.startswith(earlier) for earlier, later in zip(partials, partials[1:]))
+        assert partials[-1] == truncated + ": speed and cost."
+
+    def test_stream_vision_model_fallback(self, mock_env_vars, mock_replicate):
+        """Test models without streaming support fall back to blocking predictions."""
+        from replicate.exceptions import ReplicateError
+
+        def unsupported(*args, **kwargs):
+            raise ReplicateError(detail="Model does not support streaming")
+            yield  # pragma: no cover
+
+        mock_replicate.return_value = MOCK_VISION_RESPONSE
+        with patch("replicate.stream", side_effect=unsupported), \
+             patch.object(ReplicateService, "_non_streaming_models", set()):
+            partials = list(ReplicateService.stream_vision_model("test prompt"))
+
+        assert partials == [MOCK_VISION_RESPONSE]
+        mock_replicate.assert_called_once()
+
+    def test_stream_vision_candidates(self, mock_env_vars):
+        """Test candidates run with their own sampling inputs, capped by the concurrency limit."""
+        def fake_stream(prompt, image_base64, max_tokens, max_continuations, sampling):
+            if sampling["seed"] == 2:
+                raise RuntimeError("API error")
+            yield f"Answer {sampling['seed']}"
+
+        seeds = iter(range(1, 10))
+        with patch.object(ReplicateService, "_limiter", MagicMock(limit=2)), \
+             patch.object(ReplicateService, "stream_vision_model", side_effect=fake_stream):
+            updates = list(ReplicateService.stream_vision_candidates(
+                "test prompt", count=3, sampling_factory=lambda: {"seed": next(seeds)}))
+
+        finished = {text for index, text, done in updates if done}
+        assert finished == {"Answer 1", None}
+        assert len([update for update in updates if update[2]]) == 2
@@ -0,0 +1,148 @@
+"""
+Unit tests for the semantic_cache module.
+
+This module contains tests for question normalization, embedding and the
+SemanticAnswerCache class.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from config.settings import INIT_HISTORY
+from services.semantic_cache import SemanticAnswerCache, normalize_question, embed_text, question_markers
+from services.image_service import ImageService
+
+
+class TestSemanticCache:
+    """Test suite for SemanticAnswerCache class."""
+
+    def test_normalize_question(self):
+        """Test punctuation, contractions and filler words are normalized away."""
+        assert normalize_question("Could you please tell me what's on this slide?") == "what is on slide"
+        assert normalize_question("") == ""
+
+    def test_embedding_is_normalized(self):
+        """Test embeddings are unit vectors and deterministic."""
+        vector = embed_text("what is this slide about")
+        assert np.isclose(np.linalg.norm(vector), 1.0)
+        assert np.array_equal(vector, embed_text("what is this slide about"))
+        assert not embed_text("").any()
+
+    def test_lookup_hit_for_similar_question(self):
+        """Test a near-identical question about the same image is a hit."""
+        cache = SemanticAnswerCache(threshold=0.8)
+        cache.store("digest-1", "What is this slide about?", "It is about photosynthesis.")
+
+        answer, similarity = cache.lookup("digest-1", "what's this slide about")
+
+        assert answer == "It is about photosynthesis."
+        assert similarity >= 0.8
+        assert cache.stats()["hits"] == 1
+
+    def test_lookup_miss_for_different_question(self):
+        """Test an unrelated question is a miss."""
+        cache = SemanticAnswerCache(threshold=0.8)
+        cache.store("digest-1", "What is this slide about?", "It is about photosynthesis.")
+
+        answer, similarity = cache.lookup("digest-1", "How many people are in the photo?")
+
+        assert answer is None
+        assert similarity < 0.8
+        assert cache.stats()["misses"] == 1
+
+    def test_lookup_is_per_image(self):
+        """Test answers are not shared between different images."""
+        cache = SemanticAnswerCache(threshold=0.8)
+        cache.store("digest-1", "Summarize this", "Summary one.")
+
+        answer, _ = cache.lookup("digest-2", "Summarize this")
+
+        assert answer is None
+
+    @pytest.mark.parametrize("stored, asked", [
+        ("What does the third paragraph say?", "What does the fourth paragraph say?"),
+        ("Who is the left person?", "Who is the right person?"),
+        ("What is in the top half?", "What is in the bottom half?"),
+        ("What is the answer to question 3?", "What is the answer to question 4?"),
+    ])
+    def test_lookup_miss_for_different_markers(self, stored, asked):
+        """Test questions that differ only in a number, ordinal or direction word are misses."""
+        cache = SemanticAnswerCache()
+        cache.store("digest-1", stored, "Stored answer.")
+
+        answer, _ = cache.lookup("digest-1", asked)
+
+        assert answer is None
+        assert cache.lookup("digest-1", stored)[0] == "Stored answer."
+
+    def test_question_markers(self):
+        """Test numbers, ordinals and direction words are the markers of a question."""
+        assert question_markers(normalize_question("What is on the 2nd slide, top left?")) == {"2nd", "top", "left"}
+        assert question_markers(normalize_question("What is this slide about?")) == frozenset()
+
+    def test_follow_up_questions_are_not_cached(self):
+        """Test questions after earlier turns are neither answered from nor added to the cache."""
+        cache = SemanticAnswerCache()
+        conversation = [list(turn) for turn in INIT_HISTORY] + [["What is on the slide?", "A bar chart."]]
+        cache.store("digest-1", "What does this mean?", "It means growth.", conversation)
+        assert cache.lookup("digest-1", "What does this mean?")[0] is None
+
+        cache.store("digest-1", "What does this mean?", "It means growth.", INIT_HISTORY)
+        assert cache.lookup("digest-1", "What does that mean?", conversation)[0] is None
+        assert cache.lookup("digest-1", "What does that mean?", INIT_HISTORY)[0] == "It means growth."
+
+    def test_threshold_controls_hits(self):
+        """Test a stricter threshold turns a near match into a miss."""
+        cache = SemanticAnswerCache(threshold=0.999)
+        cache.store("digest-1", "Summarize this slide", "Summary.")
+
+        answer, _ = cache.lookup("digest-1", "Summarize the slide briefly")
+
+        assert answer is None
+
+    def test_near_miss_is_logged(self):
+        """Test near misses are logged for threshold tuning."""
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.store("digest-1", "Summarize this slide", "Summary.")
+
+        with patch("services.semantic_cache.logger") as mock_logger:
+            cache.lookup("digest-1", "Summarize this slide briefly")
+
+        assert "near miss" in mock_logger.info.call_args[0][0]
+
+    def test_image_eviction(self):
+        """Test least recently used images are evicted."""
+        cache = SemanticAnswerCache(max_images=2)
+        cache.store("digest-1", "Summarize this", "One.")
+        cache.store("digest-2", "Summarize this", "Two.")
+        cache.store("digest-3", "Summarize this", "Three.")
+
+        assert cache.lookup("digest-1", "Summarize this")[0] is None
+        assert cache.lookup("digest-3", "Summarize this")[0] == "Three."
+
+    def test_entries_per_image_limit(self):
+        """Test the oldest answers for an image are evicted."""
+        cache = SemanticAnswerCache(max_entries_per_image=1)
+        cache.store("digest-1", "Summarize this", "Summary.")
+        cache.store("digest-1", "How many people are there", "Three.")
+
+        assert cache.lookup("digest-1", "Summarize this")[0] is None
+        assert cache.lookup("digest-1", "How many people are there")[0] == "Three."
+
+    def test_disabled_cache(self):
+        """Test a disabled cache never stores or returns answers."""
+        cache = SemanticAnswerCache(enabled=False)
+        cache.store("digest-1", "Summarize this", "Summary.")
+
+        assert cache.lookup("digest-1", "Summarize this") == (None, 0.0)
+
+    def test_image_digest(self, sample_image):
+        """Test identical images share a digest and different images do not."""
+        same = sample_image.copy()
+        different = sample_image.copy()
+        different[0, 0, 0] = 0
+
+        assert ImageService.image_digest(sample_image) == ImageService.image_digest(same)
+        assert ImageService.image_digest(sample_image) != ImageService.image_digest(different)
+        assert ImageService.image_digest(None) is None
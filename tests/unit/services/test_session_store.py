@@ -0,0 +1,207 @@
+"""
+Unit tests for the session_store module.
+
+This module contains tests for the SessionStore class, which keeps chat
+histories on the server instead of in every Gradio event.
+"""
+
+import time
+import pytest
+
+from config.settings import INIT_HISTORY
+from services.session_store import SessionStore, Turn, TurnAction, TurnRequest, HistoryView
+from utils.image_utils import EXTRACT_USER_MESSAGE
+
+
+@pytest.fixture
+def store():
+    """Memory-only store."""
+    return SessionStore(db_path=None)
+
+
+class TestSessionStore:
+    """Test suite for SessionStore class."""
+
+    def test_new_session_starts_with_init_history(self, store):
+        """Test an unknown session starts with the welcome messages."""
+        assert store.history("session") == [list(turn) for turn in INIT_HISTORY]
+        assert len(store) == 1
+
+    def test_history_is_a_copy(self, store):
+        """Test changes to a returned history do not reach the store."""
+        history = store.history("session")
+        extended = history + [["Question", "Answer"]]
+        history[0][1] = "Changed"
+        extended[0][1] = "Changed"
+
+        assert isinstance(extended, list)
+        assert store.history("session") == [list(turn) for turn in INIT_HISTORY]
+
+    def test_replace_from_appends_and_replaces(self, store):
+        """Test new answers are appended and a regenerated answer replaces the last turn."""
+        start = len(store.history("session"))
+        store.replace_from("session", start, [["Question", "First answer"]])
+        store.replace_from("session", start, [["Question", "Second answer"]])
+
+        history = store.history("session")
+        assert len(history) == start + 1
+        assert history[-1] == ["Question", "Second answer"]
+
+    def test_sessions_are_separate(self, store):
+        """Test one session's turns do not appear in another."""
+        store.replace_from("a", len(INIT_HISTORY), [["Question", "Answer"]])
+
+        assert store.history("b") == [list(turn) for turn in INIT_HISTORY]
+        assert store.history(None) == store.history("shared")
+
+    def test_track_passes_updates_and_stores_last(self, store):
+        """Test streamed updates reach the caller unchanged and the final turn is stored."""
+        history = store.history("session")
+        updates = [(history + [["Question", "Part"]], "Streaming..."),
+                   (history + [["Question", "Partial answer"]], "Latency: 1.00s")]
+
+        assert list(store.track("session", len(history), iter(updates))) == updates
+        assert store.history("session")[-1] == ["Question", "Partial answer"]
+
+    def test_track_stores_interrupted_stream(self, store):
+        """Test the last update is stored when the listener stops reading."""
+        history = store.history("session")
+        updates = ((history + [["Question", "Answer " * count]], "Streaming...") for count in range(1, 10))
+
+        stream = store.track("session", len(history), updates)
+        next(stream)
+        next(stream)
+        stream.close()
+
+        assert store.history("session")[-1] == ["Question", "Answer Answer "]
+
+    def test_reset_and_release(self, store):
+        """Test reset restores the welcome messages and release forgets the session."""
+        store.replace_from("session", len(INIT_HISTORY), [["Question", "Answer"]])
+
+        assert store.reset("session") == [list(turn) for turn in INIT_HISTORY]
+        assert store.history("session") == [list(turn) for turn in INIT_HISTORY]
+
+        store.release("session")
+        assert len(store) == 0
+
+    def test_last_request_matches_last_turn(self, store):
+        """Test the recorded request is returned only while it belongs to the last turn."""
+        start = len(store.history("session"))
+        request = TurnRequest("What color is the bus?", "prompt", "digest", "aW1hZ2U=")
+        store.record_request("session", start, request)
+        store.replace_from("session", start, [["What color is the bus?", "Red."]])
+        assert store.last_request("session") is request
+
+        # A regenerated answer keeps the request
+        store.replace_from("session", start, [["What color is the bus?", "It is red."]])
+        assert store.last_request("session") is request
+
+        # An image action after it does not
+        store.replace_from("session", start + 1, [[EXTRACT_USER_MESSAGE, "EXIT"]])
+        assert store.last_request("session") is None
+
+    def test_reset_forgets_request(self, store):
+        """Test a cleared chat has no request to replay."""
+        start = len(store.history("session"))
+        store.record_request("session", start - 1, TurnRequest(INIT_HISTORY[-1][0], "prompt", "digest", None))
+        assert store.last_request("session") is not None
+
+        store.reset("session")
+        assert store.last_request("session") is None
+
+    def test_sqlite_persists_across_instances(self, tmp_path):
+        """Test turns written to SQLite are loaded by a new store, e.g. after a restart."""
+        db_path = str(tmp_path / "sessions.db")
+        first = SessionStore(db_path=db_path)
+        start = len(first.history("session"))
+        first.replace_from("session", start, [["Question", "First answer"]])
+        first.replace_from("session", start, [["Question", "Second answer"]])
+        first.replace_from("session", start + 1, [[None, "Caption: a red bus."]])
+
+        second = SessionStore(db_path=db_path)
+        assert second.history("session") == first.history("session")
+        assert second.history("session")[-2:] == [["Question", "Second answer"], [None, "Caption: a red bus."]]
+
+    def test_sqlite_release_keeps_rows(self, tmp_path):
+        """Test a released session leaves memory but can still be loaded from the database."""
+        db_path = str(tmp_path / "sessions.db")
+        first = SessionStore(db_path=db_path)
+        first.replace_from("session", len(INIT_HISTORY), [["Question", "Answer"]])
+        first.release("session")
+
+        assert len(first) == 0
+        assert SessionStore(db_path=db_path).history("session")[-1] == ["Question", "Answer"]
+
+    def test_sweep_expires_idle_sessions(self, tmp_path):
+        """Test sweep removes sessions older than the TTL from memory and the database."""
+        db_path = str(tmp_path / "sessions.db")
+        store = SessionStore(db_path=db_path, ttl=60)
+        store.replace_from("old", len(INIT_HISTORY), [["Question", "Old answer"]])
+        store.replace_from("new", len(INIT_HISTORY), [["Question", "New answer"]])
+        store.release("new")
+
+        assert store.sweep(now=time.time() + 30) == 0
+        assert store.sweep(now=time.time() + 90) == 1
+        assert len(store) == 0
+
+        reloaded = SessionStore(db_path=db_path)
+        assert reloaded.history("old") == [list(turn) for turn in INIT_HISTORY]
+        assert reloaded.history("new") == [list(turn) for turn in INIT_HISTORY]
+
+
+class TestTurn:
+    """Test suite for the Turn record and HistoryView."""
+
+    def test_actions(self):
+        """Test the action is derived from the user side of the turn."""
+        assert Turn("What color is the bus?", "Red.").action is TurnAction.MESSAGE
+        assert Turn(EXTRACT_USER_MESSAGE, "EXIT").action is TurnAction.EXTRACT
+        assert Turn(None, "Error processing the image.").action is TurnAction.NOTICE
+
+    def test_canned_text_is_shared(self):
+        """Test copies of a canned prompt, e.g. loaded from SQLite, refer to one string."""
+        first_copy, second_copy = EXTRACT_USER_MESSAGE.encode().decode(), EXTRACT_USER_MESSAGE.encode().decode()
+        assert first_copy is not second_copy
+
+        assert Turn(first_copy, "A").user is Turn(second_copy, "B").user
+
+    def test_slots(self):
+        """Test turns have no per-instance attribute dict."""
+        assert not hasattr(Turn("Question", "Answer"), "__dict__")
+
+    def test_view_converts_on_access(self):
+        """Test indexing and slicing convert only the turns they return."""
+        turns = [Turn(f"Question {index}", f"Answer {index}") for index in range(5)]
+        view = HistoryView(turns)
+
+        assert view[-1] == ["Question 4", "Answer 4"]
+        assert isinstance(view[1:3], HistoryView)
+        assert list(view[1:3]) == [["Question 1", "Answer 1"], ["Question 2", "Answer 2"]]
+        assert view._pairs is None
+        assert (view + [["New", "Turn"]])[-2:] == [["Question 4", "Answer 4"], ["New", "Turn"]]
+
+    def test_request_sampling(self):
+        """Test replays only send sampling inputs that are configured."""
+        assert TurnRequest.sampling(temperature=None, random_seed=False) == {}
+
+        sampling = TurnRequest.sampling(temperature=0.9, random_seed=True)
+        assert sampling["temperature"] == 0.9
+        assert 0 <= sampling["seed"] < 2 ** 31
+
+    def test_candidates_follow_last_turn(self, store):
+        """Test alternatives can be selected while they belong to the last turn."""
+        start = len(store.history("session"))
+        store.replace_from("session", start, [["What color is the bus?", "Red."]])
+        store.record_candidates("session", start, "What color is the bus?", ["Red.", None, "It is red."], 0)
+        assert store.candidates("session") == (["Red.", None, "It is red."], 0)
+
+        history = store.select_candidate("session", 2)
+        assert history[-1] == ["What color is the bus?", "It is red."]
+        assert store.candidates("session")[1] == 2
+        assert store.select_candidate("session", 1) is None
+
+        # A new turn makes them stale
+        store.replace_from("session", start + 1, [["And the car?", "Blue."]])
+        assert store.candidates("session") == ([], None)
+        assert store.select_candidate("session", 0) is None
@@ -0,0 +1,95 @@
+"""
+Unit tests for the speech_pipeline module.
+
+This module contains tests for the SpeechPipeline class, which speaks a
+response while it is still being generated.
+"""
+
+import time
+import threading
+import wave
+from unittest.mock import patch
+
+from services.speech_pipeline import SpeechPipeline
+from services.audio_cache import audio_cache_key
+from services.tts_service import TTSService
+from config.settings import TTS_CROSSFADE_SECONDS
+
+
+FIRST_SENTENCE = "The first sentence is long enough to be spoken."
+SECOND_SENTENCE = "The second sentence is also long enough."
+
+
+class TestSpeechPipeline:
+    """Test suite for SpeechPipeline class."""
+
+    def test_waits_for_complete_sentences(self, fake_synthesis):
+        """Test nothing is synthesized until a long enough sentence is complete."""
+        pipeline = SpeechPipeline()
+        pipeline.feed("The image shows")
+        pipeline.feed("The image shows a red bus parked")
+        assert fake_synthesis == []
+
+        pipeline.feed("The image shows a red bus parked beside a school. It has")
+        list(pipeline.finish("The image shows a red bus parked beside a school. It has two doors."))
+        assert fake_synthesis == ["The image shows a red bus parked beside a school.", "It has two doors."]
+
+    def test_chunks_are_returned_in_order(self, fake_synthesis):
+        """Test audio is handed back in text order even when chunks finish out of order."""
+        fake_synthesis.delays[FIRST_SENTENCE] = 0.05
+        pipeline = SpeechPipeline()
+        text = f"{FIRST_SENTENCE} {SECOND_SENTENCE}"
+        ready = pipeline.feed(text + " Third")
+        ready += list(pipeline.finish(text))
+
+        assert ready == [fake_synthesis.paths[FIRST_SENTENCE], fake_synthesis.paths[SECOND_SENTENCE]]
+        assert pipeline.first_audio_at is not None
+        assert "First audio" in pipeline.status()
+
+    def test_finished_answer_is_cached(self, fake_synthesis, isolated_audio_cache):
+        """Test the complete answer's speech is cached for a later replay."""
+        text = f"{FIRST_SENTENCE} {SECOND_SENTENCE}"
+        pipeline = SpeechPipeline("Female River (American)", 1.0)
+        list(pipeline.finish(text))
+
+        key = audio_cache_key(text, TTSService.validate_voice_type("Female River (American)"), 1.0)
+        cached = isolated_audio_cache.get(key)
+        assert cached is not None
+        with wave.open(cached, "rb") as wav_file:
+            # Chunks are joined with a crossfade
+            assert wav_file.getnframes() == 4800 - int(24000 * TTS_CROSSFADE_SECONDS)
+
+    def test_failure_stops_speaking(self):
+        """Test a failed chunk ends the pipeline with an error status."""
+        with patch.object(TTSService, '_synthesize_chunk', side_effect=Exception("API error")):
+            pipeline = SpeechPipeline()
+            assert list(pipeline.finish("A sentence that will never be spoken aloud.")) == []
+
+        assert "Error generating speech" in pipeline.status()
+        assert pipeline.feed("More text arriving after the failure. And more.") == []
+
+    def test_chunks_play_text_queued_by_another_thread(self, fake_synthesis):
+        """Test audio queued by the answering thread is played in order by another thread."""
+        fake_synthesis.delays[FIRST_SENTENCE] = 0.05
+        pipeline = SpeechPipeline()
+        text = f"{FIRST_SENTENCE} {SECOND_SENTENCE}"
+
+        def answer():
+            pipeline.queue_text(text[:48])
+            time.sleep(0.05)
+            pipeline.queue_text(text, final=True)
+
+        producer = threading.Thread(target=answer)
+        producer.start()
+        played = list(pipeline.chunks())
+        producer.join()
+
+        assert played == [fake_synthesis.paths[FIRST_SENTENCE], fake_synthesis.paths[SECOND_SENTENCE]]
+        assert "Auto-spoke" in pipeline.status()
+
+    def test_close_ends_chunks(self, fake_synthesis):
+        """Test a closed pipeline, e.g. after the answering event went away, ends playback."""
+        pipeline = SpeechPipeline()
+        pipeline.close()
+
+        assert list(pipeline.chunks()) == []
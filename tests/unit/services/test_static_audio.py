@@ -0,0 +1,58 @@
+"""
+Unit tests for the static_audio module.
+
+This module contains tests for pre-rendering static speech into the audio
+cache and for the voice preview.
+"""
+
+from unittest.mock import patch
+
+from services.static_audio import StaticAudio
+from config.settings import INIT_HISTORY, VOICE_TYPES, VOICE_PREVIEW_TEXT
+
+
+class TestStaticAudio:
+    """Test suite for StaticAudio class."""
+
+    def test_static_texts(self):
+        """Test the welcome answers and the preview phrase are pre-rendered."""
+        texts = StaticAudio.static_texts()
+        assert texts[:-1] == [bot for _, bot in INIT_HISTORY]
+        assert texts[-1] == VOICE_PREVIEW_TEXT
+
+    def test_prerender_fills_cache_for_every_voice(self, mock_env_vars, fake_synthesis):
+        """Test every voice gets every static text, and a second run costs nothing."""
+        with patch('services.tts_service.TTS_AUDIO_FORMAT', "wav"):
+            stats = StaticAudio.prerender()
+            expected = len(VOICE_TYPES) * len(StaticAudio.static_texts())
+            assert stats == {"rendered": expected, "cached": 0, "failed": 0}
+            assert {voice_id for _, voice_id, _ in fake_synthesis.calls} == set(VOICE_TYPES.values())
+
+            predictions = len(fake_synthesis)
+            assert StaticAudio.prerender() == {"rendered": 0, "cached": expected, "failed": 0}
+            assert len(fake_synthesis) == predictions
+
+    def test_prerender_without_api(self, monkeypatch, fake_synthesis):
+        """Test nothing is rendered when the API token is missing."""
+        monkeypatch.delenv("REPLICATE_API_TOKEN", raising=False)
+        with patch('services.replicate_service.load_tokens_from_env', return_value=[]):
+            assert StaticAudio.prerender() == {"rendered": 0, "cached": 0, "failed": 0}
+        assert fake_synthesis == []
+
+    def test_voice_preview_served_from_cache(self, mock_env_vars, fake_synthesis):
+        """Test the preview of a pre-rendered voice needs no prediction."""
+        StaticAudio.prerender(["Male George (British)"])
+        predictions = len(fake_synthesis)
+
+        updates = list(StaticAudio.stream_voice_preview("Male George (British)", 1.0))
+
+        assert len(fake_synthesis) == predictions
+        assert updates[0][0] is not None
+        assert updates[-1][0] is None
+        assert updates[-1][1].startswith("Previewed")
+        assert "(cached)" in updates[-1][1]
+
+    def test_start_prerender_disabled(self):
+        """Test no background thread is started when pre-rendering is off."""
+        with patch('services.static_audio.STATIC_AUDIO_PRERENDER', False):
+            assert StaticAudio.start_prerender() is None
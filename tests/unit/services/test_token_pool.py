@@ -0,0 +1,127 @@
+"""
+Unit tests for the token_pool module.
+
+This module contains tests for the TokenPool class and its helper functions.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from services.token_pool import TokenPool, load_tokens_from_env, is_rate_limit_error
+
+
+class RateLimitError(Exception):
+    """Stand-in for a Replicate error carrying an HTTP status."""
+
+    def __init__(self):
+        super().__init__("Too Many Requests")
+        self.status = 429
+
+
+class TestTokenPool:
+    """Test suite for TokenPool class."""
+
+    def test_load_tokens_from_env(self, monkeypatch):
+        """Test tokens are read from both variables without duplicates."""
+        monkeypatch.setenv("REPLICATE_API_TOKENS", "token-a, token-b,,token-a")
+        monkeypatch.setenv("REPLICATE_API_TOKEN", "token-b")
+
+        assert load_tokens_from_env() == ["token-a", "token-b"]
+
+    def test_load_tokens_from_env_empty(self, monkeypatch):
+        """Test no tokens are returned when nothing is configured."""
+        monkeypatch.delenv("REPLICATE_API_TOKENS", raising=False)
+        monkeypatch.delenv("REPLICATE_API_TOKEN", raising=False)
+
+        assert load_tokens_from_env() == []
+
+    def test_is_rate_limit_error(self):
+        """Test rate limit detection from status and message."""
+        assert is_rate_limit_error(RateLimitError())
+        assert is_rate_limit_error(Exception("Request was throttled"))
+        assert not is_rate_limit_error(Exception("Invalid input"))
+        assert is_rate_limit_error(Exception("HTTP 429 Too Many Requests"))
+        assert is_rate_limit_error(Exception("Request failed with status 429"))
+        assert is_rate_limit_error(Exception("Rate limit exceeded"))
+
+    def test_is_rate_limit_error_ignores_other_429s(self):
+        """Test a 429 that is not an HTTP status is not treated as throttling."""
+        assert not is_rate_limit_error(Exception("Prediction 8f2d429a failed"))
+        assert not is_rate_limit_error(Exception("Image is 1429 pixels wide"))
+        assert not is_rate_limit_error(Exception("Timed out after 429 seconds"))
+
+    def test_acquire_picks_least_loaded(self):
+        """Test that concurrent acquisitions are spread across tokens."""
+        pool = TokenPool(["token-a", "token-b"])
+
+        with pool.acquire() as first:
+            with pool.acquire() as second:
+                assert {first, second} == {"token-a", "token-b"}
+
+    def test_rate_limited_token_removed_from_rotation(self):
+        """Test that a 429 takes the token out of rotation."""
+        pool = TokenPool(["token-a", "token-b"], rate_limit_cooldown=60)
+
+        with pytest.raises(RateLimitError):
+            with pool.acquire() as token:
+                assert token == "token-a"
+                raise RateLimitError()
+
+        # Subsequent requests should avoid the throttled token
+        for _ in range(3):
+            with pool.acquire() as token:
+                assert token == "token-b"
+
+        stats = {entry["label"]: entry for entry in pool.stats()}
+        assert stats["...en-a"]["rate_limited_count"] == 1
+        assert stats["...en-a"]["available"] is False
+
+    def test_failing_token_marked_unhealthy(self):
+        """Test that repeated failures quarantine a token."""
+        pool = TokenPool(["token-a", "token-b"], failure_threshold=2, failure_cooldown=60)
+
+        # Force selection of token-a by keeping token-b busy
+        with pool.acquire():
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    with pool.acquire() as token:
+                        assert token == "token-b"
+                        raise ValueError("boom")
+
+        stats = {entry["label"]: entry for entry in pool.stats()}
+        assert stats["...en-b"]["available"] is False
+        assert stats["...en-b"]["consecutive_failures"] == 2
+
+    def test_success_resets_failure_streak(self):
+        """Test that a success clears consecutive failures."""
+        pool = TokenPool(["token-a"], failure_threshold=3)
+
+        with pytest.raises(ValueError):
+            with pool.acquire():
+                raise ValueError("boom")
+        with pool.acquire():
+            pass
+
+        assert pool.stats()[0]["consecutive_failures"] == 0
+        assert pool.stats()[0]["in_flight"] == 0
+
+    def test_all_tokens_throttled_falls_back(self):
+        """Test that the soonest-recovering token is used when all are throttled."""
+        pool = TokenPool(["token-a"], rate_limit_cooldown=60)
+
+        with pytest.raises(RateLimitError):
+            with pool.acquire():
+                raise RateLimitError()
+
+        with patch("services.token_pool.logger") as mock_logger:
+            with pool.acquire() as token:
+                assert token == "token-a"
+            mock_logger.warning.assert_called_once()
+
+    def test_acquire_empty_pool(self):
+        """Test that an empty pool raises ValueError."""
+        pool = TokenPool([])
+
+        with pytest.raises(ValueError):
+            with pool.acquire():
+                pass
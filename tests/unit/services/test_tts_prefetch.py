@@ -0,0 +1,85 @@
+"""
+Unit tests for the tts_prefetch module.
+
+This module contains tests for the TTSPrefetcher class, which synthesizes
+new bot messages in the background.
+"""
+
+import time
+import pytest
+from unittest.mock import patch, ANY
+
+from services.tts_prefetch import TTSPrefetcher
+from services.tts_service import TTSService
+
+
+class TestTTSPrefetcher:
+    """Test suite for TTSPrefetcher class."""
+
+    def test_disabled_by_default_setting(self):
+        """Test nothing is scheduled while prefetching is disabled."""
+        prefetcher = TTSPrefetcher(enabled=False)
+        with patch.object(TTSService, 'process_audio') as mock_process:
+            assert prefetcher.schedule("session", "An answer.") is None
+        mock_process.assert_not_called()
+
+    def test_schedule_synthesizes_with_session_settings(self):
+        """Test the job synthesizes the message with the given voice, speed and session."""
+        prefetcher = TTSPrefetcher(enabled=True, delay=0)
+        with patch.object(TTSService, 'process_audio', return_value=("/tmp/a.wav", "ok")) as mock_process:
+            future = prefetcher.schedule("session", "An answer.", "Male George (British)", 1.5, "wav")
+            assert future.result(timeout=5) == "/tmp/a.wav"
+
+        mock_process.assert_called_once_with("An answer.", "Male George (British)", 1.5, "session", "wav",
+                                             max_parallel=1, cancel_event=ANY)
+        assert prefetcher.stats() == {"scheduled": 1, "completed": 1, "cancelled": 0, "pending": 0}
+
+    def test_newer_message_supersedes_pending_job(self):
+        """Test a new message cancels the session's job before it costs a prediction."""
+        prefetcher = TTSPrefetcher(enabled=True, delay=0.2)
+        with patch.object(TTSService, 'process_audio', return_value=("/tmp/b.wav", "ok")) as mock_process:
+            first = prefetcher.schedule("session", "First answer.")
+            second = prefetcher.schedule("session", "Second answer.")
+            assert second.result(timeout=5) == "/tmp/b.wav"
+            assert first.result(timeout=5) is None
+
+        mock_process.assert_called_once()
+        assert mock_process.call_args[0][0] == "Second answer."
+        assert prefetcher.stats()["cancelled"] == 1
+
+    def test_cancel_on_clear(self):
+        """Test cancelling a session drops its job, other sessions are unaffected."""
+        prefetcher = TTSPrefetcher(enabled=True, delay=0.2)
+        with patch.object(TTSService, 'process_audio', return_value=("/tmp/c.wav", "ok")) as mock_process:
+            cleared = prefetcher.schedule("cleared", "Answer to clear.")
+            kept = prefetcher.schedule("other", "Answer to keep.")
+            assert prefetcher.cancel("cleared") is True
+            assert cleared.result(timeout=5) is None
+            assert kept.result(timeout=5) == "/tmp/c.wav"
+
+        assert prefetcher.cancel("cleared") is False
+        mock_process.assert_called_once()
+
+    def test_cancel_stops_running_job_between_chunks(self, mock_env_vars, fake_synthesis, isolated_audio_cache):
+        """Test a job that is already synthesizing stops after its current chunk and caches nothing."""
+        first = "The first sentence takes a while to synthesize."
+        fake_synthesis.delays[first] = 0.2
+        prefetcher = TTSPrefetcher(enabled=True, delay=0)
+        with patch('services.tts_service.TTS_CHUNK_MAX_CHARS', 50):
+            job = prefetcher.schedule("session", f"{first} The second sentence is never spoken. Nor is the third.")
+            while not fake_synthesis:
+                time.sleep(0.01)
+            assert prefetcher.cancel("session") is True
+            assert job.result(timeout=5) is None
+
+        # One chunk at a time: the later chunks never started
+        assert fake_synthesis == [first]
+        assert isolated_audio_cache.stats()["files"] == 0
+        assert prefetcher.stats()["completed"] == 0
+
+    def test_failed_job_is_not_completed(self):
+        """Test a failed synthesis is not counted as completed."""
+        prefetcher = TTSPrefetcher(enabled=True, delay=0)
+        with patch.object(TTSService, 'process_audio', return_value=(None, "Error generating speech: boom")):
+            assert prefetcher.schedule("session", "An answer.").result(timeout=5) is None
+        assert prefetcher.stats()["completed"] == 0
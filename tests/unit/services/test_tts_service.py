@@ -4,11 +4,16 @@ Unit tests for the TTSService module.
 This module contains tests for the TTSService class and its methods.
 """
 
+import os
+import time
+import wave
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
 
 from services.tts_service import TTSService
-from config.settings import VOICE_TYPES, TTS_SPEED_RANGE, DEFAULT_VOICE, DEFAULT_SPEED
+from config.settings import (VOICE_TYPES, TTS_SPEED_RANGE, DEFAULT_VOICE, DEFAULT_SPEED,
+                             AUDIO_DOWNLOAD_TIMEOUT, TTS_CROSSFADE_SECONDS)
 
 
 class TestTTSService:
@@ -80,7 +85,7 @@ class TestTTSService:
         # Should return the default speed
         assert result == DEFAULT_SPEED
 
-    def test_process_audio_success(self, mock_env_vars, mock_replicate, mock_requests):
+    def test_process_audio_success(self, mock_env_vars, mock_replicate, mock_requests, tmp_path):
         """Test successful audio processing."""
         # Configure mocks
         mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
@@ -88,24 +93,26 @@ class TestTTSService:
         # Create a proper mock for the content
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"Mock audio content"
+        mock_response.iter_content.return_value = [b"Mock audio content"]
         mock_requests.return_value = mock_response
         
-        # Mock the _create_temp_audio_file method
-        with patch.object(TTSService, '_create_temp_audio_file', return_value="mock_temp_file.wav") as mock_create_file:
+        # Mock the _create_temp_audio_path method
+        with patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "mock_temp_file.wav")) as mock_create_file:
             # Call the method
             result, status = TTSService.process_audio("Test text", "Female River (American)", 1.0)
             
             # Verify the result
-            assert result == "mock_temp_file.wav"
+            assert result == str(tmp_path / "mock_temp_file.wav")
             assert "Generated audio" in status
             assert "Female River (American)" in status
             assert "1.0x speed" in status
             
             # Verify the mocks were called
             mock_replicate.assert_called_once()
-            mock_requests.assert_called_once_with("https://mock-audio-url.com/sample.wav")
-            mock_create_file.assert_called_once_with(b"Mock audio content")
+            mock_requests.assert_called_once_with("https://mock-audio-url.com/sample.wav", stream=True,
+                                                  timeout=AUDIO_DOWNLOAD_TIMEOUT)
+            mock_create_file.assert_called_once()
+            assert (tmp_path / "mock_temp_file.wav").read_bytes() == b"Mock audio content"
 
     def test_process_audio_api_unavailable(self, monkeypatch):
         """Test audio processing when API is unavailable."""
@@ -195,4 +202,272 @@ class TestTTSService:
                 
                 # Verify the logger was called with an error
                 mock_logger.error.assert_called_once()
-                assert "Error cleaning up audio file" in mock_logger.error.call_args[0][0]
\ No newline at end of file
+                assert "Error cleaning up audio file" in mock_logger.error.call_args[0][0]
+
+    def test_merge_wav_files(self, tmp_path, make_wav):
+        """Test WAV files are concatenated into one WAV file."""
+        parts = [make_wav(tmp_path / "a.wav", 100), make_wav(tmp_path / "b.wav", 50)]
+        merged = TTSService._merge_wav_files(parts, str(tmp_path / "merged.wav"), frames_per_block=16)
+
+        with wave.open(merged, "rb") as wav_file:
+            assert wav_file.getnframes() == 150
+            assert wav_file.getframerate() == 24000
+
+    def test_merge_wav_files_mismatched_format(self, tmp_path, make_wav):
+        """Test files with different sample rates are rejected."""
+        parts = [make_wav(tmp_path / "a.wav", 10, rate=24000), make_wav(tmp_path / "b.wav", 10, rate=16000)]
+        with pytest.raises(ValueError):
+            TTSService._merge_wav_files(parts, str(tmp_path / "merged.wav"))
+
+    def test_download_audio_streams_to_file(self, mock_requests, tmp_path):
+        """Test audio is written block by block through the shared session."""
+        mock_requests.return_value.iter_content.return_value = [b"abc", b"", b"def"]
+        destination = tmp_path / "audio.wav"
+
+        size = TTSService._download_audio("https://mock-audio-url.com/sample.wav", str(destination))
+
+        assert size == 6
+        assert destination.read_bytes() == b"abcdef"
+        assert mock_requests.call_args[1]["stream"] is True
+        assert mock_requests.call_args[1]["timeout"] == AUDIO_DOWNLOAD_TIMEOUT
+        mock_requests.return_value.close.assert_called_once()
+
+    def test_http_session_is_shared(self):
+        """Test downloads reuse one pooled session."""
+        assert TTSService.get_http_session() is TTSService.get_http_session()
+
+    def test_stream_audio_in_order(self, mock_env_vars, tmp_path, make_wav):
+        """Test chunks are yielded in text order even when they finish out of order."""
+        text = "The first sentence is rather slow to say. The second sentence is quick to synthesize."
+        first = make_wav(tmp_path / "first.wav", 100)
+        second = make_wav(tmp_path / "second.wav", 50)
+
+        def fake_synthesize(chunk, voice_id, speed, session_id=None):
+            if chunk.startswith("The first"):
+                time.sleep(0.05)
+                return first, 1.0, 0.1
+            return second, 1.0, 0.1
+
+        with patch.object(TTSService, '_synthesize_chunk', side_effect=fake_synthesize), \
+             patch('services.tts_service.TTS_CHUNK_MAX_CHARS', 50), \
+             patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "merged.wav")):
+            updates = list(TTSService.stream_audio(text))
+
+        assert [chunk for chunk, _, _ in updates[:2]] == [first, second]
+        assert "part 1 of 2" in updates[0][2]
+        chunk, file_path, status = updates[-1]
+        assert chunk is None
+        assert file_path == str(tmp_path / "merged.wav")
+        assert "Generated audio" in status
+        assert "Download: 0.20s" in status
+        # Overlapping chunks: the wall-clock time is reported, the summed prediction time separately
+        assert "Prediction time: 2.00s" in status
+        assert float(status.split("Synthesis: ")[1].split("s |")[0]) < 1.0
+
+        with wave.open(file_path, "rb") as wav_file:
+            # The crossfade is limited to half of the 50-frame chunk
+            assert wav_file.getnframes() == 150 - 25
+        # Chunk files are removed once merged
+        assert not os.path.exists(first)
+        assert not os.path.exists(second)
+
+    def test_stream_audio_cancelled_between_chunks(self, mock_env_vars, fake_synthesis, isolated_audio_cache):
+        """Test a cancelled stream drops the remaining chunks and caches nothing."""
+        second = "The second sentence is quick to synthesize."
+        text = f"The first sentence is rather slow to say. {second} The third one is never spoken."
+        fake_synthesis.delays[second] = 0.1
+        cancel_event = threading.Event()
+
+        with patch('services.tts_service.TTS_CHUNK_MAX_CHARS', 50):
+            stream = TTSService.stream_audio(text, max_parallel=1, cancel_event=cancel_event)
+            first_chunk, _, _ = next(stream)
+            cancel_event.set()
+            updates = list(stream)
+
+        assert first_chunk == fake_synthesis.paths["The first sentence is rather slow to say."]
+        assert updates == [(None, None, "Speech synthesis cancelled.")]
+        # A chunk already synthesizing finishes, the chunks after it never start
+        time.sleep(0.3)
+        assert "The third one is never spoken." not in fake_synthesis
+        assert not any(os.path.exists(path) for path in fake_synthesis.paths.values())
+        assert isolated_audio_cache.stats()["files"] == 0
+
+    def test_stream_audio_chunk_failure(self, mock_env_vars):
+        """Test a failed chunk ends the stream with an error status."""
+        with patch.object(TTSService, '_synthesize_chunk', side_effect=Exception("API error")):
+            updates = list(TTSService.stream_audio("Some text to speak."))
+
+        assert updates[-1][0] is None
+        assert updates[-1][1] is None
+        assert "Error generating speech" in updates[-1][2]
+
+    def test_url_delivery_skips_download(self, mock_env_vars, mock_replicate, mock_requests, isolated_audio_cache):
+        """Test url delivery returns the output URL without downloading it."""
+        mock_replicate.return_value = "https://mock-audio-url.com/sample.wav"
+        isolated_audio_cache.enabled = False
+
+        with patch('services.tts_service.TTS_AUDIO_DELIVERY', "url"):
+            result, status = TTSService.process_audio("First sentence here. Second sentence here.")
+
+        assert result == "https://mock-audio-url.com/sample.wav"
+        assert "Served from source" in status
+        mock_replicate.assert_called_once()
+        mock_requests.assert_not_called()
+
+    def test_url_delivery_requires_cache_disabled(self, isolated_audio_cache):
+        """Test url delivery falls back to download while the audio cache is enabled."""
+        with patch('services.tts_service.TTS_AUDIO_DELIVERY', "url"):
+            assert TTSService.audio_delivery() == "download"
+            isolated_audio_cache.enabled = False
+            assert TTSService.audio_delivery() == "url"
+
+    def test_speed_change_reuses_synthesis(self, mock_env_vars, fake_synthesis):
+        """Test speech is synthesized once at 1.0x and other speeds are stretched locally."""
+        fake_synthesis.frames = 24000
+        normal_path, _ = TTSService.process_audio("Read this aloud.", speed=1.0)
+        fast_path, fast_status = TTSService.process_audio("Read this aloud.", speed=2.0)
+        slow_path, slow_status = TTSService.process_audio("Read this aloud.", speed=0.5)
+
+        assert [speed for _, _, speed in fake_synthesis.calls] == [1.0]
+        assert "(cached)" in fast_status and "Stretch:" in fast_status
+        assert "0.5x speed" in slow_status
+        with wave.open(fast_path, "rb") as wav_file:
+            assert wav_file.getnframes() == 12000
+        with wave.open(slow_path, "rb") as wav_file:
+            assert wav_file.getnframes() == 48000
+        # The cached 1.0x synthesis is untouched
+        with wave.open(normal_path, "rb") as wav_file:
+            assert wav_file.getnframes() == 24000
+
+    def test_stream_audio_stretches_chunks(self, mock_env_vars, fake_synthesis):
+        """Test each streamed chunk is stretched and the 1.0x synthesis is cached."""
+        text = "The first sentence is rather slow to say. The second sentence is quick to synthesize."
+        fake_synthesis.frames = 4800
+
+        with patch('services.tts_service.TTS_CHUNK_MAX_CHARS', 50):
+            updates = []
+            for chunk, file_path, status in TTSService.stream_audio(text, speed=2.0):
+                if chunk:
+                    # Chunk files only live until the merged file is written
+                    with wave.open(chunk, "rb") as wav_file:
+                        assert wav_file.getnframes() == 2400
+                updates.append((chunk, file_path, status))
+
+        assert len(updates) == 3
+        _, file_path, status = updates[-1]
+        assert "Stretch:" in status
+        with wave.open(file_path, "rb") as wav_file:
+            assert wav_file.getnframes() == 4800 - int(24000 * TTS_CROSSFADE_SECONDS)
+        assert {speed for _, _, speed in fake_synthesis.calls} == {1.0}
+        # Intermediate files are removed once merged
+        assert not any(os.path.exists(path) for path in fake_synthesis.paths.values())
+
+    def test_stream_audio_without_local_stretch(self, mock_env_vars, tmp_path, make_wav):
+        """Test the requested speed is sent to the model when local stretching is off."""
+        fake_synthesize = MagicMock(return_value=(make_wav(tmp_path / "chunk.wav", 100), 1.0, 0.1))
+
+        with patch.object(TTSService, '_synthesize_chunk', fake_synthesize), \
+             patch('services.tts_service.TTS_LOCAL_TIME_STRETCH', False):
+            updates = list(TTSService.stream_audio("Read this aloud.", speed=1.5))
+
+        assert fake_synthesize.call_args[0][2] == 1.5
+        assert "Stretch:" not in updates[-1][2]
+
+    def test_synthesized_chunk_is_postprocessed(self, mock_env_vars, tmp_path):
+        """Test downloaded chunks are trimmed of silence and normalized in place."""
+        import numpy as np
+        from utils.audio_utils import write_wav, read_wav
+
+        rate = 24000
+        speech = 0.05 * np.sin(2 * np.pi * 220 * np.arange(rate) / rate)
+        padded = np.concatenate([np.zeros(rate), speech, np.zeros(rate)]).astype(np.float32)
+        chunk_path = str(tmp_path / "chunk.wav")
+
+        def fake_download(audio_url, destination_path):
+            write_wav(destination_path, padded, rate)
+            return 1
+
+        with patch('services.tts_service.ReplicateService.run_tts_model', return_value="https://audio/x.wav"), \
+             patch.object(TTSService, '_download_audio', side_effect=fake_download), \
+             patch.object(TTSService, '_create_temp_audio_path', return_value=chunk_path):
+            file_path, _, _ = TTSService._synthesize_chunk("Hello.", "voice", 1.0)
+
+        samples, _ = read_wav(file_path)
+        assert file_path == chunk_path
+        assert rate < len(samples) < rate * 1.5
+        assert np.sqrt(np.mean(samples[rate // 4:-rate // 4] ** 2)) == pytest.approx(0.1, rel=0.05)
+
+    def test_postprocess_keeps_unreadable_audio(self, tmp_path):
+        """Test a chunk that is not a PCM WAV file is kept as downloaded."""
+        path = tmp_path / "chunk.wav"
+        path.write_bytes(b"Mock audio content")
+
+        assert TTSService._postprocess_audio(str(path)) is False
+        assert path.read_bytes() == b"Mock audio content"
+        assert not os.path.exists(f"{path}.processed")
+
+    def test_join_chunks_without_postprocessing(self, tmp_path, make_wav):
+        """Test chunks are concatenated without a crossfade when post-processing is off."""
+        paths = [make_wav(tmp_path / "a.wav", 1000), make_wav(tmp_path / "b.wav", 1000)]
+
+        with patch('services.tts_service.TTS_POSTPROCESS', False), \
+             patch.object(TTSService, '_create_temp_audio_path', return_value=str(tmp_path / "merged.wav")):
+            merged = TTSService._join_chunks(paths)
+
+        with wave.open(merged, "rb") as wav_file:
+            assert wav_file.getnframes() == 2000
+
+    def test_negotiate_audio_format(self):
+        """Test Opus is preferred, Safari gets MP3 and WAV is used without ffmpeg."""
+        chrome = "Mozilla/5.0 (Windows NT 10.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+        safari = "Mozilla/5.0 (Macintosh) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.4 Safari/605.1.15"
+        with patch('services.tts_service.TTS_AUDIO_FORMAT', "opus"), \
+             patch('utils.audio_utils.shutil.which', return_value="/usr/bin/ffmpeg"):
+            assert TTSService.negotiate_audio_format(chrome) == "opus"
+            assert TTSService.negotiate_audio_format(safari) == "mp3"
+            assert TTSService.negotiate_audio_format() == "opus"
+        with patch('services.tts_service.TTS_AUDIO_FORMAT', "opus"), \
+             patch('utils.audio_utils.shutil.which', return_value=None):
+            assert TTSService.negotiate_audio_format(chrome) == "wav"
+
+    def test_encode_audio_caches_result(self, tmp_path, make_wav, isolated_audio_cache):
+        """Test encoded speech is stored in the audio cache and reused."""
+        source = make_wav(tmp_path / "speech.wav", 2400)
+        key = TTSService._encoded_cache_key("Hello there.", "af_river", 1.0, "opus")
+        assert key.endswith(".ogg")
+
+        def fake_encode(source_path, destination_path, *args):
+            with open(destination_path, "wb") as encoded:
+                encoded.write(b"OggS encoded speech")
+            return destination_path
+
+        with patch('utils.audio_utils.encode_audio_file', side_effect=fake_encode) as mock_encode:
+            first_path, first_format = TTSService.encode_audio(source, "opus", cache_key=key)
+            second_path, _ = TTSService.encode_audio(source, "opus", cache_key=key)
+
+        assert first_format == "opus"
+        assert first_path.endswith(".ogg")
+        assert second_path == isolated_audio_cache.get(key)
+        mock_encode.assert_called_once()
+
+    def test_encode_audio_falls_back_to_wav(self, tmp_path, make_wav):
+        """Test the WAV file is delivered when encoding fails."""
+        source = make_wav(tmp_path / "speech.wav", 2400)
+        with patch('utils.audio_utils.encode_audio_file', side_effect=RuntimeError("ffmpeg is not installed")):
+            assert TTSService.encode_audio(source, "mp3") == (source, "wav")
+        # WAV at the delivery rate needs no work
+        assert TTSService.encode_audio(source, "wav") == (source, "wav")
+
+    def test_stream_audio_delivers_encoded_file(self, mock_env_vars, tmp_path, make_wav):
+        """Test the final update carries the encoded file and its format."""
+        encoded = str(tmp_path / "speech.ogg")
+        with patch.object(TTSService, '_synthesize_chunk',
+                          return_value=(make_wav(tmp_path / "chunk.wav", 100), 1.0, 0.1)), \
+             patch.object(TTSService, 'encode_audio', return_value=(encoded, "opus")) as mock_encode:
+            updates = list(TTSService.stream_audio("Read this aloud.", audio_format="opus"))
+
+        assert mock_encode.call_args[0][1] == "opus"
+        assert updates[-1][1] == encoded
+        assert updates[-1][2].endswith("Format: opus")
+        # The intermediate WAV file is removed once encoded
+        assert not os.path.exists(tmp_path / "chunk.wav")
@@ -15,7 +15,9 @@ from ui.components import (
     create_image_instruction,
     create_voice_type_dropdown,
     create_speed_slider,
-    create_mllm_status
+    create_mllm_status,
+    create_audio_link_player,
+    format_audio_link
 )
 from config.settings import INIT_HISTORY, VOICE_TYPES
 
@@ -129,6 +131,19 @@ class TestUIComponents:
             assert call_kwargs['value'] == "Idle"
             assert call_kwargs['interactive'] is False
 
+    def test_audio_link_player_creation(self):
+        """Test the URL audio player starts hidden."""
+        player = create_audio_link_player()
+        assert isinstance(player, gr.HTML)
+        assert player.visible is False
+
+    def test_format_audio_link_escapes_url(self):
+        """Test the audio URL is escaped in the player HTML."""
+        result = format_audio_link('https://example.com/a.wav?x="1"&y=2')
+        assert '<audio controls autoplay' in result
+        assert 'src="https://example.com/a.wav?x=&quot;1&quot;&amp;y=2"' in result
+        assert 'Download Speech' in result
+
     def test_component_edge_cases(self):
         """Test edge cases for UI components."""
         # Test with actual Gradio components (no mocking)
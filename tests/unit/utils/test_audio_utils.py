@@ -0,0 +1,198 @@
+"""
+Unit tests for the audio_utils module.
+
+This module contains tests for WAV reading and writing, the
+pitch-preserving time-stretch, resampling, encoding and speech
+post-processing.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from utils.audio_utils import (
+    read_wav, write_wav, time_stretch, stretch_wav_file, resample, encode_audio_file,
+    map_wav, frame_rms, speech_bounds, loudness_gain, postprocess_wav_file, crossfade_wav_files
+)
+
+
+def tone(frequency=440.0, seconds=1.0, rate=24000):
+    """Generate a sine tone at half amplitude."""
+    return (0.5 * np.sin(2 * np.pi * frequency * np.arange(int(seconds * rate)) / rate)).astype(np.float32)
+
+
+def peak_frequency(samples, rate=24000):
+    """Return the strongest frequency in the signal."""
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.fft.rfftfreq(len(samples), 1 / rate)[np.argmax(spectrum)]
+
+
+class TestAudioUtils:
+    """Test suite for audio utility functions."""
+
+    def test_wav_round_trip(self, tmp_path):
+        """Test samples survive writing and reading a 16-bit WAV file."""
+        samples = tone(seconds=0.1)
+        path = write_wav(str(tmp_path / "tone.wav"), samples, 24000)
+        loaded, rate = read_wav(path)
+        assert rate == 24000
+        assert loaded.dtype == np.float32
+        np.testing.assert_allclose(loaded, samples, atol=1e-4)
+
+    @pytest.mark.parametrize("speed", [0.5, 0.8, 1.25, 2.0])
+    def test_time_stretch_scales_duration(self, speed):
+        """Test the output length is the input length divided by the speed."""
+        samples = tone()
+        assert len(time_stretch(samples, speed)) == round(len(samples) / speed)
+
+    @pytest.mark.parametrize("speed", [0.7, 1.5])
+    def test_time_stretch_preserves_pitch(self, speed):
+        """Test the dominant frequency is unchanged by stretching."""
+        stretched = time_stretch(tone(440.0), speed)
+        assert abs(peak_frequency(stretched) - 440.0) < 5.0
+        # No audible dropouts or clipping from the overlap-add
+        assert 0.4 < np.abs(stretched[2000:-2000]).max() < 0.6
+
+    def test_time_stretch_identity(self):
+        """Test speed 1.0 returns an unchanged copy."""
+        samples = tone(seconds=0.1)
+        stretched = time_stretch(samples, 1.0)
+        assert stretched is not samples
+        np.testing.assert_array_equal(stretched, samples)
+
+    def test_time_stretch_stereo_and_short_input(self):
+        """Test multi-channel audio keeps its channels and very short input is resampled."""
+        stereo = np.stack([tone(), tone(220.0)], axis=1)
+        assert time_stretch(stereo, 1.5).shape == (16000, 2)
+        assert time_stretch(tone(seconds=0.001), 2.0).shape == (12,)
+
+    def test_time_stretch_invalid_speed(self):
+        """Test a non-positive speed is rejected."""
+        with pytest.raises(ValueError):
+            time_stretch(tone(), 0)
+
+    def test_stretch_wav_file(self, tmp_path):
+        """Test a WAV file is stretched into a new file."""
+        source = write_wav(str(tmp_path / "source.wav"), tone(), 24000)
+        destination = stretch_wav_file(source, str(tmp_path / "fast.wav"), 2.0)
+        stretched, rate = read_wav(destination)
+        assert rate == 24000
+        assert len(stretched) == 12000
+
+    def test_resample_keeps_tone(self):
+        """Test resampling changes the length but not the frequency of a tone."""
+        resampled = resample(tone(440.0), 24000, 16000)
+        assert len(resampled) == 16000
+        assert abs(peak_frequency(resampled, 16000) - 440.0) < 2.0
+        assert resample(tone(), 24000, 24000).shape == (24000,)
+
+    def test_encode_wav_at_lower_rate(self, tmp_path):
+        """Test WAV output is resampled locally without an encoder."""
+        source = write_wav(str(tmp_path / "source.wav"), tone(), 24000)
+        destination = encode_audio_file(source, str(tmp_path / "small.wav"), "wav", sample_rate=16000)
+        samples, rate = read_wav(destination)
+        assert rate == 16000
+        assert len(samples) == 16000
+
+    def test_encode_compressed_uses_ffmpeg(self, tmp_path):
+        """Test Opus is encoded by ffmpeg with the requested rate and bitrate."""
+        with patch("utils.audio_utils.shutil.which", return_value="/usr/bin/ffmpeg"), \
+             patch("utils.audio_utils.subprocess.run") as mock_run:
+            encode_audio_file("in.wav", "out.ogg", "opus", sample_rate=24000, bitrate="24k")
+
+        command = mock_run.call_args[0][0]
+        assert command[0] == "/usr/bin/ffmpeg"
+        assert command[command.index("-c:a") + 1] == "libopus"
+        assert command[command.index("-b:a") + 1] == "24k"
+        assert command[command.index("-ar") + 1] == "24000"
+        assert command[-1] == "out.ogg"
+
+    def test_encode_compressed_without_ffmpeg(self):
+        """Test compressed formats fail clearly when ffmpeg is missing."""
+        with patch("utils.audio_utils.shutil.which", return_value=None):
+            with pytest.raises(RuntimeError, match="ffmpeg"):
+                encode_audio_file("in.wav", "out.mp3", "mp3")
+        with pytest.raises(ValueError):
+            encode_audio_file("in.wav", "out.flac", "flac")
+
+    def test_map_wav_matches_read_wav(self, tmp_path):
+        """Test the memory-mapped view holds the same samples as a full read."""
+        path = str(tmp_path / "tone.wav")
+        write_wav(path, tone(seconds=0.5), 24000)
+
+        samples, rate = map_wav(path)
+        assert isinstance(samples, np.memmap)
+        assert rate == 24000
+        np.testing.assert_allclose(samples / 32768.0, read_wav(path)[0], atol=1e-4)
+
+    def test_map_wav_rejects_other_files(self, tmp_path):
+        """Test files that are not PCM WAV raise ValueError."""
+        path = tmp_path / "audio.wav"
+        path.write_bytes(b"Mock audio content")
+        with pytest.raises(ValueError):
+            map_wav(str(path))
+
+    def test_speech_bounds_trims_silence(self):
+        """Test leading and trailing silence is trimmed down to the padding."""
+        audio = np.concatenate([np.zeros(24000), tone(seconds=1.0), np.zeros(12000)])
+
+        start, end = speech_bounds(audio, 24000, pad_seconds=0.1)
+        assert start == 24000 - 2400
+        assert end == 48000 + 2400
+        assert speech_bounds(np.zeros(1000), 24000) == (0, 1000)
+
+    def test_frame_rms_of_tone(self):
+        """Test the frame energy of a sine tone is its amplitude over sqrt(2)."""
+        rms = frame_rms(tone(frequency=1000.0), 240)
+        assert len(rms) == 100
+        np.testing.assert_allclose(rms, 0.5 / np.sqrt(2), rtol=0.01)
+
+    def test_loudness_gain_targets_speech_level(self):
+        """Test gain is measured on voiced frames and limited by the peak."""
+        quiet = np.concatenate([0.1 * tone(), np.zeros(48000)])
+        gain = loudness_gain(quiet, 24000, target_dbfs=-20.0)
+        assert 20 * np.log10(0.05 / np.sqrt(2) * gain) == pytest.approx(-20.0, abs=0.1)
+
+        # A -3 dBFS RMS target would push the 0.05 peak above -1 dBFS
+        assert 0.05 * loudness_gain(0.1 * tone(), 24000, target_dbfs=-3.0) == pytest.approx(10 ** (-1 / 20))
+        assert loudness_gain(np.zeros(100), 24000) == 1.0
+
+    def test_postprocess_wav_file(self, tmp_path):
+        """Test silence is trimmed and the level normalized."""
+        source = str(tmp_path / "raw.wav")
+        destination = str(tmp_path / "clean.wav")
+        write_wav(source, np.concatenate([np.zeros(24000), 0.1 * tone(), np.zeros(24000)]), 24000)
+
+        stats = postprocess_wav_file(source, destination, pad_seconds=0.05, target_dbfs=-20.0)
+
+        samples, _ = read_wav(destination)
+        assert stats["frames_in"] == 72000
+        assert stats["frames_out"] == len(samples) == 24000 + 2 * 1200
+        assert stats["gain_db"] > 0
+        assert 20 * np.log10(np.sqrt(np.mean(samples[1200:-1200] ** 2))) == pytest.approx(-20.0, abs=0.1)
+
+    def test_crossfade_wav_files(self, tmp_path):
+        """Test joins overlap by the fade and keep a constant level for a continuous tone."""
+        paths = []
+        for index in range(3):
+            path = str(tmp_path / f"part{index}.wav")
+            write_wav(path, np.full(2400, 0.5, dtype=np.float32), 24000)
+            paths.append(path)
+        destination = str(tmp_path / "merged.wav")
+
+        crossfade_wav_files(paths, destination, fade_seconds=0.01)
+
+        samples, _ = read_wav(destination)
+        assert len(samples) == 3 * 2400 - 2 * 240
+        # Equal-power fades of correlated audio rise by at most 3 dB mid-fade
+        assert samples.min() >= 0.5 - 1e-3
+        assert samples.max() <= 0.5 * np.sqrt(2) + 1e-3
+
+    def test_crossfade_rejects_mismatched_rates(self, tmp_path):
+        """Test files with different sample rates are not merged."""
+        first, second = str(tmp_path / "a.wav"), str(tmp_path / "b.wav")
+        write_wav(first, tone(seconds=0.1), 24000)
+        write_wav(second, tone(seconds=0.1, rate=16000), 16000)
+        with pytest.raises(ValueError):
+            crossfade_wav_files([first, second], str(tmp_path / "merged.wav"))
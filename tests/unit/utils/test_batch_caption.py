@@ -0,0 +1,47 @@
+"""
+Unit tests for the batch_caption module.
+
+This module contains tests for the batch captioning command line entry point.
+"""
+
+from unittest.mock import patch
+
+from PIL import Image
+
+from utils.batch_caption import caption_files, main
+from utils.image_utils import ImageUtils
+
+
+class TestBatchCaption:
+    """Test suite for the batch captioning entry point."""
+
+    def test_caption_files_skips_unreadable_files(self, tmp_path):
+        """Test unreadable files get an error caption and are not sent to the model."""
+        image_path = tmp_path / "red.png"
+        Image.new("RGB", (32, 32), "red").save(image_path)
+        broken_path = tmp_path / "broken.png"
+        broken_path.write_bytes(b"not an image")
+
+        with patch.object(ImageUtils, "caption_images_batch",
+                          return_value=(["A red square."], "Latency: 1.00s | Images: 1 | Predictions: 1")) as mock_batch:
+            captions, metrics = caption_files([str(broken_path), str(image_path)])
+
+        assert len(mock_batch.call_args[0][0]) == 1
+        assert captions[0].startswith("Error reading the image")
+        assert captions[1] == "A red square."
+        assert "Predictions: 1" in metrics
+
+    def test_main_prints_captions_and_summary(self, tmp_path, capsys):
+        """Test one line is printed per image, followed by a summary line."""
+        image_path = tmp_path / "red.png"
+        Image.new("RGB", (32, 32), "red").save(image_path)
+
+        with patch("utils.batch_caption.caption_files",
+                   return_value=(["A red square."], "Latency: 1.00s | Images: 1 | Predictions: 1")), \
+             patch("config.logging_config.configure_logging"):
+            status = main([str(image_path)])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert status == 0
+        assert lines[0] == f"{image_path}: A red square."
+        assert lines[-1] == "Captioned 1 of 1 images | Latency: 1.00s | Images: 1 | Predictions: 1"
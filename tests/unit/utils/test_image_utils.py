@@ -7,6 +7,7 @@ This module contains tests for the ImageUtils class and its methods.
 import pytest
 from unittest.mock import patch, MagicMock
 import time
+import threading
 
 from utils.image_utils import ImageUtils
 from services.image_service import ImageService
@@ -176,4 +177,156 @@ class TestImageUtils:
         
         # Verify the result
         assert len(history) == len(sample_chat_history) + 1
-        assert history[-1][1] == "This is a test response."
\ No newline at end of file
+        assert history[-1][1] == "This is a test response."
+    def test_stream_extract_text(self, sample_image, mock_env_vars):
+        """Test streamed text extraction yields partial and final results."""
+        with patch.object(ReplicateService, 'stream_vision_model',
+                          return_value=iter(["Partial", "Partial text"])):
+            updates = list(ImageUtils.stream_extract_text(sample_image, []))
+
+        assert updates[0][0][-1] == ["Please extract the text from this image.", "Partial"]
+        assert "Streaming" in updates[0][1]
+        history, metrics = updates[-1]
+        assert history[-1][1] == "Partial text"
+        assert "Latency" in metrics
+
+    def test_stream_extract_text_exception(self, sample_image, mock_env_vars):
+        """Test streamed text extraction reports errors in the chat."""
+        with patch.object(ReplicateService, 'stream_vision_model', side_effect=Exception("API error")):
+            updates = list(ImageUtils.stream_extract_text(sample_image))
+
+        assert "Error extracting text" in updates[-1][0][-1][1]
+        assert "Error" in updates[-1][1]
+
+    def test_caption_images_batch(self, sample_image, mock_env_vars):
+        """Test batch captioning splits one mosaic response per image."""
+        response = '```json\n{"1": "A red square.", "2": "A blue square.", "3": "A green square."}\n```'
+        with patch.object(ReplicateService, 'run_vision_model', return_value=response) as mock_run:
+            captions, metrics = ImageUtils.caption_images_batch([sample_image] * 3)
+
+        assert captions == ["A red square.", "A blue square.", "A green square."]
+        assert mock_run.call_count == 1
+        assert "Predictions: 1" in metrics
+
+    def test_caption_images_batch_missing_tile(self, sample_image, mock_env_vars):
+        """Test tiles missing from the mosaic response are captioned individually."""
+        with patch.object(ReplicateService, 'run_vision_model',
+                          side_effect=["1: A red square.", "A single caption."]) as mock_run:
+            captions, metrics = ImageUtils.caption_images_batch([sample_image] * 2)
+
+        assert captions == ["A red square.", "A single caption."]
+        assert mock_run.call_count == 2
+        assert "Predictions: 2" in metrics
+
+    def test_caption_images_batch_missing_tiles_run_concurrently(self, sample_image, mock_env_vars):
+        """Test the individual captions of missing tiles run side by side."""
+        both_started = threading.Barrier(2, timeout=5)
+
+        def fake_run(prompt, image_base64=None, max_tokens=None, **kwargs):
+            if max_tokens is not None:
+                return "1: A red square."
+            both_started.wait()
+            return "A single caption."
+
+        with patch.object(ReplicateService, 'run_vision_model', side_effect=fake_run):
+            captions, metrics = ImageUtils.caption_images_batch([sample_image] * 3)
+
+        assert captions == ["A red square.", "A single caption.", "A single caption."]
+        assert "Predictions: 3" in metrics
+
+    def test_caption_images_batch_mosaic_encoding_failure(self, sample_image, mock_env_vars):
+        """Test a mosaic that cannot be encoded is never sent to the model without an image."""
+        with patch.object(ImageService, 'image_to_base64', return_value=None), \
+             patch.object(ReplicateService, 'run_vision_model') as mock_run:
+            captions, _ = ImageUtils.caption_images_batch([sample_image] * 2)
+
+        mock_run.assert_not_called()
+        assert captions == ["Error processing the image."] * 2
+
+    def test_caption_images_batch_empty(self):
+        """Test batch captioning with no images."""
+        captions, metrics = ImageUtils.caption_images_batch([])
+        assert captions == []
+        assert "Images: 0" in metrics
+
+    def test_progressive_caption_image(self, sample_image, mock_env_vars):
+        """Test the preview is shown first and replaced by the full caption."""
+        full_started = threading.Event()
+        preview_shown = threading.Event()
+
+        def fake_run(prompt, image_base64=None, max_tokens=None, **kwargs):
+            if max_tokens is None:
+                full_started.set()
+                preview_shown.wait(timeout=5)
+                return "A detailed full resolution caption."
+            return "A quick caption."
+
+        with patch.object(ReplicateService, 'run_vision_model', side_effect=fake_run):
+            updates = []
+            for update in ImageUtils.progressive_caption_image(sample_image, []):
+                updates.append(update)
+                preview_shown.set()
+
+        assert full_started.is_set()
+        assert len(updates) == 2
+        assert updates[0][0][-1][1] == "A quick caption."
+        assert "Refining" in updates[0][1]
+        history, metrics = updates[-1]
+        assert len(history) == 1
+        assert history[-1][1] == "A detailed full resolution caption."
+        assert "Preview:" in metrics and "Full:" in metrics
+
+    def test_progressive_caption_image_does_not_wait_for_preview(self, sample_image, mock_env_vars):
+        """Test the full caption is yielded while a slower preview is still running."""
+        release_preview = threading.Event()
+
+        def fake_run(prompt, image_base64=None, max_tokens=None, **kwargs):
+            if max_tokens is None:
+                return "A detailed full resolution caption."
+            release_preview.wait(timeout=5)
+            return "A quick caption."
+
+        try:
+            with patch.object(ReplicateService, 'run_vision_model', side_effect=fake_run):
+                start = time.monotonic()
+                updates = list(ImageUtils.progressive_caption_image(sample_image))
+                elapsed = time.monotonic() - start
+        finally:
+            release_preview.set()
+
+        assert elapsed < 2
+        assert len(updates) == 1
+        assert updates[0][0][-1][1] == "A detailed full resolution caption."
+
+    def test_progressive_caption_image_disabled(self, sample_image, mock_env_vars):
+        """Test only the full-resolution prediction runs when progressive analysis is off."""
+        with patch('utils.image_utils.PROGRESSIVE_ANALYSIS', False), \
+             patch.object(ReplicateService, 'run_vision_model', return_value="A full caption.") as mock_run:
+            updates = list(ImageUtils.progressive_caption_image(sample_image))
+
+        mock_run.assert_called_once()
+        assert len(updates) == 1
+        assert updates[0][0][-1][1] == "A full caption."
+
+    def test_progressive_summarize_image_full_failure_keeps_preview(self, sample_image, mock_env_vars):
+        """Test a failed full pass keeps the preview answer."""
+        def fake_run(prompt, image_base64=None, max_tokens=None, **kwargs):
+            if max_tokens is None:
+                time.sleep(0.05)
+                raise Exception("API error")
+            return "A quick summary."
+
+        with patch.object(ReplicateService, 'run_vision_model', side_effect=fake_run):
+            updates = list(ImageUtils.progressive_summarize_image(sample_image))
+
+        history, metrics = updates[-1]
+        assert history[-1][1] == "A quick summary."
+        assert "failed" in metrics
+
+    def test_progressive_caption_image_exception(self, sample_image, mock_env_vars):
+        """Test both passes failing reports an error in the chat."""
+        with patch.object(ReplicateService, 'run_vision_model', side_effect=Exception("API error")):
+            updates = list(ImageUtils.progressive_caption_image(sample_image))
+
+        assert "Error generating caption" in updates[-1][0][-1][1]
+        assert "Error" in updates[-1][1]
@@ -0,0 +1,146 @@
+"""
+Unit tests for the prompt_builder module.
+
+This module contains tests for incremental prompt assembly, the token
+budgeted history window with its rolling summary, and the per-session
+builder cache.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from utils import ChatUtils
+from utils.prompt_builder import PromptBuilder, PromptBuilderCache, CHAT_SYSTEM_PROMPT
+from config.settings import INIT_HISTORY
+
+
+def full_prompt(history, message):
+    """Build the prompt from scratch, leaving out the greeting and turns without a user message."""
+    context = "".join(f"User: {user}\nAssistant: {bot}\n\n" for user, bot in history
+                      if user is not None and [user, bot] not in INIT_HISTORY)
+    return f"{CHAT_SYSTEM_PROMPT}\n\nConversation History:\n{context}\nUser: {message}\nAssistant:"
+
+
+class TestPromptBuilder:
+    """Test suite for PromptBuilder class."""
+
+    def test_build_matches_full_prompt(self):
+        """Test the incremental prompt is identical to a prompt built from scratch."""
+        history = INIT_HISTORY + [[None, "Caption: a red bus."], ["What color is it?", "Red."]]
+        prompt = PromptBuilder().build(history, "Is it moving?")
+        assert prompt == full_prompt(history, "Is it moving?")
+        # The greeting is never sent to the model
+        assert INIT_HISTORY[0][1] not in prompt
+
+    def test_growing_history_only_formats_new_turns(self):
+        """Test a new turn is appended without reformatting earlier turns."""
+        builder = PromptBuilder(summarizer=None)
+        history = [list(turn) for turn in INIT_HISTORY]
+        builder.build(history, "Describe the image")
+
+        with patch.object(PromptBuilder, 'format_turn', wraps=PromptBuilder.format_turn) as format_turn:
+            history.append(["Describe the image", "A classroom with a whiteboard."])
+            prompt = builder.build(history, "What is on the whiteboard?")
+
+        assert format_turn.call_count == 1
+        assert prompt == full_prompt(history, "What is on the whiteboard?")
+        assert builder.rebuilds == 0
+
+    def test_regenerate_and_clear(self):
+        """Test a dropped last turn is truncated and a replaced history is rebuilt."""
+        builder = PromptBuilder(summarizer=None)
+        history = INIT_HISTORY + [["First question", "First answer"], ["Second question", "Second answer"]]
+        builder.sync(history)
+
+        assert builder.build(history[:-1], "Second question") == full_prompt(history[:-1], "Second question")
+        assert builder.rebuilds == 0
+
+        other = [["Another chat", "Another answer"]]
+        assert builder.build(other, "Next") == full_prompt(other, "Next")
+        assert builder.rebuilds == 1
+        assert len(builder) == 1
+
+
+    def test_window_keeps_recent_turns_within_budget(self):
+        """Test only the newest turns that fit in the token budget are sent."""
+        builder = PromptBuilder(token_budget=40, summarizer=None)
+        history = [[f"Question {index}", "An answer of a few words."] for index in range(10)]
+        prompt = builder.build(history, "Next question")
+
+        assert "Question 9" in prompt and "Question 8" in prompt
+        assert "Question 0" not in prompt
+        assert 0 < builder.window_start() < 10
+
+        # A single turn longer than the budget is still sent
+        long_turn = [["Read the slide", "word " * 100]]
+        assert "word " * 100 in builder.build(long_turn, "And then?")
+
+    def test_older_turns_are_summarized_in_background(self):
+        """Test turns leaving the window are folded into the summary without blocking the request."""
+        release = threading.Event()
+        calls = []
+
+        def summarizer(summary, turns):
+            calls.append((summary, turns))
+            release.wait(5)
+            return f"Summary {len(calls)}"
+
+        builder = PromptBuilder(token_budget=40, summarizer=summarizer, executor=ThreadPoolExecutor(1))
+        history = [[f"Question {index}", "An answer of a few words."] for index in range(10)]
+        first = builder.build(history, "Next question")
+
+        # The request does not wait for the summary
+        assert "Summary of the earlier conversation" not in first
+        release.set()
+        assert builder.pending_summary.result(5) is True
+        assert calls[0][0] == "" and "Question 0" in calls[0][1]
+
+        prompt = builder.build(history, "Next question")
+        assert "Summary of the earlier conversation:\nSummary 1" in prompt
+        assert builder.summarized_turns == builder.window_start()
+
+        # Dropping summarized turns discards the summary
+        builder.sync(history[:1])
+        assert builder.summary == "" and builder.summarized_turns == 0
+
+    def test_failed_summary_keeps_window(self):
+        """Test a failing summarizer leaves the prompt without a summary."""
+        def summarizer(summary, turns):
+            raise RuntimeError("API error")
+
+        builder = PromptBuilder(token_budget=40, summarizer=summarizer, executor=ThreadPoolExecutor(1))
+        history = [[f"Question {index}", "An answer of a few words."] for index in range(10)]
+        builder.build(history, "Next question")
+
+        assert builder.pending_summary.result(5) is False
+        assert "Summary of the earlier conversation" not in builder.build(history, "Next question")
+
+
+class TestPromptBuilderCache:
+    """Test suite for PromptBuilderCache class."""
+
+    def test_sessions_have_their_own_builder(self):
+        """Test each session keeps a builder and the least recently used one is evicted."""
+        cache = PromptBuilderCache(max_sessions=2)
+        first = cache.get("session-a")
+        assert cache.get("session-a") is first
+        cache.get("session-b")
+        cache.get("session-a")
+        cache.get("session-c")  # Evicts session-b
+
+        assert len(cache) == 2
+        assert cache.get("session-a") is first
+        cache.release("session-a")
+        assert cache.get("session-a") is not first
+
+    def test_chat_utils_prompt_uses_real_newlines(self):
+        """Test ChatUtils sends the same prompt as the app, with newlines rather than literal backslashes."""
+        history = [["Describe the image", "A red bus."]]
+        with patch('services.ReplicateService.run_vision_model', return_value="It is parked.") as run_model:
+            updated, metrics = ChatUtils.regenerate_response(history + [["Is it moving?", "Old answer"]], "")[:2]
+
+        prompt = run_model.call_args[0][0]
+        assert prompt == full_prompt(history, "Is it moving?")
+        assert "\\n" not in prompt
+        assert updated[-1] == ["Is it moving?", "It is parked."]
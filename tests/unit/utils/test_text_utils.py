@@ -0,0 +1,88 @@
+"""
+Unit tests for the text_utils module.
+
+This module contains tests for token estimation, truncation detection and
+continuation stitching and sentence splitting.
+"""
+
+import pytest
+
+from utils.text_utils import estimate_tokens, is_truncated, stitch_continuation, continuation_settled, split_sentences
+
+
+class TestTextUtils:
+    """Test suite for text utility functions."""
+
+    def test_estimate_tokens(self):
+        """Test approximate token counting."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens(None) == 0
+        assert estimate_tokens("Hello, world!") == 6
+        # Long words are split into several sub-word tokens
+        assert estimate_tokens("internationalization") == 5
+
+    def test_is_truncated_complete_response(self):
+        """Test that a response ending with punctuation is not truncated."""
+        text = " ".join(["word"] * 600) + "."
+        assert is_truncated(text, 512) is False
+
+    def test_is_truncated_short_response(self):
+        """Test that a short unfinished response is not truncated."""
+        assert is_truncated("The slide shows", 512) is False
+
+    def test_is_truncated_at_limit(self):
+        """Test that a long unfinished response is truncated."""
+        text = " ".join(["word"] * 500)
+        assert is_truncated(text, 512) is True
+
+    def test_stitch_removes_overlap(self):
+        """Test repeated text at the boundary is removed."""
+        result = stitch_continuation(
+            "The slide lists the three main goals",
+            " the three main goals: speed and cost."
+        )
+        assert result == "The slide lists the three main goals: speed and cost."
+
+    def test_stitch_adds_separator(self):
+        """Test a space is added between words when neither side has one."""
+        assert stitch_continuation("First part", "second part.") == "First part second part."
+        assert stitch_continuation("First part", ", second part.") == "First part, second part."
+        assert stitch_continuation("First part ", "second part.") == "First part second part."
+
+    def test_stitch_empty_parts(self):
+        """Test stitching with empty inputs."""
+        assert stitch_continuation("", "answer") == "answer"
+        assert stitch_continuation("answer", "") == "answer"
+
+    def test_continuation_settled(self):
+        """Test a continuation is held back while it may still overlap the response."""
+        text = "The slide lists the three main goals"
+        assert continuation_settled(text, " the three") is False
+        assert continuation_settled(text, " ") is False
+        assert continuation_settled(text, " the three main goals: speed") is True
+        assert continuation_settled(text, "and more") is True
+        assert continuation_settled("", "the") is True
+
+    def test_split_sentences(self):
+        """Test text is split at sentence boundaries."""
+        text = "The slide shows a graph. Sales rose in every quarter of 2024!"
+        assert split_sentences(text, min_chars=10) == [
+            "The slide shows a graph.",
+            "Sales rose in every quarter of 2024!"
+        ]
+
+    def test_split_sentences_merges_short(self):
+        """Test short sentences are merged with the next one."""
+        chunks = split_sentences("Yes. It is a photo of a busy street market at dusk.", min_chars=20)
+        assert chunks == ["Yes. It is a photo of a busy street market at dusk."]
+
+    def test_split_sentences_long_sentence(self):
+        """Test sentences over max_chars are split at a word boundary."""
+        chunks = split_sentences("word " * 60, max_chars=100)
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert " ".join(chunks).split() == ["word"] * 60
+
+    def test_split_sentences_empty(self):
+        """Test empty text gives no chunks."""
+        assert split_sentences("") == []
+        assert split_sentences("   ") == []
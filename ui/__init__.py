@@ -5,8 +5,15 @@ from .components import (
     create_chatbot_component,
     create_image_instruction,
     create_voice_type_dropdown,
+    create_voice_preview_button,
     create_speed_slider,
-    create_mllm_status
+    create_auto_speak_checkbox,
+    create_alternatives_checkbox,
+    create_candidate_selector,
+    create_export_button,
+    create_mllm_status,
+    create_audio_link_player,
+    format_audio_link
 )
 
 # Import interfaces
@@ -18,8 +25,15 @@ __all__ = [
     'create_chatbot_component',
     'create_image_instruction',
     'create_voice_type_dropdown',
+    'create_voice_preview_button',
     'create_speed_slider',
+    'create_auto_speak_checkbox',
+    'create_alternatives_checkbox',
+    'create_candidate_selector',
+    'create_export_button',
     'create_mllm_status',
+    'create_audio_link_player',
+    'format_audio_link',
     
     # Interfaces
     'ChatInterface',
@@ -17,8 +17,14 @@ from ui.components import (
     create_chatbot_component,
     create_image_instruction,
     create_voice_type_dropdown,
+    create_voice_preview_button,
     create_speed_slider,
-    create_mllm_status
+    create_auto_speak_checkbox,
+    create_alternatives_checkbox,
+    create_candidate_selector,
+    create_export_button,
+    create_mllm_status,
+    create_audio_link_player
 )
 
 # Module-level function for direct import
@@ -79,8 +85,12 @@ class ChatInterface:
             with gr.Row():
                 upload_btn = gr.UploadButton("📁 Upload Image", file_types=["image"], file_count="single")
                 regenerate_btn = gr.Button("🔄 Regenerate")
+                alternatives = create_alternatives_checkbox()  # Several answers per regenerate
                 clear_btn = gr.Button("🗑️ Clear History")
 
+            # Switches the last answer between regenerated alternatives, hidden until there are some
+            candidate_selector = create_candidate_selector()
+
             # Specialized image processing action buttons
             # All initially disabled until an image is uploaded
             with gr.Row():
@@ -104,14 +114,28 @@ class ChatInterface:
 
             # Audio playback component for TTS output
             with gr.Row():
-                audio_output = gr.Audio(label="Generated Speech", interactive=False, show_share_button=False)
+                # Streaming playback starts with the first synthesized sentence
+                audio_output = gr.Audio(label="Generated Speech", interactive=False, show_share_button=False,
+                                        streaming=True, autoplay=True)
+                # Complete speech as one WAV file, available once synthesis finishes
+                audio_download = gr.File(label="Download Speech", interactive=False)
+                # Player for speech served straight from its source URL (url delivery mode)
+                audio_link = create_audio_link_player()
 
             # TTS configuration controls
             with gr.Row():
                 voice_type = create_voice_type_dropdown()  # Voice selection
+                preview_btn = create_voice_preview_button()  # Sample phrase in the selected voice
                 speed = create_speed_slider()  # Playback speed adjustment
+                auto_speak = create_auto_speak_checkbox()  # Speak answers while they stream
                 tts_btn = gr.Button("🔊 Play Last Response")  # Trigger TTS generation
 
+            # Whole-conversation export for offline listening
+            with gr.Row():
+                export_btn = create_export_button()  # Narrate every answer into one file
+                export_file = gr.File(label="Conversation Audio", interactive=False)
+                export_status = gr.Textbox(label="Export Status", interactive=False, value="Idle")
+
             # System status indicators
             with gr.Row():
                 tts_status = gr.Textbox(
@@ -130,16 +154,25 @@ class ChatInterface:
                 "send_btn": send_btn,
                 "upload_btn": upload_btn,
                 "regenerate_btn": regenerate_btn,
+                "alternatives": alternatives,
+                "candidate_selector": candidate_selector,
                 "clear_btn": clear_btn,
                 "extract_btn": extract_btn,
                 "caption_btn": caption_btn,
                 "summarize_btn": summarize_btn,
                 "gallery": gallery,
                 "voice_type": voice_type,
+                "preview_btn": preview_btn,
                 "speed": speed,
+                "auto_speak": auto_speak,
                 "tts_btn": tts_btn,
+                "export_btn": export_btn,
+                "export_file": export_file,
+                "export_status": export_status,
                 "tts_status": tts_status,
                 "performance_metrics": performance_metrics,
                 "audio_output": audio_output,
+                "audio_download": audio_download,
+                "audio_link": audio_link,
                 "image_instruction": image_instruction
             }
\ No newline at end of file
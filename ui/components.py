@@ -8,13 +8,17 @@ promote reusability and maintainability across different interfaces.
 The components include:
 - Chatbot display
 - Image upload instructions
-- Voice type selection
+- Voice type selection and preview
 - Speech speed controls
+- Auto-speak toggle
+- Regenerate alternatives toggle and selector
 - Status indicators
+- Direct audio player for speech served from its source URL
 """
 
+import html
 import gradio as gr
-from config.settings import INIT_HISTORY, VOICE_TYPES
+from config.settings import INIT_HISTORY, VOICE_TYPES, AUTO_SPEAK_DEFAULT, REGENERATE_ALTERNATIVES_DEFAULT
 
 def create_chatbot_component():
     """
@@ -98,6 +102,22 @@ def create_voice_type_dropdown():
         label="Voice Type"  # User-friendly label
     )
 
+def create_voice_preview_button():
+    """
+    Create the button that plays a sample phrase in the selected voice.
+    
+    The phrase is pre-rendered for every voice at startup, so the preview
+    plays without waiting for a new synthesis.
+    
+    Returns:
+        gr.Button: Small preview button placed next to the voice dropdown
+    
+    Example:
+        preview_btn = create_voice_preview_button()
+        preview_btn.click(preview_handler, inputs=[voice_type, speed], outputs=[audio_output])
+    """
+    return gr.Button("▶ Preview Voice", size="sm")
+
 def create_speed_slider():
     """
     Create the speed slider for Text-to-Speech playback rate control.
@@ -122,6 +142,82 @@ def create_speed_slider():
         label="Playback Speed"  # User-friendly label
     )
 
+def create_auto_speak_checkbox():
+    """
+    Create the toggle that speaks answers while they are being generated.
+    
+    When enabled, complete sentences of a streaming answer are synthesized
+    and played right away, so users who rely on audio do not have to wait
+    for the full answer and then press the play button.
+    
+    Returns:
+        gr.Checkbox: Auto-speak toggle, off unless AUTO_SPEAK_DEFAULT is set
+    
+    Example:
+        auto_speak = create_auto_speak_checkbox()
+        # Passed to the chat handler as a boolean input
+        speak_answers = auto_speak.value
+    """
+    return gr.Checkbox(
+        value=AUTO_SPEAK_DEFAULT,
+        label="Auto-speak answers"  # Speak while the answer is still streaming
+    )
+
+def create_alternatives_checkbox():
+    """
+    Create the toggle that makes regenerate produce several alternative answers.
+    
+    When enabled, one click on Regenerate runs several completions at once
+    instead of one per click.
+    
+    Returns:
+        gr.Checkbox: Alternatives toggle, off unless REGENERATE_ALTERNATIVES_DEFAULT is set
+    
+    Example:
+        alternatives = create_alternatives_checkbox()
+        regenerate_btn.click(regenerate_handler, inputs=[performance_metrics, image_output, alternatives])
+    """
+    return gr.Checkbox(
+        value=REGENERATE_ALTERNATIVES_DEFAULT,
+        label="Regenerate alternatives"
+    )
+
+def create_candidate_selector():
+    """
+    Create the selector that switches the last answer between regenerated alternatives.
+    
+    Hidden until a regenerate with alternatives has produced more than one answer.
+    
+    Returns:
+        gr.Radio: Selector whose values are candidate indexes
+    
+    Example:
+        candidate_selector = create_candidate_selector()
+        candidate_selector.input(show_candidate, inputs=[candidate_selector], outputs=[chatbot])
+    """
+    return gr.Radio(
+        choices=[],
+        label="Alternative answers",
+        visible=False,
+        interactive=True
+    )
+
+def create_export_button():
+    """
+    Create the button that exports the whole conversation as one audio file.
+    
+    Every answer in the chat history is narrated in the selected voice and
+    speed, so a session can be listened to offline.
+    
+    Returns:
+        gr.Button: Export button placed with the Text-to-Speech options
+    
+    Example:
+        export_btn = create_export_button()
+        export_btn.click(export_handler, inputs=[chatbot, voice_type, speed], outputs=[export_file, export_status])
+    """
+    return gr.Button("💾 Export Conversation Audio")
+
 def create_mllm_status():
     """
     Create the performance metrics textbox for Multimodal LLM status display.
@@ -145,6 +241,41 @@ def create_mllm_status():
         scale=1              # Add scale parameter for responsive sizing
     )
 
+def create_audio_link_player():
+    """
+    Create the HTML player used when speech is served straight from its source URL.
+    
+    The browser fetches the audio directly from the URL, so the server never
+    downloads it. Hidden until a URL is shown with format_audio_link.
+    
+    Returns:
+        gr.HTML: Hidden HTML component
+    
+    Example:
+        audio_link = create_audio_link_player()
+        audio_link.value = format_audio_link(audio_url)
+    """
+    return gr.HTML(value="", visible=False)
+
+def format_audio_link(url):
+    """
+    Render an audio player and download link for a speech URL.
+    
+    Args:
+        url (str): URL of the audio file.
+    
+    Returns:
+        str: HTML for an autoplaying audio element and a download link
+    
+    Example:
+        html_player = format_audio_link("https://replicate.delivery/speech.wav")
+    """
+    safe_url = html.escape(url, quote=True)
+    return (
+        f'<audio controls autoplay preload="auto" src="{safe_url}" style="width: 100%;"></audio>'
+        f'<p><a href="{safe_url}" download target="_blank" rel="noopener">Download Speech</a></p>'
+    )
+
 # Add more component creation functions as needed
 # Each function should follow the pattern of creating a single, reusable UI component
 # with appropriate configuration and documentation
\ No newline at end of file
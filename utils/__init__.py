@@ -10,10 +10,11 @@ from .validators import (
 )
 
 from .image_utils import ImageUtils
+from .prompt_builder import PromptBuilder, PromptBuilderCache, prompt_builders
 
 class ChatUtils:
     @staticmethod
-    def regenerate_response(history, performance_metrics, image=None):
+    def regenerate_response(history, performance_metrics, image=None, session_id=None):
         """
         Regenerate the last bot message by re-running the model.
         
@@ -21,6 +22,7 @@ class ChatUtils:
             history: Current chat history
             performance_metrics: Current performance metrics
             image: Optional image for context
+            session_id: Optional browser session whose prompt builder is used
             
         Returns:
             tuple: Updated history and metrics
@@ -40,9 +42,8 @@ class ChatUtils:
 
         try:
             from services import ReplicateService
-            # Build system prompt from chat history
-            system_prompt = "You are a helpful AI assistant specializing in analyzing images and providing detailed information."
-            context = "\\n\\n".join([f"User: {h[0]}\\nAssistant: {h[1]}" for h in new_history if h[0] is not None])
+            # Build the prompt from the chat history
+            prompt = prompt_builders.build(session_id, new_history, last_user_msg)
             
             # Prepare image if provided
             image_str = None
@@ -51,10 +52,7 @@ class ChatUtils:
                 image_str = ImageService.image_to_base64(image)
 
             # Run the model
-            result = ReplicateService.run_vision_model(
-                f"{system_prompt}\\n\\nConversation History:\\n{context}\\nUser: {last_user_msg}\\nAssistant:",
-                image_base64=image_str
-            )
+            result = ReplicateService.run_vision_model(prompt, image_base64=image_str)
 
             updated_metrics = f"Regenerated response successfully"
             return new_history + [[last_user_msg, result]], updated_metrics
@@ -63,7 +61,7 @@ class ChatUtils:
             return new_history + [[last_user_msg, f"Error regenerating response: {str(e)}"]], "Error: Metrics unavailable"
 
     @staticmethod
-    def locked_chat_response(message, history, performance_metrics, image=None):
+    def locked_chat_response(message, history, performance_metrics, image=None, session_id=None):
         """
         Process a chat response with proper locking mechanism.
         
@@ -72,6 +70,7 @@ class ChatUtils:
             history: Chat history
             performance_metrics: Performance metrics
             image: Optional image
+            session_id: Optional browser session whose prompt builder is used
             
         Returns:
             tuple: Updated history, metrics, and empty string for input clearing
@@ -89,15 +88,11 @@ class ChatUtils:
             if image is not None:
                 image_str = ImageService.image_to_base64(image)
 
-            # Build system prompt
-            system_prompt = "You are a helpful AI assistant specializing in analyzing images and providing detailed information."
-            context = "\\n\\n".join([f"User: {h[0]}\\nAssistant: {h[1]}" for h in history if h[0] is not None])
+            # Build the prompt from the chat history
+            prompt = prompt_builders.build(session_id, history, message)
             
             # Run the model
-            result = ReplicateService.run_vision_model(
-                f"{system_prompt}\\n\\nConversation History:\\n{context}\\nUser: {message}\\nAssistant:",
-                image_base64=image_str
-            )
+            result = ReplicateService.run_vision_model(prompt, image_base64=image_str)
 
             updated_metrics = "Response generated successfully"
             return history + [[message, result]], updated_metrics, ""
@@ -111,6 +106,11 @@ __all__ = [
     'Validators',
     'ImageUtils',
     'ChatUtils',
+    'PromptBuilder',
+    'PromptBuilderCache',
+    
+    # Shared instances
+    'prompt_builders',
     
     # Validator functions
     'validate_message',
@@ -0,0 +1,588 @@
+"""
+Audio utilities for the HearSee application.
+
+This module contains NumPy helpers for working with the WAV files produced by
+the text-to-speech model, so that adjustments such as playback speed can be
+applied locally in milliseconds instead of requesting a new prediction.
+
+Functions:
+    read_wav: Read a PCM WAV file into a float32 array.
+    write_wav: Write a float32 array to a 16-bit PCM WAV file.
+    time_stretch: Change the duration of audio without changing its pitch (WSOLA).
+    stretch_wav_file: Time-stretch a WAV file into a new file.
+    resample: Change the sample rate of audio with an FFT resampler.
+    ffmpeg_path: Locate the ffmpeg executable used for compressed formats.
+    encode_audio_file: Encode a WAV file as Opus, MP3 or WAV at a given rate.
+    map_wav: Memory-map the samples of a PCM WAV file.
+    frame_rms: RMS energy of consecutive frames.
+    speech_bounds: Find where speech starts and ends, ignoring leading and trailing silence.
+    loudness_gain: Gain that brings speech to a target loudness without clipping.
+    postprocess_wav_file: Trim silence and normalize loudness of a WAV file.
+    crossfade_wav_files: Concatenate WAV files with short crossfades at the joins.
+"""
+
+import os
+import wave
+import struct
+import shutil
+import subprocess
+import logging
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# NumPy sample types for PCM sample widths (8-bit PCM is unsigned)
+SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+# Frame length for WSOLA in seconds; ~40ms spans a few pitch periods of speech
+STRETCH_FRAME_SECONDS = 0.04
+
+# The similarity search compares every Nth sample, which keeps the per-frame
+# search cheap while still aligning waveforms to within a fraction of a millisecond
+SEARCH_DECIMATION = 4
+
+# Delivery formats: file suffix and ffmpeg codec arguments (WAV needs no encoder)
+AUDIO_FORMATS = {
+    "opus": (".ogg", ["-c:a", "libopus", "-application", "voip"]),
+    "mp3": (".mp3", ["-c:a", "libmp3lame"]),
+    "wav": (".wav", None),
+}
+
+# Seconds an ffmpeg encode may take before it is abandoned
+ENCODE_TIMEOUT = 60
+
+# WAV format tags for integer PCM
+PCM_FORMAT_TAGS = (1, 0xFFFE)  # WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE
+
+# Frames processed per block when writing post-processed audio
+BLOCK_FRAMES = 65536
+
+# Length of the frames used for silence detection and loudness measurement
+ENERGY_FRAME_SECONDS = 0.01
+
+
+def read_wav(path):
+    """
+    Read a PCM WAV file into a float32 array.
+
+    Args:
+        path (str): Path of the WAV file.
+
+    Returns:
+        tuple: (samples, sample_rate) where samples has shape (frames,) for
+               mono audio or (frames, channels) otherwise, scaled to [-1, 1).
+
+    Raises:
+        ValueError: If the sample width is not 8, 16 or 32 bits.
+
+    Example:
+        >>> samples, rate = read_wav("speech.wav")
+        >>> print(f"{len(samples) / rate:.1f}s")
+    """
+    with wave.open(path, "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        width = wav_file.getsampwidth()
+        rate = wav_file.getframerate()
+        raw = wav_file.readframes(wav_file.getnframes())
+
+    if width not in SAMPLE_DTYPES:
+        raise ValueError(f"Unsupported WAV sample width: {width * 8} bits")
+
+    samples = np.frombuffer(raw, dtype=SAMPLE_DTYPES[width]).astype(np.float32)
+    if width == 1:
+        samples = (samples - 128.0) / 128.0
+    else:
+        samples /= float(2 ** (8 * width - 1))
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    return samples, rate
+
+
+def write_wav(path, samples, sample_rate):
+    """
+    Write a float32 array to a 16-bit PCM WAV file.
+
+    Args:
+        path (str): Destination path.
+        samples (numpy.ndarray): Audio of shape (frames,) or (frames, channels) in [-1, 1].
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        str: path
+
+    Example:
+        >>> write_wav("speech.wav", samples, 24000)
+    """
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    pcm = np.clip(np.round(samples * 32767.0), -32768, 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return path
+
+
+def time_stretch(samples, speed, sample_rate=24000, frame_seconds=STRETCH_FRAME_SECONDS):
+    """
+    Change the duration of audio without changing its pitch.
+
+    Uses WSOLA (waveform similarity overlap-add): Hann-windowed frames are
+    read from the input every hop * speed samples and overlap-added every
+    hop samples. Each frame's read position is shifted by up to a quarter
+    frame to the position whose waveform best matches the natural
+    continuation of the previous frame, which avoids the phasing artifacts
+    of plain overlap-add. Frame extraction and overlap-add are vectorized;
+    only the similarity search runs once per frame.
+
+    Args:
+        samples (numpy.ndarray): Audio of shape (frames,) or (frames, channels).
+        speed (float): Playback speed; 2.0 halves the duration, 0.5 doubles it.
+        sample_rate (int, optional): Sample rate in Hz, used to size frames.
+        frame_seconds (float, optional): Analysis frame length in seconds.
+
+    Returns:
+        numpy.ndarray: float32 audio with round(len(samples) / speed) frames.
+
+    Raises:
+        ValueError: If speed is not positive.
+
+    Example:
+        >>> samples, rate = read_wav("speech.wav")
+        >>> faster = time_stretch(samples, 1.5, rate)
+    """
+    if speed <= 0:
+        raise ValueError(f"Speed must be positive, got {speed}")
+
+    samples = np.asarray(samples, dtype=np.float32)
+    target_length = int(round(len(samples) / speed))
+    if abs(speed - 1.0) < 1e-3:
+        return samples.copy()
+
+    frame_length = max(64, int(sample_rate * frame_seconds)) // 2 * 2
+    synthesis_hop = frame_length // 2
+    analysis_hop = synthesis_hop * speed
+    tolerance = frame_length // 4
+
+    if len(samples) < frame_length:
+        # Too short to stretch; resample instead (the pitch shift is inaudible)
+        positions = np.linspace(0, len(samples) - 1, max(1, target_length))
+        if samples.ndim == 1:
+            return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        return np.stack([np.interp(positions, np.arange(len(samples)), samples[:, c])
+                         for c in range(samples.shape[1])], axis=1).astype(np.float32)
+
+    # Align on the channel mix, then apply the same read positions to every channel
+    mono = samples if samples.ndim == 1 else samples.mean(axis=1)
+    frame_count = int(np.ceil(target_length / synthesis_hop)) + 1
+
+    # Leading padding lets the first frame start half a frame early (so the
+    # output does not fade in) and lets the search look before sample 0
+    lead = tolerance + synthesis_hop
+    tail = int(np.ceil(frame_count * analysis_hop)) + frame_length + 2 * tolerance - len(mono)
+    padded_mono = np.pad(mono, (lead, max(0, tail) + frame_length))
+
+    positions = np.empty(frame_count, dtype=np.int64)
+    positions[0] = tolerance
+    step = SEARCH_DECIMATION
+    for k in range(1, frame_count):
+        natural = positions[k - 1] + synthesis_hop
+        template = padded_mono[natural:natural + frame_length:step]
+        start = int(round(k * analysis_hop))
+        region = padded_mono[start:start + 2 * tolerance + frame_length]
+        candidates = sliding_window_view(region, frame_length)[::step, ::step]
+        positions[k] = start + int(np.argmax(candidates @ template)) * step
+
+    # Vectorized overlap-add: with a 50% hop each output hop receives the
+    # second half of one frame and the first half of the next
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame_length) / frame_length)).astype(np.float32)
+    padding = [(lead, max(0, tail) + frame_length)] + [(0, 0)] * (samples.ndim - 1)
+    padded = np.pad(samples, padding)
+    indices = positions[:, None] + np.arange(frame_length)
+    frames = padded[indices] * (window if samples.ndim == 1 else window[:, None])
+
+    channel_shape = samples.shape[1:]
+    output = np.zeros(((frame_count + 1) * synthesis_hop,) + channel_shape, dtype=np.float32)
+    output[:frame_count * synthesis_hop] += frames[:, :synthesis_hop].reshape((-1,) + channel_shape)
+    output[synthesis_hop:] += frames[:, synthesis_hop:].reshape((-1,) + channel_shape)
+
+    # The first frame started half a frame before sample 0
+    return output[synthesis_hop:synthesis_hop + target_length]
+
+
+def stretch_wav_file(source_path, destination_path, speed):
+    """
+    Time-stretch a WAV file into a new file.
+
+    Args:
+        source_path (str): Input WAV file.
+        destination_path (str): Output WAV file (16-bit PCM).
+        speed (float): Playback speed; see time_stretch.
+
+    Returns:
+        str: destination_path
+
+    Example:
+        >>> stretch_wav_file("speech_1x.wav", "speech_1_5x.wav", 1.5)
+    """
+    samples, rate = read_wav(source_path)
+    write_wav(destination_path, time_stretch(samples, speed, rate), rate)
+    return destination_path
+
+
+def resample(samples, sample_rate, target_rate):
+    """
+    Change the sample rate of audio with an FFT resampler.
+
+    The spectrum is truncated (or zero-padded) to the target rate, which is
+    an ideal low-pass filter, so downsampling does not alias.
+
+    Args:
+        samples (numpy.ndarray): Audio of shape (frames,) or (frames, channels).
+        sample_rate (int): Current sample rate in Hz.
+        target_rate (int): Desired sample rate in Hz.
+
+    Returns:
+        numpy.ndarray: float32 audio at target_rate.
+
+    Example:
+        >>> narrowband = resample(samples, 24000, 16000)
+    """
+    if sample_rate == target_rate or len(samples) == 0:
+        return np.asarray(samples, dtype=np.float32)
+    target_length = max(1, int(round(len(samples) * target_rate / sample_rate)))
+    spectrum = np.fft.rfft(samples, axis=0)
+    bins = target_length // 2 + 1
+    if bins <= spectrum.shape[0]:
+        spectrum = spectrum[:bins]
+    else:
+        padding = [(0, bins - spectrum.shape[0])] + [(0, 0)] * (spectrum.ndim - 1)
+        spectrum = np.pad(spectrum, padding)
+    resampled = np.fft.irfft(spectrum, n=target_length, axis=0) * (target_length / len(samples))
+    return resampled.astype(np.float32)
+
+
+def ffmpeg_path():
+    """
+    Locate the ffmpeg executable used for compressed formats.
+
+    Returns:
+        str or None: Path of ffmpeg, or None when it is not installed.
+
+    Example:
+        >>> if ffmpeg_path() is None:
+        >>>     print("Only WAV output is available")
+    """
+    return shutil.which("ffmpeg")
+
+
+def encode_audio_file(source_path, destination_path, audio_format="wav", sample_rate=24000, bitrate="32k"):
+    """
+    Encode a WAV file as Opus, MP3 or WAV at a given rate.
+
+    Opus and MP3 are encoded with ffmpeg. WAV is written locally as 16-bit
+    PCM, resampled to sample_rate, so a lower rate still shrinks the file
+    when no encoder is installed.
+
+    Args:
+        source_path (str): Input WAV file.
+        destination_path (str): Output file; its suffix should match the format.
+        audio_format (str, optional): "opus", "mp3" or "wav". Defaults to "wav".
+        sample_rate (int, optional): Output sample rate in Hz. Opus only
+            supports 8000, 12000, 16000, 24000 and 48000.
+        bitrate (str, optional): Target bitrate for compressed formats, e.g. "32k".
+
+    Returns:
+        str: destination_path
+
+    Raises:
+        ValueError: If the format is unknown.
+        RuntimeError: If a compressed format is requested and ffmpeg is not installed.
+        subprocess.CalledProcessError: If ffmpeg fails.
+        subprocess.TimeoutExpired: If ffmpeg takes longer than ENCODE_TIMEOUT.
+
+    Example:
+        >>> encode_audio_file("speech.wav", "speech.ogg", "opus", 24000, "32k")
+    """
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+
+    codec_args = AUDIO_FORMATS[audio_format][1]
+    if codec_args is None:
+        samples, rate = read_wav(source_path)
+        return write_wav(destination_path, resample(samples, rate, sample_rate), sample_rate)
+
+    executable = ffmpeg_path()
+    if executable is None:
+        raise RuntimeError(f"Cannot encode {audio_format}: ffmpeg is not installed")
+    command = [executable, "-nostdin", "-loglevel", "error", "-y", "-i", source_path,
+               "-ar", str(sample_rate), *codec_args, "-b:a", bitrate, destination_path]
+    subprocess.run(command, check=True, capture_output=True, timeout=ENCODE_TIMEOUT)
+    return destination_path
+
+
+def map_wav(path):
+    """
+    Memory-map the samples of a PCM WAV file.
+
+    The samples are not read into memory; pages are loaded on demand as the
+    array is accessed, so long files can be analyzed and sliced cheaply.
+
+    Args:
+        path (str): Path of the WAV file.
+
+    Returns:
+        tuple: (samples, sample_rate) where samples is a read-only integer
+               array of shape (frames,) for mono audio or (frames, channels).
+
+    Raises:
+        ValueError: If the file is not an 8, 16 or 32-bit PCM WAV file.
+
+    Example:
+        >>> samples, rate = map_wav("speech.wav")
+        >>> print(samples[:rate].max())  # Loudest sample of the first second
+    """
+    with open(path, "rb") as wav_file:
+        header = wav_file.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError(f"Not a WAV file: {path}")
+        fmt = None
+        while True:
+            chunk_header = wav_file.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError(f"WAV file has no data chunk: {path}")
+            chunk_id, size = chunk_header[:4], struct.unpack("<I", chunk_header[4:])[0]
+            if chunk_id == b"data":
+                offset = wav_file.tell()
+                break
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", wav_file.read(16))
+                size -= 16
+            # Chunks are word aligned
+            wav_file.seek(size + (size & 1), os.SEEK_CUR)
+
+    if fmt is None:
+        raise ValueError(f"WAV file has no format chunk: {path}")
+    format_tag, channels, rate, _, block_align, bits = fmt
+    width = bits // 8
+    if format_tag not in PCM_FORMAT_TAGS or width not in SAMPLE_DTYPES or block_align != width * channels:
+        raise ValueError(f"Unsupported WAV encoding in {path}: format {format_tag}, {bits} bits")
+
+    # Streamed WAV files may carry a placeholder data size
+    frames = min(size, os.path.getsize(path) - offset) // block_align
+    shape = (frames,) if channels == 1 else (frames, channels)
+    if frames == 0:
+        return np.zeros(shape, dtype=SAMPLE_DTYPES[width]), rate
+    dtype = np.dtype(SAMPLE_DTYPES[width]).newbyteorder("<")
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape), rate
+
+
+def _to_float(samples):
+    """Convert integer PCM samples to float32 in [-1, 1)."""
+    if samples.dtype == np.uint8:
+        return (samples.astype(np.float32) - 128.0) / 128.0
+    if np.issubdtype(samples.dtype, np.integer):
+        return samples.astype(np.float32) / float(2 ** (8 * samples.dtype.itemsize - 1))
+    return np.asarray(samples, dtype=np.float32)
+
+
+def _to_pcm16(samples):
+    """Convert float samples to little-endian 16-bit PCM bytes."""
+    return np.clip(np.round(samples * 32767.0), -32768, 32767).astype("<i2").tobytes()
+
+
+def frame_rms(samples, frame_length):
+    """
+    RMS energy of consecutive frames.
+
+    Args:
+        samples (numpy.ndarray): Audio of shape (frames,) or (frames, channels),
+            integer PCM or float in [-1, 1]. Channels are averaged.
+        frame_length (int): Samples per frame; a partial last frame is included.
+
+    Returns:
+        numpy.ndarray: float32 RMS value per frame, in full scale units.
+
+    Example:
+        >>> energy = frame_rms(samples, 240)  # 10ms frames at 24kHz
+    """
+    audio = _to_float(samples)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    count = -(-len(audio) // frame_length)
+    padded = np.zeros(count * frame_length, dtype=np.float32)
+    padded[:len(audio)] = audio
+    squares = np.square(padded.reshape(count, frame_length))
+    lengths = np.full(count, frame_length, dtype=np.float32)
+    if count:
+        lengths[-1] = len(audio) - (count - 1) * frame_length
+    return np.sqrt(squares.sum(axis=1) / lengths)
+
+
+def speech_bounds(samples, sample_rate, threshold_db=-45.0, pad_seconds=0.1):
+    """
+    Find where speech starts and ends, ignoring leading and trailing silence.
+
+    Args:
+        samples (numpy.ndarray): Audio, see frame_rms.
+        sample_rate (int): Sample rate in Hz.
+        threshold_db (float, optional): Frames quieter than this (dBFS RMS) are silence.
+        pad_seconds (float, optional): Silence kept before and after the speech, so
+            words are not clipped and sentences keep a natural pause.
+
+    Returns:
+        tuple: (start, end) sample indices. The full range is returned when
+               the audio contains no speech at all.
+
+    Example:
+        >>> start, end = speech_bounds(samples, 24000)
+        >>> trimmed = samples[start:end]
+    """
+    frame_length = max(1, int(sample_rate * ENERGY_FRAME_SECONDS))
+    voiced = np.flatnonzero(frame_rms(samples, frame_length) > 10 ** (threshold_db / 20))
+    if voiced.size == 0:
+        return 0, len(samples)
+    pad = int(sample_rate * pad_seconds)
+    start = max(0, voiced[0] * frame_length - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame_length + pad)
+    return int(start), int(end)
+
+
+def loudness_gain(samples, sample_rate, target_dbfs=-20.0, threshold_db=-45.0, peak_dbfs=-1.0):
+    """
+    Gain that brings speech to a target loudness without clipping.
+
+    Loudness is the RMS of the voiced frames only, so pauses do not make a
+    chunk look quieter than it sounds. The gain is capped so the loudest
+    sample stays at or below peak_dbfs.
+
+    Args:
+        samples (numpy.ndarray): Audio, see frame_rms.
+        sample_rate (int): Sample rate in Hz.
+        target_dbfs (float, optional): Desired RMS level of speech in dBFS.
+        threshold_db (float, optional): Frames quieter than this are ignored.
+        peak_dbfs (float, optional): Highest allowed sample level in dBFS.
+
+    Returns:
+        float: Linear gain factor (1.0 for silent audio).
+
+    Example:
+        >>> gain = loudness_gain(samples, 24000, target_dbfs=-20.0)
+    """
+    frame_length = max(1, int(sample_rate * ENERGY_FRAME_SECONDS))
+    rms = frame_rms(samples, frame_length)
+    voiced = rms[rms > 10 ** (threshold_db / 20)]
+    if voiced.size == 0:
+        return 1.0
+    speech_rms = float(np.sqrt(np.mean(np.square(voiced))))
+    peak = float(np.abs(_to_float(samples)).max())
+    gain = 10 ** (target_dbfs / 20) / speech_rms
+    return min(gain, 10 ** (peak_dbfs / 20) / peak) if peak > 0 else gain
+
+
+def postprocess_wav_file(source_path, destination_path, threshold_db=-45.0, pad_seconds=0.1, target_dbfs=-20.0):
+    """
+    Trim silence and normalize loudness of a WAV file.
+
+    The source is memory-mapped and written out in blocks of BLOCK_FRAMES,
+    so only the analysis works on the whole file at once.
+
+    Args:
+        source_path (str): Input PCM WAV file.
+        destination_path (str): Output file (16-bit PCM); must differ from source_path.
+        threshold_db (float, optional): Silence threshold in dBFS, see speech_bounds.
+        pad_seconds (float, optional): Silence kept around the speech.
+        target_dbfs (float, optional): Loudness of speech in dBFS, see loudness_gain.
+
+    Returns:
+        dict: frames_in, frames_out and gain_db of the processing.
+
+    Raises:
+        ValueError: If the source is not a supported PCM WAV file.
+
+    Example:
+        >>> stats = postprocess_wav_file("raw.wav", "clean.wav")
+        >>> print(f"Trimmed {stats['frames_in'] - stats['frames_out']} frames")
+    """
+    samples, rate = map_wav(source_path)
+    start, end = speech_bounds(samples, rate, threshold_db, pad_seconds)
+    gain = loudness_gain(samples[start:end], rate, target_dbfs, threshold_db)
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+
+    with wave.open(destination_path, "wb") as output:
+        output.setnchannels(channels)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        for block_start in range(start, end, BLOCK_FRAMES):
+            block = samples[block_start:min(end, block_start + BLOCK_FRAMES)]
+            output.writeframes(_to_pcm16(_to_float(block) * gain))
+
+    return {
+        "frames_in": len(samples),
+        "frames_out": end - start,
+        "gain_db": float(20 * np.log10(gain)),
+    }
+
+
+def crossfade_wav_files(paths, destination_path, fade_seconds=0.01):
+    """
+    Concatenate WAV files with short crossfades at the joins.
+
+    The end of each file is blended into the start of the next with
+    equal-power curves, which removes the clicks that plain concatenation
+    leaves between independently synthesized chunks. Files are memory-mapped
+    and copied in blocks, so memory use does not depend on their length.
+
+    Args:
+        paths (list): PCM WAV file paths in playback order.
+        destination_path (str): Output file (16-bit PCM).
+        fade_seconds (float, optional): Crossfade length. Shortened at joins
+            with a file shorter than two fades.
+
+    Returns:
+        str: destination_path
+
+    Raises:
+        ValueError: If the files use different sample rates or channel counts.
+
+    Example:
+        >>> crossfade_wav_files(["part1.wav", "part2.wav"], "speech.wav")
+    """
+    tail = None
+    layout = None
+    with wave.open(destination_path, "wb") as output:
+        for index, path in enumerate(paths):
+            samples, rate = map_wav(path)
+            channels = 1 if samples.ndim == 1 else samples.shape[1]
+            if layout is None:
+                layout = (rate, channels)
+                output.setnchannels(channels)
+                output.setsampwidth(2)
+                output.setframerate(rate)
+            elif (rate, channels) != layout:
+                raise ValueError(f"Cannot merge audio chunks with different formats: {layout} vs {(rate, channels)}")
+
+            next_fade = 0 if index == len(paths) - 1 else min(int(rate * fade_seconds), len(samples) // 2)
+            start = 0
+            if tail is not None and len(tail):
+                fade = min(len(tail), len(samples) // 2)
+                # The held tail is longer than this file can blend with; flush the excess unblended
+                output.writeframes(_to_pcm16(tail[:len(tail) - fade]))
+                curve = np.linspace(0.0, np.pi / 2, fade, dtype=np.float32)
+                if channels > 1:
+                    curve = curve[:, None]
+                blended = tail[len(tail) - fade:] * np.cos(curve) + _to_float(samples[:fade]) * np.sin(curve)
+                output.writeframes(_to_pcm16(blended))
+                start = fade
+
+            body_end = len(samples) - next_fade
+            for block_start in range(start, body_end, BLOCK_FRAMES):
+                output.writeframes(_to_pcm16(_to_float(samples[block_start:min(body_end, block_start + BLOCK_FRAMES)])))
+            tail = _to_float(samples[max(start, body_end):])
+
+        if tail is not None and len(tail):
+            output.writeframes(_to_pcm16(tail))
+    return destination_path
@@ -0,0 +1,95 @@
+"""
+Command line entry point for batch captioning.
+
+Captions many small images (e.g. a folder of thumbnails) with few
+predictions by tiling them into mosaics, see ImageUtils.caption_images_batch:
+
+    python -m utils.batch_caption thumbnail1.png thumbnail2.png ...
+
+This module is not imported by the utils package, so running it with -m
+does not import it twice.
+
+Functions:
+    caption_files: Caption image files in one batch.
+    main: Parse the command line, caption the files and print the captions.
+"""
+
+import sys
+import argparse
+import logging
+
+from PIL import Image
+
+from .image_utils import ImageUtils
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def caption_files(paths, max_workers=4):
+    """
+    Caption image files in one batch.
+
+    Files that cannot be read get an error message as their caption and are
+    not sent to the model.
+
+    Args:
+        paths (list): Paths of the image files.
+        max_workers (int, optional): Mosaics captioned concurrently. Defaults to 4.
+
+    Returns:
+        tuple: (captions, metrics_message) - one caption (or error message) per
+               file in input order, and the metrics of caption_images_batch.
+
+    Example:
+        >>> captions, metrics = caption_files(["cat.png", "dog.png"])
+    """
+    captions = [None] * len(paths)
+    images, indices = [], []
+    for index, path in enumerate(paths):
+        try:
+            with Image.open(path) as image:
+                images.append(image.convert("RGB"))
+            indices.append(index)
+        except OSError as e:
+            logger.warning(f"Cannot read image {path}: {e}")
+            captions[index] = f"Error reading the image: {e}"
+
+    batch_captions, metrics = ImageUtils.caption_images_batch(images, max_workers=max_workers)
+    for index, caption in zip(indices, batch_captions):
+        captions[index] = caption
+    return captions, metrics
+
+
+def main(argv=None):
+    """
+    Parse the command line, caption the files and print one caption per line.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit status, 1 if any image could not be captioned.
+    """
+    from dotenv import load_dotenv
+    from config.logging_config import configure_logging
+
+    parser = argparse.ArgumentParser(prog="python -m utils.batch_caption",
+                                     description="Caption many small images with few predictions.")
+    parser.add_argument("images", nargs="+", help="Image files to caption")
+    parser.add_argument("--workers", type=int, default=4, help="Mosaics captioned concurrently (default: 4)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    configure_logging()
+    captions, metrics = caption_files(args.images, max_workers=args.workers)
+    for path, caption in zip(args.images, captions):
+        print(f"{path}: {caption}")
+
+    failed = sum(caption.startswith("Error") for caption in captions)
+    print(f"Captioned {len(captions) - failed} of {len(captions)} images | {metrics}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
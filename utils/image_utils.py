@@ -5,18 +5,51 @@ This module contains utilities for image operations including base64 conversion,
 text extraction, captioning, and summarization. It provides a unified interface
 for interacting with vision models through the ReplicateService.
 
+Batch captioning of many small images also runs from the command line,
+see utils.batch_caption.
+
 Classes:
     ImageUtils: Static methods for various image processing operations.
 """
 
+import re
+import json
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from services.image_service import ImageService
 from services.replicate_service import ReplicateService
+from config.settings import MOSAIC_TOKENS_PER_TILE, PROGRESSIVE_ANALYSIS, PROGRESSIVE_PREVIEW_MAX_TOKENS
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Prompts for text extraction, shared by the blocking and streaming variants
+EXTRACT_SYSTEM_PROMPT = "You are a helpful AI assistant specializing in extracting text from images."
+EXTRACT_USER_PROMPT = "Extract and transcribe all text visible in this image. Be thorough and precise."
+EXTRACT_USER_MESSAGE = "Please extract the text from this image."
+
+# Prompts for captioning, shared by single-image and mosaic batch captioning
+CAPTION_SYSTEM_PROMPT = "You are a helpful AI assistant specializing in captioning images in a clear and concise manner."
+CAPTION_USER_PROMPT = "Caption this image concisely, you may include objects, people, scenery, colors, and composition to your response."
+CAPTION_USER_MESSAGE = "Create a concise caption for this image."
+
+# Prompt for summarization, shared by the blocking and progressive variants
+SUMMARY_PROMPT = "Analyze this image and provide a concise contextual summary including objects, people, activities, environment, colors, and mood."
+SUMMARY_USER_MESSAGE = "Please provide a concise summary of this image."
+
+MOSAIC_CAPTION_PROMPT = (
+    "This image is a grid of {count} separate images. Each tile has a number label "
+    "in its top-left corner, from 1 to {count}. Caption each tile on its own in one "
+    "concise sentence, ignoring the labels and the other tiles. Respond only with a "
+    "JSON object mapping each tile number to its caption, for example "
+    "{{\"1\": \"A red bicycle leaning on a wall.\"}}."
+)
+
+# Fallback for "1: caption" / "Tile 1 - caption" lines when the response is not valid JSON
+MOSAIC_LINE_PATTERN = re.compile(r"^\W*(?:tile|image)?\s*(\d+)\s*[\"']?\s*[:.)\-]\s*(.+?)[\s,\"']*$",
+                                 re.IGNORECASE | re.MULTILINE)
+
 class ImageUtils:
     @staticmethod
     def extract_text(image, history=None):
@@ -62,12 +95,9 @@ class ImageUtils:
                 return [[None, "Error processing the image."]], "Error: Metrics unavailable"
 
             # Craft specialized prompts for the vision model to optimize text extraction
-            system_prompt = "You are a helpful AI assistant specializing in extracting text from images."
-            user_prompt = "Extract and transcribe all text visible in this image. Be thorough and precise."
-            
             logger.debug("Calling vision model for text extraction")
             result = ReplicateService.run_vision_model(
-                f"{system_prompt}\n\n{user_prompt}", image_base64=img_str
+                f"{EXTRACT_SYSTEM_PROMPT}\n\n{EXTRACT_USER_PROMPT}", image_base64=img_str
             )
 
             # Calculate performance metrics to provide feedback to the user
@@ -77,9 +107,8 @@ class ImageUtils:
             
             logger.info(f"Text extraction completed in {latency:.2f}s with {word_count} words")
 
-            user_message = "Please extract the text from this image."
             history = [] if history is None else history
-            return history + [[user_message, result]], metrics
+            return history + [[EXTRACT_USER_MESSAGE, result]], metrics
 
         except Exception as e:
             logger.error(f"Error extracting text from image: {str(e)}", exc_info=True)
@@ -91,6 +120,60 @@ class ImageUtils:
             history = [] if history is None else history
             return history + [[None, error_message]], "Error: Status unavailable. Please try again."
 
+    @staticmethod
+    def stream_extract_text(image, history=None):
+        """
+        Extract text from image, streaming the transcription as it is generated.
+        
+        Streaming variant of extract_text for the chat interface. Long
+        transcriptions that hit the token limit are continued automatically
+        and appear as a single growing message.
+        
+        Args:
+            image: The image object to process (PIL.Image or similar)
+            history: Optional chat history list of [user_msg, bot_msg] pairs. Defaults to None.
+            
+        Yields:
+            tuple: (updated_history, metrics_message) after each received chunk,
+                   with the final metrics on the last update
+                   
+        Example:
+            >>> for history, metrics in ImageUtils.stream_extract_text(my_image):
+            >>>     print(history[-1][1])
+        """
+        logger.info("Starting streamed text extraction from image")
+        start_time = time.time()
+        history = [] if history is None else history
+        size_valid, size_msg = ImageService.verify_image_size(image)
+        if not size_valid:
+            logger.warning(f"Image size validation failed: {size_msg}")
+            yield history + [[None, size_msg]], "Error: Image too large"
+            return
+
+        result = ""
+        try:
+            logger.debug("Converting image to base64")
+            img_str = ImageService.image_to_base64(image)
+            if img_str is None:
+                logger.error("Failed to convert image to base64")
+                yield history + [[None, "Error processing the image."]], "Error: Metrics unavailable"
+                return
+
+            logger.debug("Streaming vision model output for text extraction")
+            for result in ReplicateService.stream_vision_model(
+                f"{EXTRACT_SYSTEM_PROMPT}\n\n{EXTRACT_USER_PROMPT}", image_base64=img_str
+            ):
+                yield history + [[EXTRACT_USER_MESSAGE, result]], f"Streaming... | Words: {len(result.split())}"
+
+            latency = time.time() - start_time
+            word_count = len(result.split())
+            logger.info(f"Streamed text extraction completed in {latency:.2f}s with {word_count} words")
+            yield history + [[EXTRACT_USER_MESSAGE, result]], f"Latency: {latency:.2f}s | Words: {word_count}"
+
+        except Exception as e:
+            logger.error(f"Error extracting text from image: {str(e)}", exc_info=True)
+            yield history + [[None, f"Error extracting text: {str(e)}"]], "Error: Status unavailable. Please try again."
+
     @staticmethod
     def caption_image(image, history=None):
         """
@@ -132,13 +215,9 @@ class ImageUtils:
                 logger.error("Failed to convert image to base64")
                 return [[None, "Error processing the image."]], "Error: Status unavailable. Please try again."
 
-            # Craft specialized prompts for the vision model to optimize conciseness and image description
-            system_prompt = "You are a helpful AI assistant specializing in captioning images in a clear and concise manner."
-            user_prompt = "Caption this image concisely, you may include objects, people, scenery, colors, and composition to your response."
-
             logger.debug("Calling vision model for image captioning")
             result = ReplicateService.run_vision_model(
-                f"{system_prompt}\n\n{user_prompt}", image_base64=img_str
+                f"{CAPTION_SYSTEM_PROMPT}\n\n{CAPTION_USER_PROMPT}", image_base64=img_str
             )
             
             # Calculate metrics
@@ -148,9 +227,8 @@ class ImageUtils:
             
             logger.info(f"Image captioning completed in {latency:.2f}s with {word_count} words")
 
-            user_message = "Create a concise caption for this image."
             history = [] if history is None else history
-            return history + [[user_message, result]], metrics
+            return history + [[CAPTION_USER_MESSAGE, result]], metrics
 
         except Exception as e:
             logger.error(f"Error generating image caption: {str(e)}", exc_info=True)
@@ -199,11 +277,8 @@ class ImageUtils:
                 logger.error("Failed to convert image to base64")
                 return [[None, "Error processing the image."]], "Error: Metrics unavailable"
 
-            # Single comprehensive and concise prompt for image summarization
-            prompt = "Analyze this image and provide a concise contextual summary including objects, people, activities, environment, colors, and mood."
-
             logger.debug("Calling vision model for image summarization")
-            result = ReplicateService.run_vision_model(prompt, image_base64=img_str)
+            result = ReplicateService.run_vision_model(SUMMARY_PROMPT, image_base64=img_str)
 
             # Calculate metrics
             latency = time.time() - start_time
@@ -212,12 +287,297 @@ class ImageUtils:
             
             logger.info(f"Image summarization completed in {latency:.2f}s with {word_count} words")
 
-            user_message = "Please provide a concise summary of this image."
             history = [] if history is None else history
-            return history + [[user_message, result]], metrics
+            return history + [[SUMMARY_USER_MESSAGE, result]], metrics
 
         except Exception as e:
             logger.error(f"Error summarizing image: {str(e)}", exc_info=True)
             error_message = f"Error summarizing image: {str(e)}"
             history = [] if history is None else history
-            return history + [[None, error_message]], "Error: Status unavailable. Please try again."
\ No newline at end of file
+            return history + [[None, error_message]], "Error: Status unavailable. Please try again."
+
+    @staticmethod
+    def progressive_caption_image(image, history=None):
+        """
+        Caption an image in two passes: a fast preview, then the full answer.
+        
+        See _progressive_analysis for how the two passes are run. With
+        PROGRESSIVE_ANALYSIS off only the full answer is produced.
+        
+        Args:
+            image: The image object to process (PIL.Image or similar)
+            history: Optional chat history list of [user_msg, bot_msg] pairs. Defaults to None.
+            
+        Yields:
+            tuple: (updated_history, metrics_message) after each pass
+            
+        Example:
+            >>> for history, metrics in ImageUtils.progressive_caption_image(my_image):
+            >>>     print(metrics)
+            'Preview: 0.91s | Refining...'
+            'Preview: 0.91s | Full: 3.12s | Words: 41'
+        """
+        if not PROGRESSIVE_ANALYSIS:
+            yield ImageUtils.caption_image(image, history)
+            return
+        yield from ImageUtils._progressive_analysis(
+            image, history, f"{CAPTION_SYSTEM_PROMPT}\n\n{CAPTION_USER_PROMPT}",
+            CAPTION_USER_MESSAGE, "caption"
+        )
+
+    @staticmethod
+    def progressive_summarize_image(image, history=None):
+        """
+        Summarize an image in two passes: a fast preview, then the full answer.
+        
+        See _progressive_analysis for how the two passes are run. With
+        PROGRESSIVE_ANALYSIS off only the full answer is produced.
+        
+        Args:
+            image: The image object to process (PIL.Image or similar)
+            history: Optional chat history list of [user_msg, bot_msg] pairs. Defaults to None.
+            
+        Yields:
+            tuple: (updated_history, metrics_message) after each pass
+            
+        Example:
+            >>> for history, metrics in ImageUtils.progressive_summarize_image(my_image):
+            >>>     print(metrics)
+        """
+        if not PROGRESSIVE_ANALYSIS:
+            yield ImageUtils.summarize_image(image, history)
+            return
+        yield from ImageUtils._progressive_analysis(
+            image, history, SUMMARY_PROMPT, SUMMARY_USER_MESSAGE, "summary"
+        )
+
+    @staticmethod
+    def _progressive_analysis(image, history, prompt, user_message, label):
+        """
+        Run a low-resolution preview pass and a full-resolution pass concurrently.
+        
+        The preview uses a downscaled image and a short token limit, so it is
+        shown while the full pass is still running; the full answer then
+        replaces it in the same chat message. If the full pass finishes first
+        the preview is skipped, and if the full pass fails the preview is kept.
+        
+        Args:
+            image: The image object to process (PIL.Image or similar)
+            history: Chat history list of [user_msg, bot_msg] pairs, or None.
+            prompt (str): Prompt for both passes.
+            user_message (str): User-side chat message for the turn.
+            label (str): Name of the result used in log and error messages.
+            
+        Yields:
+            tuple: (updated_history, metrics_message)
+        """
+        logger.info(f"Starting progressive image {label}")
+        history = [] if history is None else history
+        start_time = time.time()
+        size_valid, size_msg = ImageService.verify_image_size(image)
+        if not size_valid:
+            logger.warning(f"Image size validation failed: {size_msg}")
+            yield history + [[None, size_msg]], "Error: Image too large"
+            return
+
+        full_str = ImageService.image_to_base64(image)
+        preview_str = ImageService.image_to_base64(ImageService.downscale_image(image))
+        if full_str is None or preview_str is None:
+            logger.error("Failed to convert image to base64")
+            yield history + [[None, "Error processing the image."]], "Error: Status unavailable. Please try again."
+            return
+
+        def timed(image_base64, **kwargs):
+            result = ReplicateService.run_vision_model(prompt, image_base64=image_base64, **kwargs)
+            return result, time.time() - start_time
+
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"progressive-{label}")
+        try:
+            full_future = executor.submit(timed, full_str)
+            preview_future = executor.submit(timed, preview_str, max_tokens=PROGRESSIVE_PREVIEW_MAX_TOKENS,
+                                             max_continuations=0)
+            wait([full_future, preview_future], return_when=FIRST_COMPLETED)
+
+            preview_metrics = None
+            if not full_future.done():
+                try:
+                    preview, preview_latency = preview_future.result()
+                    preview_metrics = f"Preview: {preview_latency:.2f}s"
+                    logger.info(f"Preview {label} ready in {preview_latency:.2f}s")
+                    yield history + [[user_message, preview]], f"{preview_metrics} | Refining..."
+                except Exception as e:
+                    logger.warning(f"Preview {label} failed, waiting for full resolution: {str(e)}")
+            # Otherwise the full answer is already here; the preview would only flash on screen
+
+            try:
+                result, full_latency = full_future.result()
+            except Exception as e:
+                logger.error(f"Error generating image {label}: {str(e)}", exc_info=True)
+                if preview_metrics:
+                    yield history + [[user_message, preview]], f"{preview_metrics} | Full: failed ({str(e)})"
+                else:
+                    yield history + [[None, f"Error generating {label}: {str(e)}"]], "Error: Status unavailable. Please try again."
+                return
+
+            word_count = len(result.split())
+            metrics = f"Full: {full_latency:.2f}s | Words: {word_count}"
+            if preview_metrics:
+                metrics = f"{preview_metrics} | {metrics}"
+            logger.info(f"Progressive image {label} completed in {full_latency:.2f}s with {word_count} words")
+            yield history + [[user_message, result]], metrics
+        finally:
+            # A running preview cannot be cancelled; the answer does not wait for it
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def caption_images_batch(images, max_workers=4):
+        """
+        Caption many images with few predictions by tiling them into mosaics.
+        
+        Images are packed into labeled grids (see ImageService.plan_mosaic and
+        ImageService.build_mosaic), each grid is captioned in one prediction
+        that returns a JSON object of per-tile captions, and the captions are
+        split back out in input order. Tiles the model skipped, or whose
+        mosaic failed, are captioned individually.
+        
+        Args:
+            images (list): Images (numpy.ndarray or PIL.Image) to caption.
+            max_workers (int, optional): Mosaics captioned concurrently. Defaults to 4.
+            
+        Returns:
+            tuple: (captions, metrics_message)
+                - captions: List with one caption (or error message) per image
+                - metrics_message: String with performance metrics
+                
+        Example:
+            >>> captions, metrics = ImageUtils.caption_images_batch(thumbnails)
+            >>> print(metrics)
+            'Latency: 4.02s | Images: 12 | Predictions: 1'
+        """
+        if not images:
+            return [], "Latency: 0.00s | Images: 0 | Predictions: 0"
+
+        logger.info(f"Starting batch captioning of {len(images)} images")
+        start_time = time.time()
+        captions = [None] * len(images)
+
+        # Oversized images cannot be tiled reliably; report them like caption_image does
+        indices = []
+        for index, image in enumerate(images):
+            size_valid, size_msg = ImageService.verify_image_size(image)
+            if size_valid:
+                indices.append(index)
+            else:
+                captions[index] = size_msg
+
+        tile_size, per_mosaic = ImageService.plan_mosaic([images[i] for i in indices])
+        batches = [indices[i:i + per_mosaic] for i in range(0, len(indices), per_mosaic)] if indices else []
+        logger.debug(f"Captioning {len(indices)} images in {len(batches)} mosaics of {tile_size}px tiles")
+
+        def caption_batch(batch):
+            if len(batch) == 1:
+                return {0: ImageUtils._caption_single(images[batch[0]])}
+            return ImageUtils._caption_mosaic([images[i] for i in batch], tile_size)
+
+        predictions = len(batches)
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+                results = list(executor.map(caption_batch, batches))
+
+            missing = []
+            for batch, parsed in zip(batches, results):
+                for position, index in enumerate(batch):
+                    captions[index] = parsed.get(position)
+                    if captions[index] is None:
+                        logger.warning(f"Mosaic response missing tile {position + 1}; captioning it individually")
+                        missing.append(index)
+
+            # Tiles the mosaics did not cover are captioned side by side as well
+            if missing:
+                with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as executor:
+                    for index, caption in zip(missing, executor.map(
+                            lambda i: ImageUtils._caption_single(images[i]), missing)):
+                        captions[index] = caption
+                predictions += len(missing)
+
+        latency = time.time() - start_time
+        metrics = f"Latency: {latency:.2f}s | Images: {len(images)} | Predictions: {predictions}"
+        logger.info(f"Batch captioning completed in {latency:.2f}s with {predictions} predictions")
+        return captions, metrics
+
+    @staticmethod
+    def _caption_single(image):
+        """Caption one image, returning an error message instead of raising."""
+        try:
+            img_str = ImageService.image_to_base64(image)
+            if img_str is None:
+                return "Error processing the image."
+            return ReplicateService.run_vision_model(
+                f"{CAPTION_SYSTEM_PROMPT}\n\n{CAPTION_USER_PROMPT}", image_base64=img_str
+            )
+        except Exception as e:
+            logger.error(f"Error generating image caption: {str(e)}", exc_info=True)
+            return f"Error generating caption: {str(e)}"
+
+    @staticmethod
+    def _caption_mosaic(images, tile_size):
+        """Caption one mosaic, returning {tile position: caption} (empty on failure)."""
+        try:
+            mosaic = ImageService.build_mosaic(images, tile_size)
+            img_str = ImageService.image_to_base64(mosaic)
+            if img_str is None:
+                # Without an image the model would caption nothing; the tiles fall back to single captions
+                logger.error("Failed to convert mosaic to base64")
+                return {}
+            prompt = f"{CAPTION_SYSTEM_PROMPT}\n\n{MOSAIC_CAPTION_PROMPT.format(count=len(images))}"
+            result = ReplicateService.run_vision_model(
+                prompt,
+                image_base64=img_str,
+                max_tokens=MOSAIC_TOKENS_PER_TILE * len(images)
+            )
+        except Exception as e:
+            logger.error(f"Error captioning mosaic: {str(e)}", exc_info=True)
+            return {}
+        return ImageUtils._parse_mosaic_captions(result, len(images))
+
+    @staticmethod
+    def _parse_mosaic_captions(text, count):
+        """
+        Split a mosaic response into per-tile captions.
+        
+        Accepts a JSON object keyed by tile number (optionally wrapped in a
+        code fence or surrounding prose) and falls back to numbered lines.
+        
+        Args:
+            text (str): The model response.
+            count (int): Number of tiles in the mosaic.
+            
+        Returns:
+            dict: Zero-based tile position to caption, for tiles found.
+            
+        Example:
+            >>> ImageUtils._parse_mosaic_captions('{"1": "A cat.", "2": "A dog."}', 2)
+            {0: 'A cat.', 1: 'A dog.'}
+        """
+        pairs = []
+        match = re.search(r"\{.*\}", text or "", re.DOTALL)
+        if match:
+            try:
+                parsed = json.loads(match.group(0))
+                if isinstance(parsed, dict):
+                    pairs = list(parsed.items())
+            except ValueError:
+                logger.debug("Mosaic response is not valid JSON; parsing numbered lines")
+        if not pairs:
+            pairs = MOSAIC_LINE_PATTERN.findall(text or "")
+
+        captions = {}
+        for key, caption in pairs:
+            digits = re.sub(r"\D", "", str(key))
+            if not digits or not isinstance(caption, str) or not caption.strip():
+                continue
+            position = int(digits) - 1
+            if 0 <= position < count:
+                captions.setdefault(position, caption.strip())
+        return captions
+
@@ -0,0 +1,355 @@
+"""
+Incremental prompt assembly for multi-turn chat.
+
+Every chat request sends the conversation so far to the vision model. The
+PromptBuilder keeps each turn formatted once and follows the Gradio history
+as it grows, so a new turn costs one formatted string instead of a rebuild of
+the whole transcript, and the prompt is rendered with a single join. One
+builder is cached per browser session in prompt_builders.
+
+Only the most recent turns that fit in PROMPT_HISTORY_TOKEN_BUDGET are sent
+verbatim. Older turns are folded into a rolling summary that is refreshed in
+the background, so long sessions keep a bounded prompt (and latency) without
+forgetting what was discussed. The INIT_HISTORY greeting is never sent.
+
+Classes:
+    PromptBuilder: Formatted conversation history of one session.
+    PromptBuilderCache: Least recently used builders, keyed by session.
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .text_utils import estimate_tokens
+from config.settings import (
+    INIT_HISTORY,
+    PROMPT_BUILDER_MAX_SESSIONS,
+    PROMPT_HISTORY_TOKEN_BUDGET,
+    PROMPT_SUMMARY_ENABLED,
+    PROMPT_SUMMARY_MAX_TOKENS,
+    PROMPT_SUMMARY_WORKERS
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Role of the assistant in every chat prompt
+CHAT_SYSTEM_PROMPT = "You are a helpful AI assistant specializing in analyzing images and providing detailed information."
+
+# Requests without a browser session share one builder
+SHARED_SESSION = "shared"
+
+# Folds turns that left the token window into the running summary
+SUMMARY_PROMPT = (
+    "Update the summary of a conversation between a user and an AI assistant that analyzes images. "
+    "Keep every fact the user may refer back to, such as names, numbers, text read from images and "
+    "the questions asked. Answer with the updated summary only, in at most a few sentences.\n\n"
+    "Current summary:\n{summary}\n\nNew conversation turns:\n{turns}\nUpdated summary:"
+)
+
+# The greeting is the same in every session and says nothing about the image
+STATIC_TURNS = frozenset((user, bot) for user, bot in INIT_HISTORY)
+
+# Summaries of all sessions share this pool, created on first use
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+
+def summarize_turns(summary, turns):
+    """
+    Fold conversation turns into a rolling summary with the vision model.
+
+    Args:
+        summary (str): The current summary, empty for the first fold.
+        turns (str): Formatted turns that left the token window.
+
+    Returns:
+        str: The updated summary.
+
+    Raises:
+        ValueError: If the API token is not available.
+        RuntimeError: If the prediction fails.
+
+    Example:
+        >>> summary = summarize_turns("", "User: What is on the slide?\nAssistant: A bar chart.\n\n")
+    """
+    # Lazy import avoids a circular import (services imports utils)
+    from services.replicate_service import ReplicateService
+
+    prompt = SUMMARY_PROMPT.format(summary=summary or "(none)", turns=turns)
+    return ReplicateService.run_vision_model(prompt, max_tokens=PROMPT_SUMMARY_MAX_TOKENS,
+                                             max_continuations=0).strip()
+
+
+def summary_executor():
+    """Return the shared summary worker pool."""
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(max_workers=max(1, PROMPT_SUMMARY_WORKERS),
+                                                   thread_name_prefix="prompt-summary")
+        return _summary_executor
+
+
+class PromptBuilder:
+    """
+    Formatted conversation history of one session.
+
+    sync() brings the builder in line with a chat history. The history
+    normally only grows (a new answer) or loses its last turn (regenerate);
+    both are detected by comparing a single turn, so a sync costs time in
+    proportion to the number of changed turns, not the length of the
+    conversation. Any other change, such as a cleared chat, rebuilds the
+    builder from scratch.
+
+    render() sends the newest turns that fit in token_budget (always at
+    least the last one). When turns leave the window, a background job
+    folds them into the rolling summary; until it finishes, the previous
+    summary is sent, so a request never waits for summarization.
+
+    Example:
+        >>> builder = PromptBuilder()
+        >>> prompt = builder.build(history, "What color is the bus?")
+    """
+
+    def __init__(self, system_prompt=CHAT_SYSTEM_PROMPT, token_budget=PROMPT_HISTORY_TOKEN_BUDGET,
+                 summarizer=summarize_turns if PROMPT_SUMMARY_ENABLED else None, executor=None):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.summarizer = summarizer    # None drops the turns outside the window
+        self._executor = executor
+        self._turns = []    # (user, bot) pairs in the builder, as in the history
+        self._parts = []    # Formatted turn for each pair
+        self._tokens = []   # Approximate token count of each formatted turn
+        self.rebuilds = 0
+        # Rolling summary of the turns before summarized_turns
+        self._lock = threading.Lock()
+        self.summary = ""
+        self.summarized_turns = 0
+        self.pending_summary = None     # Future of the running summary job
+        self._summary_generation = 0    # Bumped when the summarized turns are dropped
+
+    def __len__(self):
+        return len(self._turns)
+
+    @staticmethod
+    def format_turn(user, bot):
+        """Format one exchange the way it appears in the prompt."""
+        return f"User: {user}\nAssistant: {bot}\n\n"
+
+    def append(self, user, bot):
+        """
+        Add one exchange to the end of the conversation.
+
+        Exchanges without a user message (e.g. image operations shown in the
+        chat) and the INIT_HISTORY greeting take part in sync() but are not
+        part of the prompt.
+
+        Args:
+            user (str or None): The user's message.
+            bot (str): The assistant's answer.
+        """
+        self._turns.append((user, bot))
+        part = self.format_turn(user, bot) if user is not None and (user, bot) not in STATIC_TURNS else ""
+        self._parts.append(part)
+        self._tokens.append(estimate_tokens(part))
+
+    def truncate(self, length):
+        """Drop all exchanges after the first length."""
+        del self._turns[length:]
+        del self._parts[length:]
+        del self._tokens[length:]
+        with self._lock:
+            if length < self.summarized_turns:
+                # The summary covers turns that no longer exist
+                self.summary = ""
+                self.summarized_turns = 0
+                self._summary_generation += 1
+
+    def sync(self, history):
+        """
+        Bring the builder in line with a chat history.
+
+        Args:
+            history (list): Conversation history as a list of [user, bot] message pairs.
+
+        Returns:
+            PromptBuilder: self, for chaining.
+
+        Example:
+            >>> builder.sync(history).render(message)
+        """
+        history = history or []
+        shared = min(len(self._turns), len(history))
+        # The last shared turn is unchanged, so the history grew or shrank at the end
+        if shared and self._turns[shared - 1] != tuple(history[shared - 1][:2]):
+            self.rebuilds += 1
+            shared = 0
+        self.truncate(shared)
+        for user, bot in (turn[:2] for turn in history[shared:]):
+            self.append(user, bot)
+        return self
+
+    def window_start(self):
+        """
+        Index of the oldest turn sent verbatim.
+
+        Returns:
+            int: The newest turns from this index fit in token_budget; the
+                 last turn is always included, however long it is.
+        """
+        start = len(self._parts)
+        used = 0
+        while start > 0:
+            tokens = self._tokens[start - 1]
+            if tokens and used + tokens > self.token_budget and used:
+                break
+            used += tokens
+            start -= 1
+        return start
+
+    def _schedule_summary(self, upto):
+        """Fold the turns before upto into the summary in the background."""
+        with self._lock:
+            if self.pending_summary is not None and not self.pending_summary.done():
+                # Picked up by the next render once the running job is finished
+                return
+            turns = "".join(self._parts[self.summarized_turns:upto])
+            if not turns:
+                self.summarized_turns = upto
+                return
+            summary, generation = self.summary, self._summary_generation
+            executor = self._executor or summary_executor()
+            self.pending_summary = executor.submit(self._summarize, summary, turns, upto, generation)
+
+    def _summarize(self, summary, turns, upto, generation):
+        """Summary job body: run the summarizer and publish the result if still current."""
+        try:
+            updated = self.summarizer(summary, turns)
+        except Exception as e:
+            logger.warning(f"Could not summarize earlier conversation: {e}")
+            return False
+        with self._lock:
+            if generation != self._summary_generation or not updated:
+                return False
+            self.summary = updated
+            self.summarized_turns = upto
+        logger.debug(f"Folded conversation turns up to {upto} into the summary")
+        return True
+
+    def render(self, message):
+        """
+        Render the prompt for a new message.
+
+        Args:
+            message (str): The user's new message.
+
+        Returns:
+            str: System prompt, summary of older turns, the recent turns that
+                 fit in the token budget and the new message.
+        """
+        start = self.window_start()
+        if self.summarizer is not None and start > self.summarized_turns:
+            self._schedule_summary(start)
+        with self._lock:
+            summary = self.summary
+        parts = [self.system_prompt]
+        if summary:
+            parts += ["\n\nSummary of the earlier conversation:\n", summary]
+        return "".join([*parts, "\n\nConversation History:\n", *self._parts[start:],
+                        "\nUser: ", message, "\nAssistant:"])
+
+    def build(self, history, message):
+        """
+        Sync with a history and render the prompt for a new message.
+
+        Args:
+            history (list): Conversation history before the new message.
+            message (str): The user's new message.
+
+        Returns:
+            str: The complete prompt.
+
+        Example:
+            >>> prompt = prompt_builders.get(request.session_hash).build(history, message)
+        """
+        return self.sync(history).render(message)
+
+
+class PromptBuilderCache:
+    """
+    Least recently used prompt builders, keyed by browser session.
+
+    Each builder has its own lock, because Gradio may run more than one
+    event of a session at a time.
+
+    Example:
+        >>> prompt = prompt_builders.build(request.session_hash, history, message)
+        >>> prompt_builders.release(request.session_hash)  # browser tab closed
+    """
+
+    def __init__(self, max_sessions=PROMPT_BUILDER_MAX_SESSIONS, factory=PromptBuilder):
+        self.max_sessions = max_sessions
+        self.factory = factory
+        self._builders = OrderedDict()   # session -> (builder, lock)
+        self._lock = threading.Lock()
+
+    def _entry(self, session_id):
+        """Return the (builder, lock) pair of a session, creating it if needed."""
+        session = session_id or SHARED_SESSION
+        with self._lock:
+            entry = self._builders.get(session)
+            if entry is None:
+                entry = (self.factory(), threading.Lock())
+                self._builders[session] = entry
+                while len(self._builders) > self.max_sessions:
+                    self._builders.popitem(last=False)
+            else:
+                self._builders.move_to_end(session)
+            return entry
+
+    def get(self, session_id):
+        """
+        Get the builder of a session.
+
+        Args:
+            session_id (str): Browser session, or None for the shared builder.
+
+        Returns:
+            PromptBuilder: The session's builder.
+        """
+        return self._entry(session_id)[0]
+
+    def build(self, session_id, history, message):
+        """
+        Build a session's prompt for a new message while holding its lock.
+
+        Args:
+            session_id (str): Browser session, or None for the shared builder.
+            history (list): Conversation history before the new message.
+            message (str): The user's new message.
+
+        Returns:
+            str: The complete prompt.
+
+        Example:
+            >>> prompt = prompt_builders.build(request.session_hash, history, message)
+        """
+        builder, lock = self._entry(session_id)
+        with lock:
+            return builder.build(history, message)
+
+    def release(self, session_id):
+        """Forget a session's builder, e.g. when its browser tab closes."""
+        with self._lock:
+            self._builders.pop(session_id or SHARED_SESSION, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._builders)
+
+
+# Shared builders used by the app
+prompt_builders = PromptBuilderCache()
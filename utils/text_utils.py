@@ -0,0 +1,208 @@
+"""
+Text utilities for the HearSee application.
+
+This module contains lightweight, dependency-free helpers for working with
+model output text, such as approximate token counting and detection of
+responses that were cut off by the model's token limit.
+
+Functions:
+    estimate_tokens: Approximate the number of model tokens in a text.
+    is_truncated: Detect whether a response was likely cut off at the token limit.
+    stitch_continuation: Join a continuation onto a partial response.
+    continuation_settled: Check whether a streamed continuation's overlap is resolved.
+    split_sentences: Split text into sentence chunks for speech synthesis.
+"""
+
+import re
+import logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Words and individual punctuation marks, the rough unit most BPE tokenizers split on
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Average characters per sub-word token for long words
+CHARS_PER_TOKEN = 4
+
+# Sentence boundary: terminal punctuation (plus closing quotes/brackets) followed
+# by whitespace, or a line break (bullet lists in model answers)
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+|\n+")
+
+# Characters that indicate a response ended naturally
+TERMINAL_CHARACTERS = (".", "!", "?", ":", ")", "]", "\"", "'", "`", "*")
+
+
+def estimate_tokens(text):
+    """
+    Approximate the number of model tokens in a text.
+
+    Each punctuation mark counts as one token and each word counts as one
+    token per CHARS_PER_TOKEN characters (minimum one). This tracks BPE
+    tokenizers closely enough for budgeting without loading a vocabulary.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Approximate token count (0 for empty or None text).
+
+    Example:
+        >>> estimate_tokens("Hello, world!")
+        6
+    """
+    if not text:
+        return 0
+    return sum(-(-len(piece) // CHARS_PER_TOKEN) for piece in TOKEN_PATTERN.findall(text))
+
+
+def is_truncated(text, max_tokens, ratio=0.85):
+    """
+    Detect whether a model response was likely cut off at the token limit.
+
+    A response is treated as truncated when its approximate length reaches
+    ratio * max_tokens and it does not end with sentence-final punctuation.
+
+    Args:
+        text (str): The model response.
+        max_tokens (int): The max_new_tokens value used for the prediction.
+        ratio (float, optional): Fraction of max_tokens that counts as "at the limit".
+
+    Returns:
+        bool: True if the response should be continued.
+
+    Example:
+        >>> is_truncated("A short, complete answer.", 512)
+        False
+    """
+    if not text or not max_tokens:
+        return False
+    stripped = text.rstrip()
+    if stripped.endswith(TERMINAL_CHARACTERS):
+        return False
+    return estimate_tokens(stripped) >= ratio * max_tokens
+
+
+def stitch_continuation(text, continuation, max_overlap=200, min_overlap=12):
+    """
+    Join a continuation onto a partial response.
+
+    Models asked to continue sometimes repeat the last few words of the
+    partial response. Any such overlap (at least min_overlap characters) is
+    removed before the two parts are joined.
+
+    Args:
+        text (str): The partial response so far.
+        continuation (str): Output of the continuation prediction.
+        max_overlap (int, optional): Longest overlap to search for.
+        min_overlap (int, optional): Shortest overlap that is removed.
+
+    Returns:
+        str: The stitched response.
+
+    Example:
+        >>> stitch_continuation("The slide lists the three main goals", " the three main goals: speed and cost.")
+        'The slide lists the three main goals: speed and cost.'
+    """
+    if not text:
+        return continuation or ""
+    if not continuation:
+        return text
+
+    candidate = continuation.lstrip()
+    tail = text[-max_overlap:]
+    for size in range(min(len(tail), len(candidate)), min_overlap - 1, -1):
+        if tail.endswith(candidate[:size]):
+            logger.debug(f"Removed {size} overlapping characters from continuation")
+            return text + candidate[size:]
+
+    # Keep the separator the model produced; add one if neither side has it
+    if text[-1].isspace() or continuation[0].isspace() or not continuation[0].isalnum():
+        return text + continuation
+    return f"{text} {continuation}"
+
+
+def continuation_settled(text, continuation, max_overlap=200):
+    """
+    Check whether stitching a partial continuation can no longer shrink.
+
+    While a streamed continuation still matches a part of the response's
+    tail, more text may turn it into an overlap that stitch_continuation
+    removes, and the stitched text would lose characters already shown.
+    Once it no longer occurs in the tail, the overlap is fixed and every
+    longer continuation only appends to the stitched text.
+
+    Args:
+        text (str): The partial response so far.
+        continuation (str): Continuation text received so far.
+        max_overlap (int, optional): Longest overlap stitch_continuation searches for.
+
+    Returns:
+        bool: True if the stitched text is safe to show.
+
+    Example:
+        >>> continuation_settled("The slide lists the three main goals", " the three")
+        False
+        >>> continuation_settled("The slide lists the three main goals", " the three main goals: speed")
+        True
+    """
+    if not text:
+        return True
+    return continuation.lstrip() not in text[-max_overlap:]
+
+
+def split_sentences(text, max_chars=300, min_chars=40):
+    """
+    Split text into sentence chunks for speech synthesis.
+
+    Sentences shorter than min_chars are merged with the next one so that
+    "Yes." or a list bullet does not cost a prediction of its own, and
+    sentences longer than max_chars are split at the last comma or space
+    before the limit.
+
+    Args:
+        text (str): Text to split.
+        max_chars (int, optional): Maximum characters per chunk.
+        min_chars (int, optional): Chunks shorter than this are merged forward.
+
+    Returns:
+        list: Non-empty chunks in order (empty list for empty text).
+
+    Example:
+        >>> split_sentences("The slide shows a graph. Sales rose in every quarter of 2024.", min_chars=10)
+        ['The slide shows a graph.', 'Sales rose in every quarter of 2024.']
+    """
+    if not text or not text.strip():
+        return []
+
+    sentences = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(", ", 0, max_chars), sentence.rfind(" ", 0, max_chars))
+            cut = cut + 1 if cut > 0 else max_chars
+            sentences.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+
+    chunks = []
+    pending = ""
+    for sentence in sentences:
+        candidate = f"{pending} {sentence}" if pending else sentence
+        if len(candidate) < min_chars:
+            pending = candidate
+        elif len(candidate) <= max_chars:
+            chunks.append(candidate)
+            pending = ""
+        else:
+            chunks.append(pending)
+            pending = sentence if len(sentence) < min_chars else ""
+            if not pending:
+                chunks.append(sentence)
+    if pending:
+        if chunks and len(chunks[-1]) + len(pending) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks